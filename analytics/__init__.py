@@ -0,0 +1 @@
+"""Columnar analytics over the dp_* collections and the mock data in src/lib/mockData.ts."""
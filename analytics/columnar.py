@@ -0,0 +1,515 @@
+"""A column store for ``dp_*`` collections and mock data, memory-mapped on open.
+
+Every table is a directory of ``.npy`` files, one or two per field, plus a
+shared ``meta.json``:
+
+    <store>/meta.json
+    <store>/dp_vacancies/city.npy                  dictionary codes (int32, -1 = missing)
+    <store>/dp_vacancies/createdAt.npy             datetime64[ms], NaT = missing
+    <store>/dp_vacancies/title.data.npy            UTF-8 bytes of every value …
+    <store>/dp_vacancies/title.offsets.npy         … and rows + 1 int64 offsets
+    <store>/dp_vacancies/applications.offsets.npy  rows + 1 offsets into the nested table
+    <store>/dp_vacancies.applications/status.npy   the nested table, one row per application
+
+Each field gets one of these kinds, from its name and its first non-null
+value:
+
+``int`` / ``float``
+    int64 or float64. An int column becomes float64 (NaN = missing) once a
+    float or a missing value turns up.
+``bool``
+    int8: 1, 0 and -1 for missing.
+``time``
+    datetime64[ms] for ``...At`` fields holding ISO 8601 strings.
+``dict``
+    Dictionary-encoded strings for the fields in ``CATEGORICAL`` (city,
+    role, status, ...) or ending in ``CATEGORICAL_SUFFIXES``. The codes are
+    int32, and the values list is kept in ``meta.json``.
+``str`` / ``json``
+    Arrow-style UTF-8 data and offsets. ``json`` holds objects (e.g.
+    ``unreadCount``) as JSON text.
+``list``
+    Offsets plus an item column ``<field>.item`` of one of the kinds above,
+    e.g. ``requirements`` or ``skills``.
+``table``
+    Offsets into a nested table ``<table>.<field>``, for lists of objects:
+    applications, responses and participants (``NESTED``). The nested table has the same
+    layout, so ``dp_vacancies.applications`` can be queried on its own and
+    ``Table.parent_index()`` maps its rows back to the vacancy.
+
+Records stream through ``Builder`` in chunks of ``CHUNK`` rows, each chunk
+converted straight to arrays. Files are written by appending those chunks
+after an ``.npy`` header sized for the final row count. ``open_store``
+returns tables whose columns are ``np.load(mmap_mode='r')`` views, so
+reopening millions of rows reads only ``meta.json``.
+
+NumPy is required.
+"""
+
+import datetime
+import json
+import os
+import shutil
+import tempfile
+
+try:
+    import numpy as np
+except ImportError:  # reported by analytics.ingest; the module stays importable
+    np = None
+
+FORMAT_VERSION = 1
+CHUNK = 65_536
+CATEGORICAL = frozenset({
+    'city', 'district', 'role', 'status', 'type', 'category', 'course', 'subscriptionPlan', 'plan',
+    'specialization', 'companyType', 'experience', 'schedule', 'service', 'carType', 'responderRole',
+    'authorRole', 'participantRoles', 'partner', 'level',
+})
+# ... and every field named like these, e.g. salaryCurrency (see analytics.money).
+CATEGORICAL_SUFFIXES = ('Currency', 'Period')
+# Lists of objects that are always nested tables, even while every list seen is empty.
+NESTED = frozenset({'applications', 'responses', 'participants'})
+
+
+class ColumnarError(Exception):
+    pass
+
+
+def _is_time_field(name, value):
+    return (name.endswith('At') or name in ('date', 'deadline', 'validUntil', 'subscriptionExpiry')) \
+        and isinstance(value, str) and len(value) >= 10 and value[4] == '-' and value[:4].isdigit()
+
+
+def _parse_times(values):
+    """datetime64[ms] for ISO strings; ``(array, values that did not parse)``."""
+    plain = ['NaT' if v is None else v[:-1] if v.endswith('Z') else v for v in values]
+    try:
+        return np.array(plain, dtype='datetime64[ms]'), 0
+    except ValueError:
+        pass
+    out = np.empty(len(plain), dtype='datetime64[ms]')
+    invalid = 0
+    for i, v in enumerate(values):
+        if v is None:
+            out[i] = np.datetime64('NaT')
+            continue
+        try:
+            t = datetime.datetime.fromisoformat(v.replace('Z', '+00:00'))
+        except (TypeError, ValueError):
+            out[i] = np.datetime64('NaT')
+            invalid += 1
+            continue
+        if t.tzinfo is not None:
+            t = t.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+        out[i] = np.datetime64(t, 'ms')
+    return out, invalid
+
+
+class _Column:
+    """Accumulates one field chunk by chunk as arrays."""
+
+    def __init__(self, builder, table, name):
+        self.builder, self.table, self.name = builder, table, name
+        self.label = name
+        self.kind = None
+        self.count = 0
+        self.pending = 0       # leading rows seen before the kind was known (all null)
+        self.empty_lists = False
+        self.chunks = []       # int / float / bool / time / dict codes
+        self.data = []         # str / json: encoded bytes per chunk
+        self.lengths = []      # str / json / list / table: int64 lengths per chunk
+        self.values, self.index = [], {}
+        self.invalid = 0
+        self.item = None       # list: the item column; table: the nested table name
+
+    def _decide(self, values):
+        for v in values:
+            if v is None:
+                continue
+            if isinstance(v, list) and not v:
+                if self.name in NESTED:
+                    self.item = self.builder.nested(self.table, self.name)
+                    return 'table'
+                self.empty_lists = True
+                continue
+            if isinstance(v, bool):
+                return 'bool'
+            if isinstance(v, int):
+                return 'int'
+            if isinstance(v, float):
+                return 'float'
+            if isinstance(v, str):
+                if _is_time_field(self.name, v):
+                    return 'time'
+                return 'dict' if self._categorical() else 'str'
+            if isinstance(v, list):
+                if isinstance(v[0], dict):
+                    self.item = self.builder.nested(self.table, self.name)
+                    return 'table'
+                self.item = self._item()
+                return 'list'
+            return 'json'
+        return None
+
+    def _categorical(self):
+        return self.name in CATEGORICAL or self.name.endswith(CATEGORICAL_SUFFIXES)
+
+    def _item(self):
+        item = _Column(self.builder, self.table, self.name)
+        item.label = f'{self.name}.item'
+        return item
+
+    def add(self, values):
+        self.count += len(values)
+        if self.kind is None:
+            self.kind = self._decide(values)
+            if self.kind is None:
+                self.pending += len(values)
+                return
+            if self.pending:
+                n, self.pending = self.pending, 0
+                self._encode([None] * n)
+        self._encode(values)
+
+    def _mismatch(self, values, allowed):
+        bad = next(v for v in values if v is not None and not isinstance(v, allowed))
+        raise ColumnarError(f'{self.table}.{self.label}: {self.kind} column got {type(bad).__name__} {bad!r:.60}')
+
+    def _encode(self, values):
+        kind = self.kind
+        types = set(map(type, values))
+        if kind in ('int', 'float'):
+            types.discard(type(None))
+            if types - {int, float}:
+                self._mismatch(values, (int, float))
+            if kind == 'int' and (float in types or None in values):
+                self.chunks = [c.astype(np.float64) for c in self.chunks]
+                self.kind = kind = 'float'
+            if kind == 'int':
+                self.chunks.append(np.array(values, dtype=np.int64))
+            else:
+                self.chunks.append(np.array([np.nan if v is None else v for v in values], dtype=np.float64))
+        elif kind == 'bool':
+            if types - {bool, type(None)}:
+                self._mismatch(values, bool)
+            self.chunks.append(np.array([-1 if v is None else v for v in values], dtype=np.int8))
+        elif kind == 'time':
+            if types - {str, type(None)}:
+                self._mismatch(values, str)
+            times, invalid = _parse_times(values)
+            self.invalid += invalid
+            self.chunks.append(times)
+        elif kind == 'dict':
+            if types - {str, type(None)}:
+                self._mismatch(values, str)
+            index, add = self.index, self.values.append
+
+            def code(v):
+                c = index.get(v)
+                if c is None:
+                    c = index[v] = len(index)
+                    add(v)
+                return c
+
+            self.chunks.append(np.fromiter((-1 if v is None else code(v) for v in values), np.int32, len(values)))
+        elif kind in ('str', 'json'):
+            if kind == 'str':
+                if types - {str, type(None)}:
+                    self._mismatch(values, str)
+                parts = [b'' if v is None else v.encode('utf-8') for v in values]
+            else:
+                parts = [b'' if v is None else json.dumps(v, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+                         for v in values]
+            self.lengths.append(np.fromiter(map(len, parts), np.int64, len(parts)))
+            self.data.append(np.frombuffer(b''.join(parts), dtype=np.uint8))
+        else:  # list / table
+            if types - {list, type(None)}:
+                self._mismatch(values, list)
+            self.lengths.append(np.fromiter((len(v) if v else 0 for v in values), np.int64, len(values)))
+            flat = [x for v in values if v for x in v]
+            if kind == 'table':
+                if any(not isinstance(x, dict) for x in flat):
+                    self._mismatch(flat, dict)
+                self.builder.tables[self.item].add_rows(flat)
+            else:
+                self.item.add(flat)
+
+    def finish(self, directory):
+        """Write the column's files; returns its ``meta.json`` entry."""
+        if self.kind is None:
+            # Never saw a value: only empty lists, or missing throughout.
+            self.kind = 'list' if self.empty_lists else 'dict' if self._categorical() else 'str'
+            if self.kind == 'list':
+                self.item = self._item()
+            self._encode([None] * self.pending)
+            self.pending = 0
+        base = os.path.join(directory, self.label)
+        meta = {'kind': self.kind}
+        if self.kind in ('str', 'json', 'list', 'table'):
+            _write_offsets(base + '.offsets.npy', self.lengths)
+            if self.kind in ('str', 'json'):
+                _write_npy(base + '.data.npy', self.data, np.uint8)
+            elif self.kind == 'list':
+                meta['item'] = self.item.finish(directory)
+            else:
+                meta['table'] = self.item
+        else:
+            dtype = {'int': np.int64, 'float': np.float64, 'bool': np.int8, 'time': 'datetime64[ms]',
+                     'dict': np.int32}[self.kind]
+            _write_npy(base + '.npy', self.chunks, np.dtype(dtype))
+            if self.kind == 'dict':
+                meta['values'] = self.values
+            if self.invalid:
+                meta['invalid'] = self.invalid
+        return meta
+
+
+class _Table:
+    def __init__(self, builder, name, parent=None):
+        self.builder, self.name, self.parent = builder, name, parent
+        self.columns = {}
+        self.rows = 0
+        self.batch = []
+
+    def add_rows(self, records):
+        self.batch.extend(records)
+        if len(self.batch) >= CHUNK:
+            self.flush()
+
+    def flush(self):
+        if not self.batch:
+            return
+        batch, self.batch = self.batch, []
+        for record in batch:
+            if not isinstance(record, dict):
+                raise ColumnarError(f'{self.name}: record is {type(record).__name__}, not an object')
+            for key in record:
+                if key not in self.columns:
+                    column = self.columns[key] = _Column(self.builder, self.name, key)
+                    column.add([None] * self.rows)
+        for key, column in self.columns.items():
+            column.add([r.get(key) for r in batch])
+        self.rows += len(batch)
+
+
+class Builder:
+    """Collects records per table and writes them as a store directory."""
+
+    def __init__(self):
+        if np is None:
+            raise ColumnarError('analytics needs NumPy: pip install numpy')
+        self.tables = {}
+
+    def table(self, name):
+        table = self.tables.get(name)
+        if table is None:
+            table = self.tables[name] = _Table(self, name)
+        return table
+
+    def nested(self, parent, field):
+        name = f'{parent}.{field}'
+        self.tables[name] = _Table(self, name, parent=(parent, field))
+        return name
+
+    def add(self, name, record):
+        table = self.table(name)
+        table.batch.append(record)
+        if len(table.batch) >= CHUNK:
+            table.flush()
+
+    def write(self, path):
+        """Write every table to the store at ``path``, replacing it whole."""
+        # Flushing a parent can still feed (and create) its nested tables.
+        while any(t.batch for t in self.tables.values()):
+            for table in list(self.tables.values()):
+                table.flush()
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        tmp = tempfile.mkdtemp(prefix='.' + os.path.basename(path) + '.', dir=parent)
+        try:
+            meta = {'version': FORMAT_VERSION, 'tables': {}}
+            for name, table in self.tables.items():
+                directory = os.path.join(tmp, name)
+                os.makedirs(directory)
+                entry = {'rows': table.rows, 'columns': {}}
+                if table.parent:
+                    entry['parent'], entry['field'] = table.parent
+                for key, column in table.columns.items():
+                    entry['columns'][key] = column.finish(directory)
+                meta['tables'][name] = entry
+            with open(os.path.join(tmp, 'meta.json'), 'w', encoding='utf-8') as f:
+                json.dump(meta, f, ensure_ascii=False, indent=1)
+            old = None
+            if os.path.exists(path):
+                old = tempfile.mkdtemp(prefix='.' + os.path.basename(path) + '.old.', dir=parent)
+                os.rmdir(old)
+                os.rename(path, old)
+            os.rename(tmp, path)
+            if old:
+                shutil.rmtree(old)
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        return meta
+
+
+def _write_npy(path, chunks, dtype):
+    """Write ``chunks`` as one 1-d ``.npy`` array without concatenating them in memory."""
+    dtype = np.dtype(dtype)
+    with open(path, 'wb') as f:
+        np.lib.format.write_array_header_1_0(
+            f, {'descr': np.lib.format.dtype_to_descr(dtype), 'fortran_order': False,
+                'shape': (sum(len(c) for c in chunks),)})
+        for chunk in chunks:
+            f.write(np.ascontiguousarray(chunk, dtype=dtype).tobytes())
+
+
+def _write_offsets(path, lengths):
+    total, chunks = 0, [np.zeros(1, dtype=np.int64)]
+    for chunk in lengths:
+        offsets = np.cumsum(chunk) + total
+        if len(offsets):
+            total = int(offsets[-1])
+        chunks.append(offsets)
+    _write_npy(path, chunks, np.int64)
+
+
+def _load(path):
+    return np.load(path, mmap_mode='r')
+
+
+class DictColumn:
+    """Dictionary-encoded strings: ``codes`` (int32, -1 = missing) into ``values``."""
+
+    def __init__(self, codes, values):
+        self.codes = codes
+        self.values = np.array(values, dtype=object)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def code(self, value):
+        """The code of ``value``, or -2 (matching nothing) if it never occurs."""
+        hits = np.flatnonzero(self.values == value)
+        return int(hits[0]) if len(hits) else -2
+
+    def decode(self):
+        out = np.empty(len(self.codes), dtype=object)
+        valid = self.codes >= 0
+        out[valid] = self.values[self.codes[valid]]
+        return out
+
+
+class StrColumn:
+    """UTF-8 strings stored as one byte array plus ``rows + 1`` offsets."""
+
+    def __init__(self, data, offsets, kind='str'):
+        self.data, self.offsets, self.kind = data, offsets, kind
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        text = bytes(self.data[self.offsets[i]:self.offsets[i + 1]]).decode('utf-8')
+        return json.loads(text) if self.kind == 'json' and text else text
+
+    def tolist(self):
+        data, offsets = bytes(self.data), self.offsets.tolist()
+        texts = [data[a:b].decode('utf-8') for a, b in zip(offsets, offsets[1:])]
+        return [json.loads(t) if t else None for t in texts] if self.kind == 'json' else texts
+
+
+class ListColumn:
+    """``rows + 1`` offsets into ``items``, one slice of items per row."""
+
+    def __init__(self, offsets, items):
+        self.offsets, self.items = offsets, items
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def lengths(self):
+        return np.diff(self.offsets)
+
+
+class Table:
+    def __init__(self, store, name, meta):
+        self.store, self.name, self.meta = store, name, meta
+        self.rows = meta['rows']
+        self.directory = os.path.join(store.path, name)
+        self._columns = {}
+
+    @property
+    def fields(self):
+        return list(self.meta['columns'])
+
+    def __contains__(self, field):
+        return field in self.meta['columns']
+
+    def __getitem__(self, field):
+        column = self._columns.get(field)
+        if column is None:
+            try:
+                meta = self.meta['columns'][field]
+            except KeyError:
+                raise KeyError(f'{self.name} has no field {field!r}') from None
+            column = self._columns[field] = self._open(field, meta)
+        return column
+
+    def _open(self, label, meta):
+        base = os.path.join(self.directory, label)
+        kind = meta['kind']
+        if kind in ('int', 'float', 'bool', 'time'):
+            return _load(base + '.npy')
+        if kind == 'dict':
+            return DictColumn(_load(base + '.npy'), meta['values'])
+        if kind in ('str', 'json'):
+            return StrColumn(_load(base + '.data.npy'), _load(base + '.offsets.npy'), kind)
+        offsets = _load(base + '.offsets.npy')
+        if kind == 'list':
+            return ListColumn(offsets, self._open(label + '.item', meta['item']))
+        return ListColumn(offsets, self.store[meta['table']])
+
+    def parent_index(self):
+        """For a nested table, the parent row of each of its rows."""
+        if 'parent' not in self.meta:
+            raise ColumnarError(f'{self.name} is not a nested table')
+        offsets = self.store[self.meta['parent']][self.meta['field']].offsets
+        return np.repeat(np.arange(len(offsets) - 1, dtype=np.int64), np.diff(offsets))
+
+
+class Store:
+    """A store directory opened read-only; columns are mapped as they are used."""
+
+    def __init__(self, path):
+        if np is None:
+            raise ColumnarError('analytics needs NumPy: pip install numpy')
+        self.path = path
+        try:
+            with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+                self.meta = json.load(f)
+        except FileNotFoundError:
+            raise ColumnarError(f'no column store at {path}; run python -m analytics.ingest first') from None
+        if self.meta.get('version') != FORMAT_VERSION:
+            raise ColumnarError(f'{path}: store format {self.meta.get("version")}, expected {FORMAT_VERSION}')
+        self._tables = {}
+
+    @property
+    def tables(self):
+        return list(self.meta['tables'])
+
+    def __contains__(self, name):
+        return name in self.meta['tables']
+
+    def __getitem__(self, name):
+        table = self._tables.get(name)
+        if table is None:
+            try:
+                meta = self.meta['tables'][name]
+            except KeyError:
+                raise KeyError(f'no table {name!r} in {self.path}') from None
+            table = self._tables[name] = Table(self, name, meta)
+        return table
+
+
+def open_store(path):
+    return Store(path)
@@ -0,0 +1,75 @@
+"""Load mockData.ts and dp_* exports into the column store.
+
+    python -m analytics.ingest [--out analytics/.store] [--dp PATH ...] [--mock src/lib/mockData.ts]
+                               [--no-mock]
+
+``--dp`` takes any export ``analytics.sources.iter_dp`` reads (a
+``backend.generate`` dataset, a directory of ``<dp_key>.jsonl`` files or a
+JSON snapshot). It can be repeated, and records of the same key are
+appended. It defaults to ``backend/seed.json``. Mock arrays are stored as
+tables named after their export (``mockVacancies``, ...). The store is
+rebuilt whole and swapped in when complete; see ``analytics.columnar``.
+
+Salary and price strings are parsed on the way in (``analytics.money``), so
+every ``salary``, ``price``, ... column gets numeric ``Min``/``Max`` columns and
+``Currency``/``Period`` columns.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from . import columnar
+from .columnar import Builder, ColumnarError
+from .money import annotate
+from .sources import SourceError, iter_dp, mock_arrays
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STORE_PATH = os.path.join(ROOT, 'analytics', '.store')
+MOCK_PATH = os.path.join(ROOT, 'src', 'lib', 'mockData.ts')
+SEED_PATH = os.path.join(ROOT, 'backend', 'seed.json')
+
+
+def ingest(out=STORE_PATH, dp_paths=(SEED_PATH,), mock_path=MOCK_PATH):
+    """Build the store at ``out``; returns its meta (see ``Builder.write``)."""
+    builder = Builder()
+    if mock_path:
+        for name, records in mock_arrays(mock_path).items():
+            for record in records:
+                builder.add(name, annotate(record) if isinstance(record, dict) else record)
+    for path in dp_paths:
+        for key, record in iter_dp(path):
+            builder.add(key, annotate(record) if isinstance(record, dict) else record)
+    return builder.write(out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load mockData.ts and dp_* exports into the column store.')
+    parser.add_argument('--out', default=STORE_PATH, help='store directory (replaced whole)')
+    parser.add_argument('--dp', action='append', default=None, metavar='PATH',
+                        help='dp_* export: dataset directory, JSONL file(s) or JSON snapshot (default: backend/seed.json)')
+    parser.add_argument('--mock', default=MOCK_PATH, help='mockData.ts to extract arrays from')
+    parser.add_argument('--no-mock', action='store_true', help='skip mockData.ts')
+    args = parser.parse_args(argv)
+
+    if columnar.np is None:
+        sys.exit('analytics needs NumPy: pip install numpy')
+    started = time.perf_counter()
+    try:
+        meta = ingest(args.out, args.dp or [SEED_PATH], None if args.no_mock else args.mock)
+    except (OSError, SourceError, ColumnarError) as e:
+        sys.exit(f'Error: {e}')
+    elapsed = time.perf_counter() - started
+    total = 0
+    for name, table in meta['tables'].items():
+        total += table['rows']
+        kinds = {}
+        for column in table['columns'].values():
+            kinds[column['kind']] = kinds.get(column['kind'], 0) + 1
+        print(f'  {name:<36} {table["rows"]:>12,} rows  ' + ' '.join(f'{k} {n}' for k, n in sorted(kinds.items())))
+    print(f'{total:,} rows in {len(meta["tables"])} tables in {elapsed:.1f}s → {args.out}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""NumPy group-by kernels over store columns.
+
+Groups are dense int keys ``0 … n-1``. ``group_index`` builds them from
+dictionary codes, where a missing value (-1) becomes a group of its own.
+Every kernel is a handful of whole-array operations (``bincount``,
+``lexsort``, ``reduceat``), with no Python loop per row.
+"""
+
+import numpy as np
+
+NAT = np.iinfo(np.int64).min
+MS_PER_HOUR = 3_600_000
+
+
+def group_index(column, rows=None):
+    """``(keys, labels)`` grouping a ``DictColumn`` (optionally at ``rows``); missing → label ``None``."""
+    codes = np.asarray(column.codes)
+    if rows is not None:
+        codes = codes[rows]
+    return codes.astype(np.int64) + 1, [None] + list(column.values)
+
+
+def counts(keys, n, weights=None):
+    return np.bincount(keys, weights=weights, minlength=n)[:n]
+
+
+def rate(hits, totals):
+    """``hits / totals`` with NaN where the total is 0."""
+    hits = np.asarray(hits, dtype=np.float64)
+    totals = np.asarray(totals, dtype=np.float64)
+    out = np.full(hits.shape, np.nan)
+    np.divide(hits, totals, out=out, where=totals > 0)
+    return out
+
+
+def millis(times):
+    """datetime64[ms] as int64 milliseconds; NaT stays ``NAT``."""
+    return np.asarray(times).view(np.int64)
+
+
+def segment_min(offsets, values, empty):
+    """Minimum of ``values[offsets[i]:offsets[i+1]]`` per segment; ``empty`` where a segment has none."""
+    offsets = np.asarray(offsets)
+    out = np.full(len(offsets) - 1, empty, dtype=values.dtype)
+    starts = offsets[:-1]
+    nonempty = offsets[1:] > starts
+    if len(values) and nonempty.any():
+        out[nonempty] = np.minimum.reduceat(values, starts[nonempty])
+    return out
+
+
+def segment_any(offsets, hits):
+    """Whether any of ``hits`` is true in each segment."""
+    offsets = np.asarray(offsets)
+    cum = np.concatenate(([0], np.cumsum(hits, dtype=np.int64)))
+    return cum[offsets[1:]] > cum[offsets[:-1]]
+
+
+def group_quantiles(keys, values, n, qs):
+    """``(n, len(qs))`` quantiles of ``values`` per group; NaN for empty groups.
+
+    Quantiles are observed values, as ``numpy.quantile(method='lower')``.
+
+    ``values`` must not contain NaN; drop them (and their keys) first.
+    """
+    order = np.lexsort((values, keys))
+    sorted_values = values[order]
+    size = counts(keys, n)
+    start = np.concatenate(([0], np.cumsum(size)[:-1]))
+    out = np.full((n, len(qs)), np.nan)
+    present = size > 0
+    for j, q in enumerate(qs):  # one vector op per quantile, not per row
+        pick = start[present] + np.floor(q * (size[present] - 1)).astype(np.int64)
+        out[present, j] = sorted_values[pick]
+    return out
+
+
+def quantiles(values, qs):
+    """Quantiles of ``values`` as ``group_quantiles`` computes them (NaN if there are none)."""
+    if not len(values):
+        return [float('nan')] * len(qs)
+    return [float(x) for x in np.quantile(values, qs, method='lower')]
+
+
+def bucket(values, edges):
+    """Index of the ``edges`` bucket (``edges[i] <= v < edges[i+1]``; the last is open-ended) of each value."""
+    return np.searchsorted(np.asarray(edges), values, side='right') - 1
@@ -0,0 +1,291 @@
+"""Salary and price strings as numbers, and a range index over them.
+
+    python -m analytics.money TABLE FIELD [--store analytics/.store] [--min X] [--max Y] [--city CITY]
+                              [--currency RUB] [--within] [--limit 20]
+
+``salary``, ``pay``, ``budget``, ``price``, ``unitPrice`` and
+``retailPrice`` (``FIELDS``) are free text such as ``"от 80 000 ₽"``,
+``"3 000–5 000"``, ``"до 38 тыс. руб/мес"`` or ``"Договорная"``. ``parse``
+reads one into ``Money(low, high, currency, period)``. It handles
+``от``/``до``/``свыше``, ``A–B`` ranges, space/dot/comma thousands separators,
+``тыс``/``к``/``млн`` and a trailing period (``в месяц``, ``/час``, ``за
+смену``, ...). An open end is ``None``, and text without an amount parses to
+``None``. Results are cached, so a collection with a few hundred distinct
+strings is parsed a few hundred times, however many rows it has.
+
+``analytics.ingest`` runs ``annotate`` on every record, so the store gets
+``<field>Min`` and ``<field>Max`` float columns (NaN = open or unknown) and
+dictionary-encoded ``<field>Currency`` and ``<field>Period`` next to the
+original string. Nothing parses money at query time.
+
+``MoneyIndex`` sorts one table's ranges by ``(city, currency, min)`` and by
+``(city, currency, max)``. ``count`` answers "salary ≥ X in city Y" with two
+binary searches. ``select`` returns the matching rows in O(log n + k).
+Nested tables (``dp_client_orders.responses``) take the city of their
+parent row.
+"""
+
+import argparse
+import functools
+import math
+import re
+import sys
+from typing import NamedTuple, Optional
+
+from .columnar import ColumnarError, np, open_store
+
+FIELDS = frozenset({'salary', 'pay', 'budget', 'price', 'unitPrice', 'retailPrice'})
+# Period assumed when the text names none.
+DEFAULT_PERIOD = {'salary': 'month', 'unitPrice': 'unit', 'retailPrice': 'unit'}
+DEFAULT_CURRENCY = 'RUB'
+SUFFIXES = ('Min', 'Max', 'Currency', 'Period')
+
+_SPACES = re.compile(r'[   ]')
+_NUMBER = re.compile(r'''
+    (?P<int>\d{1,3}(?:[ .,]\d{3})+(?!\d)|\d+)    # 80 000, 1.200, 12,500 or plain digits
+    (?:[.,](?P<frac>\d{1,2})(?!\d))?             # 12 500,50
+    (?:\s*(?P<scale>тыс\b\.?|т\.|млн\b\.?|[кk](?![а-яa-z])))?
+''', re.X | re.I)
+_RANGE = re.compile(r'\s*(?:[-–—]|до\b)')
+_FROM = re.compile(r'(?:^|\s)(?:от|свыше|более|больше|from)\s*$|\+', re.I)
+_TO = re.compile(r'(?:^|\s)(?:до|не более|менее|up to)\s*$', re.I)
+_CURRENCIES = (
+    (re.compile(r'₽|\bруб|\bр\.|(?<=\d)\s*р\b|\brub\b', re.I), 'RUB'),
+    (re.compile(r'\$|\busd\b|\bдолл', re.I), 'USD'),
+    (re.compile(r'€|\beur\b|\bевро\b', re.I), 'EUR'),
+    (re.compile(r'₸|\bтенге\b|\bkzt\b', re.I), 'KZT'),
+)
+_PER = r'(?:\b(?:в|за)\s+|/\s*)'
+_PERIODS = (
+    (re.compile(_PER + r'(?:час|ч\b)', re.I), 'hour'),
+    (re.compile(_PER + r'смен', re.I), 'shift'),
+    (re.compile(_PER + r'(?:день|сутки|дн)', re.I), 'day'),
+    (re.compile(_PER + r'нед', re.I), 'week'),
+    (re.compile(_PER + r'мес', re.I), 'month'),
+    (re.compile(_PER + r'(?:шт|ед)', re.I), 'unit'),
+)
+_SCALE = {'т': 1_000, 'к': 1_000, 'k': 1_000, 'м': 1_000_000}
+
+
+class Money(NamedTuple):
+    low: Optional[float]
+    high: Optional[float]
+    currency: str
+    period: Optional[str]
+
+
+def _amount(m):
+    value = float(re.sub(r'[ .,]', '', m.group('int')))
+    if m.group('frac'):
+        value += float('0.' + m.group('frac'))
+    return value, m.group('scale')
+
+
+@functools.lru_cache(maxsize=65_536)
+def parse(text, period=None):
+    """``Money`` for a price string, or ``None`` if it names no amount (``"Договорная"``).
+
+    ``period`` is used when the text does not name one.
+    """
+    if not isinstance(text, str):
+        return None
+    text = _SPACES.sub(' ', text).strip()
+    numbers = list(_NUMBER.finditer(text))
+    if not numbers:
+        return None
+    first, second = numbers[0], None
+    if len(numbers) > 1 and _RANGE.match(text, first.end()):
+        second = numbers[1]
+    low, scale = _amount(first)
+    if second:
+        high, high_scale = _amount(second)
+        scale = scale or high_scale  # "80–100 тыс." scales both ends
+        low *= _SCALE[scale[0].lower()] if scale else 1
+        high *= _SCALE[high_scale[0].lower()] if high_scale else 1
+        if low > high:
+            low, high = high, low
+    else:
+        low *= _SCALE[scale[0].lower()] if scale else 1
+        before, after = text[:first.start()], text[first.end():]
+        if _TO.search(before):
+            low, high = None, low
+        elif _FROM.search(before) or after.lstrip().startswith('+'):
+            high = None
+        else:
+            high = low
+    currency = next((code for pattern, code in _CURRENCIES if pattern.search(text)), DEFAULT_CURRENCY)
+    period = next((name for pattern, name in _PERIODS if pattern.search(text)), period)
+    return Money(low, high, currency, period)
+
+
+def annotate(record):
+    """Add ``<field>Min/Max/Currency/Period`` to ``record`` (and its nested records) for every money field."""
+    for key, value in list(record.items()):
+        if isinstance(value, str):
+            if key in FIELDS:
+                money = parse(value, DEFAULT_PERIOD.get(key))
+                # NaN rather than None, so an all-open column is still typed float.
+                record[key + 'Min'] = math.nan if money is None or money.low is None else money.low
+                record[key + 'Max'] = math.nan if money is None or money.high is None else money.high
+                record[key + 'Currency'] = money and money.currency
+                record[key + 'Period'] = money and money.period
+        elif isinstance(value, list):
+            for item in value:
+                if isinstance(item, dict):
+                    annotate(item)
+    return record
+
+
+def _group_codes(table, by):
+    """Dictionary codes of ``by`` per row of ``table``, taken from the parent for nested tables."""
+    if by is None:
+        return np.full(table.rows, -1, dtype=np.int32), None
+    rows = None
+    while by not in table:
+        if 'parent' not in table.meta:
+            raise ColumnarError(f'{table.name} has no field {by!r}')
+        index = table.parent_index()
+        rows = index if rows is None else index[rows]
+        table = table.store[table.meta['parent']]
+    column = table[by]
+    codes = np.asarray(column.codes)
+    return (codes if rows is None else codes[rows]), column
+
+
+class MoneyIndex:
+    """Sorted ``(group, currency, bound)`` arrays over one money field of a table.
+
+    ``by`` is the dictionary field queries can filter on (``city=``); ``None``
+    indexes the table as one group, for tables without a city.
+    """
+
+    def __init__(self, table, field, by='city'):
+        names = [field + s for s in SUFFIXES]
+        missing = [n for n in names if n not in table]
+        if missing:
+            raise ColumnarError(f'{table.name} has no {", ".join(missing)}; '
+                                f'rebuild the store with python -m analytics.ingest')
+        self.table, self.field, self.by = table, field, by
+        low = np.asarray(table[names[0]], dtype=np.float64)
+        high = np.asarray(table[names[1]], dtype=np.float64)
+        self.currency, self.period = table[names[2]], table[names[3]]
+        groups, self.groups = _group_codes(table, by)
+
+        # Per row, with open ends as ±inf; unpriced rows are not indexed.
+        rows = np.flatnonzero(~(np.isnan(low) & np.isnan(high)))
+        self.row_low = np.where(np.isnan(low), -np.inf, low)
+        self.row_high = np.where(np.isnan(high), np.inf, high)
+        self.width = len(self.currency.values) + 1
+        key = (groups[rows].astype(np.int64) + 1) * self.width + np.asarray(self.currency.codes)[rows] + 1
+        low, high = self.row_low[rows], self.row_high[rows]
+        by_low, by_high = np.lexsort((low, key)), np.lexsort((high, key))
+        self.low_key, self.low, self.low_rows = key[by_low], low[by_low], rows[by_low]
+        self.high_key, self.high, self.high_rows = key[by_high], high[by_high], rows[by_high]
+
+    def __len__(self):
+        return len(self.low_rows)
+
+    def _keys(self, group, currency):
+        currency_code = self.currency.code(currency)
+        if currency_code < 0:
+            return []
+        if group is not None:
+            if self.groups is None:
+                raise ColumnarError(f'{self.table.name}: index is not grouped by {self.by}')
+            return [(self.groups.code(group) + 1) * self.width + currency_code + 1]
+        groups = len(self.groups.values) + 1 if self.groups is not None else 1
+        return [g * self.width + currency_code + 1 for g in range(groups)]
+
+    def _slices(self, key, low, high, within):
+        """``(start, stop)`` runs of the min-sorted and the max-sorted arrays of partition ``key``.
+
+        Each run already satisfies the bound its sort order can check.
+        """
+        lo_a, lo_b = np.searchsorted(self.low_key, [key, key + 1])
+        hi_a, hi_b = np.searchsorted(self.high_key, [key, key + 1])
+        # overlap: max ≥ low and min ≤ high; within: min ≥ low and max ≤ high.
+        if within:
+            by_low = (lo_a + np.searchsorted(self.low[lo_a:lo_b], low, 'left') if low is not None else lo_a, lo_b)
+            by_high = (hi_a, hi_a + np.searchsorted(self.high[hi_a:hi_b], high, 'right') if high is not None else hi_b)
+        else:
+            by_high = (hi_a + np.searchsorted(self.high[hi_a:hi_b], low, 'left') if low is not None else hi_a, hi_b)
+            by_low = (lo_a, lo_a + np.searchsorted(self.low[lo_a:lo_b], high, 'right') if high is not None else lo_b)
+        return by_low, by_high
+
+    def count(self, low=None, high=None, city=None, currency=DEFAULT_CURRENCY, within=False):
+        """How many rows match, as ``select`` would return them; O(log n) with a single bound."""
+        if low is not None and high is not None:
+            return len(self.select(low, high, city, currency, within))
+        total = 0
+        for key in self._keys(city, currency):
+            (a, b), (c, d) = self._slices(key, low, high, within)
+            total += (b - a) if (high is None) == within else (d - c)
+        return int(total)
+
+    def select(self, low=None, high=None, city=None, currency=DEFAULT_CURRENCY, within=False):
+        """Row numbers whose ``[min, max]`` overlaps ``[low, high]`` (lies inside it if ``within``), ascending.
+
+        Open ends count as unbounded, so ``"от 80 000 ₽"`` matches ``low=150_000``
+        unless ``within`` is set. ``city=None`` searches every city.
+        """
+        found = []
+        for key in self._keys(city, currency):
+            (a, b), (c, d) = self._slices(key, low, high, within)
+            # Take the shorter sorted run and filter it by the other bound.
+            if b - a <= d - c:
+                rows, bound = self.low_rows[a:b], None
+                if (high if within else low) is not None:
+                    bound = self.row_high[rows] <= high if within else self.row_high[rows] >= low
+            else:
+                rows, bound = self.high_rows[c:d], None
+                if (low if within else high) is not None:
+                    bound = self.row_low[rows] >= low if within else self.row_low[rows] <= high
+            found.append(rows if bound is None else rows[bound])
+        return np.sort(np.concatenate(found)) if found else np.zeros(0, dtype=np.int64)
+
+
+def _format(low, high):
+    low = None if low is None or np.isnan(low) else f'{low:,.0f}'.replace(',', ' ')
+    high = None if high is None or np.isnan(high) else f'{high:,.0f}'.replace(',', ' ')
+    if low and high:
+        return low if low == high else f'{low}–{high}'
+    return f'от {low}' if low else f'до {high}' if high else '—'
+
+
+def main(argv=None):
+    from .ingest import STORE_PATH  # ingest imports this module
+
+    parser = argparse.ArgumentParser(description='Range queries over normalized salary and price columns.')
+    parser.add_argument('table', help='e.g. dp_vacancies, dp_gigs, dp_client_orders.responses')
+    parser.add_argument('field', help=f'one of {", ".join(sorted(FIELDS))}')
+    parser.add_argument('--store', default=STORE_PATH, help='store built by python -m analytics.ingest')
+    parser.add_argument('--min', type=float, help='lower bound')
+    parser.add_argument('--max', type=float, help='upper bound')
+    parser.add_argument('--city', help='only rows in this city')
+    parser.add_argument('--currency', default=DEFAULT_CURRENCY)
+    parser.add_argument('--within', action='store_true', help='whole range inside the bounds, not just overlapping')
+    parser.add_argument('--limit', type=int, default=20, help='rows printed (0: only the count)')
+    args = parser.parse_args(argv)
+
+    if np is None:
+        sys.exit('analytics needs NumPy: pip install numpy')
+    try:
+        store = open_store(args.store)
+        if args.table not in store:
+            sys.exit(f'Error: no table {args.table!r} in {args.store}')
+        table = store[args.table]
+        index = MoneyIndex(table, args.field, 'city' if args.city else None)
+    except ColumnarError as e:
+        sys.exit(f'Error: {e}')
+    rows = index.select(args.min, args.max, args.city, args.currency, args.within)
+    text, low, high = table[args.field], table[args.field + 'Min'], table[args.field + 'Max']
+    period = table[args.field + 'Period']
+    for row in rows[:args.limit]:
+        code = period.codes[row]
+        print(f'  {row:>10}  {_format(low[row], high[row]):>22}  {period.values[code] if code >= 0 else "":<6}  '
+              f'{text[row]}')
+    print(f'{len(rows):,} of {len(index):,} priced rows in {args.table}')
+
+
+if __name__ == '__main__':
+    main()
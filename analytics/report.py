@@ -0,0 +1,285 @@
+"""Marketplace metrics over the column store, as whole-array NumPy kernels.
+
+    python -m analytics.report [--store analytics/.store] [--metrics acceptance,first_response,gig_fill,purchases]
+                               [--min-participants 5] [--top 15] [--json] [--output report.json]
+
+``acceptance``
+    Applications per vacancy city: accepted, rejected and pending counts, the
+    acceptance rate over all applications and over decided ones.
+``first_response``
+    Hours from a vacancy's, gig's or client order's ``createdAt`` to its
+    earliest application or response: the share that got one, mean, p50 and
+    p90, and p50/p90 per city.
+``gig_fill``
+    Share of gigs ``taken`` or ``completed``, and of gigs with an accepted
+    response, overall and per gig type and city.
+``purchases``
+    Collective purchase completion rate and mean ``currentVolume /
+    targetVolume`` by participant count. Purchases have no
+    ``minParticipants`` field, so ``--min-participants`` is the threshold
+    the rates are split at.
+
+Nested rows reach their parent through the stored offsets
+(``Table.parent_index``, ``reduceat``). Groups are dictionary codes, so
+every metric is a fixed number of passes over memory-mapped columns,
+whatever the row count. The text output is one table per metric; ``--json``
+prints the report object, with per-metric timings, instead.
+"""
+
+import argparse
+import json
+import math
+import sys
+import time
+
+from . import kernels as k
+from .columnar import ColumnarError, Table, np, open_store
+from .ingest import STORE_PATH
+
+QS = (0.5, 0.9)
+PARTICIPANT_EDGES = (0, 1, 3, 6, 11, 21)
+RESPONSES = (('vacancies', 'dp_vacancies', 'applications'), ('gigs', 'dp_gigs', 'responses'),
+             ('orders', 'dp_client_orders', 'responses'))
+
+
+class Skipped(Exception):
+    """A metric whose tables are not in the store."""
+
+
+def _num(x, digits=4):
+    x = float(x)
+    return None if math.isnan(x) else round(x, digits)
+
+
+def _table(store, name, *fields):
+    if name not in store:
+        raise Skipped(f'no {name} table')
+    table = store[name]
+    missing = [f for f in fields if f not in table]
+    if missing:
+        raise Skipped(f'{name} has no {", ".join(missing)}')
+    return table
+
+
+def _is(column, *values):
+    """Rows of a dictionary column equal to any of ``values``."""
+    return np.isin(np.asarray(column.codes), [column.code(v) for v in values])
+
+
+def _ranked(labels, rows, key, top):
+    """Group rows (dicts) sorted by ``key`` descending, the first ``top`` of them."""
+    out = [dict(r, **{'group': labels[i]}) for i, r in enumerate(rows) if r[key]]
+    out.sort(key=lambda r: -r[key])
+    return out[:top] if top else out
+
+
+def acceptance(store, top=None, **_):
+    vacancies = _table(store, 'dp_vacancies', 'city', 'applications')
+    apps = _table(store, 'dp_vacancies.applications', 'status')
+    keys, labels = k.group_index(vacancies['city'], apps.parent_index())
+    n = len(labels)
+    total = k.counts(keys, n)
+    accepted = k.counts(keys, n, _is(apps['status'], 'accepted'))
+    rejected = k.counts(keys, n, _is(apps['status'], 'rejected'))
+    rows = [{'applications': int(t), 'accepted': int(a), 'rejected': int(r), 'pending': int(t - a - r),
+             'acceptance_rate': _num(ar), 'decided_acceptance_rate': _num(dr)}
+            for t, a, r, ar, dr in zip(total, accepted, rejected, k.rate(accepted, total),
+                                       k.rate(accepted, accepted + rejected))]
+    a, r, t = int(accepted.sum()), int(rejected.sum()), int(total.sum())
+    return {'total': {'applications': t, 'accepted': a, 'rejected': r, 'pending': t - a - r,
+                      'acceptance_rate': _num(k.rate(a, t)), 'decided_acceptance_rate': _num(k.rate(a, a + r))},
+            'by_city': _ranked(labels, rows, 'applications', top)}
+
+
+def first_response(store, top=None, **_):
+    out = {}
+    for label, parent_name, field in RESPONSES:
+        try:
+            parent = _table(store, parent_name, 'createdAt', 'city', field)
+        except Skipped as e:
+            out[label] = {'skipped': str(e)}
+            continue
+        nested = parent[field]
+        if not isinstance(nested.items, Table):  # every list was empty: a plain list column
+            first = np.full(parent.rows, k.NAT)
+        else:
+            child = nested.items
+            times = k.millis(child['createdAt']).copy()
+            times[times == k.NAT] = np.iinfo(np.int64).max
+            first = k.segment_min(nested.offsets, times, np.iinfo(np.int64).max)
+        created = k.millis(parent['createdAt'])
+        ok = (first != np.iinfo(np.int64).max) & (first != k.NAT) & (created != k.NAT)
+        hours = (first[ok] - created[ok]) / k.MS_PER_HOUR
+        keys, labels = k.group_index(parent['city'], np.flatnonzero(ok))
+        n = len(labels)
+        per_city = k.group_quantiles(keys, hours, n, QS)
+        responded = k.counts(keys, n)
+        all_keys, _ = k.group_index(parent['city'])
+        parents = k.counts(all_keys, n)
+        rows = [{'parents': int(p), 'responded': int(r), 'response_share': _num(s),
+                 'p50_hours': _num(q[0], 2), 'p90_hours': _num(q[1], 2)}
+                for p, r, s, q in zip(parents, responded, k.rate(responded, parents), per_city)]
+        p50, p90 = k.quantiles(hours, QS)
+        out[label] = {'parents': parent.rows, 'responded': int(ok.sum()),
+                      'response_share': _num(k.rate(ok.sum(), parent.rows)),
+                      'hours': {'mean': _num(hours.mean() if len(hours) else math.nan, 2),
+                                'p50': _num(p50, 2), 'p90': _num(p90, 2)},
+                      'by_city': _ranked(labels, rows, 'parents', top)}
+    if all('skipped' in v for v in out.values()):
+        raise Skipped('no vacancies, gigs or client orders')
+    return out
+
+
+def gig_fill(store, top=None, **_):
+    gigs = _table(store, 'dp_gigs', 'status', 'type', 'city', 'responses')
+    filled = _is(gigs['status'], 'taken', 'completed')
+    responses = gigs['responses']
+    if isinstance(responses.items, Table) and 'status' in responses.items:
+        accepted = k.segment_any(responses.offsets, _is(responses.items['status'], 'accepted'))
+    else:
+        accepted = np.zeros(gigs.rows, dtype=bool)
+    out = {'total': {'gigs': gigs.rows, 'filled': int(filled.sum()), 'fill_rate': _num(k.rate(filled.sum(), gigs.rows)),
+                     'with_accepted_response': int(accepted.sum())}}
+    for field in ('type', 'city'):
+        keys, labels = k.group_index(gigs[field])
+        n = len(labels)
+        total, hit = k.counts(keys, n), k.counts(keys, n, filled)
+        rows = [{'gigs': int(t), 'filled': int(h), 'fill_rate': _num(r)}
+                for t, h, r in zip(total, hit, k.rate(hit, total))]
+        out[f'by_{field}'] = _ranked(labels, rows, 'gigs', top)
+    return out
+
+
+def purchases(store, min_participants=5, **_):
+    table = _table(store, 'dp_collective_purchases', 'status', 'targetVolume', 'currentVolume', 'participants')
+    size = np.diff(np.asarray(table['participants'].offsets))
+    completed = _is(table['status'], 'completed')
+    target = np.asarray(table['targetVolume'], dtype=np.float64)
+    fill = k.rate(np.asarray(table['currentVolume'], dtype=np.float64), target)
+
+    def summary(mask):
+        n = int(mask.sum())
+        f = fill[mask]
+        f = f[~np.isnan(f)]
+        return {'purchases': n, 'completed': int(completed[mask].sum()),
+                'completion_rate': _num(k.rate(completed[mask].sum(), n)),
+                'mean_fill': _num(f.mean() if len(f) else math.nan)}
+
+    buckets = k.bucket(size, PARTICIPANT_EDGES)
+    edges = list(PARTICIPANT_EDGES) + [None]
+    by_size = []
+    for i, lo in enumerate(PARTICIPANT_EDGES):  # one row per bucket, not per purchase
+        hi = edges[i + 1]
+        label = str(lo) if hi == lo + 1 else f'{lo}+' if hi is None else f'{lo}-{hi - 1}'
+        by_size.append(dict(summary(buckets == i), participants=label))
+    return {'min_participants': min_participants, 'total': summary(np.ones(table.rows, dtype=bool)),
+            'below_min': summary(size < min_participants), 'at_least_min': summary(size >= min_participants),
+            'by_participants': by_size}
+
+
+METRICS = {'acceptance': acceptance, 'first_response': first_response, 'gig_fill': gig_fill,
+           'purchases': purchases}
+
+
+def report(store, names=tuple(METRICS), **options):
+    """``{'metrics': {name: result}}``; each result carries its ``seconds`` or a ``skipped`` reason."""
+    out = {'store': store.path, 'rows': {n: store.meta['tables'][n]['rows'] for n in store.tables}, 'metrics': {}}
+    for name in names:
+        started = time.perf_counter()
+        try:
+            result = METRICS[name](store, **options)
+        except Skipped as e:
+            result = {'skipped': str(e)}
+        result['seconds'] = round(time.perf_counter() - started, 4)
+        out['metrics'][name] = result
+    return out
+
+
+def _pct(x):
+    return '—' if x is None else f'{x * 100:5.1f}%'
+
+
+def _hours(x):
+    return '—' if x is None else f'{x:7.1f}h'
+
+
+def print_report(result, out=None):
+    m = result['metrics']
+    if 'acceptance' in m and 'skipped' not in m['acceptance']:
+        r = m['acceptance']
+        t = r['total']
+        print(f'Application acceptance: {t["applications"]:,} applications, {_pct(t["acceptance_rate"])} accepted, '
+              f'{_pct(t["decided_acceptance_rate"])} of decided', file=out)
+        for row in r['by_city']:
+            print(f'  {row["group"] or "(none)":<24} {row["applications"]:>10,}  {_pct(row["acceptance_rate"])}  '
+                  f'decided {_pct(row["decided_acceptance_rate"])}', file=out)
+    if 'first_response' in m and 'skipped' not in m['first_response']:
+        print('Time to first response:', file=out)
+        for label, r in m['first_response'].items():
+            if not isinstance(r, dict):
+                continue
+            if 'skipped' in r:
+                print(f'  {label:<10} skipped: {r["skipped"]}', file=out)
+                continue
+            h = r['hours']
+            print(f'  {label:<10} {r["responded"]:>10,} of {r["parents"]:,} ({_pct(r["response_share"])})  '
+                  f'mean {_hours(h["mean"])}  p50 {_hours(h["p50"])}  p90 {_hours(h["p90"])}', file=out)
+    if 'gig_fill' in m and 'skipped' not in m['gig_fill']:
+        r = m['gig_fill']
+        t = r['total']
+        print(f'Gig fill rate: {_pct(t["fill_rate"])} of {t["gigs"]:,} gigs '
+              f'({t["with_accepted_response"]:,} with an accepted response)', file=out)
+        for row in r['by_type'] + r['by_city']:
+            print(f'  {row["group"] or "(none)":<24} {row["gigs"]:>10,}  {_pct(row["fill_rate"])}', file=out)
+    if 'purchases' in m and 'skipped' not in m['purchases']:
+        r = m['purchases']
+        print(f'Collective purchases: {_pct(r["total"]["completion_rate"])} completed of '
+              f'{r["total"]["purchases"]:,}; below {r["min_participants"]} participants '
+              f'{_pct(r["below_min"]["completion_rate"])}, at least {_pct(r["at_least_min"]["completion_rate"])}',
+              file=out)
+        for row in r['by_participants']:
+            if row['purchases']:
+                print(f'  {row["participants"]:>6} participants {row["purchases"]:>8,}  '
+                      f'{_pct(row["completion_rate"])} completed, mean fill {_pct(row["mean_fill"])}', file=out)
+    for name, r in m.items():
+        if 'skipped' in r:
+            print(f'{name}: skipped ({r["skipped"]})', file=out)
+    print(f'{sum(r["seconds"] for r in m.values()) * 1000:.0f} ms over '
+          f'{sum(result["rows"].values()):,} rows', file=out)
+
+
+def _csv(value):
+    return [v for v in value.split(',') if v]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Marketplace metrics over the column store.')
+    parser.add_argument('--store', default=STORE_PATH, help='store built by python -m analytics.ingest')
+    parser.add_argument('--metrics', type=_csv, default=list(METRICS), help=f'any of {", ".join(METRICS)}')
+    parser.add_argument('--min-participants', type=int, default=5,
+                        help='purchases: participant count the completion rate is split at')
+    parser.add_argument('--top', type=int, default=15, help='groups listed per breakdown (0: all)')
+    parser.add_argument('--json', action='store_true', help='print the report as JSON')
+    parser.add_argument('--output', help='write the JSON report here')
+    args = parser.parse_args(argv)
+
+    unknown = [m for m in args.metrics if m not in METRICS]
+    if unknown:
+        parser.error(f'unknown metric: {", ".join(unknown)}; choose from {", ".join(METRICS)}')
+    try:
+        store = open_store(args.store)
+    except ColumnarError as e:
+        sys.exit(str(e))
+    result = report(store, args.metrics, min_participants=args.min_participants, top=args.top or None)
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    if args.json:
+        print(text)
+    else:
+        print_report(result)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,207 @@
+"""Record sources for the column store: ``mockData.ts`` and ``dp_*`` exports.
+
+``mock_arrays`` pulls every ``export const name = [...]`` literal out of
+``src/lib/mockData.ts``. Keys are quoted, single-quoted strings and
+substitution-free template literals become JSON strings, and comments,
+``as const`` and trailing commas are dropped, all in one regex pass. The
+result is then handed to ``json.loads``, so the file is never parsed in
+Python code.
+
+``iter_dp`` yields ``(key, record)`` from any of these ``dp_*`` exports:
+
+* a ``backend.generate`` JSONL dataset (a directory with ``manifest.json``);
+* a directory of ``<dp_key>.jsonl`` or ``<dp_key>.json`` files;
+* a single ``<dp_key>.jsonl`` file;
+* a ``{"dp_users": [...], ...}`` snapshot such as ``backend/seed.json`` or
+  a dump of the browser's localStorage, where each collection may also be
+  a JSON string.
+
+Snapshots are read incrementally, one record at a time, with
+``JSONDecoder.raw_decode`` over a sliding buffer. A multi-gigabyte export
+never has to fit in memory at once.
+"""
+
+import ast
+import json
+import os
+import re
+
+from backend.generate import iter_records
+
+SNAPSHOT_CHUNK = 1 << 20
+
+_EXPORT = re.compile(r'^export\s+const\s+(\w+)\s*(?::[^=\n]+)?=\s*', re.M)
+_TS_TOKEN = re.compile(r'''
+    (?P<dq>"(?:[^"\\\n]|\\.)*")
+  | (?P<sq>'(?:[^'\\\n]|\\.)*')
+  | (?P<tpl>`(?:[^`\\$]|\\.|\$(?!\{))*`)
+  | (?P<comment>//[^\n]*|/\*.*?\*/)
+  | (?P<cast>\s+as\s+const\b)
+  | (?P<key>(?:[^\W\d]|\$)[\w$]*(?=\s*:))
+  | (?P<undefined>\bundefined\b)
+  | (?P<comma>,(?=\s*(?://[^\n]*\s*)*[\]}]))
+''', re.X | re.S)
+_WS = re.compile(r'\s*')
+_DECODER = json.JSONDecoder()
+
+
+class SourceError(Exception):
+    pass
+
+
+def _ts_to_json(match):
+    kind = match.lastgroup
+    if kind == 'dq':
+        return match.group()
+    if kind == 'sq':
+        return json.dumps(ast.literal_eval(match.group()), ensure_ascii=False)
+    if kind == 'tpl':
+        return json.dumps(ast.literal_eval('"""' + match.group()[1:-1].replace('"', '\\"') + '"""'),
+                          ensure_ascii=False)
+    if kind == 'key':
+        return f'"{match.group()}"'
+    if kind == 'undefined':
+        return 'null'
+    return ''
+
+
+def ts_literal(text):
+    """The value of a TS object/array literal made only of JSON-like values."""
+    return json.loads(_TS_TOKEN.sub(_ts_to_json, text))
+
+
+def mock_arrays(path):
+    """``{export name: [records]}`` for every exported array literal in ``path``."""
+    with open(path, encoding='utf-8') as f:
+        text = f.read()
+    found = {}
+    starts = list(_EXPORT.finditer(text))
+    for m, following in zip(starts, starts[1:] + [None]):
+        body = text[m.end():following.start() if following else len(text)].rstrip().rstrip(';')
+        if not body.startswith('['):
+            continue
+        try:
+            found[m.group(1)] = ts_literal(body)
+        except ValueError as e:
+            line = text.count('\n', 0, m.start()) + 1
+            raise SourceError(f'{path}:{line}: cannot read {m.group(1)}: {e}') from None
+    return found
+
+
+class _JsonStream:
+    """Just enough of a pull parser to walk a huge top-level object."""
+
+    def __init__(self, f, chunk=SNAPSHOT_CHUNK):
+        self.f, self.chunk = f, chunk
+        self.buf, self.pos, self.eof = '', 0, False
+
+    def _fill(self, size=None):
+        data = self.f.read(size or self.chunk)
+        if not data:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def peek(self):
+        while True:
+            self.pos = _WS.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, chars):
+        c = self.peek()
+        if not c or c not in chars:
+            raise SourceError(f'expected one of {chars!r} in snapshot, found {c or "end of file"!r}')
+        self.pos += 1
+        return c
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError as e:
+                # Most likely cut off by the buffer; grow it geometrically so a
+                # single huge value is not re-scanned once per chunk.
+                if self._fill(max(self.chunk, len(self.buf))):
+                    continue
+                raise SourceError(f'invalid snapshot: {e.msg}') from None
+            if end == len(self.buf) and not self.eof and self._fill():
+                continue  # a number may go on in the next chunk
+            self.pos = end
+            return value
+
+
+def iter_snapshot(path, chunk=SNAPSHOT_CHUNK):
+    """``(key, record)`` from a ``{key: [records] or "JSON string"}`` file, record by record."""
+    with open(path, encoding='utf-8') as f:
+        s = _JsonStream(f, chunk)
+        s.expect('{')
+        if s.peek() == '}':
+            return
+        while True:
+            key = s.value()
+            s.expect(':')
+            if s.peek() == '[':
+                s.expect('[')
+                if s.peek() == ']':
+                    s.expect(']')
+                else:
+                    while True:
+                        yield key, s.value()
+                        if s.expect(',]') == ']':
+                            break
+            else:
+                value = s.value()
+                if isinstance(value, str):  # localStorage keeps every collection as a string
+                    try:
+                        value = json.loads(value)
+                    except ValueError:
+                        value = None
+                if isinstance(value, list):
+                    for record in value:
+                        yield key, record
+            if s.expect(',}') == '}':
+                return
+
+
+def _iter_jsonl(path, key):
+    with open(path, encoding='utf-8') as f:
+        for n, line in enumerate(f, 1):
+            if line.strip():
+                try:
+                    yield key, json.loads(line)
+                except ValueError as e:
+                    raise SourceError(f'{path}:{n}: {e}') from None
+
+
+def iter_dp(path):
+    """``(key, record)`` pairs from a ``dp_*`` export; see the module docstring for the forms."""
+    if os.path.isdir(path):
+        if os.path.exists(os.path.join(path, 'manifest.json')):
+            with open(os.path.join(path, 'manifest.json'), encoding='utf-8') as f:
+                keys = list(json.load(f)['files'])
+            for key in keys:
+                for record in iter_records(path, key):
+                    yield key, record
+            return
+        for name in sorted(os.listdir(path)):
+            full = os.path.join(path, name)
+            if name.endswith('.jsonl'):
+                yield from _iter_jsonl(full, name[:-len('.jsonl')])
+            elif name.endswith('.json'):
+                key = name[:-len('.json')]
+                with open(full, encoding='utf-8') as f:
+                    records = json.load(f)
+                if isinstance(records, list):
+                    for record in records:
+                        yield key, record
+        return
+    if path.endswith('.jsonl'):
+        yield from _iter_jsonl(path, os.path.basename(path)[:-len('.jsonl')])
+        return
+    yield from iter_snapshot(path)
@@ -0,0 +1 @@
+"""Build steps for the static files under public/, and a server for them."""
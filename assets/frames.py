@@ -0,0 +1,287 @@
+"""Transcode the hero frame sequence into WebP/AVIF at several widths.
+
+The home page scrubs through ``public/hero-frames/frame-001.jpg`` …
+``frame-061.jpg``, 1920 px JPEGs of about 215 KB each, all fetched up front.
+This step writes every frame as
+
+    public/hero-frames/<format>/<width>/frame-NNN.<ext>
+
+and a manifest the page's ``FRAME_PATH`` helper reads to choose a variant:
+
+    {"frames": 61, "pad": 3,
+     "variants": [{"format": "avif", "type": "image/avif", "width": 960, "height": 534,
+                   "path": "/hero-frames/avif/960/frame-{frame}.avif", "bytes": 1843221}, ...],
+     "fallback": {"format": "jpeg", "type": "image/jpeg", ..., "path": "/hero-frames/frame-{frame}.jpg"},
+     "sources": [{"file": "frame-001.jpg", "sha256": "..."}, ...]}
+
+``{frame}`` is the 1-based frame number zero-padded to ``pad`` digits.
+Variants are listed best first (AVIF, then WebP, each by width).
+
+Frames are decoded once and encoded at every width and format in a worker
+process, one frame per task across ``--jobs`` processes. Re-runs are
+incremental. ``assets/.cache/frames.json`` records each source's size, mtime
+and SHA-256, and the source digest and encoder settings behind each output.
+A frame is re-encoded only for outputs that are missing or whose source or
+settings changed. The hash step itself is skipped when the size and mtime
+are unchanged.
+
+    python -m assets.frames [--src public/hero-frames] [--url /hero-frames]
+                            [--widths 640,960,1280,1920] [--formats avif,webp] [--jobs N] [--force]
+
+Manifest paths are ``--url`` plus the file's path under ``--src``. ``--url``
+defaults to where ``--src`` sits under ``public/``; a ``--src`` elsewhere
+needs it.
+
+The variants, ``manifest.json`` and the packs of ``assets.pack`` are build
+outputs and are not committed. ``npm run build`` makes them first (the
+``prebuild`` script). Without them the page plays the original JPEGs.
+
+Pillow (with WebP and AVIF support, as in its wheels since 11.2) is
+required.
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+try:
+    from PIL import Image
+except ImportError:  # reported by main(); the module stays importable
+    Image = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PUBLIC = os.path.join(ROOT, 'public')
+SRC_DIR = os.path.join(PUBLIC, 'hero-frames')
+CACHE_PATH = os.path.join(ROOT, 'assets', '.cache', 'frames.json')
+FRAME_RE = re.compile(r'frame-(\d+)\.jpe?g$')
+
+WIDTHS = (640, 960, 1280, 1920)
+# format → (file extension, MIME type, Pillow save options). The frames sit
+# under a 70% overlay on the page, so fairly low qualities are invisible.
+FORMATS = {
+    'avif': ('avif', 'image/avif', {'quality': 45, 'speed': 6}),
+    'webp': ('webp', 'image/webp', {'quality': 70, 'method': 6}),
+}
+
+
+def write_bytes_atomic(path, data):
+    """Write ``data`` to ``path`` via a temp file in the same directory."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def sha256_file(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def settings(fmt, width):
+    """The encoder settings an output depends on, as a cache key."""
+    return json.dumps([fmt, width, FORMATS[fmt][2]], sort_keys=True)
+
+
+def output_path(out_dir, fmt, width, name):
+    stem = os.path.splitext(name)[0]
+    return os.path.join(out_dir, fmt, str(width), f'{stem}.{FORMATS[fmt][0]}')
+
+
+def sources(src_dir):
+    """``[(frame number, file name)]`` of the sequence, in order."""
+    found = []
+    for name in os.listdir(src_dir):
+        m = FRAME_RE.match(name)
+        if m:
+            found.append((int(m[1]), name))
+    return sorted(found)
+
+
+def encode_frame(src, out_dir, name, outputs):
+    """Decode ``src`` once and write each ``(format, width)`` of ``outputs``; returns their sizes."""
+    with Image.open(src) as im:
+        im = im.convert('RGB')
+    written = {}
+    for width in sorted({w for _, w in outputs}, reverse=True):
+        size = im.size if width >= im.width else (width, round(im.height * width / im.width))
+        scaled = im if size == im.size else im.resize(size, Image.LANCZOS, reducing_gap=3.0)
+        for fmt in sorted(f for f, w in outputs if w == width):
+            buf = io.BytesIO()
+            scaled.save(buf, FORMATS[fmt][0].upper(), **FORMATS[fmt][2])
+            path = output_path(out_dir, fmt, width, name)
+            write_bytes_atomic(path, buf.getvalue())
+            written[fmt, width] = len(buf.getvalue())
+    return name, written
+
+
+class FrameCache:
+    """Source digests by stat, and what each output was built from."""
+
+    def __init__(self, path=CACHE_PATH):
+        self.path = path
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            data = {}
+        self.sources = data.get('sources', {})
+        self.outputs = data.get('outputs', {})
+
+    def digest(self, path):
+        st = os.stat(path)
+        entry = self.sources.get(path)
+        if entry and entry['size'] == st.st_size and entry['mtime_ns'] == st.st_mtime_ns:
+            return entry['sha256']
+        digest = sha256_file(path)
+        self.sources[path] = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'sha256': digest}
+        return digest
+
+    def fresh(self, output, digest, key):
+        entry = self.outputs.get(output)
+        return entry is not None and entry == [digest, key] and os.path.exists(output)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        data = json.dumps({'sources': self.sources, 'outputs': self.outputs}, indent=1, sort_keys=True)
+        write_bytes_atomic(self.path, (data + '\n').encode('utf-8'))
+
+
+def base_url(src_dir, url=None):
+    """The URL ``src_dir`` is served at: ``url``, or its place under ``public/``."""
+    if url is not None:
+        return '/' + url.strip('/') if url.strip('/') else ''
+    rel = os.path.relpath(os.path.abspath(src_dir), PUBLIC)
+    if rel == os.pardir or rel.startswith(os.pardir + os.sep):
+        raise ValueError(f'{src_dir} is not under {PUBLIC}; pass the URL it is served at')
+    return '' if rel == os.curdir else '/' + rel.replace(os.sep, '/')
+
+
+def _url(base, src_dir, path):
+    return base + '/' + os.path.relpath(path, src_dir).replace(os.sep, '/')
+
+
+def build_manifest(src_dir, frames, widths, formats, digests, base):
+    """The manifest for ``frames`` as written in ``src_dir`` (served at ``base``), with byte totals from disk."""
+    first = os.path.join(src_dir, frames[0][1])
+    with Image.open(first) as im:
+        src_w, src_h = im.size
+    pad = len(FRAME_RE.match(frames[0][1])[1])
+    stem = os.path.splitext(frames[0][1])[0][:-pad]
+    ext = os.path.splitext(frames[0][1])[1]
+    variants = []
+    for fmt in formats:
+        for width in sorted(set(min(w, src_w) for w in widths)):
+            paths = [output_path(src_dir, fmt, width, name) for _, name in frames]
+            pattern = os.path.join(os.path.dirname(paths[0]), f'{stem}{{frame}}.{FORMATS[fmt][0]}')
+            variants.append({
+                'format': fmt, 'type': FORMATS[fmt][1], 'width': width, 'height': round(src_h * width / src_w),
+                'path': _url(base, src_dir, pattern),
+                'bytes': sum(os.path.getsize(p) for p in paths),
+            })
+    return {
+        'frames': len(frames), 'pad': pad,
+        'variants': variants,
+        'fallback': {'format': 'jpeg', 'type': 'image/jpeg', 'width': src_w, 'height': src_h,
+                     'path': _url(base, src_dir, os.path.join(src_dir, f'{stem}{{frame}}{ext}')),
+                     'bytes': sum(os.path.getsize(os.path.join(src_dir, n)) for _, n in frames)},
+        'sources': [{'file': name, 'sha256': digests[name]} for _, name in frames],
+    }
+
+
+def run(src_dir=SRC_DIR, widths=WIDTHS, formats=tuple(FORMATS), jobs=None, force=False, cache_path=CACHE_PATH,
+        url=None):
+    """Bring every output and the manifest up to date; returns ``(manifest, frames encoded)``."""
+    base = base_url(src_dir, url)
+    frames = sources(src_dir)
+    if not frames:
+        raise FileNotFoundError(f'no frame-NNN.jpg files in {src_dir}')
+    cache = FrameCache(cache_path)
+    with Image.open(os.path.join(src_dir, frames[0][1])) as im:
+        src_w = im.width
+    targets = [(fmt, w) for fmt in formats for w in sorted(set(min(w, src_w) for w in widths))]
+
+    digests, todo = {}, []
+    for _, name in frames:
+        src = os.path.join(src_dir, name)
+        digest = digests[name] = cache.digest(src)
+        stale = [(fmt, w) for fmt, w in targets
+                 if force or not cache.fresh(output_path(src_dir, fmt, w, name), digest, settings(fmt, w))]
+        if stale:
+            todo.append((src, name, stale))
+
+    if todo:
+        with ProcessPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+            futures = [pool.submit(encode_frame, src, src_dir, name, stale) for src, name, stale in todo]
+            for future in as_completed(futures):
+                name, written = future.result()
+                for fmt, w in written:
+                    cache.outputs[output_path(src_dir, fmt, w, name)] = [digests[name], settings(fmt, w)]
+    cache.save()
+
+    manifest = build_manifest(src_dir, frames, widths, formats, digests, base)
+    text = json.dumps(manifest, ensure_ascii=False, indent=1) + '\n'
+    manifest_path = os.path.join(src_dir, 'manifest.json')
+    try:
+        with open(manifest_path, encoding='utf-8') as f:
+            unchanged = f.read() == text
+    except FileNotFoundError:
+        unchanged = False
+    if not unchanged:
+        write_bytes_atomic(manifest_path, text.encode('utf-8'))
+    return manifest, len(todo)
+
+
+def _csv(value):
+    return [v for v in value.split(',') if v]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Transcode the hero frames into WebP/AVIF variants.')
+    parser.add_argument('--src', default=SRC_DIR, help='directory holding frame-NNN.jpg')
+    parser.add_argument('--url', help='URL --src is served at (default: its path under public/)')
+    parser.add_argument('--widths', type=lambda v: [int(w) for w in _csv(v)], default=list(WIDTHS))
+    parser.add_argument('--formats', type=_csv, default=list(FORMATS))
+    parser.add_argument('--jobs', type=int, default=None, help='worker processes (default: all cores)')
+    parser.add_argument('--force', action='store_true', help='re-encode everything')
+    args = parser.parse_args(argv)
+
+    if Image is None:
+        sys.exit('assets.frames needs Pillow with WebP/AVIF support: pip install "pillow>=11.2"')
+    unknown = [f for f in args.formats if f not in FORMATS]
+    if unknown:
+        parser.error(f'unknown format: {", ".join(unknown)}; choose from {", ".join(FORMATS)}')
+    try:
+        base_url(args.src, args.url)
+    except ValueError as e:
+        parser.error(f'{e} with --url')
+
+    t0 = time.perf_counter()
+    manifest, encoded = run(os.path.abspath(args.src), args.widths, args.formats, args.jobs, args.force,
+                            url=args.url)
+    source = manifest['fallback']['bytes']
+    for v in manifest['variants']:
+        print(f'  {v["format"]:<5} {v["width"]:>5}px  {v["bytes"] / 1024:>9,.0f} KiB  '
+              f'{source / max(v["bytes"], 1):5.1f}x smaller')
+    print(f'{manifest["frames"]} frames, {encoded} re-encoded in {time.perf_counter() - t0:.1f}s '
+          f'(source {source / 1024:,.0f} KiB)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,232 @@
+"""Pack each hero frame variant into one file for HTTP Range delivery.
+
+The 61 per-frame URLs that ``assets.frames`` writes are 61 requests. This
+step concatenates the frames of each variant into
+
+    public/hero-frames/<format>/<width>/frames.pack
+
+and describes all packs in ``public/hero-frames/packs.json``:
+
+    {"frames": 61,
+     "packs": [{"format": "avif", "type": "image/avif", "width": 960, "height": 534,
+                "path": "/hero-frames/avif/960/frames.pack", "bytes": 1650112, "sha256": "...",
+                "preview": {"width": 240, "height": 134, "bytes": 21930,
+                            "frames": [[1, 0, 1820], [7, 1820, 1795], ...]},
+                "frames": [[21930, 24577], [46507, 24811], ...]}, ...]}
+
+``frames[i]`` is ``[offset, length]`` of frame ``i + 1``. Frames are stored
+in playback order, so frames ``a`` … ``b`` are the single range
+``bytes=frames[a-1][0]-(frames[b-1][0] + frames[b-1][1] - 1)``. When
+previews are on (``--keyframe-every``, default every 6th frame plus the
+last), the pack opens with low-quality keyframes, each ``[frame, offset,
+length]``. A first range of ``preview.bytes`` then gives the page something
+to scrub while the full frames stream in.
+
+Packs are written by streaming each frame file through a temp file next to
+the pack. Only one preview image is in memory at a time, never the pack. A
+pack is rebuilt only when its inputs change: the source digests from the
+frames manifest, the encoder settings and the preview settings. Run
+``python -m assets.frames`` first:
+
+    python -m assets.pack [--src public/hero-frames] [--formats avif,webp] [--widths 960,1280]
+                          [--keyframe-every 6] [--preview-width 240] [--force]
+
+Pillow is needed only to encode the previews (``--keyframe-every 0`` skips
+them).
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+
+from .frames import FORMATS, SRC_DIR, Image, write_bytes_atomic
+
+PACK_NAME = 'frames.pack'
+KEYFRAME_EVERY = 6
+PREVIEW_WIDTH = 240
+# Previews are upscaled and blurred by the overlay anyway.
+PREVIEW_OPTIONS = {'avif': {'quality': 20, 'speed': 8}, 'webp': {'quality': 30, 'method': 4},
+                   'jpeg': {'quality': 40, 'optimize': True}}
+BLOCK = 1 << 16
+
+
+class PackError(Exception):
+    pass
+
+
+@contextmanager
+def _atomic(path):
+    """A binary file that replaces ``path`` only if the block completes."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            yield f
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _local(src_dir, base, url):
+    """The file under ``src_dir`` that ``url`` names, ``src_dir`` being served at ``base``."""
+    if not url.startswith(base + '/') or '..' in url.split('/'):
+        raise PackError(f'{url} is not under {base or "/"}, where the manifest is served')
+    return os.path.join(src_dir, *url[len(base) + 1:].split('/'))
+
+
+def keyframes(count, every):
+    """1-based frame numbers that get a preview: every ``every``-th from 1, and the last."""
+    if every <= 0:
+        return []
+    return sorted(set(range(1, count + 1, every)) | {count})
+
+
+def encode_preview(src, fmt, width):
+    """``src`` scaled to ``width`` and encoded in ``fmt`` at preview quality, as bytes."""
+    with Image.open(src) as im:
+        im.draft('RGB', (width, width))  # JPEG decodes straight at a reduced scale
+        im = im.convert('RGB')
+    scaled = im.resize((width, round(im.height * width / im.width)), Image.LANCZOS)
+    buf = io.BytesIO()
+    scaled.save(buf, fmt.upper(), **PREVIEW_OPTIONS[fmt])
+    return buf.getvalue(), scaled.size
+
+
+def write_pack(path, frame_files, previews=()):
+    """Stream ``previews`` (``(frame, bytes)``) then ``frame_files`` into ``path``.
+
+    Returns ``(preview index, frame index, total bytes, sha256)``.
+    """
+    digest = hashlib.sha256()
+    offset = 0
+    preview_index, frame_index = [], []
+    with _atomic(path) as out:
+        for frame, data in previews:
+            out.write(data)
+            digest.update(data)
+            preview_index.append([frame, offset, len(data)])
+            offset += len(data)
+        for name in frame_files:
+            start = offset
+            with open(name, 'rb') as f:
+                while block := f.read(BLOCK):
+                    out.write(block)
+                    digest.update(block)
+                    offset += len(block)
+            if offset == start:
+                raise PackError(f'empty frame: {name}')
+            frame_index.append([start, offset - start])
+    return preview_index, frame_index, offset, digest.hexdigest()
+
+
+def _inputs_key(manifest, variant, every, preview_width):
+    settings = FORMATS.get(variant['format'], (None, None, None))[2]
+    data = [manifest['sources'], variant['path'], settings, every, preview_width,
+            PREVIEW_OPTIONS.get(variant['format'])]
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def run(src_dir=SRC_DIR, formats=None, widths=None, every=KEYFRAME_EVERY, preview_width=PREVIEW_WIDTH,
+        force=False):
+    """Bring the packs and ``packs.json`` up to date; returns ``(packs manifest, packs rebuilt)``."""
+    try:
+        with open(os.path.join(src_dir, 'manifest.json'), encoding='utf-8') as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        raise PackError(f'no manifest.json in {src_dir}; run python -m assets.frames first') from None
+    index_path = os.path.join(src_dir, 'packs.json')
+    try:
+        with open(index_path, encoding='utf-8') as f:
+            previous = {p['path']: p for p in json.load(f)['packs']}
+    except (FileNotFoundError, ValueError, KeyError):
+        previous = {}
+
+    chosen = [v for v in manifest['variants']
+              if (not formats or v['format'] in formats) and (not widths or v['width'] in widths)]
+    if not chosen:
+        raise PackError('no variant matches --formats/--widths')
+    count, pad = manifest['frames'], manifest['pad']
+    base = manifest['fallback']['path'].rsplit('/', 1)[0]  # the URL of src_dir itself
+    sources = [os.path.join(src_dir, s['file']) for s in manifest['sources']]
+    wanted = keyframes(count, every)
+    if wanted and Image is None:
+        raise PackError('previews need Pillow; pass --keyframe-every 0 to pack without them')
+
+    packs, rebuilt, preview_cache = [], 0, {}
+    for variant in chosen:
+        frame_files = [_local(src_dir, base, variant['path'].replace('{frame}', str(n).zfill(pad)))
+                       for n in range(1, count + 1)]
+        url = variant['path'].rsplit('/', 1)[0] + '/' + PACK_NAME
+        path = _local(src_dir, base, url)
+        key = _inputs_key(manifest, variant, every, preview_width)
+        old = previous.get(url)
+        if (not force and old and old.get('inputs') == key and os.path.exists(path)
+                and os.path.getsize(path) == old['bytes']):
+            packs.append(old)
+            continue
+        missing = [p for p in frame_files if not os.path.exists(p)]
+        if missing:
+            raise PackError(f'{len(missing)} frames missing for {url}, e.g. {missing[0]}')
+
+        fmt = variant['format']
+
+        def previews():
+            # Generated lazily so write_pack holds one preview at a time;
+            # each format's previews are shared by its widths.
+            for n in wanted:
+                if (fmt, n) not in preview_cache:
+                    preview_cache[fmt, n] = encode_preview(sources[n - 1], fmt, preview_width)
+                yield n, preview_cache[fmt, n][0]
+
+        preview_index, frame_index, size, digest = write_pack(path, frame_files, previews())
+        entry = {k: variant[k] for k in ('format', 'type', 'width', 'height')}
+        entry.update(path=url, bytes=size, sha256=digest, inputs=key)
+        if preview_index:
+            pw, ph = preview_cache[fmt, wanted[0]][1]
+            entry['preview'] = {'width': pw, 'height': ph,
+                                'bytes': frame_index[0][0], 'frames': preview_index}
+        entry['frames'] = frame_index
+        packs.append(entry)
+        rebuilt += 1
+
+    result = {'frames': count, 'packs': packs}
+    write_bytes_atomic(index_path, (json.dumps(result, separators=(',', ':')) + '\n').encode('utf-8'))
+    return result, rebuilt
+
+
+def _csv(value):
+    return [v for v in value.split(',') if v]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Pack the hero frame variants for Range delivery.')
+    parser.add_argument('--src', default=SRC_DIR, help='directory holding manifest.json')
+    parser.add_argument('--formats', type=_csv, default=None, help='default: every format in the manifest')
+    parser.add_argument('--widths', type=lambda v: [int(w) for w in _csv(v)], default=None)
+    parser.add_argument('--keyframe-every', type=int, default=KEYFRAME_EVERY,
+                        help='preview every n-th frame first; 0 for no previews')
+    parser.add_argument('--preview-width', type=int, default=PREVIEW_WIDTH)
+    parser.add_argument('--force', action='store_true', help='rebuild every pack')
+    args = parser.parse_args(argv)
+
+    try:
+        result, rebuilt = run(os.path.abspath(args.src), args.formats, args.widths,
+                              args.keyframe_every, args.preview_width, args.force)
+    except PackError as e:
+        sys.exit(str(e))
+    for p in result['packs']:
+        preview = p.get('preview')
+        head = f'{len(preview["frames"])} previews in {preview["bytes"] / 1024:,.0f} KiB' if preview else 'no previews'
+        print(f'  {p["format"]:<5} {p["width"]:>5}px  {p["bytes"] / 1024:>9,.0f} KiB  {head}')
+    print(f'{len(result["packs"])} packs, {rebuilt} rebuilt')
+
+
+if __name__ == '__main__':
+    main()
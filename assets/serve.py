@@ -0,0 +1,358 @@
+"""Serve ``public/`` for load tests the way the production CDN does.
+
+    python -m assets.serve [--root public] [--host 127.0.0.1] [--port 8080] [--max-age 0]
+
+An asyncio HTTP/1.1 server for GET and HEAD with keep-alive:
+
+* Strong ETags, from the SHA-256 of each file. Digests are computed once
+  and kept in ``assets/.cache/etags.json`` keyed by size and mtime (the
+  ``FrameCache`` of ``assets.frames``), so a restart hashes only files that
+  changed. A file changed while serving is re-hashed on its next request.
+* ``If-None-Match`` answers 304, and ``If-Range`` with a stale ETag gets
+  the whole file.
+* Single byte ranges (``bytes=a-b``, ``a-``, ``-n``) answer 206, as needed
+  for video seeking in ``preloader.mp4`` and for the frame packs.
+  Unsatisfiable ranges get 416. Multi-range requests get the whole file
+  rather than ``multipart/byteranges``.
+* Bodies over ``SMALL`` bytes go out with ``os.sendfile`` through
+  ``loop.sendfile``. Smaller ones, and everything where sendfile is
+  unavailable, are written from a shared read-only ``mmap`` of the file, so
+  no request reads a file into memory.
+* ``GET /__stats`` returns per-path counters: requests by status, body bytes
+  sent and bytes/s since start. Requests for paths that do not exist are
+  counted together under ``NOT_FOUND`` and found files under their own
+  path, so there are never more counters than files.
+
+Only regular files under ``--root`` are served; dot files (e.g. the temp
+files of an atomic write) are not.
+"""
+
+import argparse
+import asyncio
+import json
+import mimetypes
+import mmap
+import os
+import posixpath
+import stat
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from email.utils import formatdate
+from urllib.parse import unquote
+
+from .frames import PUBLIC, ROOT, FrameCache
+
+CACHE_PATH = os.path.join(ROOT, 'assets', '.cache', 'etags.json')
+STATS_PATH = '/__stats'
+NOT_FOUND = '(not found)'
+SMALL = 64 * 1024
+MAX_HEAD = 16 * 1024
+TYPES = {'.avif': 'image/avif', '.webp': 'image/webp', '.svg': 'image/svg+xml', '.mp4': 'video/mp4',
+         '.pack': 'application/octet-stream', '.json': 'application/json'}
+REASONS = {200: 'OK', 206: 'Partial Content', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found',
+           405: 'Method Not Allowed', 416: 'Range Not Satisfiable', 431: 'Request Header Fields Too Large'}
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(value, size):
+    """``(start, end)`` (end exclusive) of a ``Range`` header, or None to send the whole file.
+
+    Raises ``RangeNotSatisfiable`` when the range starts past the end of the
+    file.
+    """
+    unit, _, spec = value.partition('=')
+    if unit.strip().lower() != 'bytes' or ',' in spec:
+        return None
+    first, dash, last = spec.strip().partition('-')
+    if not dash:
+        return None
+    try:
+        if not first:  # the last n bytes
+            n = int(last)
+            if n <= 0 or size == 0:
+                raise RangeNotSatisfiable
+            return max(0, size - n), size
+        start = int(first)
+        end = int(last) + 1 if last else size
+    except ValueError:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable
+    if end <= start:
+        return None
+    return start, min(end, size)
+
+
+def _etag_matches(header, etag):
+    tags = [t.strip() for t in header.split(',')]
+    return '*' in tags or etag in tags or f'W/{etag}' in tags
+
+
+@dataclass
+class Entry:
+    """A servable file and its validators; the open file and mapping are shared by requests."""
+    path: str
+    size: int
+    mtime_ns: int
+    etag: str
+    type: str
+    modified: str
+    _file: object = field(default=None, repr=False)
+    _map: object = field(default=None, repr=False)
+
+    def file(self):
+        if self._file is None:
+            self._file = open(self.path, 'rb')
+        return self._file
+
+    def view(self):
+        """A read-only memoryview of the file; replaced files keep their old mapping until unused."""
+        if self._map is None:
+            self._map = mmap.mmap(self.file().fileno(), 0, access=mmap.ACCESS_READ) if self.size else b''
+        return memoryview(self._map)
+
+
+class FileIndex:
+    """Files under ``root`` by URL path, re-validated by ``stat`` on each lookup."""
+
+    def __init__(self, root, cache_path=CACHE_PATH):
+        self.root = os.path.realpath(root)
+        self.cache = FrameCache(cache_path)
+        self.entries = {}
+
+    def _entry(self, path, st):
+        ext = os.path.splitext(path)[1].lower()
+        kind = TYPES.get(ext) or mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        if kind.startswith('text/') or kind in ('application/json', 'image/svg+xml'):
+            kind += '; charset=utf-8'
+        return Entry(path, st.st_size, st.st_mtime_ns, f'"{self.cache.digest(path)[:32]}"', kind,
+                     formatdate(st.st_mtime_ns / 1e9, usegmt=True))
+
+    def scan(self):
+        """Hash every file up front (cheap when the cache is warm) and save the digests."""
+        for directory, dirs, files in os.walk(self.root):
+            dirs[:] = [d for d in dirs if not d.startswith('.')]
+            for name in files:
+                if name.startswith('.'):
+                    continue
+                path = os.path.join(directory, name)
+                st = os.stat(path)
+                self.entries['/' + os.path.relpath(path, self.root).replace(os.sep, '/')] = self._entry(path, st)
+        self.cache.save()
+        return len(self.entries)
+
+    async def lookup(self, url_path):
+        path = posixpath.normpath(url_path)
+        if not path.startswith('/') or '\0' in path or any(p.startswith('.') for p in path.split('/')[1:]):
+            return None
+        full = os.path.join(self.root, *path.split('/')[1:])
+        entry = self.entries.get(path)
+        try:
+            st = os.stat(full)
+        except OSError:
+            self.entries.pop(path, None)
+            return None
+        if not stat.S_ISREG(st.st_mode):
+            return None
+        if entry is None or entry.size != st.st_size or entry.mtime_ns != st.st_mtime_ns:
+            if not os.path.realpath(full).startswith(self.root + os.sep):
+                return None
+            # Hashing a large file would stall every other connection.
+            entry = await asyncio.get_running_loop().run_in_executor(None, self._entry, full, st)
+            self.entries[path] = entry
+        return entry
+
+
+@dataclass
+class PathStats:
+    requests: int = 0
+    bytes: int = 0
+    status: Counter = field(default_factory=Counter)
+
+
+class StaticServer:
+    def __init__(self, root=PUBLIC, max_age=0, cache_path=CACHE_PATH):
+        self.index = FileIndex(root, cache_path)
+        self.cache_control = f'public, max-age={max_age}'
+        self.stats = {}
+        self.started = time.monotonic()
+        self._date = (0, '')
+
+    def date(self):
+        now = int(time.time())
+        if self._date[0] != now:
+            self._date = (now, formatdate(now, usegmt=True))
+        return self._date[1]
+
+    def snapshot(self):
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        paths = {p: {'requests': s.requests, 'bytes': s.bytes, 'bytes_per_sec': round(s.bytes / elapsed, 1),
+                     'status': dict(s.status)} for p, s in sorted(self.stats.items())}
+        total = sum(s.bytes for s in self.stats.values())
+        return {'uptime': round(elapsed, 3), 'requests': sum(s.requests for s in self.stats.values()),
+                'bytes': total, 'bytes_per_sec': round(total / elapsed, 1), 'paths': paths}
+
+    def _count(self, path, status, sent):
+        s = self.stats.get(path)
+        if s is None:
+            s = self.stats[path] = PathStats()
+        s.requests += 1
+        s.bytes += sent
+        s.status[status] += 1
+
+    def _head(self, status, headers, keep_alive):
+        lines = [f'HTTP/1.1 {status} {REASONS[status]}', f'Date: {self.date()}',
+                 'Connection: ' + ('keep-alive' if keep_alive else 'close')]
+        lines += [f'{k}: {v}' for k, v in headers]
+        return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+    def _plain(self, writer, status, keep_alive, body=b'', headers=()):
+        writer.write(self._head(status, [('Content-Length', len(body)), *headers], keep_alive) + body)
+
+    async def handle(self, reader, writer):
+        try:
+            while await self._request(reader, writer):
+                pass
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _request(self, reader, writer):
+        """Answer one request; returns whether the connection stays open."""
+        try:
+            head = await reader.readuntil(b'\r\n\r\n')
+        except asyncio.IncompleteReadError:
+            return False
+        except asyncio.LimitOverrunError:
+            self._plain(writer, 431, False)
+            return False
+        lines = head.decode('latin-1').split('\r\n')
+        try:
+            method, target, version = lines[0].split(' ')
+        except ValueError:
+            self._plain(writer, 400, False)
+            return False
+        headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(':')
+            if name:
+                headers[name.strip().lower()] = value.strip()
+        connection = headers.get('connection', '').lower()
+        keep_alive = connection == 'keep-alive' if version == 'HTTP/1.0' else connection != 'close'
+
+        if method not in ('GET', 'HEAD'):
+            # A body we will not read would be taken for the next request.
+            self._plain(writer, 405, False, headers=[('Allow', 'GET, HEAD')])
+            return False
+        path = unquote(target.split('?', 1)[0])
+        if path == STATS_PATH:
+            body = json.dumps(self.snapshot()).encode('utf-8')
+            self._plain(writer, 200, keep_alive, body if method == 'GET' else b'',
+                        [('Content-Type', 'application/json'), ('Cache-Control', 'no-store')])
+            await writer.drain()
+            return keep_alive
+
+        entry = await self.index.lookup(path)
+        if entry is None:
+            self._plain(writer, 404, keep_alive)
+            self._count(NOT_FOUND, 404, 0)
+            await writer.drain()
+            return keep_alive
+        # Spellings of one file (``//a``, ``/b/../a``) share its counters.
+        path = '/' + os.path.relpath(entry.path, self.index.root).replace(os.sep, '/')
+        await self._send_file(writer, method, path, entry, headers, keep_alive)
+        return keep_alive
+
+    async def _send_file(self, writer, method, path, entry, headers, keep_alive):
+        common = [('ETag', entry.etag), ('Cache-Control', self.cache_control), ('Accept-Ranges', 'bytes'),
+                  ('Last-Modified', entry.modified)]
+        if 'if-none-match' in headers and _etag_matches(headers['if-none-match'], entry.etag):
+            writer.write(self._head(304, common, keep_alive))
+            self._count(path, 304, 0)
+            await writer.drain()
+            return
+
+        status, start, end = 200, 0, entry.size
+        wanted = headers.get('range')
+        if wanted and headers.get('if-range', entry.etag) == entry.etag:
+            try:
+                span = parse_range(wanted, entry.size)
+            except RangeNotSatisfiable:
+                self._plain(writer, 416, keep_alive, headers=[('Content-Range', f'bytes */{entry.size}'), *common])
+                self._count(path, 416, 0)
+                await writer.drain()
+                return
+            if span:
+                status, (start, end) = 206, span
+        out = [('Content-Type', entry.type), ('Content-Length', end - start), *common]
+        if status == 206:
+            out.append(('Content-Range', f'bytes {start}-{end - 1}/{entry.size}'))
+        head = self._head(status, out, keep_alive)
+        if method == 'HEAD' or start == end:
+            writer.write(head)
+            await writer.drain()
+        elif end - start <= SMALL:
+            writer.write(head + entry.view()[start:end])
+            await writer.drain()
+        else:
+            writer.write(head)
+            try:
+                await asyncio.get_running_loop().sendfile(writer.transport, entry.file(), start, end - start,
+                                                          fallback=False)
+            except asyncio.SendfileNotAvailableError:
+                view = entry.view()
+                for offset in range(start, end, 1 << 20):
+                    writer.write(view[offset:min(offset + (1 << 20), end)])
+                    await writer.drain()
+        self._count(path, status, 0 if method == 'HEAD' else end - start)
+
+
+def _raise_file_limit():
+    """Thousands of keep-alive connections need more descriptors than the usual soft limit of 1024."""
+    try:
+        import resource
+    except ImportError:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard == resource.RLIM_INFINITY or soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard if hard != resource.RLIM_INFINITY else 65536, hard))
+
+
+async def serve(args):
+    server = StaticServer(args.root, args.max_age)
+    t0 = time.perf_counter()
+    count = server.index.scan()
+    print(f'indexed {count} files under {server.index.root} in {time.perf_counter() - t0:.2f}s', file=sys.stderr)
+    listener = await asyncio.start_server(server.handle, args.host, args.port, backlog=args.backlog,
+                                          limit=MAX_HEAD)
+    print(f'serving on http://{args.host}:{args.port}/ (stats at {STATS_PATH})', file=sys.stderr)
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.index.cache.save()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve public/ with ETags, Range and sendfile.')
+    parser.add_argument('--root', default=PUBLIC)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--max-age', type=int, default=0, help='Cache-Control max-age in seconds')
+    parser.add_argument('--backlog', type=int, default=4096)
+    args = parser.parse_args(argv)
+    _raise_file_limit()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
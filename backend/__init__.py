@@ -0,0 +1,6 @@
+"""Python reference backend for the services in src/lib/storage.ts.
+
+Records keep the exact shapes (and camelCase field names) of the TypeScript
+interfaces, so anything the frontend stores under ``dp_*`` keys can be
+loaded here unchanged.
+"""
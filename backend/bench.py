@@ -0,0 +1,485 @@
+"""Benchmarks of the storage.ts access patterns at growing data sizes.
+
+    python -m backend.bench [--backends json,memory,sqlite] [--workloads messaging,vacancies,profiles]
+                            [--sizes 1000,10000,100000,1000000] [--ops 2000] [--seconds 10]
+                            [--output results.json]
+
+``json`` is the baseline. It is a faithful port of storage.ts over an emulated
+localStorage, in which every ``get`` parses the whole key and every ``set``
+re-serializes it. ``memory`` is ``backend.services.Database``, ``sqlite``
+is ``backend.sqlite_store.SqliteDatabase`` and ``log`` is ``memory`` with
+messaging on ``backend.message_log``. More backends plug into ``BACKENDS``.
+
+A workload is a weighted mix of service calls taken from the pages that use
+them, for example the messages page polling ``getMessages`` around
+``sendMessage`` and ``markRead``. Its primary collection is generated with
+``backend.generate`` at each ``--sizes`` value. Every (backend, workload, size)
+case runs in a fresh process, so ``peak_rss_kb`` belongs to that case alone.
+A case stops after ``--ops`` calls or ``--seconds``, whichever comes first.
+
+The JSON report lists ops/s, p50/p99 latency (overall and per operation),
+bytes serialized and parsed per operation (baseline only), and peak RSS.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+from .generate import Plan, Shard, dataset
+from .message_log import LogMessaging, MessageLog
+from .services import Database, ServiceError, check_subscription, js_round, now, uid
+from .sqlite_store import SqliteDatabase
+
+# ── whole-key JSON baseline ──
+
+
+class LocalStorage:
+    """``localStorage`` with byte accounting: values are strings, as in the browser."""
+
+    def __init__(self):
+        self.items = {}
+        self.written = 0
+        self.read = 0
+
+    def get(self, key):
+        raw = self.items.get(key)
+        if raw is None:
+            return []
+        self.read += len(raw.encode('utf-8'))
+        return json.loads(raw)
+
+    def set(self, key, data):
+        raw = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+        self.written += len(raw.encode('utf-8'))
+        self.items[key] = raw
+
+
+class _JsonService:
+    def __init__(self, db):
+        self.ls = db.ls
+        self.db = db
+
+
+class JsonAuth(_JsonService):
+    def login(self, email, password):
+        user = next((u for u in self.ls.get('dp_users') if u['email'] == email and u['password'] == password), None)
+        if not user:
+            raise ServiceError('Неверный email или пароль')
+        check_subscription(user)
+        self.ls.set('dp_current_user', user)
+        return user
+
+    def get_user(self, id):
+        return next((u for u in self.ls.get('dp_users') if u['id'] == id), None)
+
+    def toggle_favorite(self, user_id, target_id):
+        users = self.ls.get('dp_users')
+        user = next((u for u in users if u['id'] == user_id), None)
+        if user is None:
+            return
+        favs = user.get('favorites') or []
+        user['favorites'] = [f for f in favs if f != target_id] if target_id in favs else favs + [target_id]
+        self.ls.set('dp_users', users)
+        current = self.ls.items.get('dp_current_user')
+        if current is not None and json.loads(current).get('id') == user_id:
+            self.ls.set('dp_current_user', user)
+
+
+class JsonVacancies(_JsonService):
+    def get_all(self):
+        return [v for v in self.ls.get('dp_vacancies') if v['status'] == 'active']
+
+    def get_by_id(self, id):
+        return next((v for v in self.ls.get('dp_vacancies') if v['id'] == id), None)
+
+    def get_by_employer(self, employer_id):
+        return [v for v in self.ls.get('dp_vacancies') if v['employerId'] == employer_id]
+
+    def create(self, data):
+        all_ = self.ls.get('dp_vacancies')
+        employer = self.db.auth.get_user(data['employerId'])
+        v = dict(data, id=uid(), createdAt=now(), applications=[], status='active',
+                 isVerified=bool(employer and employer.get('isVerified')))
+        all_.append(v)
+        self.ls.set('dp_vacancies', all_)
+        return v
+
+    def apply(self, vacancy_id, specialist_id, specialist_name, message):
+        all_ = self.ls.get('dp_vacancies')
+        v = next((v for v in all_ if v['id'] == vacancy_id), None)
+        if v is None:
+            raise ServiceError('Вакансия не найдена')
+        if any(a['specialistId'] == specialist_id for a in v['applications']):
+            raise ServiceError('Вы уже откликнулись на эту вакансию')
+        app = {'id': uid(), 'vacancyId': vacancy_id, 'specialistId': specialist_id,
+               'specialistName': specialist_name, 'message': message, 'status': 'pending', 'createdAt': now()}
+        v['applications'].append(app)
+        self.ls.set('dp_vacancies', all_)
+        return app
+
+
+class JsonMessaging(_JsonService):
+    def get_conversations(self, user_id):
+        return [c for c in self.ls.get('dp_conversations') if user_id in c['participantIds']]
+
+    def get_messages(self, conversation_id):
+        return [m for m in self.ls.get('dp_messages') if m['conversationId'] == conversation_id]
+
+    def send_message(self, conversation_id, sender_id, sender_name, receiver_id, text):
+        msgs = self.ls.get('dp_messages')
+        msg = {'id': uid(), 'conversationId': conversation_id, 'senderId': sender_id, 'senderName': sender_name,
+               'receiverId': receiver_id, 'text': text, 'createdAt': now(), 'read': False}
+        msgs.append(msg)
+        self.ls.set('dp_messages', msgs)
+        convs = self.ls.get('dp_conversations')
+        conv = next((c for c in convs if c['id'] == conversation_id), None)
+        if conv is not None:
+            conv['lastMessage'] = text
+            conv['lastMessageAt'] = now()
+            conv['unreadCount'][receiver_id] = conv['unreadCount'].get(receiver_id, 0) + 1
+            self.ls.set('dp_conversations', convs)
+        return msg
+
+    def mark_read(self, conversation_id, user_id):
+        msgs = self.ls.get('dp_messages')
+        for m in msgs:
+            if m['conversationId'] == conversation_id and m['receiverId'] == user_id:
+                m['read'] = True
+        self.ls.set('dp_messages', msgs)
+        convs = self.ls.get('dp_conversations')
+        conv = next((c for c in convs if c['id'] == conversation_id), None)
+        if conv is not None:
+            conv['unreadCount'][user_id] = 0
+            self.ls.set('dp_conversations', convs)
+
+
+class JsonReviews(_JsonService):
+    def create(self, data):
+        all_ = self.ls.get('dp_reviews')
+        r = dict(data, id=uid(), createdAt=now())
+        all_.append(r)
+        self.ls.set('dp_reviews', all_)
+        ratings = [rv['rating'] for rv in all_ if rv['targetId'] == data['targetId']]
+        users = self.ls.get('dp_users')
+        user = next((u for u in users if u['id'] == data['targetId']), None)
+        if user is not None:
+            user['rating'] = js_round(sum(ratings) / len(ratings), 1)
+            user['reviewCount'] = len(ratings)
+            self.ls.set('dp_users', users)
+        return r
+
+
+class JsonCollectivePurchases(_JsonService):
+    def get_all(self):
+        return self.ls.get('dp_collective_purchases')
+
+    def join(self, purchase_id, user_id, user_name, quantity):
+        all_ = self.ls.get('dp_collective_purchases')
+        p = next((p for p in all_ if p['id'] == purchase_id), None)
+        if p is None:
+            return
+        existing = next((x for x in p['participants'] if x['userId'] == user_id), None)
+        if existing:
+            existing['quantity'] += quantity
+        else:
+            p['participants'].append({'userId': user_id, 'userName': user_name, 'quantity': quantity,
+                                      'joinedAt': now()})
+        p['currentVolume'] = sum(x['quantity'] for x in p['participants'])
+        if p['currentVolume'] >= p['targetVolume']:
+            p['status'] = 'completed'
+        self.ls.set('dp_collective_purchases', all_)
+
+
+class JsonTraining(_JsonService):
+    def get_all_graduates(self):
+        return [e for e in self.ls.get('dp_training_enrollments') if e['status'] == 'completed']
+
+    def complete(self, enrollment_id):
+        all_ = self.ls.get('dp_training_enrollments')
+        e = next((e for e in all_ if e['id'] == enrollment_id), None)
+        if e is None:
+            raise ServiceError('Запись не найдена')
+        completed = sum(1 for x in all_ if x['status'] == 'completed')
+        number = f'UC-{time.localtime().tm_year}-{completed + 1:03d}'
+        e.update(status='completed', completedAt=now(), certificateNumber=number)
+        self.ls.set('dp_training_enrollments', all_)
+        users = self.ls.get('dp_users')
+        user = next((u for u in users if u['id'] == e['userId']), None)
+        if user is not None:
+            user.update(isCertified=True, certificateNumber=number)
+            self.ls.set('dp_users', users)
+        return e
+
+
+class JsonDatabase:
+    """The storage.ts services the workloads call, over whole-key JSON values."""
+
+    SERVICES = {'auth': JsonAuth, 'vacancies': JsonVacancies, 'messaging': JsonMessaging, 'reviews': JsonReviews,
+                'collectivePurchases': JsonCollectivePurchases, 'training': JsonTraining}
+
+    def __init__(self, data):
+        self.ls = LocalStorage()
+        for key, records in data.items():
+            self.ls.set(key, records)
+        self.ls.written = 0
+        self.services = {name: cls(self) for name, cls in self.SERVICES.items()}
+        self.auth = self.services['auth']
+
+
+def _log(data, workdir):
+    db = Database({k: v for k, v in data.items() if k not in ('dp_conversations', 'dp_messages')})
+    log = MessageLog(os.path.join(workdir, 'messages'))
+    log.load(data.get('dp_conversations', ()), data.get('dp_messages', ()))
+    db.services['messaging'] = LogMessaging(log)
+    return db
+
+
+def _sqlite(data, workdir):
+    db = SqliteDatabase(os.path.join(workdir, 'bench.db'))
+    db.load(data)
+    return db
+
+
+# name → factory(data, workdir)
+BACKENDS = {
+    'json': lambda data, workdir: JsonDatabase(data),
+    'memory': lambda data, workdir: Database(data),
+    'sqlite': _sqlite,
+    'log': _log,
+}
+
+# ── workloads ──
+
+
+def _users(n):
+    """Role counts for a user base of about ``n`` (never empty)."""
+    return {'employers': max(5, n // 10), 'specialists': max(10, n * 3 // 10),
+            'clients': max(10, n * 6 // 10), 'suppliers': 1}
+
+
+@dataclass
+class Workload:
+    name: str
+    counts: object  # size → counts overriding zeros
+    ops: list       # (weight, name, fn(case))
+
+
+class Case:
+    """State shared by the operations of one run."""
+
+    def __init__(self, plan, db, seed):
+        self.plan = plan
+        self.c = plan.counts
+        self.db = db
+        self.s = db.services
+        self.rng = random.Random(seed)
+        self._shard = Shard(plan, 'conversations', 0, 0)
+
+    def pick(self, role):
+        return self._shard.who(role, self.rng.randrange(self.c[f'{role}s']))
+
+    def conversation(self):
+        i = self.rng.randrange(self.c['conversations'])
+        return f'conv{i + 1}', *self._shard._pair(i)
+
+
+def _send(case):
+    cid, a, b = case.conversation()
+    case.s['messaging'].send_message(cid, a.id, a.display, b.id, 'Добрый день! Когда удобно подъехать?')
+
+
+def _mark_read(case):
+    cid, a, b = case.conversation()
+    case.s['messaging'].mark_read(cid, b.id)
+
+
+def _create_vacancy(case):
+    emp = case.pick('employer')
+    case.s['vacancies'].create({'employerId': emp.id, 'companyName': emp.display, 'title': 'Автомойщик',
+                                'city': emp.city, 'district': emp.district, 'salary': 'от 60 000 ₽',
+                                'schedule': '2/2', 'experience': 'без опыта', 'description': 'Ищем мойщика.',
+                                'requirements': [], 'isHot': False})
+
+
+def _apply(case):
+    spec = case.pick('specialist')
+    vac = f'vac{case.rng.randrange(case.c["vacancies"]) + 1}'
+    case.s['vacancies'].apply(vac, spec.id, spec.name, 'Здравствуйте! Готов выйти на этой неделе.')
+
+
+def _review(case):
+    target, author = case.pick('specialist'), case.pick('client')
+    case.s['reviews'].create({'targetId': target.id, 'targetType': 'specialist', 'authorId': author.id,
+                              'authorName': author.name, 'rating': case.rng.randint(1, 5), 'text': 'Все отлично.'})
+
+
+def _login(case):
+    user = case.pick(case.rng.choice(('employer', 'specialist', 'client')))
+    case.s['auth'].login(f'{user.id}@test.com', '123456')
+
+
+WORKLOADS = {w.name: w for w in [
+    # The messages page: polling a thread, replying, opening unread threads.
+    Workload('messaging',
+             lambda n: dict(_users(max(100, n // 20)), messages=n, conversations=max(1, n // 10)), [
+                 (40, 'getMessages', lambda case: case.s['messaging'].get_messages(case.conversation()[0])),
+                 (30, 'sendMessage', _send),
+                 (15, 'markRead', _mark_read),
+                 (15, 'getConversations',
+                  lambda case: case.s['messaging'].get_conversations(case.pick('specialist').id)),
+             ]),
+    # The vacancies board and employer dashboard.
+    Workload('vacancies',
+             lambda n: dict(_users(max(100, n // 5)), vacancies=n, applications=n * 2), [
+                 (40, 'getAll', lambda case: case.s['vacancies'].get_all()),
+                 (25, 'getById',
+                  lambda case: case.s['vacancies'].get_by_id(f'vac{case.rng.randrange(case.c["vacancies"]) + 1}')),
+                 (20, 'getByEmployer', lambda case: case.s['vacancies'].get_by_employer(case.pick('employer').id)),
+                 (12, 'apply', _apply),
+                 (3, 'create', _create_vacancy),
+             ]),
+    # Logins, profile views, reviews and favorites over a growing user base.
+    Workload('profiles',
+             lambda n: dict(_users(n), reviews=n), [
+                 (30, 'login', _login),
+                 (40, 'getUser', lambda case: case.s['auth'].get_user(case.pick('specialist').id)),
+                 (20, 'reviews.create', _review),
+                 (10, 'toggleFavorite',
+                  lambda case: case.s['auth'].toggle_favorite(case.pick('client').id, case.pick('employer').id)),
+             ]),
+]}
+
+
+def _percentile(sorted_ns, q):
+    if not sorted_ns:
+        return None
+    return sorted_ns[min(len(sorted_ns) - 1, int(q * len(sorted_ns)))] / 1e6
+
+
+def _rss_kb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def run_case(backend, workload, size, max_ops, max_seconds, seed):
+    """Build, load and drive one case; runs in its own process."""
+    w = WORKLOADS[workload]
+    counts = dict.fromkeys(Plan().counts, 0)
+    counts.update(w.counts(size))
+    plan = Plan(seed=seed, counts=counts)
+    data = dataset(plan)
+    workdir = tempfile.mkdtemp(prefix='dp-bench-')
+    try:
+        start = time.perf_counter()
+        db = BACKENDS[backend](data, workdir)
+        load_seconds = time.perf_counter() - start
+        del data
+        rss_loaded = _rss_kb()
+
+        case = Case(plan, db, seed)
+        weights = [wt for wt, _, _ in w.ops]
+        per_op = {name: [] for _, name, _ in w.ops}
+        ls = getattr(db, 'ls', None)
+        errors = 0
+        deadline = time.perf_counter() + max_seconds
+        ops = 0
+        started = time.perf_counter()
+        while ops < max_ops and time.perf_counter() < deadline:
+            _, name, fn = case.rng.choices(w.ops, weights)[0]
+            t0 = time.perf_counter_ns()
+            try:
+                fn(case)
+            except ServiceError:
+                errors += 1
+            per_op[name].append(time.perf_counter_ns() - t0)
+            ops += 1
+        elapsed = time.perf_counter() - started
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    every = sorted(t for ts in per_op.values() for t in ts)
+    result = {
+        'backend': backend,
+        'workload': workload,
+        'size': size,
+        'records': sum(counts.values()),
+        'load_seconds': round(load_seconds, 3),
+        'ops': ops,
+        'errors': errors,
+        'seconds': round(elapsed, 3),
+        'ops_per_sec': round(ops / elapsed, 1) if elapsed else None,
+        'p50_ms': _percentile(every, 0.50),
+        'p99_ms': _percentile(every, 0.99),
+        # Only the whole-key baseline serializes; other backends report None.
+        'bytes_serialized_per_op': round(ls.written / max(ops, 1)) if ls else None,
+        'bytes_parsed_per_op': round(ls.read / max(ops, 1)) if ls else None,
+        'rss_after_load_kb': rss_loaded,
+        'peak_rss_kb': _rss_kb(),
+        'per_op': {},
+    }
+    for name, ts in per_op.items():
+        ts.sort()
+        result['per_op'][name] = {'count': len(ts), 'p50_ms': _percentile(ts, 0.5), 'p99_ms': _percentile(ts, 0.99)}
+    return result
+
+
+def run(backends, workloads, sizes, max_ops, max_seconds, seed=1):
+    """Run every case in a fresh worker process; yields results as they finish."""
+    ctx = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=ctx, max_tasks_per_child=1) as pool:
+        for workload in workloads:
+            for size in sizes:
+                for backend in backends:
+                    yield pool.submit(run_case, backend, workload, size, max_ops, max_seconds, seed).result()
+
+
+def _csv(value):
+    return [v for v in value.split(',') if v]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the storage.ts access patterns.')
+    parser.add_argument('--backends', type=_csv, default=list(BACKENDS))
+    parser.add_argument('--workloads', type=_csv, default=list(WORKLOADS))
+    parser.add_argument('--sizes', type=lambda v: [int(x) for x in _csv(v)], default=[1_000, 10_000, 100_000])
+    parser.add_argument('--ops', type=int, default=2_000, help='operations per case at most')
+    parser.add_argument('--seconds', type=float, default=10.0, help='time budget per case')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='write the JSON report here instead of stdout')
+    args = parser.parse_args(argv)
+
+    unknown = [b for b in args.backends if b not in BACKENDS] + [w for w in args.workloads if w not in WORKLOADS]
+    if unknown:
+        parser.error(f'unknown backend/workload: {", ".join(unknown)}')
+
+    results = []
+    for r in run(args.backends, args.workloads, args.sizes, args.ops, args.seconds, args.seed):
+        results.append(r)
+        print(f'{r["workload"]:<10} {r["size"]:>9,} {r["backend"]:<8} {r["ops_per_sec"] or 0:>11,.1f} ops/s  '
+              f'p50 {r["p50_ms"] or 0:8.3f} ms  p99 {r["p99_ms"] or 0:9.3f} ms  '
+              f'rss {r["peak_rss_kb"] / 1024:7.1f} MiB', file=sys.stderr)
+    report = {
+        'meta': {'python': platform.python_version(), 'platform': platform.platform(),
+                 'cpu_count': os.cpu_count(), 'seed': args.seed, 'ops': args.ops, 'seconds': args.seconds,
+                 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())},
+        'results': results,
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
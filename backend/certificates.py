@@ -0,0 +1,52 @@
+"""Certificate numbers for ``training.complete``.
+
+storage.ts numbers a certificate ``UC-<year>-<n>`` with ``n`` = (completed
+enrollments so far) + 1. That counts every year, costs a scan per
+completion, gives two simultaneous completions the same number, and issues a
+new number when an enrollment is completed twice. ``CertificateSequence``
+keeps the last number issued per year instead. It starts from the numbers
+already on record, and ``reserve`` hands out a whole block under one lock,
+so a cohort is numbered in a single step.
+
+The SQLite backend keeps the same counter in ``certificate_sequences``,
+maintained by triggers, and reserves from it inside the write transaction.
+"""
+
+import re
+import threading
+
+PREFIX = 'UC'
+_NUMBER_RE = re.compile(r'UC-(\d{4})-(\d+)$')
+
+
+def format_number(year, n):
+    return f'{PREFIX}-{year}-{n:03d}'
+
+
+def parse_number(number):
+    """``(year, n)`` of a certificate number, or None if it is not one."""
+    m = _NUMBER_RE.match(number or '')
+    return (int(m[1]), int(m[2])) if m else None
+
+
+class CertificateSequence:
+    """The last certificate number issued per year."""
+
+    def __init__(self, numbers=()):
+        self._last = {}
+        self._lock = threading.Lock()
+        for number in numbers:
+            parsed = parse_number(number)
+            if parsed:
+                year, n = parsed
+                self._last[year] = max(self._last.get(year, 0), n)
+
+    def last(self, year):
+        return self._last.get(year, 0)
+
+    def reserve(self, year, count=1):
+        """``count`` new, consecutive numbers for ``year``."""
+        with self._lock:
+            first = self._last.get(year, 0) + 1
+            self._last[year] = first + count - 1
+        return [format_number(year, n) for n in range(first, first + count)]
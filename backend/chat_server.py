@@ -0,0 +1,593 @@
+"""Real-time community chats over SSE and WebSocket.
+
+    python -m backend.chat_server [--host 127.0.0.1] [--port 8790] [--data dump.json] [--sqlite app.db]
+                                  [--ring 200] [--max-buffer 262144] [--flush-interval 0.25]
+
+``communityChat.getMessages(chatId)`` filters every ``dp_chat_messages``
+record, and ``/chats`` sees new messages only on reload. This asyncio server
+keeps each chat in memory as a ``Room`` and pushes new messages as they
+arrive:
+
+    GET  /chats/<chatId>/events      Server-Sent Events; resumes after Last-Event-ID (or ?since=<id>)
+    GET  /chats/<chatId>/ws          WebSocket; text frames in both directions, ?since=<id> as above
+    GET  /chats/<chatId>/messages    the room's recent messages as JSON (?limit=n)
+    POST /chats/<chatId>/messages    {"authorId", "authorName", "authorRole", "text", "imageUrl"?} → 201
+    GET  /__stats                    connections, subscribers per chat, drops, persistence
+
+A chat exists if it is one of ``mockData.mockChats`` (``backend.generate.CHATS``)
+or has stored messages; any other id is a 404. Each message is a JSON
+object shaped like ``communityChat.sendMessage`` returns, and its ``id`` is
+the SSE event id. A WebSocket client posts by
+sending the same fields as a text frame. It gets its own message back
+through the broadcast, and ``{"error": ...}`` if the message was refused.
+
+* A room holds the last ``--ring`` messages in a ``deque``. It is loaded
+  once from the store (``communityChat.getRecent``), so a new subscriber's
+  backfill comes from memory. A client resuming from an id that is no
+  longer in the ring gets a ``reset`` event (``{"reset": true, "chatId": n}``
+  as a WebSocket frame) instead of a replay, and refetches
+  ``GET /chats/<chatId>/messages``.
+* A room with no subscribers is dropped on the next keepalive sweep, once
+  its messages are stored.
+* A message is encoded once as an SSE event and once as a WebSocket
+  frame. Broadcasting writes those shared bytes straight to each
+  subscriber's transport, with no task or queue per subscriber.
+* Backpressure is per client. A subscriber whose unsent output exceeds
+  ``--max-buffer`` bytes is dropped (the connection is aborted), so one slow
+  reader never holds up its room. An SSE client reconnects with
+  Last-Event-ID and resumes from the ring.
+* New messages are broadcast first and stored later. A background task
+  writes them in batches through ``communityChat.saveMessages`` every
+  ``--flush-interval`` seconds, in a worker thread when the store is the
+  SQLite backend. A failed batch is retried on the next flush. Messages
+  from the last interval are lost if the process is killed.
+* Idle connections cost one suspended read each. A single sweep every
+  ``KEEPALIVE`` seconds sends SSE comments and WebSocket pings, which keeps
+  proxies from timing out and finds dead peers.
+
+Like ``backend.server``, the data is the seed data, ``--data`` or a
+``--sqlite`` database.
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import sys
+import time
+from collections import deque
+from urllib.parse import parse_qs, unquote
+
+from .generate import CHATS
+from .services import Database, now, uid
+
+RING = 200
+MAX_BUFFER = 256 * 1024
+FLUSH_INTERVAL = 0.25
+FLUSH_MAX = 1_000
+KEEPALIVE = 15
+MAX_HEAD = 16 * 1024
+MAX_BODY = 64 * 1024
+MAX_TEXT = 4_000
+WS_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+REASONS = {101: 'Switching Protocols', 200: 'OK', 201: 'Created', 204: 'No Content', 400: 'Bad Request',
+           404: 'Not Found', 405: 'Method Not Allowed', 411: 'Length Required', 413: 'Payload Too Large',
+           431: 'Request Header Fields Too Large'}
+CORS = [('Access-Control-Allow-Origin', '*')]
+SSE_PING = b': ping\n\n'
+TEXT, BINARY, CLOSE, PING, PONG = 0x1, 0x2, 0x8, 0x9, 0xA
+
+
+class BadRequest(Exception):
+    pass
+
+
+class NotFound(Exception):
+    pass
+
+
+class ProtocolError(Exception):
+    """A WebSocket peer broke the protocol; carries the close code."""
+
+    def __init__(self, code, reason):
+        super().__init__(reason)
+        self.code = code
+
+
+def ws_accept(key):
+    return base64.b64encode(hashlib.sha1((key + WS_GUID).encode('ascii')).digest()).decode('ascii')
+
+
+def ws_frame(opcode, payload=b''):
+    """One unmasked, unfragmented server frame."""
+    n = len(payload)
+    if n < 126:
+        head = bytes((0x80 | opcode, n))
+    elif n < 1 << 16:
+        head = bytes((0x80 | opcode, 126)) + n.to_bytes(2, 'big')
+    else:
+        head = bytes((0x80 | opcode, 127)) + n.to_bytes(8, 'big')
+    return head + payload
+
+
+def _unmask(payload, mask):
+    n = len(payload)
+    key = (mask * (n // 4 + 1))[:n]
+    return (int.from_bytes(payload, 'little') ^ int.from_bytes(key, 'little')).to_bytes(n, 'little')
+
+
+async def ws_read(reader, limit=MAX_BODY):
+    """The next ``(opcode, payload)`` from a client, with fragments joined and payloads unmasked."""
+    opcode, parts, size = None, [], 0
+    while True:
+        b0, b1 = await reader.readexactly(2)
+        fin, op, n = b0 & 0x80, b0 & 0x0F, b1 & 0x7F
+        if not b1 & 0x80:
+            raise ProtocolError(1002, 'client frames must be masked')
+        if n == 126:
+            n = int.from_bytes(await reader.readexactly(2), 'big')
+        elif n == 127:
+            n = int.from_bytes(await reader.readexactly(8), 'big')
+        if op >= CLOSE:
+            if not fin or n > 125:
+                raise ProtocolError(1002, 'bad control frame')
+        elif size + n > limit:
+            raise ProtocolError(1009, 'message too big')
+        mask = await reader.readexactly(4)
+        payload = _unmask(await reader.readexactly(n), mask) if n else b''
+        if op >= CLOSE:
+            return op, payload  # control frames may arrive between fragments
+        if op == 0:
+            if opcode is None:
+                raise ProtocolError(1002, 'continuation without a message')
+        elif opcode is not None:
+            raise ProtocolError(1002, 'new message inside a fragmented one')
+        else:
+            opcode = op
+        parts.append(payload)
+        size += n
+        if fin:
+            return opcode, b''.join(parts)
+
+
+class Entry:
+    """A message with its encoded forms, shared by every subscriber."""
+
+    __slots__ = ('id', 'message', 'json', '_sse', '_ws')
+
+    def __init__(self, message):
+        self.id = message['id']
+        self.message = message
+        self.json = json.dumps(message, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        self._sse = self._ws = None
+
+    @property
+    def sse(self):
+        if self._sse is None:
+            self._sse = b'id: ' + self.id.encode('utf-8') + b'\nevent: message\ndata: ' + self.json + b'\n\n'
+        return self._sse
+
+    @property
+    def ws(self):
+        if self._ws is None:
+            self._ws = ws_frame(TEXT, self.json)
+        return self._ws
+
+
+class Room:
+    def __init__(self, chat_id, size):
+        self.chat_id = chat_id
+        self.ring = deque(maxlen=size)
+        # Subscribers' transports, by the encoding they take.
+        self.sse, self.ws = set(), set()
+        self.loaded = asyncio.get_running_loop().create_future()
+
+    def subscribers(self, websocket):
+        return self.ws if websocket else self.sse
+
+    def after(self, since):
+        """Ring entries newer than the message ``since``; ``None`` if it is not in the ring."""
+        if not since:
+            return list(self.ring)
+        for i in range(len(self.ring) - 1, -1, -1):
+            if self.ring[i].id == since:
+                return list(self.ring)[i + 1:]
+        return None
+
+    def reset(self, websocket):
+        """Tells a resuming client it missed messages and should refetch them."""
+        payload = json.dumps({'reset': True, 'chatId': self.chat_id}).encode('utf-8')
+        return ws_frame(TEXT, payload) if websocket else b'event: reset\ndata: ' + payload + b'\n\n'
+
+
+class ChatHub:
+    """Rooms, fan-out and batched persistence over a ``communityChat`` service."""
+
+    def __init__(self, db, ring=RING, max_buffer=MAX_BUFFER, flush_interval=FLUSH_INTERVAL):
+        self.db, self.chat = db, db.services['communityChat']
+        self.ring, self.max_buffer, self.flush_interval = ring, max_buffer, flush_interval
+        self.known = {chat_id for chat_id, _ in CHATS}
+        self.rooms = {}
+        self.pending = []
+        self._storing = []
+        self._dirty = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self.stats = {'published': 0, 'delivered': 0, 'dropped': 0, 'persisted': 0, 'flushes': 0,
+                      'flush_errors': 0, 'fanout_ms_max': 0.0}
+
+    async def _store(self, fn, *args):
+        """Call a store method; in a worker thread when the store can take it."""
+        if getattr(self.db, 'thread_safe', False):
+            return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+        return fn(*args)
+
+    async def room(self, chat_id):
+        room = self.rooms.get(chat_id)
+        if room is None:
+            room = self.rooms[chat_id] = Room(chat_id, self.ring)
+            try:
+                recent = await self._store(self.chat.get_recent, chat_id, self.ring)
+                if not recent and chat_id not in self.known:
+                    raise NotFound(f'no chat {chat_id}')
+            except BaseException as e:
+                del self.rooms[chat_id]
+                room.loaded.set_exception(e)
+                room.loaded.exception()  # retrieved: the next caller retries the load
+                raise
+            room.ring.extend(Entry(m) for m in recent)
+            room.loaded.set_result(None)
+        else:
+            await asyncio.shield(room.loaded)
+        return room
+
+    async def publish(self, chat_id, fields):
+        """Validate, broadcast and queue a new message; returns it."""
+        msg = {'id': uid(), 'chatId': chat_id}
+        for name in ('authorId', 'authorName', 'authorRole'):
+            value = fields.get(name)
+            if not isinstance(value, str) or not value:
+                raise BadRequest(f'{name} must be a non-empty string')
+            msg[name] = value
+        text = fields.get('text')
+        if not isinstance(text, str) or len(text) > MAX_TEXT:
+            raise BadRequest(f'text must be a string of at most {MAX_TEXT} characters')
+        msg['text'] = text
+        msg['createdAt'] = now()
+        if fields.get('imageUrl') is not None:
+            if not isinstance(fields['imageUrl'], str):
+                raise BadRequest('imageUrl must be a string')
+            msg['imageUrl'] = fields['imageUrl']
+        room = await self.room(chat_id)
+        entry = Entry(msg)
+        room.ring.append(entry)
+        self._broadcast(room, entry)
+        self.stats['published'] += 1
+        self.pending.append(msg)
+        self._dirty.set()
+        return msg
+
+    def _broadcast(self, room, entry):
+        started = time.perf_counter()
+        limit, delivered = self.max_buffer, 0
+        for transports, websocket in ((room.sse, False), (room.ws, True)):
+            if not transports:
+                continue
+            frame, slow = entry.ws if websocket else entry.sse, []
+            for transport in transports:
+                if transport.get_write_buffer_size() > limit or transport.is_closing():
+                    slow.append(transport)
+                else:
+                    transport.write(frame)
+            delivered += len(transports) - len(slow)
+            for transport in slow:
+                self._drop(transports, transport)
+        self.stats['delivered'] += delivered
+        elapsed = (time.perf_counter() - started) * 1000
+        self.stats['fanout_ms_max'] = max(self.stats['fanout_ms_max'], elapsed)
+
+    def _drop(self, transports, transport):
+        """Remove a subscriber that is not keeping up (or already gone)."""
+        transports.discard(transport)
+        if not transport.is_closing():
+            self.stats['dropped'] += 1
+        transport.abort()
+
+    def subscribe(self, room, transport, websocket, since=None):
+        """Send the backfill and join the room, with no await in between so nothing is missed."""
+        backlog = room.after(since)
+        if backlog is None:
+            transport.write(room.reset(websocket))
+        elif backlog:
+            transport.write(b''.join(e.ws if websocket else e.sse for e in backlog))
+        room.subscribers(websocket).add(transport)
+
+    async def keepalive(self):
+        limit = self.max_buffer
+        while True:
+            await asyncio.sleep(KEEPALIVE)
+            for room in list(self.rooms.values()):
+                for transports, ping in ((room.sse, SSE_PING), (room.ws, ws_frame(PING))):
+                    for transport in list(transports):
+                        if transport.get_write_buffer_size() > limit or transport.is_closing():
+                            self._drop(transports, transport)
+                        else:
+                            transport.write(ping)
+            self.evict_idle()
+
+    def evict_idle(self):
+        """Forget rooms nobody is subscribed to, once their messages are stored."""
+        busy = {m['chatId'] for m in self.pending} | {m['chatId'] for m in self._storing}
+        for chat_id, room in list(self.rooms.items()):
+            if not room.sse and not room.ws and room.loaded.done() and chat_id not in busy:
+                del self.rooms[chat_id]
+
+    async def flusher(self):
+        while True:
+            await self._dirty.wait()
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def flush(self):
+        """Store everything pending, ``FLUSH_MAX`` messages per batch."""
+        async with self._flush_lock:
+            self._dirty.clear()
+            while self.pending:
+                batch = self.pending[:FLUSH_MAX]
+                del self.pending[:FLUSH_MAX]
+                self._storing = batch
+                try:
+                    await self._store(self.chat.save_messages, batch)
+                except Exception as e:
+                    self.pending[:0] = batch
+                    self.stats['flush_errors'] += 1
+                    self._dirty.set()  # retried after the next interval
+                    print(f'chat: storing {len(batch)} messages failed: {e}', file=sys.stderr)
+                    return
+                finally:
+                    self._storing = []
+                self.stats['persisted'] += len(batch)
+                self.stats['flushes'] += 1
+
+    def snapshot(self):
+        rooms = {}
+        for chat_id, room in sorted(self.rooms.items()):
+            rooms[chat_id] = {'sse': len(room.sse), 'ws': len(room.ws), 'ring': len(room.ring)}
+        return dict(self.stats, pending=len(self.pending), rooms=rooms)
+
+
+class ChatServer:
+    """HTTP/1.1 front: plain JSON routes, SSE streams and WebSocket upgrades."""
+
+    def __init__(self, hub):
+        self.hub = hub
+        self.connections = 0
+        self.started = time.monotonic()
+
+    def _head(self, status, headers, keep_alive=True):
+        lines = [f'HTTP/1.1 {status} {REASONS[status]}', 'Connection: ' + ('keep-alive' if keep_alive else 'close')]
+        lines += [f'{k}: {v}' for k, v in [*CORS, *headers]]
+        return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+    def _json(self, writer, status, payload, keep_alive=True):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        writer.write(self._head(status, [('Content-Type', 'application/json; charset=utf-8'),
+                                         ('Content-Length', len(body)), ('Cache-Control', 'no-store')],
+                                keep_alive) + body)
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while await self._request(reader, writer):
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def _request(self, reader, writer):
+        """Answer one request; returns whether the connection takes another."""
+        try:
+            head = await reader.readuntil(b'\r\n\r\n')
+        except asyncio.IncompleteReadError:
+            return False
+        except asyncio.LimitOverrunError:
+            self._json(writer, 431, {'error': 'request head too large'}, False)
+            return False
+        lines = head.decode('latin-1').split('\r\n')
+        try:
+            method, target, version = lines[0].split(' ')
+        except ValueError:
+            self._json(writer, 400, {'error': 'bad request line'}, False)
+            return False
+        headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(':')
+            if name:
+                headers[name.strip().lower()] = value.strip()
+        connection = headers.get('connection', '').lower()
+        keep_alive = 'keep-alive' in connection if version == 'HTTP/1.0' else 'close' not in connection
+        path, _, query = target.partition('?')
+        parts = unquote(path).strip('/').split('/')
+        params = {k: v[-1] for k, v in parse_qs(query).items()}
+
+        if method == 'OPTIONS':
+            writer.write(self._head(204, [('Access-Control-Allow-Methods', 'GET, POST, OPTIONS'),
+                                          ('Access-Control-Allow-Headers', 'Content-Type, Last-Event-ID'),
+                                          ('Content-Length', 0)], keep_alive))
+            return keep_alive
+        if parts == ['__stats'] and method == 'GET':
+            self._json(writer, 200, dict(self.hub.snapshot(), connections=self.connections,
+                                         uptime=round(time.monotonic() - self.started, 3)), keep_alive)
+            return keep_alive
+        if len(parts) != 3 or parts[0] != 'chats' or not parts[1].lstrip('-').isdigit() \
+                or parts[2] not in ('events', 'ws', 'messages'):
+            self._json(writer, 404, {'error': 'not found'}, keep_alive)
+            return keep_alive
+        chat_id, route = int(parts[1]), parts[2]
+        allowed = 'GET, POST' if route == 'messages' else 'GET'
+        if method not in allowed.split(', '):
+            # A body we will not read would be taken for the next request.
+            self._json(writer, 405, {'error': f'use {allowed}'}, False)
+            return False
+
+        if route == 'messages' and method == 'POST':
+            return await self._post(reader, writer, chat_id, headers, keep_alive)
+        try:
+            room = await self.hub.room(chat_id)
+        except NotFound as e:
+            self._json(writer, 404, {'error': str(e)}, keep_alive)
+            return keep_alive
+        if route == 'messages':
+            try:
+                limit = int(params.get('limit', self.hub.ring))
+            except ValueError:
+                limit = self.hub.ring
+            recent = list(room.ring)[-limit:] if limit > 0 else []
+            self._json(writer, 200, [e.message for e in recent], keep_alive)
+            return keep_alive
+        since = headers.get('last-event-id') or params.get('since')
+        if route == 'events':
+            writer.write(self._head(200, [('Content-Type', 'text/event-stream; charset=utf-8'),
+                                          ('Cache-Control', 'no-store'), ('X-Accel-Buffering', 'no')])
+                         + b'retry: 2000\n\n')
+            await self._stream(reader, writer, room, False, since)
+            return False
+        key = headers.get('sec-websocket-key')
+        if headers.get('upgrade', '').lower() != 'websocket' or not key:
+            self._json(writer, 400, {'error': 'expected a WebSocket upgrade'}, False)
+            return False
+        writer.write(f'HTTP/1.1 101 {REASONS[101]}\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n'
+                     f'Sec-WebSocket-Accept: {ws_accept(key)}\r\n\r\n'.encode('latin-1'))
+        await self._stream(reader, writer, room, True, since)
+        return False
+
+    async def _post(self, reader, writer, chat_id, headers, keep_alive):
+        if 'content-length' not in headers:
+            self._json(writer, 411, {'error': 'Content-Length required'}, False)
+            return False
+        try:
+            length = int(headers['content-length'])
+        except ValueError:
+            length = -1
+        if not 0 <= length <= MAX_BODY:
+            self._json(writer, 413, {'error': f'body over {MAX_BODY} bytes'}, False)
+            return False
+        body = await reader.readexactly(length)
+        try:
+            fields = json.loads(body or b'{}')
+            if not isinstance(fields, dict):
+                raise BadRequest('expected a JSON object')
+            msg = await self.hub.publish(chat_id, fields)
+        except (ValueError, BadRequest) as e:
+            self._json(writer, 400, {'error': str(e)}, keep_alive)
+            return keep_alive
+        except NotFound as e:
+            self._json(writer, 404, {'error': str(e)}, keep_alive)
+            return keep_alive
+        self._json(writer, 201, msg, keep_alive)
+        return keep_alive
+
+    async def _stream(self, reader, writer, room, websocket, since):
+        """Hold a subscriber in ``room`` until its peer leaves (or is dropped)."""
+        self.hub.subscribe(room, writer.transport, websocket, since)
+        try:
+            if not websocket:
+                while await reader.read(4096):  # an SSE client sends nothing more; wait for EOF
+                    pass
+                return
+            while True:
+                try:
+                    opcode, payload = await ws_read(reader)
+                except ProtocolError as e:
+                    writer.write(ws_frame(CLOSE, e.code.to_bytes(2, 'big') + str(e).encode('utf-8')))
+                    return
+                if opcode == CLOSE:
+                    writer.write(ws_frame(CLOSE, payload[:2]))
+                    return
+                if opcode == PING:
+                    writer.write(ws_frame(PONG, payload))
+                elif opcode == TEXT:
+                    await self._ws_message(writer, room, payload)
+                elif opcode == BINARY:
+                    writer.write(ws_frame(CLOSE, (1003).to_bytes(2, 'big') + b'text frames only'))
+                    return
+        finally:
+            room.subscribers(websocket).discard(writer.transport)
+
+    async def _ws_message(self, writer, room, payload):
+        try:
+            fields = json.loads(payload)
+            if not isinstance(fields, dict):
+                raise BadRequest('expected a JSON object')
+            await self.hub.publish(room.chat_id, fields)
+        except (ValueError, BadRequest) as e:
+            writer.write(ws_frame(TEXT, json.dumps({'error': str(e)}, ensure_ascii=False).encode('utf-8')))
+
+
+def _raise_file_limit():
+    """10k idle connections need more descriptors than the usual soft limit of 1024."""
+    try:
+        import resource
+    except ImportError:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard == resource.RLIM_INFINITY or soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard if hard != resource.RLIM_INFINITY else 65536, hard))
+
+
+def open_db(args):
+    if args.sqlite:
+        from .sqlite_store import SqliteDatabase
+
+        db = SqliteDatabase.seeded(args.sqlite)
+        if args.data:
+            with open(args.data, encoding='utf-8') as f:
+                db.load(json.load(f))
+        return db
+    if args.data:
+        with open(args.data, encoding='utf-8') as f:
+            return Database(json.load(f))
+    return Database.seeded()
+
+
+async def serve(args):
+    hub = ChatHub(open_db(args), args.ring, args.max_buffer, args.flush_interval)
+    server = ChatServer(hub)
+    listener = await asyncio.start_server(server.handle, args.host, args.port, backlog=args.backlog,
+                                          limit=MAX_HEAD)
+    tasks = [asyncio.create_task(hub.flusher()), asyncio.create_task(hub.keepalive())]
+    print(f'chat server on http://{args.host}:{args.port}/chats/<chatId>/events (stats at /__stats)',
+          file=sys.stderr)
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await hub.flush()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve community chats over SSE and WebSocket.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8790)
+    parser.add_argument('--data', help='JSON {dp_key: [records]} to load instead of the seed data')
+    parser.add_argument('--sqlite', metavar='PATH', help='keep chat messages in a SQLite database file')
+    parser.add_argument('--ring', type=int, default=RING, help='recent messages kept per chat')
+    parser.add_argument('--max-buffer', type=int, default=MAX_BUFFER,
+                        help='unsent bytes after which a subscriber is dropped')
+    parser.add_argument('--flush-interval', type=float, default=FLUSH_INTERVAL,
+                        help='seconds between batched writes to the store')
+    parser.add_argument('--backlog', type=int, default=4096)
+    args = parser.parse_args(argv)
+    _raise_file_limit()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,262 @@
+"""Per-user dashboard counters, maintained from change events.
+
+The dashboard's ``loadData()`` fans out to about ten services and then
+derives its numbers inline:
+
+* vacancies against the plan limit;
+* ``allApplications`` over the employer's vacancies;
+* the specialist's applications, gigs, reviews and courses;
+* the client's orders;
+* the supplier's purchases, completed purchases and participants (the
+  "Статистика" tab);
+* unread messages in every role.
+
+The cost grows with everything the user owns. Here each of those numbers is
+a counter per ``(user, name)``, so a dashboard is one dict lookup plus the
+user record:
+
+    POST /api/dashboard/get   {"userId": "emp1"}
+    → {"userId": "emp1", "role": "employer", "vacancies": 4, "vacancyLimit": 10, "applications": 7, ...}
+
+Every record adds a fixed set of ``(user, counter, n)`` contributions (see
+``contributions``). ``DashboardService`` watches the collections and keeps
+each record's last contribution. On a change it subtracts the old set and
+adds the new one, so a write costs O(size of that record) however much the
+owner has. Nested data that the services change in place (applications,
+participants, unread counts) is reported through ``Collection.touch``.
+
+The SQLite backend keeps the same counters in ``dashboard_counters``. The
+triggers come from ``COUNTERS`` by way of ``schema_sql`` and are rebuilt in
+one ``GROUP BY`` pass by ``rebuild_sql``.
+"""
+
+import re
+import threading
+from collections import defaultdict
+
+# The counters each role's dashboard shows.
+ROLE_FIELDS = {
+    'employer': ('vacancies', 'activeVacancies', 'applications', 'pendingApplications', 'gigs', 'promos', 'unread'),
+    'specialist': ('applied', 'gigs', 'reviews', 'enrollments', 'certificates', 'unread'),
+    'client': ('orders', 'activeOrders', 'unread'),
+    'supplier': ('purchases', 'completedPurchases', 'participants', 'unread'),
+}
+# subscriptionPlan → (vacancies, sub-accounts); None is unlimited. The
+# dashboard fragments call the middle plan "standard".
+PLAN_LIMITS = {'basic': (3, 0), 'pro': (10, 3), 'standard': (10, 3), 'premium': (None, None)}
+
+
+def contributions(key, r):
+    """``[(user id, counter, n)]`` that record ``r`` of collection ``key`` adds."""
+    if key == 'dp_vacancies':
+        owner, apps = r.get('employerId'), r.get('applications') or ()
+        active = r.get('status') == 'active'
+        out = [(owner, 'vacancies', 1), (owner, 'activeVacancies', active), (owner, 'applications', len(apps)),
+               (owner, 'pendingApplications', sum(a.get('status') == 'pending' for a in apps))]
+        # appliedVacs lists the active vacancies a specialist applied to.
+        if active:
+            out += [(s, 'applied', 1) for s in dict.fromkeys(a.get('specialistId') for a in apps)]
+    elif key == 'dp_gigs':
+        out = [(r.get('authorId'), 'gigs', 1)]
+    elif key == 'dp_promos':
+        out = [(r.get('creatorId'), 'promos', 1)]
+    elif key == 'dp_reviews':
+        out = [(r.get('targetId'), 'reviews', 1)]
+    elif key == 'dp_client_orders':
+        out = [(r.get('clientId'), 'orders', 1), (r.get('clientId'), 'activeOrders', r.get('status') == 'active')]
+    elif key == 'dp_collective_purchases':
+        owner = r.get('supplierId')
+        out = [(owner, 'purchases', 1), (owner, 'completedPurchases', r.get('status') == 'completed'),
+               (owner, 'participants', len(r.get('participants') or ()))]
+    elif key == 'dp_training_enrollments':
+        out = [(r.get('userId'), 'enrollments', 1),
+               (r.get('userId'), 'certificates', r.get('status') == 'completed')]
+    elif key == 'dp_conversations':
+        out = list((u, 'unread', n) for u, n in (r.get('unreadCount') or {}).items())
+    else:
+        return ()
+    return tuple((u, name, int(n)) for u, name, n in out if u is not None and n)
+
+
+SOURCES = ('dp_vacancies', 'dp_gigs', 'dp_promos', 'dp_reviews', 'dp_client_orders', 'dp_collective_purchases',
+           'dp_training_enrollments', 'dp_conversations')
+
+
+def snapshot(user, counts, unread=None):
+    """The dashboard numbers of ``user`` from its ``{counter: n}``."""
+    role = user.get('role')
+    out = {'userId': user['id'], 'role': role, 'rating': user.get('rating') or 0,
+           'reviewCount': user.get('reviewCount') or 0}
+    for name in ROLE_FIELDS.get(role, ('unread',)):
+        out[name] = counts.get(name, 0)
+    if unread is not None:
+        out['unread'] = unread
+    if role == 'employer':
+        plan = user.get('subscriptionPlan') or 'basic'
+        vacancies, subs = PLAN_LIMITS.get(plan, PLAN_LIMITS['basic'])
+        out.update(plan=plan, vacancyLimit=vacancies,
+                   vacanciesLeft=None if vacancies is None else max(0, vacancies - out['vacancies']),
+                   subAccounts=len(user.get('subAccounts') or ()), subAccountLimit=subs)
+    elif role == 'client':
+        out['favorites'] = len(user.get('favorites') or ())
+    elif role == 'specialist':
+        out['isCertified'] = bool(user.get('isCertified'))
+    return out
+
+
+def messaging_unread(db, user_id):
+    """Unread messages from a messaging service with its own storage (``LogMessaging``), else None."""
+    total = getattr(db.services.get('messaging'), 'unread_total', None)
+    return total(user_id) if total is not None else None
+
+
+class DashboardService:
+    """``dashboard.get(user_id)``: the dashboard numbers as one lookup."""
+
+    def __init__(self, db):
+        self.db = db
+        self._counts = None  # user id → {counter: n}, built on first read
+        self._last = {}      # (collection, record id) → its contributions
+        self._lock = threading.Lock()
+        for key in SOURCES:
+            db.collections[key].watch(lambda event, record, key=key: self._changed(key, event, record))
+
+    def _apply(self, items, sign):
+        for user, name, n in items:
+            counts = self._counts[user]
+            counts[name] += sign * n
+            if not counts[name]:
+                del counts[name]
+
+    def _build(self):
+        with self._lock:
+            if self._counts is None:
+                self._counts = defaultdict(lambda: defaultdict(int))
+                # Writers block in _changed until this is done, then apply on top.
+                for key in SOURCES:
+                    for record in self.db.collections[key].all():
+                        items = self._last[key, record['id']] = contributions(key, record)
+                        self._apply(items, 1)
+        return self._counts
+
+    def _changed(self, key, event, record):
+        with self._lock:
+            if self._counts is None:  # not built yet; the first read scans the collections
+                return
+            self._apply(self._last.pop((key, record['id']), ()), -1)
+            if event != 'delete':
+                items = self._last[key, record['id']] = contributions(key, record)
+                self._apply(items, 1)
+
+    def counts(self, user_id):
+        counts = self._build().get(user_id)
+        return dict(counts) if counts else {}
+
+    def get(self, user_id):
+        user = self.db.collections['dp_users'].get(user_id)
+        if user is None:
+            return None
+        return snapshot(user, self.counts(user_id), messaging_unread(self.db, user_id))
+
+
+# The same counters for backend.sqlite_store, as (table, parent, owner,
+# counter, weight). ``{r}`` is the counted row. ``{p}`` is its parent, given
+# as (parent table, foreign key), for counters owned or weighted by the
+# parent (an application counts for the vacancy's employer).
+COUNTERS = (
+    ('vacancies', None, '{r}.employer_id', 'vacancies', '1'),
+    ('vacancies', None, '{r}.employer_id', 'activeVacancies', "{r}.status = 'active'"),
+    ('applications', ('vacancies', 'vacancy_id'), '{p}.employer_id', 'applications', '1'),
+    ('applications', ('vacancies', 'vacancy_id'), '{p}.employer_id', 'pendingApplications', "{r}.status = 'pending'"),
+    ('applications', ('vacancies', 'vacancy_id'), '{r}.specialist_id', 'applied', "{p}.status = 'active'"),
+    ('gigs', None, '{r}.author_id', 'gigs', '1'),
+    ('promos', None, '{r}.creator_id', 'promos', '1'),
+    ('reviews', None, '{r}.target_id', 'reviews', '1'),
+    ('client_orders', None, '{r}.client_id', 'orders', '1'),
+    ('client_orders', None, '{r}.client_id', 'activeOrders', "{r}.status = 'active'"),
+    ('collective_purchases', None, '{r}.supplier_id', 'purchases', '1'),
+    ('collective_purchases', None, '{r}.supplier_id', 'completedPurchases', "{r}.status = 'completed'"),
+    ('purchase_participants', ('collective_purchases', 'purchase_id'), '{p}.supplier_id', 'participants', '1'),
+    ('training_enrollments', None, '{r}.user_id', 'enrollments', '1'),
+    ('training_enrollments', None, '{r}.user_id', 'certificates', "{r}.status = 'completed'"),
+    ('conversation_participants', None, '{r}.user_id', 'unread', '{r}.unread_count'),
+)
+_UPSERT = ('INSERT INTO dashboard_counters (user_id, name, n) {} '
+           'ON CONFLICT (user_id, name) DO UPDATE SET n = n + excluded.n;')
+
+
+def _columns(alias, *exprs):
+    return sorted({c for e in exprs for c in re.findall(r'\{%s\}\.(\w+)' % alias, e)})
+
+
+def _changed_sql(cols):
+    # Row updates rewrite every column, so UPDATE OF alone fires on no-op writes.
+    return ' OR '.join(f'old.{c} IS NOT new.{c}' for c in cols)
+
+
+def _select(counter, sign, row, parent_row=None):
+    """``SELECT owner, counter, ±weight`` for one changed row.
+
+    With ``parent_row`` the change is to the parent (``old``/``new``) and
+    every child row is selected.
+    """
+    table, parent, owner, name, weight = counter
+    w = f'{sign}ifnull(({weight}), 0)'
+    if parent is None:
+        sub = {'r': row}
+        return f"SELECT {owner.format(**sub)}, '{name}', {w.format(**sub)} WHERE {owner.format(**sub)} IS NOT NULL " \
+               f"AND {w.format(**sub)} <> 0"
+    ptable, fk = parent
+    if parent_row is None:
+        sub = {'r': row, 'p': 'p'}
+        source = f'FROM {ptable} p WHERE p.id = {row}.{fk}'
+    else:
+        sub = {'r': 'c', 'p': parent_row}
+        source = f'FROM {table} c WHERE c.{fk} = {parent_row}.id'
+    return f"SELECT {owner.format(**sub)}, '{name}', {w.format(**sub)} {source} " \
+           f"AND {owner.format(**sub)} IS NOT NULL AND {w.format(**sub)} <> 0"
+
+
+def schema_sql():
+    """``dashboard_counters`` and the triggers that keep it current."""
+    out = ['CREATE TABLE IF NOT EXISTS dashboard_counters (\n'
+           '    user_id TEXT NOT NULL, name TEXT NOT NULL, n INTEGER NOT NULL,\n'
+           '    PRIMARY KEY (user_id, name)) WITHOUT ROWID;']
+
+    def trigger(name, when, statements):
+        out.append(f'CREATE TRIGGER IF NOT EXISTS dashboard_{name} {when} BEGIN\n    '
+                   + '\n    '.join(statements) + '\nEND;')
+
+    by_table, by_parent = defaultdict(list), defaultdict(list)
+    for c in COUNTERS:
+        by_table[c[0]].append(c)
+        if c[1]:
+            by_parent[c[1][0]].append(c)
+    for table, counters in by_table.items():
+        trigger(f'{table}_insert', f'AFTER INSERT ON {table}', [_UPSERT.format(_select(c, '', 'new')) for c in counters])
+        # A child whose parent is being deleted finds no parent here; the
+        # parent's BEFORE DELETE trigger below has already taken it out.
+        trigger(f'{table}_delete', f'AFTER DELETE ON {table}', [_UPSERT.format(_select(c, '-', 'old')) for c in counters])
+        cols = _columns('r', *(e for c in counters for e in c[2:] if isinstance(e, str)))
+        cols += [c[1][1] for c in counters if c[1] and c[1][1] not in cols]
+        trigger(f'{table}_update', f'AFTER UPDATE OF {", ".join(cols)} ON {table} WHEN {_changed_sql(cols)}',
+                [_UPSERT.format(_select(c, sign, row)) for c in counters for sign, row in (('-', 'old'), ('', 'new'))])
+    for parent, counters in by_parent.items():
+        cols = _columns('p', *(e for c in counters for e in c[2:] if isinstance(e, str)))
+        trigger(f'{parent}_children_update', f'AFTER UPDATE OF {", ".join(cols)} ON {parent} WHEN {_changed_sql(cols)}',
+                [_UPSERT.format(_select(c, sign, None, row)) for c in counters for sign, row in (('-', 'old'), ('', 'new'))])
+        trigger(f'{parent}_children_delete', f'BEFORE DELETE ON {parent}',
+                [_UPSERT.format(_select(c, '-', None, 'old')) for c in counters])
+    return '\n'.join(out) + '\n'
+
+
+def rebuild_sql():
+    """One statement that refills an empty ``dashboard_counters`` from the tables."""
+    parts = []
+    for table, parent, owner, name, weight in COUNTERS:
+        sub = {'r': 'r', 'p': 'p'}
+        join = f' JOIN {parent[0]} p ON p.id = r.{parent[1]}' if parent else ''
+        parts.append(f"SELECT {owner.format(**sub)} AS user_id, '{name}' AS name, "
+                     f'ifnull(({weight.format(**sub)}), 0) AS n FROM {table} r{join}')
+    return ('INSERT INTO dashboard_counters (user_id, name, n) SELECT user_id, name, sum(n) FROM (\n    '
+            + '\n    UNION ALL '.join(parts) + '\n) WHERE user_id IS NOT NULL GROUP BY user_id, name HAVING sum(n) <> 0')
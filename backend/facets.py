@@ -0,0 +1,314 @@
+"""Faceted filtering with sidebar counts over bitmaps.
+
+The catalog pages narrow their lists by ``city``, ``district``,
+``companyType``, ``specialization``, ``status``, ``isCertified`` and
+``availableForGigs``, and every change of a filter re-scans the whole list.
+``FacetIndex`` gives each record a document number and keeps one ``Bitmap``
+of document numbers per (field, value). Two rules apply:
+
+* Values of one field are ORed and different fields are ANDed, e.g.
+  ``{'city': ['Москва', 'Казань'], 'isCertified': True}``.
+* The count shown next to a value applies every selected filter except the
+  one on its own field. That way the other cities of a selected city keep
+  their counts ("disjunctive" facets).
+
+``Bitmap`` is roaring-style. Document numbers are split into 2^16-wide
+chunks, each held as one Python int (AND/OR and ``bit_count`` run in C), and
+only non-empty chunks are stored. Writes touch only the bitmaps of the
+fields that changed, and per-value totals are kept as running counts, so
+neither the filters nor the counts ever re-scan the records.
+
+``FacetService`` is the ``facets`` service of ``Database``:
+
+    POST /api/facets/specialists   {"filters": {"city": "Москва", "status": ["searching", "open"]}}
+
+returns ``{"items": [...], "total": n, "counts": {field: {value: n}}}``.
+"""
+
+from collections import defaultdict
+from itertools import groupby
+
+CHUNK_BITS = 16
+_LOW = (1 << CHUNK_BITS) - 1
+_BYTE_BITS = tuple(tuple(i for i in range(8) if b >> i & 1) for b in range(256))
+
+
+class Bitmap:
+    """A set of non-negative ints as ``{chunk: int bitset}``."""
+
+    __slots__ = ('_chunks',)
+
+    def __init__(self, values=(), chunks=None):
+        self._chunks = chunks if chunks is not None else {}
+        for n in values:
+            self.add(n)
+
+    @classmethod
+    def from_sorted(cls, values):
+        """A bitmap of ascending ``values``, built a chunk at a time."""
+        chunks = {}
+        for key, group in groupby(values, lambda n: n >> CHUNK_BITS):
+            buf = bytearray(1 << CHUNK_BITS - 3)
+            for n in group:
+                buf[(n & _LOW) >> 3] |= 1 << (n & 7)
+            chunks[key] = int.from_bytes(buf, 'little')
+        return cls(chunks=chunks)
+
+    def add(self, n):
+        key = n >> CHUNK_BITS
+        self._chunks[key] = self._chunks.get(key, 0) | 1 << (n & _LOW)
+
+    def discard(self, n):
+        key = n >> CHUNK_BITS
+        bits = self._chunks.get(key, 0) & ~(1 << (n & _LOW))
+        if bits:
+            self._chunks[key] = bits
+        else:
+            self._chunks.pop(key, None)
+
+    def __contains__(self, n):
+        return bool(self._chunks.get(n >> CHUNK_BITS, 0) >> (n & _LOW) & 1)
+
+    def __len__(self):
+        return sum(bits.bit_count() for bits in self._chunks.values())
+
+    def __bool__(self):
+        return bool(self._chunks)
+
+    def __and__(self, other):
+        small, large = sorted((self._chunks, other._chunks), key=len)
+        out = {}
+        for key, bits in small.items():
+            both = bits & large.get(key, 0)
+            if both:
+                out[key] = both
+        return Bitmap(chunks=out)
+
+    def __or__(self, other):
+        out = dict(self._chunks)
+        for key, bits in other._chunks.items():
+            out[key] = out.get(key, 0) | bits
+        return Bitmap(chunks=out)
+
+    def intersection_len(self, other):
+        """``len(self & other)`` without building the result."""
+        small, large = sorted((self._chunks, other._chunks), key=len)
+        return sum((bits & large.get(key, 0)).bit_count() for key, bits in small.items())
+
+    @classmethod
+    def union(cls, bitmaps):
+        out = {}
+        for b in bitmaps:
+            for key, bits in b._chunks.items():
+                out[key] = out.get(key, 0) | bits
+        return cls(chunks=out)
+
+    def __iter__(self):
+        """Members in ascending order."""
+        for key in sorted(self._chunks):
+            bits, base = self._chunks[key], key << CHUNK_BITS
+            for i, byte in enumerate(bits.to_bytes((bits.bit_length() + 7) // 8, 'little')):
+                if byte:
+                    for bit in _BYTE_BITS[byte]:
+                        yield base + i * 8 + bit
+
+
+def _keys(value):
+    """The facet values of one field: a scalar, each item of a list, or none."""
+    if value is None or value == '':
+        return ()
+    if isinstance(value, list):
+        return tuple(dict.fromkeys(v for v in value if v is not None and v != ''))
+    return (value,)
+
+
+class FacetIndex:
+    """Bitmaps per (field, value) over records keyed by ``id``."""
+
+    def __init__(self, fields):
+        self.fields = tuple(fields)
+        self._bitmaps = {f: {} for f in self.fields}         # field → value → Bitmap
+        self._counts = {f: defaultdict(int) for f in self.fields}
+        self._all = Bitmap()
+        self._docno = {}   # record id → document number
+        self._ids = []     # document number → record id (None once deleted)
+        self._values = {}  # document number → {field: keys}, to undo on update
+
+    def __len__(self):
+        return len(self._docno)
+
+    def __contains__(self, id):
+        return id in self._docno
+
+    def _set(self, doc, field, keys, on):
+        bitmaps, counts = self._bitmaps[field], self._counts[field]
+        for key in keys:
+            if on:
+                bitmaps.setdefault(key, Bitmap()).add(doc)
+                counts[key] += 1
+            else:
+                bitmaps[key].discard(doc)
+                counts[key] -= 1
+                if not counts[key]:
+                    del bitmaps[key], counts[key]
+
+    def add(self, record):
+        """Index ``record``, or re-index the fields that changed since last time."""
+        doc = self._docno.get(record['id'])
+        new = {f: _keys(record.get(f)) for f in self.fields}
+        if doc is None:
+            # New records go last, so ascending document numbers keep the
+            # collection's insertion order; updates keep their number.
+            doc = self._docno[record['id']] = len(self._ids)
+            self._ids.append(record['id'])
+            self._all.add(doc)
+            old = {}
+        else:
+            old = self._values[doc]
+        for f in self.fields:
+            before, after = old.get(f, ()), new[f]
+            if before != after:
+                self._set(doc, f, [k for k in before if k not in after], False)
+                self._set(doc, f, [k for k in after if k not in before], True)
+        self._values[doc] = new
+
+    def load(self, records):
+        """Index many new records at once; setting bits one by one would copy each chunk per bit."""
+        members = {f: defaultdict(list) for f in self.fields}
+        docs = []
+        for record in records:
+            if record['id'] in self._docno:
+                self.add(record)
+                continue
+            doc = self._docno[record['id']] = len(self._ids)
+            self._ids.append(record['id'])
+            docs.append(doc)
+            values = self._values[doc] = {f: _keys(record.get(f)) for f in self.fields}
+            for f, keys in values.items():
+                for key in keys:
+                    members[f][key].append(doc)
+        self._all |= Bitmap.from_sorted(docs)
+        for f, by_value in members.items():
+            for key, found in by_value.items():
+                bitmap = Bitmap.from_sorted(found)
+                if key in self._bitmaps[f]:
+                    bitmap |= self._bitmaps[f][key]
+                self._bitmaps[f][key] = bitmap
+                self._counts[f][key] += len(found)
+
+    def remove(self, id):
+        doc = self._docno.pop(id, None)
+        if doc is None:
+            return
+        for f, keys in self._values.pop(doc).items():
+            self._set(doc, f, keys, False)
+        self._all.discard(doc)
+        self._ids[doc] = None
+
+    def _field(self, field, wanted):
+        values = wanted if isinstance(wanted, (list, tuple, set)) else (wanted,)
+        bitmaps = self._bitmaps[field]
+        found = [bitmaps[v] for v in values if v in bitmaps]
+        return found[0] if len(found) == 1 else Bitmap.union(found)
+
+    def _check(self, filters):
+        unknown = set(filters) - set(self.fields)
+        if unknown:
+            raise KeyError(f'not a facet: {", ".join(sorted(unknown))}')
+
+    def select(self, filters=None, skip=None):
+        """Document numbers matching ``{field: value or [values]}``, ignoring ``skip``'s filter."""
+        filters = filters or {}
+        self._check(filters)
+        out = None
+        # The most selective field first keeps the intermediate bitmaps small.
+        parts = sorted((self._field(f, v) for f, v in filters.items() if f != skip), key=len)
+        for part in parts:
+            out = part if out is None else out & part
+            if not out:
+                break
+        return self._all if out is None else out
+
+    def counts(self, filters=None):
+        """``{field: {value: count}}`` for the sidebar, each field ignoring its own filter."""
+        filters = filters or {}
+        self._check(filters)
+        out = {}
+        for f in self.fields:
+            others = [g for g in filters if g != f]
+            if not others:
+                out[f] = dict(self._counts[f])
+                continue
+            base = self.select(filters, skip=f)
+            out[f] = {v: n for v, b in self._bitmaps[f].items() if (n := b.intersection_len(base))}
+        return out
+
+    def ids(self, docs, offset=0, limit=None):
+        """Record ids of ``docs`` in insertion order, paged."""
+        out = []
+        for i, doc in enumerate(docs):
+            if i < offset:
+                continue
+            if limit is not None and len(out) >= limit:
+                break
+            out.append(self._ids[doc])
+        return out
+
+
+# page → (collection, facet fields, which records the page lists)
+SOURCES = {
+    'specialists': ('dp_users',
+                    ('city', 'district', 'specialization', 'status', 'isCertified', 'availableForGigs'),
+                    lambda u: u.get('role') == 'specialist'),
+    'companies': ('dp_users', ('city', 'district', 'companyType'), lambda u: u.get('role') == 'employer'),
+    'vacancies': ('dp_vacancies', ('city', 'district', 'status'), lambda v: True),
+    'gigs': ('dp_gigs', ('city', 'district', 'status', 'type'), lambda g: True),
+}
+
+
+class FacetService:
+    """Filtered lists and sidebar counts for the catalog pages."""
+
+    def __init__(self, db):
+        self.db = db
+        self._indexes = {}
+        for kind, (key, _, _) in SOURCES.items():
+            db.collections[key].watch(lambda event, record, kind=kind: self._changed(kind, event, record))
+
+    def _index(self, kind):
+        index = self._indexes.get(kind)
+        if index is None:
+            key, fields, accept = SOURCES[kind]
+            index = FacetIndex(fields)
+            index.load(r for r in self.db.collections[key].all() if accept(r))
+            self._indexes[kind] = index
+        return index
+
+    def _changed(self, kind, event, record):
+        index = self._indexes.get(kind)
+        if index is None or event == 'touch':  # not built yet, or nothing indexed changed
+            return
+        if event != 'delete' and SOURCES[kind][2](record):
+            index.add(record)
+        else:
+            index.remove(record['id'])
+
+    def _query(self, kind, filters, offset, limit):
+        index = self._index(kind)
+        filters = filters or {}
+        docs = index.select(filters)
+        records = self.db.collections[SOURCES[kind][0]]
+        return {'items': [records.get(id) for id in index.ids(docs, offset, limit)],
+                'total': len(docs), 'counts': index.counts(filters)}
+
+    def specialists(self, filters=None, offset=0, limit=None):
+        return self._query('specialists', filters, offset, limit)
+
+    def companies(self, filters=None, offset=0, limit=None):
+        return self._query('companies', filters, offset, limit)
+
+    def vacancies(self, filters=None, offset=0, limit=None):
+        return self._query('vacancies', filters, offset, limit)
+
+    def gigs(self, filters=None, offset=0, limit=None):
+        return self._query('gigs', filters, offset, limit)
@@ -0,0 +1,698 @@
+"""Deterministic synthetic datasets in the shapes of ``initializeData()``.
+
+    python -m backend.generate --out data/ [--scale 10] [--seed 1] [--jobs 8]
+    python -m backend.generate --out big.db --format sqlite --count messages=10000000
+
+Every collection is split into fixed-size shards of parent ids (users,
+vacancies, conversations, ...). A shard is generated from its own
+``random.Random(f'{seed}:{kind}:{lo}')`` and written straight to disk, so the
+output depends only on ``--seed``, the counts and ``--shard-rows``. The number of
+worker processes does not change it, and no shard holds more than
+``--shard-rows`` records in memory.
+
+People and companies are a pure function of their id (``identity``), which
+lets a message shard name its senders without looking up the user shards.
+Nested records follow their parent: applications are generated with their
+vacancy, messages with their conversation, and reviews and enrollments with
+the user they belong to. Ratings, unread counters, purchase volumes and
+certificate numbers therefore agree with the rows that produced them.
+
+``--format jsonl`` writes ``OUT/<dp_key>/part-NNNNN.jsonl`` plus
+``OUT/manifest.json``; read it back in order with ``iter_records``.
+``--format sqlite`` has each worker fill its own database in the
+``backend.sqlite_store`` schema. The parent then merges the shards in order
+with ``INSERT ... SELECT``.
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+from .services import js_round
+from .sqlite_store import SqliteDatabase
+
+M64 = (1 << 64) - 1
+
+# Rows per entity at --scale 1; --count overrides any of them.
+COUNTS = {
+    'employers': 1_000,
+    'specialists': 5_000,
+    'clients': 10_000,
+    'suppliers': 100,
+    'vacancies': 3_000,
+    'applications': 15_000,
+    'gigs': 2_000,
+    'gig_responses': 4_000,
+    'orders': 5_000,
+    'order_responses': 15_000,
+    'conversations': 20_000,
+    'messages': 200_000,
+    'chat_messages': 50_000,
+    'reviews': 30_000,
+    'enrollments': 4_000,
+    'purchases': 200,
+    'participants': 2_000,
+    'promos': 300,
+}
+
+ROLES = {'employer': ('emp', 'employers', 1), 'specialist': ('spec', 'specialists', 2),
+         'client': ('client', 'clients', 3), 'supplier': ('sup', 'suppliers', 4)}
+
+# Generated shard kinds: kind → (parent count, child count or None).
+KINDS = {
+    'employer': ('employers', 'reviews'),
+    'specialist': ('specialists', 'enrollments'),
+    'client': ('clients', None),
+    'supplier': ('suppliers', None),
+    'vacancies': ('vacancies', 'applications'),
+    'gigs': ('gigs', 'gig_responses'),
+    'orders': ('orders', 'order_responses'),
+    'conversations': ('conversations', 'messages'),
+    'chat_messages': ('chat_messages', None),
+    'purchases': ('purchases', 'participants'),
+    'promos': ('promos', None),
+}
+
+MALE = ['Алексей', 'Дмитрий', 'Михаил', 'Иван', 'Петр', 'Артём', 'Сергей', 'Андрей', 'Никита', 'Егор',
+        'Максим', 'Кирилл', 'Роман', 'Павел', 'Олег', 'Владимир', 'Денис', 'Игорь', 'Антон', 'Илья']
+FEMALE = ['Анна', 'Мария', 'Екатерина', 'Ольга', 'Наталья', 'Елена', 'Дарья', 'Ксения', 'Виктория', 'Юлия']
+SURNAMES = ['Кузнецов', 'Волков', 'Соколов', 'Иванов', 'Смирнов', 'Попов', 'Лебедев', 'Козлов', 'Новиков',
+            'Морозов', 'Петров', 'Васильев', 'Зайцев', 'Павлов', 'Семенов', 'Голубев', 'Виноградов',
+            'Богданов', 'Воробьев', 'Федоров', 'Михайлов', 'Беляев', 'Тарасов', 'Белов', 'Комаров',
+            'Орлов', 'Киселев', 'Макаров', 'Андреев', 'Ковалев', 'Ильин', 'Гусев', 'Титов', 'Кудрявцев']
+
+CITIES = {
+    'Москва': ('+7 (495)', ['Центральный', 'Юго-Западный', 'Северный', 'Восточный', 'Западный', 'Южный',
+                            'Северо-Западный', 'Зеленоградский']),
+    'Санкт-Петербург': ('+7 (812)', ['Невский', 'Приморский', 'Центральный', 'Василеостровский',
+                                     'Московский', 'Выборгский']),
+    'Казань': ('+7 (843)', ['Вахитовский', 'Приволжский', 'Советский', 'Ново-Савиновский']),
+    'Екатеринбург': ('+7 (343)', ['Ленинский', 'Кировский', 'Верх-Исетский', 'Чкаловский']),
+    'Новосибирск': ('+7 (383)', ['Центральный', 'Октябрьский', 'Ленинский', 'Заельцовский']),
+    'Краснодар': ('+7 (861)', ['Центральный', 'Прикубанский', 'Карасунский', 'Западный']),
+}
+# Weighted like the live user base: mostly the two capitals.
+CITY_WEIGHTS = [('Москва', 45), ('Санкт-Петербург', 25), ('Казань', 8), ('Екатеринбург', 8),
+                ('Новосибирск', 7), ('Краснодар', 7)]
+_CITY_TABLE = [c for c, w in CITY_WEIGHTS for _ in range(w)]
+
+STREETS = ['ул. Тверская', 'Ломоносовский пр-т', 'Невский пр-т', 'ул. Баумана', 'ул. Ленина', 'ул. Мира',
+           'Ленинградский пр-т', 'ул. Садовая', 'ул. Гагарина', 'ул. Советская', 'пр-т Победы',
+           'ул. Промышленная', 'Кутузовский пр-т', 'ул. Малышева', 'Красный пр-т', 'ул. Северная']
+BRANDS = ['Auto', 'Clean', 'Shine', 'Detail', 'Polish', 'Car', 'Premium', 'Blesk', 'Aqua', 'Gloss',
+          'Nano', 'Smart', 'Pro', 'Lux', 'Wash', 'Ceramic']
+BRAND_SUFFIXES = ['Studio', 'Express', 'Lab', 'Center', 'Garage', 'Point', 'House', 'Service', 'Club']
+COMPANY_TYPES = ['Детейлинг-студия', 'Автомойка', 'Детейлинг-центр', 'Автосервис', 'Сеть автомоек']
+SUPPLIER_NAMES = ['Koch Chemie', 'Grass', 'LeTech', 'Sonax', 'Meguiar\'s', 'Shine Systems', 'Detail',
+                  'Ekokemika', 'Gyeon', 'CarPro', '3M', 'Rupes']
+SUPPLIER_CATEGORIES = ['Автохимия', 'Оборудование', 'Расходные материалы', 'Пленки', 'Инструмент']
+PRODUCTS = ['Шампунь для бесконтактной мойки 1L', 'Полироль абразивная 250 мл', 'Керамическое покрытие 50 мл',
+            'Микрофибра 40×40, упаковка 10 шт', 'Очиститель дисков 1L', 'Пена активная 20L',
+            'Полировальный круг 150 мм', 'Пленка PPF 1.52×15 м', 'Очиститель салона 5L', 'Воск защитный 500 мл']
+
+SERVICES = ['Полировка кузова', 'Керамическое покрытие', 'Оклейка PPF', 'Химчистка салона', 'Тонировка',
+            'Бесконтактная мойка', 'Ручная мойка', 'Экспресс-полировка', 'Полный детейлинг', 'PDR',
+            'Восстановление ЛКП', 'Мойка двигателя', 'Антидождь', 'Шумоизоляция']
+SPECIALIZATIONS = ['Мастер-полировщик', 'Детейлер-универсал', 'Автомойщик', 'Мастер по химчистке',
+                   'Мастер по оклейке PPF', 'Мастер PDR', 'Тонировщик', 'Администратор автомойки']
+VACANCY_TITLES = SPECIALIZATIONS + ['Старший мойщик', 'Мастер-керамист', 'Мойщик (ночные смены)']
+SCHEDULES = ['5/2, с 9:00 до 20:00', '2/2, с 8:00 до 20:00', '3/3', 'Свободный график', 'Сменный график']
+EXPERIENCE = ['без опыта', 'от 1 года', 'от 2 лет', 'от 3 лет', 'от 5 лет']
+REQUIREMENTS = ['Опыт работы от 1 года', 'Аккуратность и внимание к деталям', 'Знание материалов Koch, Meguiar\'s',
+                'Умение работать с полировальной машинкой', 'Ответственность', 'Наличие сертификата',
+                'Готовность к сменному графику', 'Опыт работы с премиальными автомобилями']
+CARS = ['Toyota Camry 2023', 'Kia Rio 2020', 'Hyundai Solaris 2019', 'BMW X5 2022', 'Mercedes E-Class 2021',
+        'Volkswagen Polo 2018', 'Lada Vesta 2022', 'Skoda Octavia 2020', 'Audi A6 2021', 'Haval Jolion 2023',
+        'Geely Monjaro 2024', 'Chery Tiggo 7 Pro 2023']
+COURSES = ['Базовый курс детейлинга', 'Продвинутая полировка', 'Керамическое покрытие', 'Управление автомойкой']
+PROMO_PARTNERS = [('CoffeePoint', 'Кафе'), ('FitLife', 'Спорт'), ('AutoParts24', 'Автозапчасти'),
+                  ('ШинМаркет', 'Шиномонтаж'), ('Burger Lab', 'Кафе'), ('ТопливоПлюс', 'АЗС')]
+MONTHS = ['января', 'февраля', 'марта', 'апреля', 'мая', 'июня', 'июля', 'августа', 'сентября',
+          'октября', 'ноября', 'декабря']
+
+# (chat id, roles that post there) — the chats in mockData.mockChats.
+CHATS = [(1, ('employer',)), (2, ('specialist',)), (3, ('specialist', 'employer')),
+         (4, ('specialist', 'employer')), (5, ('specialist', 'employer')), (6, ('specialist',)),
+         (7, ('specialist', 'employer', 'client')), (8, ('specialist',))]
+
+GREETINGS = ['Здравствуйте!', 'Добрый день!', 'Привет!', 'Доброе утро!', 'Добрый вечер!']
+PHRASES = ['Мы рассмотрели ваше резюме.', 'Когда вам удобно подъехать на собеседование?',
+           'Спасибо, подойдет завтра в 11:00.', 'Уточните, пожалуйста, график.', 'Какая оплата за смену?',
+           'Есть опыт работы с керамикой?', 'Пришлите, пожалуйста, фото работ.', 'Договорились, ждем вас.',
+           'Адрес: {street}, {house}.', 'Могу выйти уже на этой неделе.', 'Машина будет готова к 18:00.',
+           'Стоимость {price} ₽, устроит?', 'Хорошо, записываю вас.', 'Подскажите, есть свободное время в субботу?']
+CHAT_PHRASES = ['Кто-нибудь работал с новой пастой Koch A1100?', 'Посоветуйте хороший полировальник.',
+                'Какой керамикой пользуетесь на потоке?', 'Ищу напарника на выходные.',
+                'Как убрать голограммы после полировки?', 'Поделитесь опытом работы с PPF.',
+                'У кого есть проверенный поставщик микрофибры?', 'Сколько сейчас берете за химчистку?']
+REVIEW_TEXTS = ['Отличная работа, рекомендую!', 'Все сделали быстро и аккуратно.', 'Хорошо, но дороговато.',
+                'Машина как новая!', 'Неплохо, но пришлось подождать.', 'Мастер знает свое дело.',
+                'Качество на высоте.', 'Остались мелкие недочеты.']
+
+DAY = 86_400
+
+
+def _mix(x):
+    """splitmix64: a well-spread 64-bit hash of an integer."""
+    x = (x + 0x9E3779B97F4A7C15) & M64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & M64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & M64
+    return x ^ (x >> 31)
+
+
+def spread(total, parts, i):
+    """``(first ordinal, count)`` of part ``i`` when ``total`` items are dealt over ``parts``."""
+    if parts <= 0:
+        return 0, 0
+    base, extra = divmod(total, parts)
+    return i * base + min(i, extra), base + (i < extra)
+
+
+def money(amount):
+    return f'{amount:,}'.replace(',', ' ') + ' ₽'
+
+
+@dataclass
+class Plan:
+    seed: int = 1
+    counts: dict = field(default_factory=lambda: dict(COUNTS))
+    # Timestamps run backwards from here (the date of the hand-written seed).
+    epoch: int = 1771495200  # 2026-02-19T10:00:00Z
+    shard_rows: int = 50_000
+
+    def stamp(self, seconds_before):
+        return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(self.epoch - seconds_before))
+
+    def tasks(self):
+        """``(kind, lo, hi)`` shards of at most ~``shard_rows`` records each."""
+        out = []
+        for kind, (parents, children) in KINDS.items():
+            n = self.counts[parents]
+            weight = 1 + (self.counts[children] / n if children and n else 0)
+            step = max(1, int(self.shard_rows / weight))
+            out.extend((kind, lo, min(n, lo + step)) for lo in range(0, n, step))
+        return out
+
+
+@dataclass(frozen=True)
+class Identity:
+    id: str
+    role: str
+    name: str
+    display: str
+    short: str
+    city: str
+    district: str
+    phone: str
+
+
+def identity(plan, role, n):
+    """Name, company and location of user ``n`` (0-based) of ``role``; a pure function of the id."""
+    prefix, _, code = ROLES[role]
+    h = _mix(plan.seed * 0x100000001B3 ^ code << 56 ^ n)
+    female = role != 'employer' and h % 5 == 0
+    first = (FEMALE if female else MALE)[(h >> 8) % (len(FEMALE) if female else len(MALE))]
+    surname = SURNAMES[(h >> 16) % len(SURNAMES)] + ('а' if female else '')
+    city = _CITY_TABLE[(h >> 24) % len(_CITY_TABLE)]
+    code_, districts = CITIES[city]
+    district = districts[(h >> 32) % len(districts)]
+    name = f'{first} {surname}'
+    display = name
+    if role == 'employer':
+        a = (h >> 40) % len(BRANDS)
+        b = (a + 1 + (h >> 44) % (len(BRANDS) - 1)) % len(BRANDS)
+        display = f'{BRANDS[a]}{BRANDS[b]} {BRAND_SUFFIXES[(h >> 48) % len(BRAND_SUFFIXES)]}'
+    elif role == 'supplier':
+        display = f'{SUPPLIER_NAMES[n % len(SUPPLIER_NAMES)]} {city}'
+        if n >= len(SUPPLIER_NAMES):
+            display += f' #{n // len(SUPPLIER_NAMES) + 1}'
+    phone = f'{code_ if role == "employer" else "+7 (999)"} {h % 900 + 100}-{h >> 12 & 0x3F:02d}-{h >> 20 & 0x3F:02d}'
+    return Identity(f'{prefix}{n + 1}', role, name, display, f'{first} {surname[0]}.', city, district, phone)
+
+
+class Shard:
+    """Generates the records of one ``(kind, lo, hi)`` shard."""
+
+    def __init__(self, plan, kind, lo, hi):
+        self.plan = plan
+        self.kind = kind
+        self.lo, self.hi = lo, hi
+        self.rng = random.Random(f'{plan.seed}:{kind}:{lo}')
+        self.c = plan.counts
+
+    def who(self, role, n=None):
+        total = self.c[ROLES[role][1]]
+        return identity(self.plan, role, self.rng.randrange(total) if n is None else n)
+
+    def ago(self, max_days, min_days=0):
+        return self.rng.randrange(min_days * DAY, max_days * DAY)
+
+    def records(self):
+        """Yield ``(dp_key, record)`` pairs."""
+        gen = getattr(self, f'_{self.kind}')
+        for i in range(self.lo, self.hi):
+            yield from gen(i)
+
+    # ── users ──
+
+    def _base_user(self, ident):
+        return {'id': ident.id, 'role': ident.role, 'email': f'{ident.id}@test.com', 'password': '123456',
+                'name': ident.display if ident.role == 'supplier' else ident.name, 'phone': ident.phone,
+                'city': ident.city}
+
+    def _reviews(self, ident, ordinal, target_type):
+        """Reviews of user ``ident``; returns ``(records, rating, count)``."""
+        r = self.rng
+        first, count = spread(self.c['reviews'], self.c['employers'] + self.c['specialists'], ordinal)
+        out, total = [], 0
+        for k in range(first, first + count):
+            author = self.who('client')
+            rating = r.choices((5, 4, 3, 2, 1), (55, 28, 10, 4, 3))[0]
+            total += rating
+            out.append({'id': f'rev{k + 1}', 'targetId': ident.id, 'targetType': target_type,
+                        'authorId': author.id, 'authorName': author.name, 'rating': rating,
+                        'text': r.choice(REVIEW_TEXTS), 'createdAt': self.plan.stamp(self.ago(365))})
+        return out, (js_round(total / count, 1) if count else 0), count
+
+    def _employer(self, i):
+        r, ident = self.rng, identity(self.plan, 'employer', i)
+        created = self.ago(900, 30)
+        reviews, rating, count = self._reviews(ident, i, 'company')
+        user = dict(self._base_user(ident),
+                    companyName=ident.display, inn=str(7700000000 + i),
+                    companyType=r.choice(COMPANY_TYPES),
+                    address=f'{STREETS[i % len(STREETS)]}, {i // len(STREETS) + 1}',
+                    district=ident.district,
+                    description=f'{r.choice(COMPANY_TYPES)} в районе {ident.district}.',
+                    services=r.sample(SERVICES, r.randint(2, 6)),
+                    workingHours=r.choice(['Пн-Вс: 9:00–21:00', 'Круглосуточно', 'Пн-Сб: 10:00–20:00']),
+                    subscriptionPlan=r.choice(['basic', 'pro', 'premium']),
+                    subscriptionExpiry=self.plan.stamp(-self.ago(700, 30))[:10],
+                    subAccounts=[], createdAt=self.plan.stamp(created), isVerified=r.random() < 0.7,
+                    rating=rating, reviewCount=count, favorites=[])
+        yield 'dp_users', user
+        for review in reviews:
+            yield 'dp_reviews', review
+
+    def _specialist(self, i):
+        r, ident = self.rng, identity(self.plan, 'specialist', i)
+        created = self.ago(900, 7)
+        reviews, rating, count = self._reviews(ident, self.c['employers'] + i, 'specialist')
+        first, n = spread(self.c['enrollments'], self.c['specialists'], i)
+        courses = r.sample(COURSES, min(n, len(COURSES)))
+        user = dict(self._base_user(ident),
+                    specialization=r.choice(SPECIALIZATIONS), experience=r.choice(EXPERIENCE[1:]),
+                    skills=r.sample(SERVICES, r.randint(2, 5)), isCertified=False,
+                    status=r.choice(['searching', 'open', 'employed']), availableForGigs=r.random() < 0.6,
+                    portfolio=[], createdAt=self.plan.stamp(created), isVerified=r.random() < 0.8,
+                    rating=rating, reviewCount=count, favorites=[])
+        enrollments = []
+        for k, course in enumerate(courses, first):
+            enrolled = self.ago(600, 60)
+            status = r.choices(('completed', 'inProgress', 'enrolled'), (5, 3, 2))[0]
+            e = {'id': f'te{k + 1}', 'userId': ident.id, 'userName': ident.name, 'course': course,
+                 'status': status, 'enrolledAt': self.plan.stamp(enrolled)}
+            if status == 'completed':
+                done = enrolled - self.rng.randrange(30 * DAY, 50 * DAY)
+                # The ordinal is unique, so certificate numbers never collide.
+                number = f'UC-{self.plan.stamp(done)[:4]}-{k + 1:03d}'
+                e.update(completedAt=self.plan.stamp(done), certificateNumber=number)
+                user.update(isCertified=True, certificateNumber=number)
+            enrollments.append(e)
+        yield 'dp_users', user
+        for review in reviews:
+            yield 'dp_reviews', review
+        for e in enrollments:
+            yield 'dp_training_enrollments', e
+
+    def _client(self, i):
+        ident = identity(self.plan, 'client', i)
+        created = self.ago(700)
+        yield 'dp_users', dict(self._base_user(ident), createdAt=self.plan.stamp(created),
+                               isVerified=True, rating=0, reviewCount=0,
+                               favorites=[self.who('employer').id for _ in range(self.rng.randint(0, 3))])
+
+    def _supplier(self, i):
+        r, ident = self.rng, identity(self.plan, 'supplier', i)
+        created = self.ago(1000, 100)
+        yield 'dp_users', dict(self._base_user(ident), companyName=ident.display,
+                               category=r.choice(SUPPLIER_CATEGORIES),
+                               products=r.sample(PRODUCTS, r.randint(2, 5)),
+                               minOrder=f'от {money(r.choice((10, 20, 50, 100)) * 1000)}',
+                               discount=f'до {r.choice((10, 15, 20, 30))}% при коллективной закупке',
+                               description=f'Официальный дистрибьютор {ident.display}.',
+                               createdAt=self.plan.stamp(created), isVerified=True,
+                               rating=round(r.uniform(4.0, 5.0), 1), reviewCount=r.randint(0, 300),
+                               favorites=[])
+
+    # ── listings ──
+
+    def _vacancies(self, i):
+        r = self.rng
+        emp = self.who('employer', i % self.c['employers'])
+        created = self.ago(60)
+        first, n = spread(self.c['applications'], self.c['vacancies'], i)
+        apps = []
+        for k, s in enumerate(r.sample(range(self.c['specialists']), min(n, self.c['specialists'])), first):
+            spec = self.who('specialist', s)
+            apps.append({'id': f'app{k + 1}', 'vacancyId': f'vac{i + 1}', 'specialistId': spec.id,
+                         'specialistName': spec.name,
+                         'message': f'{r.choice(GREETINGS)} {r.choice(PHRASES[9:11])}',
+                         'status': r.choices(('pending', 'accepted', 'rejected'), (6, 1, 2))[0],
+                         'createdAt': self.plan.stamp(created - r.randrange(1, DAY * 5))})
+        title = r.choice(VACANCY_TITLES)
+        yield 'dp_vacancies', {
+            'id': f'vac{i + 1}', 'employerId': emp.id, 'companyName': emp.display, 'title': title,
+            'city': emp.city, 'district': emp.district,
+            'salary': f'от {money(r.randrange(40, 200) * 1000)}', 'schedule': r.choice(SCHEDULES),
+            'experience': r.choice(EXPERIENCE), 'description': f'В {emp.display} требуется: {title}.',
+            'requirements': r.sample(REQUIREMENTS, r.randint(2, 4)), 'isHot': r.random() < 0.15,
+            'isVerified': r.random() < 0.7, 'status': 'active' if r.random() < 0.85 else 'closed',
+            'createdAt': self.plan.stamp(created), 'applications': apps}
+
+    def _gigs(self, i):
+        r = self.rng
+        by_employer = r.random() < 0.7
+        author = self.who('employer' if by_employer else 'specialist')
+        created = self.ago(30)
+        first, n = spread(self.c['gig_responses'], self.c['gigs'], i)
+        responses = []
+        for k in range(first, first + n):
+            who = self.who('specialist' if by_employer else 'employer')
+            responses.append({'id': f'gr{k + 1}', 'gigId': f'gig{i + 1}', 'responderId': who.id,
+                              'responderName': who.display, 'message': r.choice(PHRASES[9:12]),
+                              'status': 'pending', 'createdAt': self.plan.stamp(created - r.randrange(60, DAY))})
+        title = (f'{r.choice(SPECIALIZATIONS)} на 1 день' if by_employer
+                 else f'{r.choice(SPECIALIZATIONS)} ищет подработку')
+        yield 'dp_gigs', {
+            'id': f'gig{i + 1}', 'authorId': author.id, 'authorName': author.display,
+            'type': 'employer' if by_employer else 'specialist', 'title': title, 'city': author.city,
+            'district': author.district,
+            'date': r.choice(['Завтра, 10:00–21:00', 'Сегодня, с 14:00', 'Свободен в эту пятницу', 'Выходные']),
+            'pay': money(r.randrange(15, 80) * 100) if r.random() < 0.8 else 'Договорная',
+            'description': r.choice(PHRASES), 'urgent': r.random() < 0.3,
+            'status': r.choices(('active', 'taken', 'completed'), (7, 2, 1))[0],
+            'createdAt': self.plan.stamp(created), 'responses': responses}
+
+    def _orders(self, i):
+        r = self.rng
+        client = self.who('client')
+        created = self.ago(45)
+        first, n = spread(self.c['order_responses'], self.c['orders'], i)
+        responses = []
+        for k in range(first, first + n):
+            role = 'employer' if r.random() < 0.6 else 'specialist'
+            who = self.who(role)
+            responses.append({'id': f'or{k + 1}', 'orderId': f'ord{i + 1}', 'responderId': who.id,
+                              'responderName': who.display, 'responderRole': role,
+                              'price': money(r.randrange(10, 300) * 100), 'message': r.choice(PHRASES[9:]),
+                              'status': 'pending', 'createdAt': self.plan.stamp(created - r.randrange(60, DAY * 2))})
+        status = r.choices(('active', 'inProgress', 'completed', 'cancelled'), (6, 2, 3, 1))[0]
+        if status != 'active' and responses:
+            chosen = r.randrange(len(responses))
+            for j, resp in enumerate(responses):
+                resp['status'] = 'accepted' if j == chosen else 'rejected'
+        when = time.gmtime(self.plan.epoch + r.randrange(DAY, 20 * DAY))
+        car = r.choice(CARS)
+        service = ' + '.join(r.sample(SERVICES, r.randint(1, 2)))
+        yield 'dp_client_orders', {
+            'id': f'ord{i + 1}', 'clientId': client.id, 'clientName': client.name, 'service': service,
+            'city': client.city, 'district': client.district,
+            'preferredDate': f'{when.tm_mday} {MONTHS[when.tm_mon - 1]} {when.tm_year}'
+                             + (f', {when.tm_hour:02d}:00' if r.random() < 0.5 else ''),
+            'budget': f'{r.choice(("от", "до"))} {money(r.randrange(2, 60) * 1000)}',
+            'description': f'Нужна услуга: {service.lower()}. {car}.', 'carType': car, 'status': status,
+            'createdAt': self.plan.stamp(created), 'responses': responses}
+
+    # ── messaging ──
+
+    def _pair(self, i):
+        """The two participants of conversation ``i``; distinct pairs for i < specialists × employers."""
+        s = self.c['specialists']
+        spec = self.who('specialist', i % s)
+        if _mix(self.plan.seed ^ i) % 10 < 3:
+            other = self.who('client', (i // s + i % s) % self.c['clients'])
+        else:
+            other = self.who('employer', (i // s + i % s) % self.c['employers'])
+        return other, spec
+
+    def _conversations(self, i):
+        r = self.rng
+        a, b = self._pair(i)
+        first, n = spread(self.c['messages'], self.c['conversations'], i)
+        cid = f'conv{i + 1}'
+        t = self.ago(180, 1)
+        unread = {a.id: 0, b.id: 0}
+        sender, receiver = a, b
+        text, last_at = '', self.plan.stamp(t)
+        for k in range(first, first + n):
+            text = r.choice(PHRASES)
+            if '{' in text:
+                text = text.format(street=r.choice(STREETS), house=r.randint(1, 120), price=r.randrange(2, 30) * 500)
+            if k == first:
+                text = f'{r.choice(GREETINGS)} {text}'
+            last_at = self.plan.stamp(t)
+            # Only the tail of a thread can still be unread.
+            read = k < first + n - 2 or r.random() < 0.5
+            if not read:
+                unread[receiver.id] += 1
+            yield 'dp_messages', {'id': f'msg{k + 1}', 'conversationId': cid, 'senderId': sender.id,
+                                  'senderName': sender.display, 'receiverId': receiver.id, 'text': text,
+                                  'createdAt': last_at, 'read': read}
+            t = max(0, t - r.randrange(30, 6 * 3600))
+            if r.random() < 0.6:
+                sender, receiver = receiver, sender
+        yield 'dp_conversations', {'id': cid, 'participantIds': [a.id, b.id],
+                                   'participantNames': [a.display, b.display],
+                                   'participantRoles': [a.role, b.role], 'lastMessage': text,
+                                   'lastMessageAt': last_at, 'unreadCount': unread}
+
+    def _chat_messages(self, i):
+        r = self.rng
+        chat_id, roles = CHATS[_mix(self.plan.seed ^ i << 1) % len(CHATS)]
+        author = self.who(r.choice(roles))
+        # Ordinals run oldest → newest across the whole collection.
+        t = (self.c['chat_messages'] - i) * 97
+        yield 'dp_chat_messages', {'id': f'cm{i + 1}', 'chatId': chat_id, 'authorId': author.id,
+                                   'authorName': author.short if author.role == 'specialist' else author.display,
+                                   'authorRole': author.role, 'text': r.choice(CHAT_PHRASES),
+                                   'createdAt': self.plan.stamp(t)}
+
+    # ── offers ──
+
+    def _purchases(self, i):
+        r = self.rng
+        sup = self.who('supplier', i % self.c['suppliers'])
+        _, n = spread(self.c['participants'], self.c['purchases'], i)
+        participants, volume = [], 0
+        for e in r.sample(range(self.c['employers']), min(n, self.c['employers'])):
+            emp = self.who('employer', e)
+            q = r.randint(5, 40)
+            volume += q
+            participants.append({'userId': emp.id, 'userName': emp.display, 'quantity': q,
+                                 'joinedAt': self.plan.stamp(self.ago(20, 1))})
+        participants.sort(key=lambda p: p['joinedAt'])
+        target = max(50, int(volume * r.uniform(0.8, 1.6)) // 10 * 10)
+        price = r.randrange(2, 40) * 50
+        yield 'dp_collective_purchases', {
+            'id': f'cp{i + 1}', 'supplierId': sup.id, 'supplierName': sup.display,
+            'product': r.choice(PRODUCTS), 'description': 'Коллективная закупка по оптовой цене.',
+            'targetVolume': target, 'currentVolume': volume, 'unitPrice': money(price),
+            'retailPrice': money(int(price * r.uniform(1.3, 1.8)) // 10 * 10),
+            'deadline': self.plan.stamp(-self.ago(30, 3))[:10], 'participants': participants,
+            'status': 'completed' if volume >= target else 'active'}
+
+    def _promos(self, i):
+        r = self.rng
+        emp = self.who('employer')
+        partner, category = r.choice(PROMO_PARTNERS)
+        discount = f'{r.choice((5, 10, 15, 20, 25))}%'
+        max_uses = r.choice((50, 100, 200, 500))
+        used = r.sample(range(self.c['specialists']), min(r.randint(0, max_uses // 5), self.c['specialists']))
+        yield 'dp_promos', {
+            'id': f'promo{i + 1}', 'creatorId': emp.id, 'companyName': partner, 'partner': partner,
+            'category': category, 'title': f'Скидка {discount} в {partner}',
+            'description': f'Покажите промокод в {partner}.', 'discount': discount,
+            'code': f'DP{i + 1:05d}', 'validUntil': self.plan.stamp(-self.ago(120, 10))[:10],
+            'maxUses': max_uses, 'isActive': r.random() < 0.9, 'isExclusive': r.random() < 0.3,
+            'usedBy': [f'spec{s + 1}' for s in used]}
+
+
+# ── output ──
+
+class JsonlSink:
+    """Appends records to ``OUT/<dp_key>/part-NNNNN.jsonl``."""
+
+    def __init__(self, out, part):
+        self.out = out
+        self.name = f'part-{part:05d}.jsonl'
+        self.files = {}
+
+    def write(self, key, record):
+        f = self.files.get(key)
+        if f is None:
+            os.makedirs(os.path.join(self.out, key), exist_ok=True)
+            f = self.files[key] = open(os.path.join(self.out, key, self.name), 'w', encoding='utf-8')
+        f.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')))
+        f.write('\n')
+
+    def close(self):
+        for f in self.files.values():
+            f.close()
+        return {key: os.path.join(key, self.name) for key in self.files}
+
+
+class SqliteSink:
+    """Fills a shard database in ``load``-sized batches inside one transaction."""
+
+    BATCH = 5_000
+
+    def __init__(self, path):
+        self.path = path
+        self.db = SqliteDatabase(path, pool_size=1)
+        self.tx = self.db.batch()
+        self.tx.__enter__()
+        self.pending = {}
+        self.size = 0
+
+    def write(self, key, record):
+        self.pending.setdefault(key, []).append(record)
+        self.size += 1
+        if self.size >= self.BATCH:
+            self.flush()
+
+    def flush(self):
+        self.db.load(self.pending)
+        self.pending, self.size = {}, 0
+
+    def close(self):
+        self.flush()
+        self.tx.__exit__(None, None, None)
+        self.db.close()
+        return {}
+
+
+def run_shard(plan, kind, lo, hi, part, fmt, out):
+    """Generate one shard to disk; returns ``(part, files, rows per dp key)``."""
+    sink = JsonlSink(out, part) if fmt == 'jsonl' else SqliteSink(f'{out}.part-{part:05d}')
+    rows = {}
+    try:
+        for key, record in Shard(plan, kind, lo, hi).records():
+            sink.write(key, record)
+            rows[key] = rows.get(key, 0) + 1
+    finally:
+        files = sink.close()
+    return part, files, rows
+
+
+def merge_sqlite(out, part):
+    """Append shard ``part`` to ``out`` in one transaction and delete it."""
+    path = f'{out}.part-{part:05d}'
+    conn = sqlite3.connect(out, isolation_level=None)
+    try:
+        conn.execute('ATTACH DATABASE ? AS part', (path,))
+        tables = [t for t, in conn.execute("SELECT name FROM main.sqlite_master WHERE type = 'table' ORDER BY rowid")
+                  if t not in SqliteDatabase.DERIVED]
+        conn.execute('BEGIN IMMEDIATE')
+        for t in tables:
+            conn.execute(f'INSERT INTO main.{t} SELECT * FROM part.{t}')
+        conn.execute('COMMIT')
+        conn.execute('DETACH DATABASE part')
+    finally:
+        conn.close()
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+def generate(plan, out, fmt='jsonl', jobs=None):
+    """Write the dataset described by ``plan`` to ``out``; returns rows per dp key."""
+    tasks = plan.tasks()
+    if fmt == 'sqlite':
+        SqliteDatabase(out).close()  # create the schema
+    files, totals = {}, {}
+    args = [(plan, kind, lo, hi, part, fmt, out) for part, (kind, lo, hi) in enumerate(tasks)]
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        # map() yields in submission order, so shards are merged deterministically.
+        for part, shard_files, rows in pool.map(run_shard, *zip(*args)):
+            if fmt == 'sqlite':
+                merge_sqlite(out, part)
+            for key, path in shard_files.items():
+                files.setdefault(key, []).append(path)
+            for key, n in rows.items():
+                totals[key] = totals.get(key, 0) + n
+    if fmt == 'jsonl':
+        manifest = {'seed': plan.seed, 'counts': plan.counts, 'rows': totals, 'files': files}
+        with open(os.path.join(out, 'manifest.json'), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return totals
+
+
+def dataset(plan):
+    """The whole dataset as ``{dp_key: [records]}`` in memory, for tests and benchmarks."""
+    data = {}
+    for kind, lo, hi in plan.tasks():
+        for key, record in Shard(plan, kind, lo, hi).records():
+            data.setdefault(key, []).append(record)
+    return data
+
+
+def iter_records(out, key):
+    """Stream the ``key`` records of a JSONL dataset in generation order."""
+    with open(os.path.join(out, 'manifest.json'), encoding='utf-8') as f:
+        manifest = json.load(f)
+    for path in manifest['files'].get(key, ()):
+        with open(os.path.join(out, path), encoding='utf-8') as f:
+            for line in f:
+                yield json.loads(line)
+
+
+def parse_counts(values, scale):
+    counts = {k: max(1, int(v * scale)) if k != 'suppliers' else max(1, int(v * scale ** 0.5))
+              for k, v in COUNTS.items()}
+    for item in values:
+        name, _, n = item.partition('=')
+        if name not in counts or not n.replace('_', '').isdigit():
+            raise ValueError(f'bad --count {item!r}; expected one of {", ".join(counts)} = N')
+        counts[name] = int(n)
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate a synthetic dp_* dataset.')
+    parser.add_argument('--out', required=True, help='output directory (jsonl) or database file (sqlite)')
+    parser.add_argument('--format', choices=('jsonl', 'sqlite'), default='jsonl')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--scale', type=float, default=1.0, help='multiply every default count')
+    parser.add_argument('--count', action='append', default=[], metavar='NAME=N',
+                        help=f'set one count exactly ({", ".join(COUNTS)})')
+    parser.add_argument('--shard-rows', type=int, default=50_000, help='records per shard')
+    parser.add_argument('--jobs', type=int, default=None, help='worker processes (default: CPU count)')
+    args = parser.parse_args(argv)
+
+    try:
+        counts = parse_counts(args.count, args.scale)
+    except ValueError as e:
+        parser.error(str(e))
+    if os.path.exists(args.out) and (args.format == 'sqlite' or os.listdir(args.out)):
+        parser.error(f'{args.out} already exists')
+    if args.format == 'jsonl':
+        os.makedirs(args.out, exist_ok=True)
+
+    plan = Plan(seed=args.seed, counts=counts, shard_rows=args.shard_rows)
+    start = time.perf_counter()
+    totals = generate(plan, args.out, args.format, args.jobs)
+    elapsed = time.perf_counter() - start
+    for key, n in sorted(totals.items()):
+        print(f'  {key:<26} {n:>12,}')
+    total = sum(totals.values())
+    print(f'Done! {total:,} records in {elapsed:.1f}s ({total / elapsed:,.0f}/s) → {args.out}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,416 @@
+"""Rank specialists for open vacancies, gigs and client orders.
+
+Employers find people by browsing ``/specialists`` by hand; nothing reads
+``skills``, ``specialization``, ``city``, ``isCertified``, ``rating`` or
+``availableForGigs`` to match supply with demand. ``SpecialistIndex`` does:
+
+* Terms are Russian stems (``backend.stemmer``) cut to ``PREFIX`` letters, so
+  ``полировщик`` (a specialization) meets ``полировка`` (a skill) and
+  ``керамист`` meets ``керамическое покрытие``. A specialist posts each term
+  of its specialization (weight ``SPECIALIZATION_WEIGHT``) and skills (1).
+* An item's terms come from its title and requirements, its gig title or
+  its order's service. Terms no specialist has are dropped, so ``опыт``,
+  ``день`` and the like neither prune nor dilute.
+* Candidates are the union of the item's postings, so only specialists who
+  share a term are scored. Gigs and client orders also require the same
+  city and ``availableForGigs``. Specialists who already applied or
+  responded are skipped.
+* Each candidate's score is a weighted sum (``WEIGHTS``, per kind) of skill
+  coverage (idf-weighted share of the item's terms it posts), same city,
+  rating (a Bayesian average toward ``PRIOR_RATING``), certification,
+  experience against the vacancy's ``от N лет`` and job-seeking status. With
+  NumPy that is a few whole-array operations over the candidates, and the
+  top k comes from ``np.partition``; without it a plain loop and
+  ``heapq.nlargest`` give the same ranking.
+
+``MatchingService`` is the ``matching`` service of ``Database``. It builds the
+index on the first query. Rating, status and availability changes are
+patched in place; other specialist changes rebuild it on the next query.
+
+    POST /api/matching/vacancy       {"id": "vac12", "limit": 10}
+    POST /api/matching/gig           {"id": "gig3"}
+    POST /api/matching/clientOrder   {"id": "ord7"}
+
+each return ``[{"specialist": user, "score": s}]``, best first.
+
+The nightly batch ranks every open item of the marketplace across a process
+pool and writes one JSON line per item:
+
+    python -m backend.matching --batch [--data PATH] [--out matches.jsonl] [--jobs N] [--limit 10]
+    python -m backend.matching vacancy vac12 [--data PATH]
+
+``--data`` is a JSON dump or a ``backend.generate`` dataset directory, and
+defaults to the seed data.
+"""
+
+import argparse
+import heapq
+import json
+import math
+import os
+import re
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+from .stemmer import terms
+
+try:
+    import numpy as np
+except ImportError:  # the plain loop below gives the same ranking, just slower
+    np = None
+
+PREFIX = 6
+SPECIALIZATION_WEIGHT = 1.5
+PRIOR_RATING, PRIOR_COUNT = 4.0, 5
+MAX_YEARS = 10
+BATCH_CHUNK = 2_000
+# kind → feature weights; each feature is in [0, 1], so a score is too.
+WEIGHTS = {
+    'vacancy': {'skill': 0.5, 'city': 0.15, 'rating': 0.1, 'certified': 0.1, 'experience': 0.1, 'seeking': 0.05},
+    'gig': {'skill': 0.55, 'city': 0, 'rating': 0.25, 'certified': 0.1, 'experience': 0, 'seeking': 0.1},
+    'order': {'skill': 0.55, 'city': 0, 'rating': 0.3, 'certified': 0.15, 'experience': 0, 'seeking': 0},
+}
+SEEKING = {'searching': 1.0, 'open': 0.5, 'employed': 0.0}
+_YEARS_RE = re.compile(r'\d+')
+
+
+def match_terms(text):
+    """Stem prefixes of ``text``, without stopwords and bare numbers."""
+    return [t[:PREFIX] for t in terms(text) if not t.isdigit()]
+
+
+def years(text):
+    """Years of experience in ``от 2 лет`` / ``5 лет``; 0 for ``без опыта`` or nothing."""
+    m = _YEARS_RE.search(text or '')
+    return min(int(m.group()), MAX_YEARS) if m else 0
+
+
+@dataclass
+class Demand:
+    """What one vacancy, gig or client order asks for."""
+    kind: str
+    id: str
+    terms: dict
+    city: str = None
+    years: int = 0
+    exclude: frozenset = field(default_factory=frozenset)
+
+
+def _weigh(pairs):
+    weights = {}
+    for text, w in pairs:
+        for t in match_terms(text or ''):
+            weights[t] = max(weights.get(t, 0), w)
+    return weights
+
+
+def vacancy_demand(v):
+    return Demand('vacancy', v['id'], _weigh([(v.get('title'), 2)] + [(r, 1) for r in v.get('requirements') or ()]),
+                  v.get('city'), years(v.get('experience')),
+                  frozenset(a.get('specialistId') for a in v.get('applications') or ()))
+
+
+def gig_demand(g):
+    return Demand('gig', g['id'], _weigh([(g.get('title'), 2), (g.get('description'), 0.5)]), g.get('city'),
+                  exclude=frozenset([g.get('authorId')] + [r.get('responderId') for r in g.get('responses') or ()]))
+
+
+def order_demand(o):
+    return Demand('order', o['id'], _weigh([(o.get('service'), 2)]), o.get('city'),
+                  exclude=frozenset(r.get('responderId') for r in o.get('responses') or ()))
+
+
+# kind → (collection, which records are open for matching, Demand builder)
+KINDS = {
+    'vacancy': ('dp_vacancies', lambda v: v.get('status') == 'active', vacancy_demand),
+    'gig': ('dp_gigs', lambda g: g.get('status') == 'active' and g.get('type') == 'employer', gig_demand),
+    'order': ('dp_client_orders', lambda o: o.get('status') == 'active', order_demand),
+}
+
+
+def _rating(user):
+    count = user.get('reviewCount') or 0
+    rating = user.get('rating') or 0
+    return (rating * count + PRIOR_RATING * PRIOR_COUNT) / (count + PRIOR_COUNT) / 5
+
+
+class SpecialistIndex:
+    """Postings and feature columns over the specialists among ``users``."""
+
+    def __init__(self, users):
+        self.ids, self.docno, self.signature = [], {}, []
+        self.cities = {}
+        self.city, self.rating, self.certified, self.seeking, self.years = [], [], [], [], []
+        self.available, self.alive = [], []
+        postings = defaultdict(dict)
+        for user in users:
+            if user.get('role') != 'specialist':
+                continue
+            doc = len(self.ids)
+            self.ids.append(user['id'])
+            self.docno[user['id']] = doc
+            self.signature.append(self._signature(user))
+            self.city.append(self.cities.setdefault(user.get('city'), len(self.cities)))
+            for name, column in self._features(user).items():
+                getattr(self, name).append(column)
+            self.alive.append(True)
+            for skill in user.get('skills') or ():
+                for t in match_terms(skill):
+                    postings[t][doc] = 1.0
+            for t in match_terms(user.get('specialization') or ''):
+                postings[t][doc] = SPECIALIZATION_WEIGHT
+        n = len(self.ids)
+        self.idf = {t: math.log(1 + n / len(p)) for t, p in postings.items()}
+        self.postings = {t: (list(p), list(p.values())) for t, p in postings.items()}
+        if np is not None:
+            self.postings = {t: (np.array(d, dtype=np.int32), np.array(w, dtype=np.float64))
+                             for t, (d, w) in self.postings.items()}
+            self._arrays()
+
+    @staticmethod
+    def _signature(user):
+        return user.get('specialization'), tuple(user.get('skills') or ()), user.get('city')
+
+    @staticmethod
+    def _features(user):
+        return {'rating': _rating(user), 'certified': float(bool(user.get('isCertified'))),
+                'seeking': SEEKING.get(user.get('status'), 0.5), 'years': years(user.get('experience')),
+                'available': bool(user.get('availableForGigs'))}
+
+    def _arrays(self):
+        self.a_city = np.array(self.city, dtype=np.int32)
+        self.a_rating = np.array(self.rating, dtype=np.float64)
+        self.a_certified = np.array(self.certified, dtype=np.float64)
+        self.a_seeking = np.array(self.seeking, dtype=np.float64)
+        self.a_years = np.array(self.years, dtype=np.float64)
+        self.a_available = np.array(self.available, dtype=bool)
+        self.a_alive = np.array(self.alive, dtype=bool)
+
+    def __len__(self):
+        return sum(self.alive)
+
+    def patch(self, user):
+        """Apply a change that leaves terms and city alone; False if the index must be rebuilt."""
+        doc = self.docno.get(user.get('id'))
+        if doc is None:
+            return user.get('role') != 'specialist'
+        if user.get('role') != 'specialist' or self._signature(user) != self.signature[doc]:
+            return False
+        for name, value in self._features(user).items():
+            getattr(self, name)[doc] = value
+            if np is not None:
+                getattr(self, 'a_' + name)[doc] = value
+        return True
+
+    def remove(self, id):
+        doc = self.docno.get(id)
+        if doc is not None:
+            self.alive[doc] = False
+            if np is not None:
+                self.a_alive[doc] = False
+
+    def rank(self, demand, limit=10):
+        """The ``limit`` best ``(specialist id, score)`` pairs for ``demand``, best first."""
+        weights = {t: w * self.idf[t] for t, w in demand.terms.items() if t in self.idf}
+        total = sum(weights.values()) * SPECIALIZATION_WEIGHT
+        if not total or limit <= 0:
+            return []
+        local = demand.kind != 'vacancy'
+        code = self.cities.get(demand.city, -1)
+        if local and code < 0:
+            return []
+        w = WEIGHTS[demand.kind]
+        if np is not None:
+            return self._rank_np(demand, weights, total, local, code, w, limit)
+        coverage = defaultdict(float)
+        for t, tw in weights.items():
+            for doc, sw in zip(*self.postings[t]):
+                coverage[doc] += tw * sw
+        skip = {self.docno.get(id) for id in demand.exclude}
+        scored = []
+        for doc, cov in coverage.items():
+            if not self.alive[doc] or doc in skip or (local and (self.city[doc] != code or not self.available[doc])):
+                continue
+            experience = min(self.years[doc] / demand.years, 1.0) if demand.years else 1.0
+            score = (w['skill'] * cov / total + w['city'] * (self.city[doc] == code) + w['rating'] * self.rating[doc]
+                     + w['certified'] * self.certified[doc] + w['experience'] * experience
+                     + w['seeking'] * self.seeking[doc])
+            scored.append((score, -doc))
+        return [(self.ids[-doc], score) for score, doc in heapq.nlargest(limit, scored)]
+
+    def _rank_np(self, demand, weights, total, local, code, w, limit):
+        lists = [self.postings[t] for t in weights]
+        docs = np.concatenate([d for d, _ in lists])
+        gains = np.concatenate([sw * tw for (_, sw), tw in zip(lists, weights.values())])
+        cand, inverse = np.unique(docs, return_inverse=True)
+        coverage = np.bincount(inverse, weights=gains, minlength=len(cand)) / total
+        keep = self.a_alive[cand]
+        if local:
+            keep &= (self.a_city[cand] == code) & self.a_available[cand]
+        if demand.exclude:
+            skip = [self.docno[id] for id in demand.exclude if id in self.docno]
+            keep &= ~np.isin(cand, skip)
+        cand, coverage = cand[keep], coverage[keep]
+        if not len(cand):
+            return []
+        experience = np.minimum(self.a_years[cand] / demand.years, 1.0) if demand.years else 1.0
+        scores = (w['skill'] * coverage + w['city'] * (self.a_city[cand] == code) + w['rating'] * self.a_rating[cand]
+                  + w['certified'] * self.a_certified[cand] + w['experience'] * experience
+                  + w['seeking'] * self.a_seeking[cand])
+        if len(cand) > limit:
+            # Everything tied with the k-th score, so ties break by document as in the plain loop.
+            top = scores >= -np.partition(-scores, limit - 1)[limit - 1]
+            cand, scores = cand[top], scores[top]
+        order = np.lexsort((cand, -scores))[:limit]
+        return [(self.ids[doc], score) for doc, score in zip(cand[order].tolist(), scores[order].tolist())]
+
+
+class MatchingService:
+    """Online matches for one vacancy, gig or client order."""
+
+    def __init__(self, db):
+        self.db = db
+        self._index = None
+        db.collections['dp_users'].watch(self._changed)
+
+    def index(self):
+        if self._index is None:
+            self._index = SpecialistIndex(self.db.collections['dp_users'].all())
+        return self._index
+
+    def _changed(self, event, record):
+        if self._index is None or event == 'touch':
+            return
+        if event == 'delete':
+            self._index.remove(record['id'])
+        elif not self._index.patch(record):
+            self._index = None
+
+    def _match(self, kind, id, limit):
+        key, accept, build = KINDS[kind]
+        record = self.db.collections[key].get(id)
+        if record is None or not accept(record):  # closed items are not matched, as in the batch
+            return []
+        users = self.db.collections['dp_users']
+        return [{'specialist': users.get(sid), 'score': round(score, 4)}
+                for sid, score in self.index().rank(build(record), limit)]
+
+    def vacancy(self, id, limit=10):
+        return self._match('vacancy', id, limit)
+
+    def gig(self, id, limit=10):
+        return self._match('gig', id, limit)
+
+    def client_order(self, id, limit=10):
+        return self._match('order', id, limit)
+
+
+def _source(path):
+    """``records(dp key)`` over a dataset directory or a JSON dump."""
+    from .generate import iter_records  # both import services, which imports this module
+    from .services import SEED_PATH
+
+    if path and os.path.isdir(path):
+        return lambda key: iter_records(path, key)
+
+    with open(path or SEED_PATH, encoding='utf-8') as f:
+        data = json.load(f)
+    return lambda key: data.get(key) or ()
+
+
+def demands(records):
+    """Every open item's ``Demand``, vacancies first."""
+    for kind, (key, accept, build) in KINDS.items():
+        for record in records(key):
+            if accept(record):
+                yield build(record)
+
+
+_worker_index = None
+
+
+def _init_worker(index):
+    global _worker_index
+    _worker_index = index
+
+
+def _rank_chunk(chunk, limit):
+    return [(d.kind, d.id, _worker_index.rank(d, limit)) for d in chunk]
+
+
+def _chunks(items, size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def batch(records, out, limit=10, jobs=None):
+    """Rank every open item into ``out`` (JSON lines); returns ``(items, matches)``."""
+    index = SpecialistIndex(records('dp_users'))
+    chunks = list(_chunks(demands(records), BATCH_CHUNK))
+    items = found = 0
+    tmp = f'{out}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(index,)) as pool:
+            # map() yields in submission order, so the output is deterministic.
+            for ranked in pool.map(_rank_chunk, chunks, [limit] * len(chunks)):
+                for kind, id, matches in ranked:
+                    items += 1
+                    found += len(matches)
+                    f.write(json.dumps({'kind': kind, 'id': id,
+                                        'matches': [{'id': s, 'score': round(score, 4)} for s, score in matches]},
+                                       ensure_ascii=False) + '\n')
+    os.replace(tmp, out)
+    return items, found
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Rank specialists for vacancies, gigs and client orders.')
+    parser.add_argument('kind', nargs='?', choices=sorted(KINDS), help='match one item (online mode)')
+    parser.add_argument('id', nargs='?')
+    parser.add_argument('--batch', action='store_true', help='match every open item')
+    parser.add_argument('--data', help='JSON dump or backend.generate dataset directory (default: the seed data)')
+    parser.add_argument('--out', default='matches.jsonl', help='batch output (JSON lines)')
+    parser.add_argument('--jobs', type=int, default=None, help='batch worker processes (default: CPU count)')
+    parser.add_argument('--limit', type=int, default=10, help='specialists per item')
+    args = parser.parse_args(argv)
+
+    if args.batch == bool(args.kind):
+        parser.error('give either KIND ID or --batch')
+    if args.kind and not args.id:
+        parser.error('KIND needs an ID')
+    try:
+        records = _source(args.data)
+    except (OSError, ValueError) as e:
+        sys.exit(f'Error: {e}')
+    t0 = time.perf_counter()
+    if args.batch:
+        items, found = batch(records, args.out, args.limit, args.jobs)
+        print(f'{items:,} items, {found:,} matches in {time.perf_counter() - t0:.1f}s → {args.out}')
+        return
+    index = SpecialistIndex(records('dp_users'))
+    key, _, build = KINDS[args.kind]
+    record = next((r for r in records(key) if r.get('id') == args.id), None)
+    if record is None:
+        sys.exit(f'Error: no {args.kind} {args.id!r}')
+    t1 = time.perf_counter()
+    matches = index.rank(build(record), args.limit)
+    t2 = time.perf_counter()
+    users = {u['id']: u for u in records('dp_users') if u.get('id') in dict(matches)}
+    for sid, score in matches:
+        u = users[sid]
+        print(f'{score:6.3f}  {sid:<10} {u.get("city", ""):<16} {u.get("specialization", "")}: '
+              f'{", ".join(u.get("skills") or ())}')
+    print(f'{len(index):,} specialists indexed in {t1 - t0:.2f}s; match took {(t2 - t1) * 1000:.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,374 @@
+"""Append-only, per-conversation message log.
+
+storage.ts keeps every message of the platform in one ``dp_messages`` array.
+``sendMessage`` rewrites it and then rewrites ``dp_conversations`` to bump a
+counter, and ``markRead`` rescans the whole array. Here each conversation
+owns its own directory of fixed-size segments:
+
+    ROOT/conversations.log              one header line per conversation
+    ROOT/c/<ab>/<conversation id>/
+        000000.jsonl, 000000.idx        messages 0..SEGMENT-1 and their byte offsets
+        000001.jsonl, 000001.idx        ...
+        state.json                      count, lastMessage(At), unreadCount, read marks
+
+A message is addressed by its sequence number within the conversation. The
+``.idx`` file holds one little-endian u64 offset per message, so any window
+``[lo, hi)`` costs two seeks and one contiguous read. Sending a message
+appends one line and one offset and rewrites the small ``state.json``.
+Marking a conversation read moves a per-user high-water mark instead of
+touching messages, so a message's ``read`` flag is ``seq < readUpto[receiver]``.
+None of this depends on how many messages the platform holds.
+
+On open, only ``conversations.log`` is read. It feeds the per-user
+conversation lists and the ``(user, user)`` pair index used by
+``getOrCreateConversation``. Conversation state loads lazily. If a crash left
+the segments ahead of ``state.json``, the missing tail is replayed.
+
+Conversation ids become directory names, so only ids made of ``A-Z a-z
+0-9 _ -`` are accepted (``ServiceError`` otherwise). Only conversations
+with a header have state: sending to an unknown id is a ``KeyError``, while
+reading or marking one read finds no messages and writes nothing, as the
+in-memory ``messaging`` service does.
+
+``LogMessaging`` puts the storage.ts ``messaging`` API on top. Its
+``get_messages`` also takes a cursor (``before``/``limit``).
+"""
+
+import json
+import os
+import re
+import struct
+import threading
+import zlib
+from collections import defaultdict
+
+from .services import ServiceError, now, uid
+
+SEGMENT = 4096
+_OFFSET = struct.Struct('<Q')
+_ID = re.compile(r'[A-Za-z0-9_-]+')
+
+
+def _dumps(record):
+    return json.dumps(record, ensure_ascii=False, separators=(',', ':'))
+
+
+class ConversationState:
+    """Incrementally maintained summary of one conversation."""
+
+    __slots__ = ('header', 'count', 'last_message', 'last_message_at', 'unread', 'read_upto')
+
+    def __init__(self, header, count=0, last_message='', last_message_at=None, unread=None, read_upto=None):
+        self.header = header
+        self.count = count
+        self.last_message = last_message
+        self.last_message_at = last_message_at or header.get('createdAt') or ''
+        self.unread = unread if unread is not None else {u: 0 for u in header['participantIds']}
+        self.read_upto = read_upto or {}
+
+    def to_json(self):
+        return {'count': self.count, 'lastMessage': self.last_message, 'lastMessageAt': self.last_message_at,
+                'unreadCount': self.unread, 'readUpto': self.read_upto}
+
+    def record(self):
+        """The ``Conversation`` as storage.ts stores it."""
+        h = self.header
+        return {'id': h['id'], 'participantIds': h['participantIds'], 'participantNames': h['participantNames'],
+                'participantRoles': h['participantRoles'], 'lastMessage': self.last_message,
+                'lastMessageAt': self.last_message_at, 'unreadCount': dict(self.unread)}
+
+    def apply(self, msg, seq):
+        """Account for message ``seq`` having been appended."""
+        self.count = seq + 1
+        self.last_message = msg['text']
+        self.last_message_at = msg['createdAt']
+        receiver = msg['receiverId']
+        self.unread[receiver] = self.unread.get(receiver, 0) + 1
+
+
+class MessageLog:
+    """Per-conversation segmented storage with a pair index."""
+
+    def __init__(self, root, segment_size=SEGMENT):
+        self.root = root
+        self.segment_size = segment_size
+        self._lock = threading.RLock()
+        self._headers = {}
+        self._by_user = defaultdict(list)
+        self._pairs = {}
+        self._states = {}
+        os.makedirs(os.path.join(root, 'c'), exist_ok=True)
+        self._headers_path = os.path.join(root, 'conversations.log')
+        if os.path.exists(self._headers_path):
+            with open(self._headers_path, encoding='utf-8') as f:
+                for line in f:
+                    if line.endswith('\n'):  # a torn last line was never acknowledged
+                        self._index(json.loads(line))
+
+    def __len__(self):
+        return len(self._headers)
+
+    # ── layout ──
+
+    def _dir(self, cid):
+        if not isinstance(cid, str) or not _ID.fullmatch(cid):
+            raise ServiceError(f'invalid conversation id {cid!r}')
+        shard = f'{zlib.crc32(cid.encode("utf-8")) & 0xFF:02x}'
+        return os.path.join(self.root, 'c', shard, cid)
+
+    def _segment(self, cid, k, ext):
+        return os.path.join(self._dir(cid), f'{k:06d}.{ext}')
+
+    def _indexed(self, cid, k):
+        try:
+            return os.path.getsize(self._segment(cid, k, 'idx')) // _OFFSET.size
+        except FileNotFoundError:
+            return 0
+
+    # ── conversations ──
+
+    def _index(self, header):
+        cid = header['id']
+        self._headers[cid] = header
+        ids = header['participantIds']
+        for u in dict.fromkeys(ids):
+            self._by_user[u].append(cid)
+        for i, a in enumerate(ids):
+            for b in ids[i + 1:]:
+                self._pairs.setdefault(frozenset((a, b)), cid)
+
+    def create(self, header, state=None):
+        """Register a conversation; ``header`` holds id, participants and createdAt."""
+        with self._lock:
+            if header['id'] in self._headers:
+                raise KeyError(f'duplicate conversation {header["id"]!r}')
+            os.makedirs(self._dir(header['id']), exist_ok=True)
+            with open(self._headers_path, 'a', encoding='utf-8') as f:
+                f.write(_dumps(header) + '\n')
+            self._index(header)
+            state = state or ConversationState(header)
+            self._states[header['id']] = state
+            self._save(header['id'], state)
+            return state
+
+    def between(self, a, b):
+        """The id of a conversation between users ``a`` and ``b``, if any."""
+        return self._pairs.get(frozenset((a, b)))
+
+    def of_user(self, user_id):
+        return list(self._by_user.get(user_id, ()))
+
+    def state(self, cid):
+        """The (lazily loaded) state of ``cid``; ``KeyError`` if it has no header."""
+        with self._lock:
+            s = self._states.get(cid)
+            if s is None:
+                if cid not in self._headers:
+                    raise KeyError(f'unknown conversation {cid!r}')
+                s = self._states[cid] = self._load(cid)
+            return s
+
+    def _load(self, cid):
+        header = self._headers[cid]
+        try:
+            with open(os.path.join(self._dir(cid), 'state.json'), encoding='utf-8') as f:
+                saved = json.load(f)
+            s = ConversationState(header, saved['count'], saved['lastMessage'], saved['lastMessageAt'],
+                                  saved['unreadCount'], saved['readUpto'])
+        except FileNotFoundError:
+            s = ConversationState(header)
+        # Replay anything appended after the last state write.
+        k = s.count // self.segment_size
+        total = k * self.segment_size + self._indexed(cid, k)
+        while total == (k + 1) * self.segment_size:
+            k += 1
+            total += self._indexed(cid, k)
+        if total > s.count:
+            for seq, msg in enumerate(self._read(cid, s.count, total), s.count):
+                s.apply(msg, seq)
+            self._save(cid, s)
+        return s
+
+    def _save(self, cid, state):
+        path = os.path.join(self._dir(cid), 'state.json')
+        tmp = path + '.tmp'
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(_dumps(state.to_json()))
+        os.replace(tmp, path)
+
+    # ── messages ──
+
+    def append(self, cid, msg):
+        """Append ``msg`` (without ``read``) to ``cid``; returns its sequence number."""
+        with self._lock:
+            s = self.state(cid)
+            seq = s.count
+            k = seq // self.segment_size
+            os.makedirs(self._dir(cid), exist_ok=True)
+            with open(self._segment(cid, k, 'jsonl'), 'ab') as data:
+                offset = data.tell()
+                data.write(_dumps(msg).encode('utf-8') + b'\n')
+            with open(self._segment(cid, k, 'idx'), 'ab') as idx:
+                idx.write(_OFFSET.pack(offset))
+            s.apply(msg, seq)
+            self._save(cid, s)
+            return seq
+
+    def append_many(self, cid, msgs):
+        """Bulk-append ``msgs`` with one open per segment and one state write."""
+        with self._lock:
+            s = self.state(cid)
+            msgs = list(msgs)
+            i = 0
+            os.makedirs(self._dir(cid), exist_ok=True)
+            while i < len(msgs):
+                k = s.count // self.segment_size
+                room = (k + 1) * self.segment_size - s.count
+                batch = msgs[i:i + room]
+                offsets = []
+                with open(self._segment(cid, k, 'jsonl'), 'ab') as data:
+                    pos = data.tell()
+                    chunks = []
+                    for m in batch:
+                        line = _dumps(m).encode('utf-8') + b'\n'
+                        offsets.append(pos)
+                        pos += len(line)
+                        chunks.append(line)
+                    data.write(b''.join(chunks))
+                with open(self._segment(cid, k, 'idx'), 'ab') as idx:
+                    idx.write(b''.join(_OFFSET.pack(o) for o in offsets))
+                for m in batch:
+                    s.apply(m, s.count)
+                i += len(batch)
+            self._save(cid, s)
+
+    def _read(self, cid, lo, hi):
+        """Stored messages ``lo..hi-1`` of ``cid``, oldest first."""
+        out = []
+        while lo < hi:
+            k = lo // self.segment_size
+            first = lo - k * self.segment_size
+            n = min(hi, (k + 1) * self.segment_size) - lo
+            with open(self._segment(cid, k, 'idx'), 'rb') as idx:
+                idx.seek(first * _OFFSET.size)
+                # One extra offset, when there is one, marks where the window ends.
+                raw = idx.read((n + 1) * _OFFSET.size)
+            offsets = [o for o, in _OFFSET.iter_unpack(raw[:len(raw) - len(raw) % _OFFSET.size])]
+            with open(self._segment(cid, k, 'jsonl'), 'rb') as data:
+                data.seek(offsets[0])
+                block = data.read(offsets[n] - offsets[0]) if len(offsets) > n else data.read()
+            out.extend(json.loads(line) for line in block.split(b'\n', n)[:n])
+            lo += n
+        return out
+
+    def window(self, cid, before=None, limit=None):
+        """``(messages, first seq)`` for the ``limit`` messages before ``before`` (default: newest)."""
+        if cid not in self._headers:
+            return [], 0
+        s = self.state(cid)
+        hi = s.count if before is None else max(0, min(before, s.count))
+        lo = 0 if limit is None else max(0, hi - limit)
+        msgs = self._read(cid, lo, hi)
+        for seq, m in enumerate(msgs, lo):
+            m['read'] = seq < s.read_upto.get(m['receiverId'], 0)
+        return msgs, lo
+
+    def mark_read(self, cid, user_id):
+        with self._lock:
+            if cid not in self._headers:
+                return
+            s = self.state(cid)
+            s.read_upto[user_id] = s.count
+            s.unread[user_id] = 0
+            self._save(cid, s)
+
+    # ── bulk import / export ──
+
+    def load(self, conversations, messages):
+        """Import ``dp_conversations`` and ``dp_messages`` records.
+
+        A per-message ``read`` flag becomes a read mark just past the last
+        read message addressed to each user, which is the only pattern the
+        app itself produces. Messages of a conversation that is not in
+        ``conversations`` are skipped; the app never lists them.
+        """
+        by_conv = defaultdict(list)
+        for m in messages:
+            by_conv[m['conversationId']].append(m)
+        for conv in conversations:
+            header = {k: conv[k] for k in ('id', 'participantIds', 'participantNames', 'participantRoles')}
+            header['createdAt'] = conv.get('lastMessageAt', '')
+            self.create(header)
+        for cid, msgs in by_conv.items():
+            if cid not in self._headers:
+                continue
+            self.append_many(cid, [{k: v for k, v in m.items() if k != 'read'} for m in msgs])
+            s = self.state(cid)
+            for seq, m in enumerate(msgs, s.count - len(msgs)):
+                if m.get('read'):
+                    s.read_upto[m['receiverId']] = seq + 1
+            self._save(cid, s)
+        # The stored summaries win over the ones replayed from the messages.
+        for conv in conversations:
+            s = self.state(conv['id'])
+            s.last_message, s.last_message_at = conv['lastMessage'], conv['lastMessageAt']
+            s.unread = dict(conv['unreadCount'])
+            self._save(conv['id'], s)
+
+    def dump(self):
+        """``{'dp_conversations': [...], 'dp_messages': [...]}`` as storage.ts would hold them."""
+        convs, msgs = [], []
+        for cid in self._headers:
+            convs.append(self.state(cid).record())
+            msgs.extend(self.window(cid)[0])
+        return {'dp_conversations': convs, 'dp_messages': msgs}
+
+
+class LogMessaging:
+    """The storage.ts ``messaging`` service over a ``MessageLog``."""
+
+    def __init__(self, log):
+        self.log = log
+
+    def get_conversations(self, user_id):
+        return [self.log.state(cid).record() for cid in self.log.of_user(user_id)]
+
+    def get_or_create_conversation(self, user1, user2):
+        cid = self.log.between(user1['id'], user2['id'])
+        if cid is not None:
+            return self.log.state(cid).record()
+        header = {
+            'id': uid(),
+            'participantIds': [user1['id'], user2['id']],
+            'participantNames': [user1.get('name') or user1.get('companyName') or '',
+                                 user2.get('name') or user2.get('companyName') or ''],
+            'participantRoles': [user1.get('role'), user2.get('role')],
+            'createdAt': now(),
+        }
+        return self.log.create(header).record()
+
+    def get_messages(self, conversation_id, before=None, limit=None):
+        """Messages oldest first; ``before``/``limit`` select a window by sequence number."""
+        return self.log.window(conversation_id, before, limit)[0]
+
+    def get_messages_page(self, conversation_id, before=None, limit=50):
+        """A window plus the cursor of the next older page (``None`` at the start)."""
+        msgs, lo = self.log.window(conversation_id, before, limit)
+        return {'messages': msgs, 'nextCursor': lo or None}
+
+    def send_message(self, conversation_id, sender_id, sender_name, receiver_id, text):
+        msg = {'id': uid(), 'conversationId': conversation_id, 'senderId': sender_id,
+               'senderName': sender_name, 'receiverId': receiver_id, 'text': text, 'createdAt': now()}
+        self.log.append(conversation_id, msg)
+        return dict(msg, read=False)
+
+    def mark_read(self, conversation_id, user_id):
+        self.log.mark_read(conversation_id, user_id)
+
+    def unread_total(self, user_id):
+        """Unread messages across the user's conversations, for ``dashboard.get``."""
+        return sum(self.log.state(cid).unread.get(user_id, 0) for cid in self.log.of_user(user_id))
+
+    def dump(self):
+        return self.log.dump()
@@ -0,0 +1,149 @@
+"""Running rating aggregates for ``reviews``.
+
+storage.ts recomputes a target's average on every ``reviews.create`` by
+filtering all reviews, then rewrites all of ``dp_users``. ``RatingAggregates``
+keeps a running ``(sum, count)`` per target instead. Insert, edit and delete
+are O(1), and the displayed rating is ``js_round(sum / count, 1)``, the same
+value storage.ts computes.
+
+``recompute`` rebuilds every aggregate from the review log in one vectorized
+pass (``numpy.bincount`` over factorized target ids, or a plain loop when
+NumPy is not installed). It backs backfills and the consistency check:
+
+    python -m backend.ratings --data dump.json [--check] [--write fixed.json]
+    python -m backend.ratings --sqlite app.db [--check]
+
+Only targets that have reviews are compared or rewritten. storage.ts leaves
+the rating of a user without reviews as it was seeded.
+"""
+
+import argparse
+import json
+import sys
+
+from .services import js_round
+
+try:
+    import numpy as np
+except ImportError:  # the plain loop below is exact, just slower
+    np = None
+
+
+class RatingAggregates:
+    """``target id → (sum of ratings, count)``, maintained incrementally."""
+
+    def __init__(self, totals=None):
+        self._agg = {t: [s, c] for t, (s, c) in (totals or {}).items()}
+
+    @classmethod
+    def from_reviews(cls, reviews):
+        return cls(recompute(reviews))
+
+    def __len__(self):
+        return len(self._agg)
+
+    def add(self, target, rating):
+        a = self._agg.get(target)
+        if a is None:
+            self._agg[target] = [rating, 1]
+        else:
+            a[0] += rating
+            a[1] += 1
+
+    def remove(self, target, rating):
+        a = self._agg[target]
+        a[0] -= rating
+        a[1] -= 1
+        if not a[1]:
+            del self._agg[target]
+
+    def change(self, old_target, old_rating, new_target, new_rating):
+        self.remove(old_target, old_rating)
+        self.add(new_target, new_rating)
+
+    def get(self, target):
+        """``{'rating', 'reviewCount'}`` as stored on the user."""
+        total, count = self._agg.get(target, (0, 0))
+        return {'rating': js_round(total / count, 1) if count else 0, 'reviewCount': count}
+
+    def totals(self):
+        return {t: (s, c) for t, (s, c) in self._agg.items()}
+
+
+def recompute(reviews):
+    """``{target: (sum, count)}`` over ``reviews`` in one pass."""
+    reviews = reviews if isinstance(reviews, list) else list(reviews)
+    if np is None or not reviews:
+        out = {}
+        for r in reviews:
+            s, c = out.get(r['targetId'], (0, 0))
+            out[r['targetId']] = (s + r['rating'], c + 1)
+        return out
+    targets, inverse = np.unique(np.array([r['targetId'] for r in reviews], dtype=object), return_inverse=True)
+    # Ratings may be fractional (4.5); sums of whole ratings stay ints, as in the loop.
+    ratings = np.fromiter((r['rating'] for r in reviews), dtype=np.float64, count=len(reviews))
+    sums = np.bincount(inverse, weights=ratings, minlength=len(targets))
+    counts = np.bincount(inverse, minlength=len(targets))
+    return {t: (int(s) if s.is_integer() else s, c) for t, s, c in zip(targets.tolist(), sums.tolist(), counts.tolist())}
+
+
+def _stale(users, totals):
+    agg = RatingAggregates(totals)
+    for u in users:
+        if u['id'] in totals:
+            expected = agg.get(u['id'])
+            if u.get('rating') != expected['rating'] or u.get('reviewCount') != expected['reviewCount']:
+                yield u, expected
+
+
+def check(users, totals):
+    """``[(user id, stored, expected)]`` for reviewed users whose stored fields disagree."""
+    return [(u['id'], {'rating': u.get('rating'), 'reviewCount': u.get('reviewCount')}, expected)
+            for u, expected in _stale(users, totals)]
+
+
+def apply(users, totals):
+    """Write the aggregates onto ``users`` in place; returns how many changed."""
+    stale = list(_stale(users, totals))
+    for u, expected in stale:
+        u.update(expected)
+    return len(stale)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Rebuild or check rating aggregates from the reviews.')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--data', help='JSON {dp_key: [records]} dump')
+    source.add_argument('--sqlite', metavar='PATH', help='a backend.sqlite_store database')
+    parser.add_argument('--check', action='store_true', help='only report mismatches; exit 1 if any')
+    parser.add_argument('--write', metavar='OUT', help='with --data: write the corrected dump here')
+    args = parser.parse_args(argv)
+
+    if args.sqlite:
+        from .sqlite_store import SqliteDatabase
+
+        db = SqliteDatabase(args.sqlite)
+        # The same pass as GROUP BY inside SQLite, without pulling rows out.
+        targets, mismatches = db.rating_mismatches()
+    else:
+        with open(args.data, encoding='utf-8') as f:
+            data = json.load(f)
+        totals = recompute(data.get('dp_reviews', ()))
+        targets, mismatches = len(totals), check(data.get('dp_users', ()), totals)
+    for uid, stored, expected in mismatches[:20]:
+        print(f'  {uid}: stored {stored}, expected {expected}')
+    print(f'{targets} reviewed targets, {len(mismatches)} out of date')
+    if args.check:
+        sys.exit(1 if mismatches else 0)
+    if args.sqlite:
+        db.rebuild_ratings()
+        print('Rebuilt rating_aggregates and user ratings')
+    elif args.write:
+        apply(data.get('dp_users', []), totals)
+        with open(args.write, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        print(f'Wrote {args.write}')
+
+
+if __name__ == '__main__':
+    main()
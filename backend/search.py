@@ -0,0 +1,381 @@
+"""Full-text search over vacancies, specialists and companies.
+
+The pages filter by looping over ``vacancies.getAll()`` or
+``auth.getUsersByRole(...)`` and substring-matching a few fields.
+``SearchIndex`` keeps an inverted index instead:
+
+* Terms are Russian stems (``backend.stemmer``), so ``полировка``,
+  ``полировки`` and ``полировкой`` are one term.
+* Each field has a weight. A posting holds the weighted term frequency, and
+  the weighted document length feeds BM25 (k1=1.2, b=0.75).
+* A query stem that is not in the vocabulary falls back to the nearest
+  vocabulary terms by trigram Dice similarity, so ``палировка`` still finds
+  ``полировка``.
+* Postings are ``array`` columns. With NumPy each queried term also keeps
+  its postings' BM25 impacts in descending order, and the top k comes from
+  the threshold algorithm, which usually reads a few dozen postings per
+  term. Queries over very common terms fall back to MaxScore over a dense
+  score array. Without NumPy the same scores come from a plain loop.
+* Updates never rewrite postings. A changed or deleted document gets a
+  tombstone, and an update appends the new version under a fresh document
+  number. Once half the documents are dead the postings are compacted.
+
+``SearchService`` is the ``search`` service of ``Database``. It builds an index
+per page on the first query and keeps it current through ``Collection.watch``,
+so ``vacancies.create/update/delete`` and ``auth.updateProfile`` are visible to
+the next query:
+
+    POST /api/search/vacancies   {"query": "полировка кузова", "limit": 20}
+
+    python -m backend.search [--data dump.json] vacancies 'палировка'
+"""
+
+import argparse
+import json
+import math
+import time
+from array import array
+from collections import Counter, defaultdict
+
+from .stemmer import terms
+
+try:
+    import numpy as np
+except ImportError:  # the plain loop below gives the same ranking, just slower
+    np = None
+
+K1 = 1.2
+B = 0.75
+FUZZY_MIN_LEN = 4      # shorter stems are too ambiguous to correct
+FUZZY_MIN_DICE = 0.5
+FUZZY_TERMS = 3
+AVG_DRIFT = 0.1
+
+
+def trigrams(term):
+    padded = f'${term}$'
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SearchIndex:
+    """An inverted index over ``{field: weight}`` of records keyed by ``id``."""
+
+    def __init__(self, fields):
+        self.fields = dict(fields)
+        self._docs = {}                 # term → array('i') of document numbers
+        self._tf = {}                   # term → array('f') of weighted term frequencies
+        self._grams = defaultdict(set)  # trigram → vocabulary terms
+        self._ext = []                  # document number → record id (None once dead)
+        self._docno = {}                # record id → live document number
+        self._len = array('f')
+        self._alive = bytearray()
+        self._live_len = 0.0
+        self._avg = None                # avgdl the cached impacts were computed with
+        self._ranked = {}               # term → _impacts() cache, NumPy only
+
+    def __len__(self):
+        return len(self._docno)
+
+    def __contains__(self, id):
+        return id in self._docno
+
+    def _analyze(self, record):
+        freq = Counter()
+        for field, weight in self.fields.items():
+            value = record.get(field)
+            if not value:
+                continue
+            for text in (value if isinstance(value, list) else (value,)):
+                for term in terms(str(text)):
+                    freq[term] += weight
+        return freq
+
+    def add(self, record):
+        """Index ``record``, replacing its previous version if any."""
+        self.remove(record['id'])
+        freq = self._analyze(record)
+        doc = len(self._ext)
+        for term, tf in freq.items():
+            docs = self._docs.get(term)
+            if docs is None:
+                docs = self._docs[term] = array('i')
+                self._tf[term] = array('f')
+                for gram in trigrams(term):
+                    self._grams[gram].add(term)
+            docs.append(doc)
+            self._tf[term].append(tf)
+        length = sum(freq.values())
+        self._ext.append(record['id'])
+        self._docno[record['id']] = doc
+        self._len.append(length)
+        self._alive.append(1)
+        self._live_len += length
+
+    def remove(self, id):
+        doc = self._docno.pop(id, None)
+        if doc is None:
+            return
+        self._alive[doc] = 0
+        self._ext[doc] = None
+        self._live_len -= self._len[doc]
+        dead = len(self._ext) - len(self._docno)
+        if dead > 1024 and dead > len(self._docno):
+            self.compact()
+
+    def compact(self):
+        """Drop dead documents from the postings and renumber the live ones."""
+        remap = array('i', [-1]) * len(self._ext)
+        for new, doc in enumerate(d for d, alive in enumerate(self._alive) if alive):
+            remap[doc] = new
+        for term in list(self._docs):
+            docs, tf = self._docs[term], self._tf[term]
+            keep = [(remap[d], f) for d, f in zip(docs, tf) if self._alive[d]]
+            if not keep:
+                del self._docs[term], self._tf[term]
+                for gram in trigrams(term):
+                    self._grams[gram].discard(term)
+                continue
+            self._docs[term] = array('i', (d for d, _ in keep))
+            self._tf[term] = array('f', (f for _, f in keep))
+        self._len = array('f', (n for n, alive in zip(self._len, self._alive) if alive))
+        self._ext = [id for id in self._ext if id is not None]
+        self._docno = {id: doc for doc, id in enumerate(self._ext)}
+        self._alive = bytearray(b'\x01') * len(self._ext)
+        self._ranked.clear()
+
+    def similar(self, term):
+        """``[(vocabulary term, dice)]`` closest to ``term`` by trigrams, best first."""
+        grams = trigrams(term)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self._grams.get(gram, ()))
+        scored = [(t, 2 * n / (len(grams) + len(trigrams(t)))) for t, n in shared.items()]
+        scored = sorted((s for s in scored if s[1] >= FUZZY_MIN_DICE), key=lambda s: -s[1])
+        return scored[:FUZZY_TERMS]
+
+    def _query_terms(self, query):
+        """``{term: weight}``: stems of ``query``, or their fuzzy stand-ins."""
+        out = {}
+        for term in terms(query):
+            if term in self._docs:
+                out[term] = max(out.get(term, 0), 1.0)
+            elif len(term) >= FUZZY_MIN_LEN:
+                for near, dice in self.similar(term):
+                    out[near] = max(out.get(near, 0), dice)
+        return out
+
+    def _avgdl(self):
+        """The average document length BM25 normalizes by, re-read when it drifts by 10%."""
+        avg = self._live_len / len(self._docno) or 1.0
+        if self._avg is None or abs(avg - self._avg) > AVG_DRIFT * self._avg:
+            self._avg = avg
+            self._ranked.clear()
+        return self._avg
+
+    def _impacts(self, term):
+        """``(impact, order, sorted)`` for ``term``: the BM25 tf part of each posting,
+        and the first ``sorted`` postings by descending impact (ties by document).
+        Postings appended since the sort are the unsorted tail."""
+        docs = np.frombuffer(self._docs[term], dtype=np.int32)
+        tf = np.frombuffer(self._tf[term], dtype=np.float32)
+        impact, order, done = self._ranked.get(term, (np.empty(0, np.float32), None, 0))
+        if len(impact) < len(docs):
+            lens = np.frombuffer(self._len, dtype=np.float32)
+            d, f = docs[len(impact):], tf[len(impact):]
+            tail = f * (K1 + 1) / (f + K1 * (1 - B + B * lens[d] / self._avg))
+            impact = np.concatenate((impact, tail.astype(np.float32)))
+        if order is None or len(docs) - done > done // 4 + 64:
+            order, done = np.lexsort((docs, -impact)).astype(np.int32), len(docs)
+        self._ranked[term] = impact, order, done
+        return impact, order, done
+
+    def search(self, query, limit=20):
+        """The ``limit`` best ``(id, score)`` pairs for ``query``, best first."""
+        n = len(self._docno)
+        weights = self._query_terms(query)
+        if not n or not weights or limit <= 0:
+            return []
+        avg = self._avgdl()
+        # idf from posting lengths, which still count dead postings until compaction.
+        idf = {t: w * math.log(1 + (n - df + 0.5) / (df + 0.5))
+               for t, w in weights.items() for df in (min(len(self._docs[t]), n),)}
+        if np is not None:
+            return self._search_np(idf, limit)
+        scores = defaultdict(float)
+        lens, alive = self._len, self._alive
+        for term, w in idf.items():
+            for doc, tf in zip(self._docs[term], self._tf[term]):
+                if alive[doc]:
+                    scores[doc] += w * tf * (K1 + 1) / (tf + K1 * (1 - B + B * lens[doc] / avg))
+        top = sorted(scores.items(), key=lambda s: (-s[1], s[0]))[:limit]
+        return [(self._ext[doc], score) for doc, score in top]
+
+    def _search_np(self, idf, limit):
+        """Fagin's threshold algorithm over impact-ordered postings, then MaxScore.
+
+        Read each term's postings ``depth`` deep in impact order (plus its
+        unsorted tail) and score those documents exactly; postings are sorted
+        by document, so ``searchsorted`` finds a document's posting in the
+        other terms. A document not read yet scores at most the sum of each
+        term's impact at ``depth``. Once the k-th best score reaches that
+        bound the top k is final; otherwise read deeper.
+
+        Flat impacts (many equal scores) would make that read most of the
+        index, so past a small budget the k-th score found so far becomes a
+        MaxScore threshold: terms whose maximum impacts add up to less than it
+        cannot place a document on their own, so only the other terms are
+        scattered into a dense score array. Documents whose partial score
+        cannot reach the threshold are dropped before the cheap terms are
+        added.
+        """
+        # Views over the array columns; none may outlive this call, or the
+        # arrays could not grow.
+        alive = np.frombuffer(self._alive, dtype=np.uint8).view(bool)
+        lists = [(w, np.frombuffer(self._docs[t], dtype=np.int32)) + self._impacts(t) for t, w in idf.items()]
+        depth, budget, floor = max(2 * limit, 16), len(self._ext) // 64, 0.0
+        while sum(min(depth, done) + len(docs) - done for _, docs, _, _, done in lists) <= budget:
+            seen, bound, exhausted = [], 0.0, True
+            for w, docs, impact, order, done in lists:
+                seen.append(docs[order[:depth]])
+                seen.append(docs[done:])
+                if depth < done:
+                    bound += w * float(impact[order[depth]])
+                    exhausted = False
+            cand = seen[0] if len(seen) == 2 and not len(seen[1]) else np.unique(np.concatenate(seen))
+            cand = cand[alive[cand]]
+            scores = self._score(lists, cand)
+            k = min(limit, len(cand))
+            if k == limit:
+                floor = float(-np.partition(-scores, k - 1)[k - 1])
+            if exhausted or (k == limit and floor >= bound):
+                return self._top(cand, scores, limit)
+            depth *= 4
+
+        # Term upper bounds, cheapest first; a prefix summing below ``floor`` is non-essential.
+        lists.sort(key=lambda l: l[0] * float(l[2].max()))
+        cheap, rest = 0.0, 0
+        while rest < len(lists) - 1 and cheap + lists[rest][0] * float(lists[rest][2].max()) < floor:
+            cheap += lists[rest][0] * float(lists[rest][2].max())
+            rest += 1
+        dense = np.zeros(len(self._ext), dtype=np.float32)
+        for w, docs, impact, _, _ in lists[rest:]:
+            # A document appears once per term, so a fancy-index add is exact.
+            dense[docs] += w * impact
+        # float32 partial sums: keep a hair's slack below the threshold.
+        keep = dense >= (floor - cheap) * (1 - 1e-5) if floor else dense > 0
+        cand = np.flatnonzero(keep & alive)
+        if len(cand) > budget:
+            for w, docs, impact, _, _ in lists[:rest]:
+                dense[docs] += w * impact
+            scores = dense[cand].astype(float)
+        else:
+            scores = dense[cand].astype(float) + self._score(lists[:rest], cand)
+        if len(cand) > limit:
+            top = np.argpartition(-scores, limit - 1)[:limit]
+            cand, scores = cand[top], scores[top]
+        return self._top(cand, scores, limit)
+
+    @staticmethod
+    def _score(lists, cand):
+        """Exact scores of the documents ``cand`` over ``lists``."""
+        # float64 like the threshold bound, so a tie with the bound counts as reaching it.
+        scores = np.zeros(len(cand))
+        for w, docs, impact, _, _ in lists:
+            pos = np.minimum(np.searchsorted(docs, cand), len(docs) - 1)
+            scores += np.where(docs[pos] == cand, w * impact[pos].astype(float), 0)
+        return scores
+
+    def _top(self, cand, scores, limit):
+        top = np.lexsort((cand, -scores))[:limit]
+        return [(self._ext[doc], score) for doc, score in zip(cand[top].tolist(), scores[top].tolist())]
+
+
+# page → (collection, {field: weight}, which records the page lists)
+SOURCES = {
+    'vacancies': ('dp_vacancies',
+                  {'title': 3, 'companyName': 1.5, 'requirements': 1.5, 'description': 1,
+                   'city': 0.5, 'district': 0.5},
+                  lambda v: v.get('status') == 'active'),
+    'specialists': ('dp_users',
+                    {'specialization': 3, 'name': 2, 'skills': 2, 'resumeText': 1, 'city': 0.5},
+                    lambda u: u.get('role') == 'specialist'),
+    'companies': ('dp_users',
+                  {'companyName': 3, 'companyType': 2, 'services': 2, 'description': 1,
+                   'city': 0.5, 'district': 0.5},
+                  lambda u: u.get('role') == 'employer'),
+}
+
+
+class SearchService:
+    """Ranked search for the vacancies, specialists and companies pages."""
+
+    def __init__(self, db):
+        self.db = db
+        self._indexes = {}
+        for kind, (key, _, _) in SOURCES.items():
+            db.collections[key].watch(lambda event, record, kind=kind: self._changed(kind, event, record))
+
+    def _index(self, kind):
+        index = self._indexes.get(kind)
+        if index is None:
+            key, fields, accept = SOURCES[kind]
+            index = SearchIndex(fields)
+            for record in self.db.collections[key].all():
+                if accept(record):
+                    index.add(record)
+            self._indexes[kind] = index
+        return index
+
+    def _changed(self, kind, event, record):
+        index = self._indexes.get(kind)
+        if index is None or event == 'touch':  # not built yet, or nothing indexed changed
+            return
+        if event != 'delete' and SOURCES[kind][2](record):
+            index.add(record)
+        else:
+            index.remove(record['id'])
+
+    def _search(self, kind, query, limit):
+        records = self.db.collections[SOURCES[kind][0]]
+        return [records.get(id) for id, _ in self._index(kind).search(query, limit)]
+
+    def vacancies(self, query, limit=20):
+        return self._search('vacancies', query, limit)
+
+    def specialists(self, query, limit=20):
+        return self._search('specialists', query, limit)
+
+    def companies(self, query, limit=20):
+        return self._search('companies', query, limit)
+
+
+def main(argv=None):
+    from .services import Database
+
+    parser = argparse.ArgumentParser(description='Query the search index over a dump.')
+    parser.add_argument('kind', choices=sorted(SOURCES))
+    parser.add_argument('query')
+    parser.add_argument('--data', help='JSON {dp_key: [records]} dump (default: the seed data)')
+    parser.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    if args.data:
+        with open(args.data, encoding='utf-8') as f:
+            db = Database(json.load(f))
+    else:
+        db = Database.seeded()
+    service = db.services['search']
+    t0 = time.perf_counter()
+    index = service._index(args.kind)
+    t1 = time.perf_counter()
+    hits = index.search(args.query, args.limit)
+    t2 = time.perf_counter()
+    records = db.collections[SOURCES[args.kind][0]]
+    for id, score in hits:
+        r = records.get(id)
+        print(f'{score:7.3f}  {id}  {r.get("title") or r.get("companyName") or r.get("name")}')
+    print(f'{len(index)} documents indexed in {t1 - t0:.2f}s; query took {(t2 - t1) * 1000:.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+"""HTTP front for the reference backend.
+
+Every service method of storage.ts is reachable as
+
+    POST /api/<service>/<method>     e.g. POST /api/vacancies/getByEmployer
+
+with a JSON body holding either the keyword arguments (camelCase names, as
+in the TypeScript signature) or a list of positional arguments:
+
+    {"employerId": "emp1"}           or    ["emp1"]
+
+Responses are ``{"result": ...}``; a ``ServiceError``, a body that is not
+JSON or arguments that do not fit the method become a 400 with
+``{"error": message}``, an unknown service or method a 404, and anything
+else a 500 (the traceback goes to stderr). ``GET /api/dump`` returns every
+``dp_*`` collection.
+
+    python -m backend.server [--port 8787] [--data dump.json] [--sqlite app.db] [--messages DIR]
+
+With ``--sqlite`` the collections live in a SQLite file (see
+``backend.sqlite_store``) and requests are served concurrently. With
+``--messages`` the messaging service runs on a ``backend.message_log``
+directory, which is filled from the loaded data the first time.
+"""
+
+import argparse
+import contextlib
+import inspect
+import json
+import re
+import sys
+import threading
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .services import Database, ServiceError
+
+_CAMEL_RE = re.compile(r'(?<!^)(?=[A-Z])')
+
+
+def snake(name):
+    return _CAMEL_RE.sub('_', name).lower()
+
+
+class UnknownMethod(Exception):
+    """No service method answers to ``<service>.<method>``."""
+
+
+class Api:
+    """Dispatches ``(service, method, args)`` calls onto a ``Database``."""
+
+    def __init__(self, db):
+        self.db = db
+        # The SQLite backend does its own locking; the in-memory one needs a lock.
+        self.lock = contextlib.nullcontext() if getattr(db, 'thread_safe', False) else threading.Lock()
+
+    def call(self, service, method, args):
+        target = self.db.services.get(service)
+        fn = getattr(target, snake(method), None) if target and not method.startswith('_') else None
+        if fn is None:
+            raise UnknownMethod(f'unknown method {service}.{method}')
+        if isinstance(args, list):
+            args, kwargs = args, {}
+        elif isinstance(args, dict):
+            args, kwargs = [], {snake(k): v for k, v in args.items()}
+        else:
+            raise ServiceError('arguments must be a JSON list or object')
+        try:
+            inspect.signature(fn).bind(*args, **kwargs)
+        except TypeError as e:
+            raise ServiceError(f'bad arguments for {service}.{method}: {e}') from None
+        with self.lock:
+            return fn(*args, **kwargs)
+
+
+def make_handler(api):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _send(self, status, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_OPTIONS(self):
+            self.send_response(204)
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
+            self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+        def do_GET(self):
+            if self.path == '/api/dump':
+                with api.lock:
+                    self._send(200, api.db.dump())
+            else:
+                self._send(404, {'error': 'not found'})
+
+        def do_POST(self):
+            parts = self.path.split('?', 1)[0].strip('/').split('/')
+            if len(parts) != 3 or parts[0] != 'api':
+                self._send(404, {'error': 'not found'})
+                return
+            try:
+                length = int(self.headers.get('Content-Length') or 0)
+                args = json.loads(self.rfile.read(length) or b'{}')
+            except ValueError as e:
+                self._send(400, {'error': f'bad request: {e}'})
+                return
+            try:
+                result = api.call(parts[1], parts[2], args)
+            except UnknownMethod as e:
+                self._send(404, {'error': str(e)})
+            except ServiceError as e:
+                self._send(400, {'error': str(e)})
+            except Exception:
+                print(f'{parts[1]}.{parts[2]} failed:', file=sys.stderr)
+                traceback.print_exc()
+                self._send(500, {'error': 'internal error'})
+            else:
+                self._send(200, {'result': result})
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve the storage.ts API over HTTP.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8787)
+    parser.add_argument('--data', help='JSON {dp_key: [records]} to load instead of the seed data')
+    parser.add_argument('--sqlite', metavar='PATH', help='keep the collections in a SQLite database file')
+    parser.add_argument('--messages', metavar='DIR', help='keep conversations and messages in a segmented log')
+    args = parser.parse_args(argv)
+
+    if args.sqlite:
+        from .sqlite_store import SqliteDatabase
+
+        db = SqliteDatabase.seeded(args.sqlite)
+        if args.data:
+            with open(args.data, encoding='utf-8') as f:
+                db.load(json.load(f))
+    elif args.data:
+        with open(args.data, encoding='utf-8') as f:
+            db = Database(json.load(f))
+    else:
+        db = Database.seeded()
+    if args.messages:
+        from .message_log import LogMessaging, MessageLog
+
+        log = MessageLog(args.messages)
+        if not len(log):
+            data = db.dump()
+            log.load(data.get('dp_conversations', ()), data.get('dp_messages', ()))
+        db.services['messaging'] = LogMessaging(log)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(Api(db)))
+    print(f'Serving storage API on http://{args.host}:{args.port}/api/')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,538 @@
+"""The storage.ts service API over indexed in-memory collections.
+
+Each service mirrors its TypeScript counterpart method for method (snake_case
+here, camelCase on the wire) and raises ``ServiceError`` with the same
+messages. Browser-session helpers (``auth.logout``/``getCurrentUser``) have no
+server-side meaning and are left out.
+"""
+
+import json
+import math
+import os
+import random
+import string
+import threading
+import time
+from datetime import datetime, timezone
+
+from .certificates import CertificateSequence
+from .dashboard import DashboardService
+from .facets import FacetService
+from .matching import MatchingService
+from .search import SearchService
+from .store import Collection
+
+SEED_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'seed.json')
+
+# dp_* key → (indexed fields, multi-valued indexed fields)
+SCHEMA = {
+    'dp_users': (('email', 'inn', 'address', 'role'), ()),
+    'dp_vacancies': (('employerId', 'status'), ()),
+    'dp_gigs': (('authorId', 'status'), ()),
+    'dp_client_orders': (('clientId', 'status'), ()),
+    'dp_conversations': ((), ('participantIds',)),
+    'dp_messages': (('conversationId',), ()),
+    'dp_chat_messages': (('chatId',), ()),
+    'dp_promos': (('creatorId',), ()),
+    'dp_reviews': (('targetId',), ()),
+    'dp_collective_purchases': (('supplierId', 'status'), ()),
+    'dp_training_enrollments': (('userId', 'status', 'certificateNumber'), ()),
+}
+
+
+class ServiceError(Exception):
+    """A user-facing error, raised where storage.ts throws."""
+
+
+def _base36(n):
+    digits = string.digits + string.ascii_lowercase
+    out = ''
+    while n:
+        n, r = divmod(n, 36)
+        out = digits[r] + out
+    return out or '0'
+
+
+def uid():
+    return _base36(int(time.time() * 1000)) + ''.join(random.choices(string.digits + string.ascii_lowercase, k=6))
+
+
+def now():
+    return datetime.now(timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+
+
+def parse_time(value):
+    """Parse the ISO dates storage.ts writes; date-only values are UTC midnight."""
+    t = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    return t if t.tzinfo else t.replace(tzinfo=timezone.utc)
+
+
+def js_round(x, digits=0):
+    """``Math.round(x * 10**d) / 10**d``: halves round up, unlike ``round``."""
+    scale = 10 ** digits
+    return math.floor(x * scale + 0.5) / scale
+
+
+def check_subscription(user):
+    """Refuse employers whose subscription has expired, as ``auth.login`` does."""
+    if user['role'] == 'employer' and user.get('subscriptionExpiry'):
+        if parse_time(user['subscriptionExpiry']) < datetime.now(timezone.utc):
+            raise ServiceError('Подписка истекла. Продлите подписку для входа.')
+    return user
+
+
+class Auth:
+    def __init__(self, db):
+        self.users = db.collections['dp_users']
+
+    def register(self, data):
+        if self.users.find_one('email', data.get('email')):
+            raise ServiceError('Пользователь с таким email уже существует')
+        if data.get('role') == 'employer' and data.get('inn'):
+            if self.users.find_one('inn', data['inn']):
+                raise ServiceError('Компания с таким ИНН уже зарегистрирована')
+        if data.get('role') == 'employer' and data.get('address'):
+            if any(u['role'] == 'employer' for u in self.users.find('address', data['address'])):
+                raise ServiceError('Предприятие по этому адресу уже зарегистрировано')
+        user = dict(data, id=uid(), createdAt=now(), isVerified=data.get('role') == 'client',
+                    rating=0, reviewCount=0, favorites=[])
+        return self.users.insert(user)
+
+    def login(self, email, password):
+        user = self.users.find_one('email', email)
+        if not user or user.get('password') != password:
+            raise ServiceError('Неверный email или пароль')
+        return check_subscription(user)
+
+    def update_profile(self, user_id, updates):
+        if user_id not in self.users:
+            raise ServiceError('Пользователь не найден')
+        return self.users.update(user_id, updates)
+
+    def get_user(self, id):
+        return self.users.get(id)
+
+    def get_users_by_role(self, role):
+        return self.users.find('role', role)
+
+    def toggle_favorite(self, user_id, target_id):
+        user = self.users.get(user_id)
+        if user is None:
+            return
+        favs = user.get('favorites') or []
+        if target_id in favs:
+            user['favorites'] = [f for f in favs if f != target_id]
+        else:
+            user['favorites'] = favs + [target_id]
+
+
+class Vacancies:
+    def __init__(self, db):
+        self.db = db
+        self.vacancies = db.collections['dp_vacancies']
+
+    def get_all(self):
+        return self.vacancies.find('status', 'active')
+
+    def get_by_id(self, id):
+        return self.vacancies.get(id)
+
+    def get_by_employer(self, employer_id):
+        return self.vacancies.find('employerId', employer_id)
+
+    def create(self, data):
+        employer = self.db.auth.get_user(data.get('employerId'))
+        v = dict(data, id=uid(), createdAt=now(), applications=[], status='active',
+                 isVerified=bool(employer and employer.get('isVerified')))
+        return self.vacancies.insert(v)
+
+    def update(self, id, updates):
+        if id not in self.vacancies:
+            raise ServiceError('Вакансия не найдена')
+        return self.vacancies.update(id, updates)
+
+    def delete(self, id):
+        self.vacancies.delete(id)
+
+    def apply(self, vacancy_id, specialist_id, specialist_name, message):
+        v = self.vacancies.get(vacancy_id)
+        if v is None:
+            raise ServiceError('Вакансия не найдена')
+        if any(a['specialistId'] == specialist_id for a in v['applications']):
+            raise ServiceError('Вы уже откликнулись на эту вакансию')
+        app = {'id': uid(), 'vacancyId': vacancy_id, 'specialistId': specialist_id,
+               'specialistName': specialist_name, 'message': message, 'status': 'pending', 'createdAt': now()}
+        v['applications'].append(app)
+        self.vacancies.touch(vacancy_id)
+        return app
+
+    def update_application_status(self, vacancy_id, application_id, status):
+        v = self.vacancies.get(vacancy_id)
+        if v is None:
+            return
+        for a in v['applications']:
+            if a['id'] == application_id:
+                a['status'] = status
+                self.vacancies.touch(vacancy_id)
+                return
+
+
+class Gigs:
+    def __init__(self, db):
+        self.gigs = db.collections['dp_gigs']
+
+    def get_all(self):
+        return self.gigs.find('status', 'active')
+
+    def create(self, data):
+        return self.gigs.insert(dict(data, id=uid(), createdAt=now(), responses=[], status='active'))
+
+    def respond(self, gig_id, responder_id, responder_name, message):
+        g = self.gigs.get(gig_id)
+        if g is None:
+            return
+        g['responses'].append({'id': uid(), 'gigId': gig_id, 'responderId': responder_id,
+                               'responderName': responder_name, 'message': message,
+                               'status': 'pending', 'createdAt': now()})
+        self.gigs.touch(gig_id)
+
+    def get_by_author(self, author_id):
+        return self.gigs.find('authorId', author_id)
+
+    def delete(self, id):
+        self.gigs.delete(id)
+
+
+class ClientOrders:
+    def __init__(self, db):
+        self.orders = db.collections['dp_client_orders']
+
+    def get_all(self):
+        return self.orders.all()
+
+    def get_active(self):
+        return self.orders.find('status', 'active')
+
+    def get_by_client(self, client_id):
+        return self.orders.find('clientId', client_id)
+
+    def create(self, data):
+        return self.orders.insert(dict(data, id=uid(), createdAt=now(), responses=[], status='active'))
+
+    def respond(self, order_id, responder_id, responder_name, responder_role, price, message):
+        o = self.orders.get(order_id)
+        if o is None:
+            return
+        o['responses'].append({'id': uid(), 'orderId': order_id, 'responderId': responder_id,
+                               'responderName': responder_name, 'responderRole': responder_role,
+                               'price': price, 'message': message, 'status': 'pending', 'createdAt': now()})
+        self.orders.touch(order_id)
+
+    def update_status(self, id, status):
+        if id in self.orders:
+            self.orders.update(id, {'status': status})
+
+    def accept_response(self, order_id, response_id):
+        o = self.orders.get(order_id)
+        if o is None:
+            return
+        for r in o['responses']:
+            r['status'] = 'accepted' if r['id'] == response_id else 'rejected'
+        self.orders.update(order_id, {'status': 'inProgress'})
+
+
+class Messaging:
+    def __init__(self, db):
+        self.conversations = db.collections['dp_conversations']
+        self.messages = db.collections['dp_messages']
+
+    def get_conversations(self, user_id):
+        return self.conversations.find('participantIds', user_id)
+
+    def get_or_create_conversation(self, user1, user2):
+        for c in self.conversations.find('participantIds', user1['id']):
+            if user2['id'] in c['participantIds']:
+                return c
+        conv = {
+            'id': uid(),
+            'participantIds': [user1['id'], user2['id']],
+            'participantNames': [user1.get('name') or user1.get('companyName') or '',
+                                 user2.get('name') or user2.get('companyName') or ''],
+            'participantRoles': [user1.get('role'), user2.get('role')],
+            'lastMessage': '',
+            'lastMessageAt': now(),
+            'unreadCount': {user1['id']: 0, user2['id']: 0},
+        }
+        return self.conversations.insert(conv)
+
+    def get_messages(self, conversation_id):
+        return self.messages.find('conversationId', conversation_id)
+
+    def send_message(self, conversation_id, sender_id, sender_name, receiver_id, text):
+        msg = {'id': uid(), 'conversationId': conversation_id, 'senderId': sender_id,
+               'senderName': sender_name, 'receiverId': receiver_id, 'text': text,
+               'createdAt': now(), 'read': False}
+        self.messages.insert(msg)
+        conv = self.conversations.get(conversation_id)
+        if conv is not None:
+            conv['lastMessage'] = text
+            conv['lastMessageAt'] = now()
+            conv['unreadCount'][receiver_id] = conv['unreadCount'].get(receiver_id, 0) + 1
+            self.conversations.touch(conversation_id)
+        return msg
+
+    def mark_read(self, conversation_id, user_id):
+        for m in self.messages.find('conversationId', conversation_id):
+            if m['receiverId'] == user_id:
+                m['read'] = True
+        conv = self.conversations.get(conversation_id)
+        if conv is not None:
+            conv['unreadCount'][user_id] = 0
+            self.conversations.touch(conversation_id)
+
+
+class CommunityChat:
+    def __init__(self, db):
+        self.messages = db.collections['dp_chat_messages']
+
+    def get_messages(self, chat_id):
+        return self.messages.find('chatId', chat_id)
+
+    def send_message(self, chat_id, author_id, author_name, author_role, text, image_url=None):
+        msg = {'id': uid(), 'chatId': chat_id, 'authorId': author_id, 'authorName': author_name,
+               'authorRole': author_role, 'text': text, 'createdAt': now()}
+        if image_url is not None:
+            msg['imageUrl'] = image_url
+        return self.messages.insert(msg)
+
+    def get_recent(self, chat_id, limit):
+        """The last ``limit`` messages of the chat, oldest first."""
+        return self.messages.find('chatId', chat_id)[-limit:] if limit > 0 else []
+
+    def save_messages(self, messages):
+        """Store messages built elsewhere (``backend.chat_server``), in order."""
+        for msg in messages:
+            self.messages.insert(msg)
+
+
+class Promos:
+    def __init__(self, db):
+        self.promos = db.collections['dp_promos']
+
+    def get_all(self):
+        return self.promos.all()
+
+    def create(self, data):
+        return self.promos.insert(dict(data, id=uid(), usedBy=[]))
+
+    def use_promo(self, promo_id, user_id):
+        p = self.promos.get(promo_id)
+        if p is not None and user_id not in p['usedBy']:
+            p['usedBy'].append(user_id)
+            self.promos.touch(promo_id)
+
+
+class Reviews:
+    def __init__(self, db):
+        self.db = db
+        self.reviews = db.collections['dp_reviews']
+        from .ratings import RatingAggregates  # ratings imports js_round from here
+
+        self.aggregates = RatingAggregates.from_reviews(self.reviews.all())
+
+    def get_by_target(self, target_id):
+        return self.reviews.find('targetId', target_id)
+
+    def _sync(self, target_id):
+        users = self.db.collections['dp_users']
+        if target_id in users:
+            users.update(target_id, self.aggregates.get(target_id))
+
+    def create(self, data):
+        r = self.reviews.insert(dict(data, id=uid(), createdAt=now()))
+        self.aggregates.add(r['targetId'], r['rating'])
+        self._sync(r['targetId'])
+        return r
+
+    def update(self, id, changes):
+        """Edit a review (not in storage.ts); the aggregates follow in O(1)."""
+        r = self.reviews.get(id)
+        if r is None:
+            raise ServiceError('Отзыв не найден')
+        old_target, old_rating = r['targetId'], r['rating']
+        self.reviews.update(id, changes)
+        self.aggregates.change(old_target, old_rating, r['targetId'], r['rating'])
+        self._sync(old_target)
+        if r['targetId'] != old_target:
+            self._sync(r['targetId'])
+        return r
+
+    def delete(self, id):
+        """Delete a review (not in storage.ts); the aggregates follow in O(1)."""
+        r = self.reviews.delete(id)
+        if r is not None:
+            self.aggregates.remove(r['targetId'], r['rating'])
+            self._sync(r['targetId'])
+
+
+class CollectivePurchases:
+    """Joins are atomic per purchase and never push ``currentVolume`` past ``targetVolume``.
+
+    storage.ts re-reads the array, re-sums every participant and writes it
+    back, so concurrent joins lose updates and overshoot the target. Here a
+    join holds its purchase's lock (one of ``STRIPES``), adds to the running
+    ``currentVolume`` and caps the quantity at what the target has left.
+    Completed and cancelled purchases accept nothing.
+    """
+
+    STRIPES = 64
+
+    def __init__(self, db):
+        self.purchases = db.collections['dp_collective_purchases']
+        self._locks = [threading.Lock() for _ in range(self.STRIPES)]
+        self._members = {}  # purchase id → {userId: participant}, built on first join
+        # Completing a purchase moves it between shared ``status`` index buckets.
+        self._index_lock = threading.Lock()
+
+    def get_all(self):
+        return self.purchases.all()
+
+    def get_active(self):
+        return self.purchases.find('status', 'active')
+
+    def create(self, data):
+        return self.purchases.insert(dict(data, id=uid(), participants=[], currentVolume=0, status='active'))
+
+    def join(self, purchase_id, user_id, user_name, quantity):
+        """Join with up to ``quantity`` units; returns ``{accepted, rejected, currentVolume, status}``."""
+        if not isinstance(quantity, int) or quantity <= 0:
+            raise ServiceError('Некорректное количество')
+        with self._locks[hash(purchase_id) % self.STRIPES]:
+            p = self.purchases.get(purchase_id)
+            if p is None:
+                return None
+            accepted = 0
+            if p['status'] == 'active':
+                accepted = max(0, min(quantity, p['targetVolume'] - p['currentVolume']))
+            if accepted:
+                members = self._members.get(purchase_id)
+                if members is None:
+                    members = self._members[purchase_id] = {x['userId']: x for x in p['participants']}
+                existing = members.get(user_id)
+                if existing:
+                    existing['quantity'] += accepted
+                else:
+                    members[user_id] = {'userId': user_id, 'userName': user_name,
+                                        'quantity': accepted, 'joinedAt': now()}
+                    p['participants'].append(members[user_id])
+                p['currentVolume'] += accepted
+                if p['currentVolume'] >= p['targetVolume']:
+                    with self._index_lock:
+                        self.purchases.update(purchase_id, {'status': 'completed'})
+                else:
+                    self.purchases.touch(purchase_id)
+            return {'accepted': accepted, 'rejected': quantity - accepted,
+                    'currentVolume': p['currentVolume'], 'status': p['status']}
+
+
+class Training:
+    def __init__(self, db):
+        self.db = db
+        self.enrollments = db.collections['dp_training_enrollments']
+        self._certificates = None  # CertificateSequence, built on first completion
+        self._lock = threading.Lock()
+
+    def get_enrollments(self, user_id):
+        return self.enrollments.find('userId', user_id)
+
+    def get_all_graduates(self):
+        return self.enrollments.find('status', 'completed')
+
+    def enroll(self, user_id, user_name, course):
+        if any(e['course'] == course for e in self.enrollments.find('userId', user_id)):
+            raise ServiceError('Вы уже записаны на этот курс')
+        e = {'id': uid(), 'userId': user_id, 'userName': user_name, 'course': course,
+             'status': 'enrolled', 'enrolledAt': now()}
+        return self.enrollments.insert(e)
+
+    def _sequence(self):
+        if self._certificates is None:
+            self._certificates = CertificateSequence(e.get('certificateNumber') for e in self.enrollments.all())
+        return self._certificates
+
+    def complete(self, enrollment_id):
+        return self.complete_many([enrollment_id])[0]
+
+    def complete_many(self, enrollment_ids):
+        """Complete a cohort: one block of certificate numbers, then the enrollments and profiles.
+
+        Unknown ids fail the whole call before anything changes. Enrollments
+        that are already completed keep their number.
+        """
+        with self._lock:
+            records = [self.enrollments.get(i) for i in enrollment_ids]
+            if None in records:
+                raise ServiceError('Запись не найдена')
+            todo = list({e['id']: e for e in records if e['status'] != 'completed'}.values())
+            numbers = self._sequence().reserve(datetime.now().year, len(todo))
+            users = self.db.collections['dp_users']
+            for e, number in zip(todo, numbers):
+                self.enrollments.update(e['id'], {'status': 'completed', 'completedAt': now(),
+                                                  'certificateNumber': number})
+                if e['userId'] in users:
+                    self.db.auth.update_profile(e['userId'], {'isCertified': True, 'certificateNumber': number})
+        return records
+
+    def verify_certificate(self, cert_number):
+        for e in self.enrollments.find('certificateNumber', cert_number):
+            if e['status'] == 'completed':
+                return e
+        return None
+
+
+def dump_services(data, services):
+    """Overlay what services with their own storage (e.g. ``LogMessaging``) hold onto ``data``."""
+    for service in services.values():
+        dump = getattr(service, 'dump', None)
+        if dump is not None:
+            data.update(dump())
+    return data
+
+
+class Database:
+    """All collections plus the service objects, named as in storage.ts."""
+
+    SERVICES = {
+        'auth': Auth,
+        'vacancies': Vacancies,
+        'gigs': Gigs,
+        'clientOrders': ClientOrders,
+        'messaging': Messaging,
+        'communityChat': CommunityChat,
+        'promos': Promos,
+        'reviews': Reviews,
+        'collectivePurchases': CollectivePurchases,
+        'training': Training,
+        'search': SearchService,
+        'facets': FacetService,
+        'dashboard': DashboardService,
+        'matching': MatchingService,
+    }
+
+    def __init__(self, data=None):
+        self.collections = {key: Collection(key, indexes, multi) for key, (indexes, multi) in SCHEMA.items()}
+        for key, records in (data or {}).items():
+            self.collections[key].load(records)
+        self.services = {name: cls(self) for name, cls in self.SERVICES.items()}
+        self.auth = self.services['auth']
+
+    @classmethod
+    def seeded(cls, path=SEED_PATH):
+        """A database holding the same seed data as ``initializeData()``."""
+        with open(path, encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def dump(self):
+        """All collections as ``{dp_key: [records]}``, as localStorage would hold them."""
+        data = {key: c.all() for key, c in self.collections.items()}
+        return dump_services(data, self.services)
@@ -0,0 +1,1103 @@
+"""SQLite persistence for the storage.ts collections.
+
+The whole-array model of ``set(KEYS.X, all)`` is replaced by one row per
+record. Each table keeps the fields its service filters or sorts on as real
+columns (with indexes matching those access patterns) and the remaining
+fields as a JSON ``data`` column. Nested arrays are normalised into child
+tables, so ``vacancies.apply``, ``gigs.respond``, ``clientOrders.respond``
+and ``collectivePurchases.join`` are single-row inserts/upserts:
+
+    Vacancy.applications              → applications
+    Gig.responses                     → gig_responses
+    ClientOrder.responses             → order_responses
+    CollectivePurchase.participants   → purchase_participants
+    Conversation.participantIds/unreadCount → conversation_participants
+    Promo.usedBy                      → promo_uses
+
+The database runs in WAL mode so readers never block the writer. Connections
+come from a small pool; writes take ``BEGIN IMMEDIATE`` and can be grouped
+with ``SqliteDatabase.batch()`` so many calls share one transaction. sqlite3
+caches prepared statements per connection, and bulk loads go through
+``executemany``.
+
+``SqliteDatabase`` exposes the same ``services`` as ``backend.services.Database``,
+so ``backend.server --sqlite PATH`` serves the identical API from disk.
+Services that keep in-memory indexes fed by ``Collection.watch`` (``search``,
+``facets``, ``matching``) read ``SqliteDatabase.collections``: ``SqlCollection``
+views over the tables they index. Triggers note the id of every written row in
+``record_changes``; each outermost write drains it before COMMIT and hands
+the committed records to the watchers afterwards. Writes made by other
+processes sharing the file are not seen until the next open.
+"""
+
+import contextlib
+import functools
+import json
+import queue
+import sqlite3
+import threading
+from datetime import datetime
+
+from . import dashboard
+from .certificates import format_number
+from .facets import FacetService
+from .matching import MatchingService
+from .search import SearchService
+from .services import SEED_PATH, ServiceError, check_subscription, dump_services, js_round, now, uid
+
+# Tables whose changes reach ``SqlCollection.watch``, by storage.ts key.
+WATCHED = {'dp_users': 'users', 'dp_vacancies': 'vacancies', 'dp_gigs': 'gigs', 'dp_client_orders': 'client_orders'}
+
+
+def _changes_sql():
+    """``record_changes`` and the triggers that fill it for the ``WATCHED`` tables."""
+    out = ['CREATE TABLE IF NOT EXISTS record_changes (\n'
+           '    tbl TEXT NOT NULL, id TEXT NOT NULL, PRIMARY KEY (tbl, id)) WITHOUT ROWID;']
+    for table in WATCHED.values():
+        for event, row in (('insert', 'new'), ('update', 'new'), ('delete', 'old')):
+            out.append(f'CREATE TRIGGER IF NOT EXISTS {table}_changes_{event} AFTER {event.upper()} ON {table} BEGIN\n'
+                       f"    INSERT OR IGNORE INTO record_changes (tbl, id) VALUES ('{table}', {row}.id);\nEND;")
+    return '\n'.join(out) + '\n'
+
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY, role TEXT NOT NULL, email TEXT NOT NULL UNIQUE,
+    inn TEXT, address TEXT, data TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS users_role ON users(role);
+CREATE INDEX IF NOT EXISTS users_inn ON users(inn) WHERE inn IS NOT NULL;
+CREATE INDEX IF NOT EXISTS users_address ON users(address, role) WHERE address IS NOT NULL;
+
+CREATE TABLE IF NOT EXISTS vacancies (
+    id TEXT PRIMARY KEY, employer_id TEXT NOT NULL, status TEXT NOT NULL,
+    created_at TEXT NOT NULL, data TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS vacancies_employer ON vacancies(employer_id, created_at);
+CREATE INDEX IF NOT EXISTS vacancies_status ON vacancies(status, created_at);
+
+CREATE TABLE IF NOT EXISTS applications (
+    id TEXT PRIMARY KEY,
+    vacancy_id TEXT NOT NULL REFERENCES vacancies(id) ON DELETE CASCADE,
+    specialist_id TEXT NOT NULL, status TEXT NOT NULL, created_at TEXT NOT NULL,
+    data TEXT NOT NULL, UNIQUE (vacancy_id, specialist_id));
+CREATE INDEX IF NOT EXISTS applications_specialist ON applications(specialist_id, vacancy_id);
+
+CREATE TABLE IF NOT EXISTS gigs (
+    id TEXT PRIMARY KEY, author_id TEXT NOT NULL, status TEXT NOT NULL,
+    created_at TEXT NOT NULL, data TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS gigs_author ON gigs(author_id, created_at);
+CREATE INDEX IF NOT EXISTS gigs_status ON gigs(status, created_at);
+
+CREATE TABLE IF NOT EXISTS gig_responses (
+    id TEXT PRIMARY KEY,
+    gig_id TEXT NOT NULL REFERENCES gigs(id) ON DELETE CASCADE,
+    responder_id TEXT NOT NULL, status TEXT NOT NULL, created_at TEXT NOT NULL, data TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS gig_responses_gig ON gig_responses(gig_id, created_at);
+
+CREATE TABLE IF NOT EXISTS client_orders (
+    id TEXT PRIMARY KEY, client_id TEXT NOT NULL, status TEXT NOT NULL,
+    created_at TEXT NOT NULL, data TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS client_orders_client ON client_orders(client_id, created_at);
+CREATE INDEX IF NOT EXISTS client_orders_status ON client_orders(status, created_at);
+
+CREATE TABLE IF NOT EXISTS order_responses (
+    id TEXT PRIMARY KEY,
+    order_id TEXT NOT NULL REFERENCES client_orders(id) ON DELETE CASCADE,
+    responder_id TEXT NOT NULL, status TEXT NOT NULL, created_at TEXT NOT NULL, data TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS order_responses_order ON order_responses(order_id, created_at);
+
+CREATE TABLE IF NOT EXISTS conversations (
+    id TEXT PRIMARY KEY, last_message TEXT NOT NULL, last_message_at TEXT NOT NULL, data TEXT NOT NULL);
+
+CREATE TABLE IF NOT EXISTS conversation_participants (
+    conversation_id TEXT NOT NULL REFERENCES conversations(id) ON DELETE CASCADE,
+    user_id TEXT NOT NULL, position INTEGER NOT NULL, unread_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (conversation_id, user_id)) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS conversation_participants_user
+    ON conversation_participants(user_id, conversation_id);
+
+CREATE TABLE IF NOT EXISTS messages (
+    id TEXT PRIMARY KEY, conversation_id TEXT NOT NULL, sender_id TEXT NOT NULL,
+    receiver_id TEXT NOT NULL, created_at TEXT NOT NULL, read INTEGER NOT NULL, data TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS messages_conversation ON messages(conversation_id, created_at);
+CREATE INDEX IF NOT EXISTS messages_unread ON messages(conversation_id, receiver_id) WHERE read = 0;
+
+CREATE TABLE IF NOT EXISTS chat_messages (
+    id TEXT PRIMARY KEY, chat_id INTEGER NOT NULL, created_at TEXT NOT NULL, data TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS chat_messages_chat ON chat_messages(chat_id, created_at);
+
+CREATE TABLE IF NOT EXISTS promos (
+    id TEXT PRIMARY KEY, creator_id TEXT NOT NULL, data TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS promos_creator ON promos(creator_id);
+
+CREATE TABLE IF NOT EXISTS promo_uses (
+    promo_id TEXT NOT NULL REFERENCES promos(id) ON DELETE CASCADE,
+    user_id TEXT NOT NULL, PRIMARY KEY (promo_id, user_id)) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS reviews (
+    id TEXT PRIMARY KEY, target_id TEXT NOT NULL, rating INTEGER NOT NULL,
+    created_at TEXT NOT NULL, data TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS reviews_target ON reviews(target_id, rating);
+
+-- Running sum/count per review target, kept current by the triggers below.
+CREATE TABLE IF NOT EXISTS rating_aggregates (
+    target_id TEXT PRIMARY KEY, total INTEGER NOT NULL, count INTEGER NOT NULL) WITHOUT ROWID;
+CREATE TRIGGER IF NOT EXISTS reviews_aggregate_insert AFTER INSERT ON reviews BEGIN
+    INSERT INTO rating_aggregates (target_id, total, count) VALUES (new.target_id, new.rating, 1)
+        ON CONFLICT (target_id) DO UPDATE SET total = total + excluded.total, count = count + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS reviews_aggregate_delete AFTER DELETE ON reviews BEGIN
+    UPDATE rating_aggregates SET total = total - old.rating, count = count - 1 WHERE target_id = old.target_id;
+    DELETE FROM rating_aggregates WHERE target_id = old.target_id AND count = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS reviews_aggregate_update AFTER UPDATE OF target_id, rating ON reviews BEGIN
+    UPDATE rating_aggregates SET total = total - old.rating, count = count - 1 WHERE target_id = old.target_id;
+    DELETE FROM rating_aggregates WHERE target_id = old.target_id AND count = 0;
+    INSERT INTO rating_aggregates (target_id, total, count) VALUES (new.target_id, new.rating, 1)
+        ON CONFLICT (target_id) DO UPDATE SET total = total + excluded.total, count = count + 1;
+END;
+
+CREATE TABLE IF NOT EXISTS collective_purchases (
+    id TEXT PRIMARY KEY, supplier_id TEXT NOT NULL, status TEXT NOT NULL,
+    target_volume INTEGER NOT NULL, current_volume INTEGER NOT NULL, data TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS collective_purchases_supplier ON collective_purchases(supplier_id);
+CREATE INDEX IF NOT EXISTS collective_purchases_status ON collective_purchases(status);
+
+CREATE TABLE IF NOT EXISTS purchase_participants (
+    purchase_id TEXT NOT NULL REFERENCES collective_purchases(id) ON DELETE CASCADE,
+    user_id TEXT NOT NULL, quantity INTEGER NOT NULL, joined_at TEXT NOT NULL, data TEXT NOT NULL,
+    PRIMARY KEY (purchase_id, user_id));
+
+CREATE TABLE IF NOT EXISTS training_enrollments (
+    id TEXT PRIMARY KEY, user_id TEXT NOT NULL, course TEXT NOT NULL, status TEXT NOT NULL,
+    certificate_number TEXT, data TEXT NOT NULL, UNIQUE (user_id, course));
+CREATE INDEX IF NOT EXISTS training_status ON training_enrollments(status);
+CREATE INDEX IF NOT EXISTS training_certificate
+    ON training_enrollments(certificate_number) WHERE certificate_number IS NOT NULL;
+
+-- Last certificate number issued per year (UC-<year>-<n>), kept current by the triggers below.
+CREATE TABLE IF NOT EXISTS certificate_sequences (year INTEGER PRIMARY KEY, last INTEGER NOT NULL);
+CREATE TRIGGER IF NOT EXISTS training_certificate_insert AFTER INSERT ON training_enrollments
+WHEN new.certificate_number GLOB 'UC-[0-9][0-9][0-9][0-9]-[0-9]*' BEGIN
+    INSERT INTO certificate_sequences (year, last)
+        VALUES (CAST(substr(new.certificate_number, 4, 4) AS INTEGER), CAST(substr(new.certificate_number, 9) AS INTEGER))
+        ON CONFLICT (year) DO UPDATE SET last = max(last, excluded.last);
+END;
+CREATE TRIGGER IF NOT EXISTS training_certificate_update AFTER UPDATE OF certificate_number ON training_enrollments
+WHEN new.certificate_number GLOB 'UC-[0-9][0-9][0-9][0-9]-[0-9]*' BEGIN
+    INSERT INTO certificate_sequences (year, last)
+        VALUES (CAST(substr(new.certificate_number, 4, 4) AS INTEGER), CAST(substr(new.certificate_number, 9) AS INTEGER))
+        ON CONFLICT (year) DO UPDATE SET last = max(last, excluded.last);
+END;
+''' + dashboard.schema_sql() + _changes_sql()  # dashboard counters, watched-row ids and their triggers
+
+
+class Table:
+    """Maps a record to ``(columns..., data)`` and back.
+
+    ``columns`` maps TypeScript field names to column names; every other
+    field except those in ``nested`` goes into the JSON ``data`` column.
+    """
+
+    def __init__(self, name, columns, nested=(), bools=()):
+        self.name = name
+        self.columns = columns
+        self.nested = set(nested)
+        self.bools = set(bools)
+        cols = ', '.join(list(columns.values()) + ['data'])
+        marks = ', '.join('?' * (len(columns) + 1))
+        self.insert_sql = f'INSERT INTO {name} ({cols}) VALUES ({marks})'
+        # Row-level updates assume ``id`` is the first column.
+        assigns = ', '.join(f'{c} = ?' for c in list(columns.values())[1:] + ['data'])
+        self.update_sql = f'UPDATE {name} SET {assigns} WHERE id = ?' if 'id' in columns else None
+
+    def row(self, record, **extra):
+        record = dict(record, **extra)
+        rest = {k: v for k, v in record.items() if k not in self.columns and k not in self.nested}
+        return [record.get(f) for f in self.columns] + [json.dumps(rest, ensure_ascii=False)]
+
+    def record(self, row):
+        r = json.loads(row['data'])
+        for field, col in self.columns.items():
+            value = row[col]
+            if value is not None or field in r:
+                r[field] = bool(value) if field in self.bools else value
+        return r
+
+
+USERS = Table('users', {'id': 'id', 'role': 'role', 'email': 'email', 'inn': 'inn', 'address': 'address'})
+VACANCIES = Table('vacancies', {'id': 'id', 'employerId': 'employer_id', 'status': 'status',
+                                'createdAt': 'created_at'}, nested=('applications',))
+APPLICATIONS = Table('applications', {'id': 'id', 'vacancyId': 'vacancy_id', 'specialistId': 'specialist_id',
+                                      'status': 'status', 'createdAt': 'created_at'})
+GIGS = Table('gigs', {'id': 'id', 'authorId': 'author_id', 'status': 'status', 'createdAt': 'created_at'},
+             nested=('responses',))
+GIG_RESPONSES = Table('gig_responses', {'id': 'id', 'gigId': 'gig_id', 'responderId': 'responder_id',
+                                        'status': 'status', 'createdAt': 'created_at'})
+ORDERS = Table('client_orders', {'id': 'id', 'clientId': 'client_id', 'status': 'status',
+                                 'createdAt': 'created_at'}, nested=('responses',))
+ORDER_RESPONSES = Table('order_responses', {'id': 'id', 'orderId': 'order_id', 'responderId': 'responder_id',
+                                            'status': 'status', 'createdAt': 'created_at'})
+CONVERSATIONS = Table('conversations', {'id': 'id', 'lastMessage': 'last_message',
+                                        'lastMessageAt': 'last_message_at'},
+                      nested=('participantIds', 'unreadCount'))
+MESSAGES = Table('messages', {'id': 'id', 'conversationId': 'conversation_id', 'senderId': 'sender_id',
+                              'receiverId': 'receiver_id', 'createdAt': 'created_at', 'read': 'read'},
+                 bools=('read',))
+CHAT_MESSAGES = Table('chat_messages', {'id': 'id', 'chatId': 'chat_id', 'createdAt': 'created_at'})
+PROMOS = Table('promos', {'id': 'id', 'creatorId': 'creator_id'}, nested=('usedBy',))
+REVIEWS = Table('reviews', {'id': 'id', 'targetId': 'target_id', 'rating': 'rating', 'createdAt': 'created_at'})
+PURCHASES = Table('collective_purchases', {'id': 'id', 'supplierId': 'supplier_id', 'status': 'status',
+                                           'targetVolume': 'target_volume', 'currentVolume': 'current_volume'},
+                  nested=('participants',))
+PARTICIPANTS = Table('purchase_participants', {'purchaseId': 'purchase_id', 'userId': 'user_id',
+                                               'quantity': 'quantity', 'joinedAt': 'joined_at'})
+ENROLLMENTS = Table('training_enrollments', {'id': 'id', 'userId': 'user_id', 'course': 'course',
+                                             'status': 'status', 'certificateNumber': 'certificate_number'})
+
+
+class ConnectionPool:
+    """A fixed-size pool of WAL-mode connections shared across threads."""
+
+    def __init__(self, path, size=4):
+        self.path = path
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._size = size
+        self._created = 0
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False,
+                               cached_statements=256)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode = WAL')
+        conn.execute('PRAGMA synchronous = NORMAL')
+        conn.execute('PRAGMA foreign_keys = ON')
+        conn.execute('PRAGMA busy_timeout = 5000')
+        return conn
+
+    @contextlib.contextmanager
+    def connection(self):
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                grow = self._created < self._size
+                self._created += grow
+            conn = self._connect() if grow else self._idle.get()
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class Engine:
+    """Read and write scopes over a pool; nested writes join the outer transaction.
+
+    ``on_commit(conn)``, when set, runs at the end of each outermost write
+    before COMMIT and may return a callable to run once it has committed.
+    """
+
+    def __init__(self, path, pool_size=4):
+        self.pool = ConnectionPool(path, pool_size)
+        self._local = threading.local()
+        self.on_commit = None
+        # executescript() manages its own transaction.
+        with self.pool.connection() as c:
+            c.executescript(SCHEMA)
+
+    @contextlib.contextmanager
+    def read(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            yield conn
+            return
+        with self.pool.connection() as conn:
+            yield conn
+
+    @contextlib.contextmanager
+    def write(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            yield conn
+            return
+        with self.pool.connection() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            self._local.conn = conn
+            try:
+                yield conn
+                after = self.on_commit(conn) if self.on_commit else None
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+            else:
+                conn.execute('COMMIT')
+            finally:
+                self._local.conn = None
+        if after is not None:
+            after()
+
+
+# Parent ids are bound in chunks to stay under SQLite's host-parameter limit.
+CHUNK = 500
+
+
+def _chunks(ids):
+    ids = list(ids)
+    for i in range(0, len(ids), CHUNK):
+        yield ids[i:i + CHUNK]
+
+
+def _children(conn, table, fk, ids):
+    """``{parent id: [child records]}`` for ``ids``, one query per chunk."""
+    out = {i: [] for i in ids}
+    for chunk in _chunks(out):
+        marks = ', '.join('?' * len(chunk))
+        for row in conn.execute(f'SELECT * FROM {table.name} WHERE {fk} IN ({marks}) ORDER BY rowid', chunk):
+            out[row[fk]].append(table.record(row))
+    return out
+
+
+_RECOMPUTE = 'SELECT target_id, sum(rating) AS total, count(*) AS count FROM reviews GROUP BY target_id'
+# js_round(total / count, 1) in SQL; ratings are positive, so the cast floors.
+_EXPECTED = 'CAST(total * 10.0 / count + 0.5 AS INTEGER) / 10.0 AS expected'
+
+
+class _Service:
+    def __init__(self, db):
+        self.db = db
+        self.engine = db.engine
+
+
+class SqlAuth(_Service):
+    def _get(self, c, id):
+        row = c.execute('SELECT * FROM users WHERE id = ?', (id,)).fetchone()
+        return USERS.record(row) if row else None
+
+    def _put(self, c, user):
+        c.execute(USERS.update_sql, USERS.row(user)[1:] + [user['id']])
+
+    def register(self, data):
+        with self.engine.write() as c:
+            if c.execute('SELECT 1 FROM users WHERE email = ?', (data.get('email'),)).fetchone():
+                raise ServiceError('Пользователь с таким email уже существует')
+            if data.get('role') == 'employer' and data.get('inn'):
+                if c.execute('SELECT 1 FROM users WHERE inn = ?', (data['inn'],)).fetchone():
+                    raise ServiceError('Компания с таким ИНН уже зарегистрирована')
+            if data.get('role') == 'employer' and data.get('address'):
+                if c.execute("SELECT 1 FROM users WHERE address = ? AND role = 'employer'",
+                             (data['address'],)).fetchone():
+                    raise ServiceError('Предприятие по этому адресу уже зарегистрировано')
+            user = dict(data, id=uid(), createdAt=now(), isVerified=data.get('role') == 'client',
+                        rating=0, reviewCount=0, favorites=[])
+            c.execute(USERS.insert_sql, USERS.row(user))
+        return user
+
+    def login(self, email, password):
+        with self.engine.read() as c:
+            row = c.execute('SELECT * FROM users WHERE email = ?', (email,)).fetchone()
+        user = USERS.record(row) if row else None
+        if not user or user.get('password') != password:
+            raise ServiceError('Неверный email или пароль')
+        return check_subscription(user)
+
+    def update_profile(self, user_id, updates):
+        with self.engine.write() as c:
+            user = self._get(c, user_id)
+            if user is None:
+                raise ServiceError('Пользователь не найден')
+            user.update(updates)
+            self._put(c, user)
+        return user
+
+    def get_user(self, id):
+        with self.engine.read() as c:
+            return self._get(c, id)
+
+    def get_users_by_role(self, role):
+        with self.engine.read() as c:
+            return [USERS.record(r) for r in c.execute('SELECT * FROM users WHERE role = ? ORDER BY rowid', (role,))]
+
+    def toggle_favorite(self, user_id, target_id):
+        with self.engine.write() as c:
+            user = self._get(c, user_id)
+            if user is None:
+                return
+            favs = user.get('favorites') or []
+            user['favorites'] = [f for f in favs if f != target_id] if target_id in favs else favs + [target_id]
+            self._put(c, user)
+
+
+class SqlVacancies(_Service):
+    def _select(self, where, args):
+        with self.engine.read() as c:
+            rows = [VACANCIES.record(r) for r in
+                    c.execute(f'SELECT * FROM vacancies WHERE {where} ORDER BY rowid', args)]
+            apps = _children(c, APPLICATIONS, 'vacancy_id', [v['id'] for v in rows])
+        for v in rows:
+            v['applications'] = apps[v['id']]
+        return rows
+
+    def get_all(self):
+        return self._select("status = 'active'", ())
+
+    def get_by_id(self, id):
+        found = self._select('id = ?', (id,))
+        return found[0] if found else None
+
+    def get_by_employer(self, employer_id):
+        return self._select('employer_id = ?', (employer_id,))
+
+    def create(self, data):
+        employer = self.db.auth.get_user(data.get('employerId'))
+        v = dict(data, id=uid(), createdAt=now(), applications=[], status='active',
+                 isVerified=bool(employer and employer.get('isVerified')))
+        with self.engine.write() as c:
+            c.execute(VACANCIES.insert_sql, VACANCIES.row(v))
+        return v
+
+    def update(self, id, updates):
+        with self.engine.write() as c:
+            row = c.execute('SELECT * FROM vacancies WHERE id = ?', (id,)).fetchone()
+            if row is None:
+                raise ServiceError('Вакансия не найдена')
+            v = dict(VACANCIES.record(row), **updates)
+            c.execute(VACANCIES.update_sql, VACANCIES.row(v)[1:] + [id])
+        v['applications'] = self.get_by_id(id)['applications']
+        return v
+
+    def delete(self, id):
+        with self.engine.write() as c:
+            c.execute('DELETE FROM vacancies WHERE id = ?', (id,))
+
+    def apply(self, vacancy_id, specialist_id, specialist_name, message):
+        app = {'id': uid(), 'vacancyId': vacancy_id, 'specialistId': specialist_id,
+               'specialistName': specialist_name, 'message': message, 'status': 'pending', 'createdAt': now()}
+        with self.engine.write() as c:
+            if not c.execute('SELECT 1 FROM vacancies WHERE id = ?', (vacancy_id,)).fetchone():
+                raise ServiceError('Вакансия не найдена')
+            try:
+                c.execute(APPLICATIONS.insert_sql, APPLICATIONS.row(app))
+            except sqlite3.IntegrityError:
+                raise ServiceError('Вы уже откликнулись на эту вакансию') from None
+        return app
+
+    def update_application_status(self, vacancy_id, application_id, status):
+        with self.engine.write() as c:
+            c.execute('UPDATE applications SET status = ? WHERE id = ? AND vacancy_id = ?',
+                      (status, application_id, vacancy_id))
+
+
+class SqlGigs(_Service):
+    def _select(self, where, args):
+        with self.engine.read() as c:
+            rows = [GIGS.record(r) for r in c.execute(f'SELECT * FROM gigs WHERE {where} ORDER BY rowid', args)]
+            responses = _children(c, GIG_RESPONSES, 'gig_id', [g['id'] for g in rows])
+        for g in rows:
+            g['responses'] = responses[g['id']]
+        return rows
+
+    def get_all(self):
+        return self._select("status = 'active'", ())
+
+    def create(self, data):
+        g = dict(data, id=uid(), createdAt=now(), responses=[], status='active')
+        with self.engine.write() as c:
+            c.execute(GIGS.insert_sql, GIGS.row(g))
+        return g
+
+    def respond(self, gig_id, responder_id, responder_name, message):
+        r = {'id': uid(), 'gigId': gig_id, 'responderId': responder_id, 'responderName': responder_name,
+             'message': message, 'status': 'pending', 'createdAt': now()}
+        with self.engine.write() as c:
+            if c.execute('SELECT 1 FROM gigs WHERE id = ?', (gig_id,)).fetchone():
+                c.execute(GIG_RESPONSES.insert_sql, GIG_RESPONSES.row(r))
+
+    def get_by_author(self, author_id):
+        return self._select('author_id = ?', (author_id,))
+
+    def delete(self, id):
+        with self.engine.write() as c:
+            c.execute('DELETE FROM gigs WHERE id = ?', (id,))
+
+
+class SqlClientOrders(_Service):
+    def _select(self, where, args):
+        with self.engine.read() as c:
+            rows = [ORDERS.record(r) for r in
+                    c.execute(f'SELECT * FROM client_orders WHERE {where} ORDER BY rowid', args)]
+            responses = _children(c, ORDER_RESPONSES, 'order_id', [o['id'] for o in rows])
+        for o in rows:
+            o['responses'] = responses[o['id']]
+        return rows
+
+    def get_all(self):
+        return self._select('1', ())
+
+    def get_active(self):
+        return self._select("status = 'active'", ())
+
+    def get_by_client(self, client_id):
+        return self._select('client_id = ?', (client_id,))
+
+    def create(self, data):
+        o = dict(data, id=uid(), createdAt=now(), responses=[], status='active')
+        with self.engine.write() as c:
+            c.execute(ORDERS.insert_sql, ORDERS.row(o))
+        return o
+
+    def respond(self, order_id, responder_id, responder_name, responder_role, price, message):
+        r = {'id': uid(), 'orderId': order_id, 'responderId': responder_id, 'responderName': responder_name,
+             'responderRole': responder_role, 'price': price, 'message': message,
+             'status': 'pending', 'createdAt': now()}
+        with self.engine.write() as c:
+            if c.execute('SELECT 1 FROM client_orders WHERE id = ?', (order_id,)).fetchone():
+                c.execute(ORDER_RESPONSES.insert_sql, ORDER_RESPONSES.row(r))
+
+    def update_status(self, id, status):
+        with self.engine.write() as c:
+            c.execute('UPDATE client_orders SET status = ? WHERE id = ?', (status, id))
+
+    def accept_response(self, order_id, response_id):
+        with self.engine.write() as c:
+            if c.execute("UPDATE client_orders SET status = 'inProgress' WHERE id = ?", (order_id,)).rowcount:
+                c.execute("UPDATE order_responses SET status = CASE WHEN id = ? THEN 'accepted' ELSE 'rejected' END "
+                          'WHERE order_id = ?', (response_id, order_id))
+
+
+class SqlMessaging(_Service):
+    def _conversations(self, c, rows):
+        convs = [CONVERSATIONS.record(r) for r in rows]
+        if not convs:
+            return convs
+        by_id = {cv['id']: cv for cv in convs}
+        for cv in convs:
+            cv['participantIds'], cv['unreadCount'] = [], {}
+        for chunk in _chunks(by_id):
+            marks = ', '.join('?' * len(chunk))
+            for p in c.execute(f'SELECT * FROM conversation_participants WHERE conversation_id IN ({marks}) '
+                               'ORDER BY conversation_id, position', chunk):
+                cv = by_id[p['conversation_id']]
+                cv['participantIds'].append(p['user_id'])
+                cv['unreadCount'][p['user_id']] = p['unread_count']
+        return convs
+
+    def get_conversations(self, user_id):
+        with self.engine.read() as c:
+            rows = c.execute('SELECT c.* FROM conversation_participants p JOIN conversations c '
+                             'ON c.id = p.conversation_id WHERE p.user_id = ? ORDER BY c.rowid', (user_id,)).fetchall()
+            return self._conversations(c, rows)
+
+    def get_or_create_conversation(self, user1, user2):
+        with self.engine.write() as c:
+            row = c.execute('SELECT c.* FROM conversation_participants a '
+                            'JOIN conversation_participants b ON b.conversation_id = a.conversation_id '
+                            'JOIN conversations c ON c.id = a.conversation_id '
+                            'WHERE a.user_id = ? AND b.user_id = ? LIMIT 1', (user1['id'], user2['id'])).fetchone()
+            if row is not None:
+                return self._conversations(c, [row])[0]
+            conv = {
+                'id': uid(),
+                'participantIds': [user1['id'], user2['id']],
+                'participantNames': [user1.get('name') or user1.get('companyName') or '',
+                                     user2.get('name') or user2.get('companyName') or ''],
+                'participantRoles': [user1.get('role'), user2.get('role')],
+                'lastMessage': '',
+                'lastMessageAt': now(),
+                'unreadCount': {user1['id']: 0, user2['id']: 0},
+            }
+            _insert_conversation(c, conv)
+        return conv
+
+    def get_messages(self, conversation_id):
+        with self.engine.read() as c:
+            return [MESSAGES.record(r) for r in c.execute(
+                'SELECT * FROM messages WHERE conversation_id = ? ORDER BY created_at, rowid', (conversation_id,))]
+
+    def send_message(self, conversation_id, sender_id, sender_name, receiver_id, text):
+        msg = {'id': uid(), 'conversationId': conversation_id, 'senderId': sender_id, 'senderName': sender_name,
+               'receiverId': receiver_id, 'text': text, 'createdAt': now(), 'read': False}
+        with self.engine.write() as c:
+            c.execute(MESSAGES.insert_sql, MESSAGES.row(msg))
+            if c.execute('UPDATE conversations SET last_message = ?, last_message_at = ? WHERE id = ?',
+                         (text, now(), conversation_id)).rowcount:
+                c.execute('INSERT INTO conversation_participants (conversation_id, user_id, position, unread_count) '
+                          'VALUES (?, ?, 1000000, 1) ON CONFLICT (conversation_id, user_id) '
+                          'DO UPDATE SET unread_count = unread_count + 1', (conversation_id, receiver_id))
+        return msg
+
+    def mark_read(self, conversation_id, user_id):
+        with self.engine.write() as c:
+            c.execute('UPDATE messages SET read = 1 WHERE conversation_id = ? AND receiver_id = ? AND read = 0',
+                      (conversation_id, user_id))
+            c.execute('UPDATE conversation_participants SET unread_count = 0 WHERE conversation_id = ? AND user_id = ?',
+                      (conversation_id, user_id))
+
+
+def _insert_conversation(c, conv):
+    c.execute(CONVERSATIONS.insert_sql, CONVERSATIONS.row(conv))
+    unread = conv.get('unreadCount') or {}
+    c.executemany('INSERT INTO conversation_participants (conversation_id, user_id, position, unread_count) '
+                  'VALUES (?, ?, ?, ?)',
+                  [(conv['id'], u, i, unread.get(u, 0)) for i, u in enumerate(conv['participantIds'])])
+
+
+class SqlCommunityChat(_Service):
+    def get_messages(self, chat_id):
+        with self.engine.read() as c:
+            return [CHAT_MESSAGES.record(r) for r in c.execute(
+                'SELECT * FROM chat_messages WHERE chat_id = ? ORDER BY created_at, rowid', (chat_id,))]
+
+    def send_message(self, chat_id, author_id, author_name, author_role, text, image_url=None):
+        msg = {'id': uid(), 'chatId': chat_id, 'authorId': author_id, 'authorName': author_name,
+               'authorRole': author_role, 'text': text, 'createdAt': now()}
+        if image_url is not None:
+            msg['imageUrl'] = image_url
+        with self.engine.write() as c:
+            c.execute(CHAT_MESSAGES.insert_sql, CHAT_MESSAGES.row(msg))
+        return msg
+
+    def get_recent(self, chat_id, limit):
+        with self.engine.read() as c:
+            rows = c.execute('SELECT * FROM chat_messages WHERE chat_id = ? ORDER BY created_at DESC, rowid DESC '
+                             'LIMIT ?', (chat_id, max(limit, 0))).fetchall()
+        return [CHAT_MESSAGES.record(r) for r in reversed(rows)]
+
+    def save_messages(self, messages):
+        with self.engine.write() as c:
+            c.executemany(CHAT_MESSAGES.insert_sql, [CHAT_MESSAGES.row(m) for m in messages])
+
+
+class SqlPromos(_Service):
+    def get_all(self):
+        with self.engine.read() as c:
+            promos = [PROMOS.record(r) for r in c.execute('SELECT * FROM promos ORDER BY rowid')]
+            uses = {}
+            for r in c.execute('SELECT promo_id, user_id FROM promo_uses'):
+                uses.setdefault(r['promo_id'], []).append(r['user_id'])
+        for p in promos:
+            p['usedBy'] = uses.get(p['id'], [])
+        return promos
+
+    def create(self, data):
+        p = dict(data, id=uid(), usedBy=[])
+        with self.engine.write() as c:
+            c.execute(PROMOS.insert_sql, PROMOS.row(p))
+        return p
+
+    def use_promo(self, promo_id, user_id):
+        with self.engine.write() as c:
+            if c.execute('SELECT 1 FROM promos WHERE id = ?', (promo_id,)).fetchone():
+                c.execute('INSERT OR IGNORE INTO promo_uses (promo_id, user_id) VALUES (?, ?)', (promo_id, user_id))
+
+
+class SqlReviews(_Service):
+    def get_by_target(self, target_id):
+        with self.engine.read() as c:
+            return [REVIEWS.record(r) for r in c.execute(
+                'SELECT * FROM reviews WHERE target_id = ? ORDER BY rowid', (target_id,))]
+
+    def _sync(self, c, target_id):
+        row = c.execute('SELECT total, count FROM rating_aggregates WHERE target_id = ?', (target_id,)).fetchone()
+        user = self.db.auth._get(c, target_id)
+        if user is not None:
+            total, count = row if row else (0, 0)
+            user.update(rating=js_round(total / count, 1) if count else 0, reviewCount=count)
+            self.db.auth._put(c, user)
+
+    def create(self, data):
+        r = dict(data, id=uid(), createdAt=now())
+        with self.engine.write() as c:
+            c.execute(REVIEWS.insert_sql, REVIEWS.row(r))
+            self._sync(c, r['targetId'])
+        return r
+
+    def update(self, id, changes):
+        """Edit a review (not in storage.ts); the aggregate triggers follow."""
+        with self.engine.write() as c:
+            row = c.execute('SELECT * FROM reviews WHERE id = ?', (id,)).fetchone()
+            if row is None:
+                raise ServiceError('Отзыв не найден')
+            old = REVIEWS.record(row)
+            r = dict(old, **changes)
+            c.execute(REVIEWS.update_sql, REVIEWS.row(r)[1:] + [id])
+            self._sync(c, old['targetId'])
+            if r['targetId'] != old['targetId']:
+                self._sync(c, r['targetId'])
+        return r
+
+    def delete(self, id):
+        """Delete a review (not in storage.ts); the aggregate triggers follow."""
+        with self.engine.write() as c:
+            row = c.execute('SELECT target_id FROM reviews WHERE id = ?', (id,)).fetchone()
+            if row is not None:
+                c.execute('DELETE FROM reviews WHERE id = ?', (id,))
+                self._sync(c, row['target_id'])
+
+
+class SqlCollectivePurchases(_Service):
+    def _select(self, where, args):
+        with self.engine.read() as c:
+            rows = [PURCHASES.record(r) for r in
+                    c.execute(f'SELECT * FROM collective_purchases WHERE {where} ORDER BY rowid', args)]
+            parts = _children(c, PARTICIPANTS, 'purchase_id', [p['id'] for p in rows])
+        for p in rows:
+            p['participants'] = [{k: v for k, v in x.items() if k != 'purchaseId'} for x in parts[p['id']]]
+        return rows
+
+    def get_all(self):
+        return self._select('1', ())
+
+    def get_active(self):
+        return self._select("status = 'active'", ())
+
+    def create(self, data):
+        p = dict(data, id=uid(), participants=[], currentVolume=0, status='active')
+        with self.engine.write() as c:
+            c.execute(PURCHASES.insert_sql, PURCHASES.row(p))
+        return p
+
+    def join(self, purchase_id, user_id, user_name, quantity):
+        """As ``CollectivePurchases.join``; the write transaction serializes joins."""
+        if not isinstance(quantity, int) or quantity <= 0:
+            raise ServiceError('Некорректное количество')
+        with self.engine.write() as c:
+            row = c.execute('SELECT target_volume, current_volume, status FROM collective_purchases WHERE id = ?',
+                            (purchase_id,)).fetchone()
+            if row is None:
+                return None
+            target, current, status = row
+            accepted = max(0, min(quantity, target - current)) if status == 'active' else 0
+            if accepted:
+                participant = {'purchaseId': purchase_id, 'userId': user_id, 'userName': user_name,
+                               'quantity': accepted, 'joinedAt': now()}
+                c.execute(PARTICIPANTS.insert_sql + ' ON CONFLICT (purchase_id, user_id) '
+                          'DO UPDATE SET quantity = quantity + excluded.quantity', PARTICIPANTS.row(participant))
+                current += accepted
+                if current >= target:
+                    status = 'completed'
+                c.execute('UPDATE collective_purchases SET current_volume = ?, status = ? WHERE id = ?',
+                          (current, status, purchase_id))
+        return {'accepted': accepted, 'rejected': quantity - accepted, 'currentVolume': current, 'status': status}
+
+
+class SqlTraining(_Service):
+    def _select(self, where, args):
+        with self.engine.read() as c:
+            return [ENROLLMENTS.record(r) for r in
+                    c.execute(f'SELECT * FROM training_enrollments WHERE {where} ORDER BY rowid', args)]
+
+    def get_enrollments(self, user_id):
+        return self._select('user_id = ?', (user_id,))
+
+    def get_all_graduates(self):
+        return self._select("status = 'completed'", ())
+
+    def enroll(self, user_id, user_name, course):
+        e = {'id': uid(), 'userId': user_id, 'userName': user_name, 'course': course,
+             'status': 'enrolled', 'enrolledAt': now()}
+        with self.engine.write() as c:
+            try:
+                c.execute(ENROLLMENTS.insert_sql, ENROLLMENTS.row(e))
+            except sqlite3.IntegrityError:
+                raise ServiceError('Вы уже записаны на этот курс') from None
+        return e
+
+    def complete(self, enrollment_id):
+        return self.complete_many([enrollment_id])[0]
+
+    def complete_many(self, enrollment_ids):
+        """As ``Training.complete_many``, in one write transaction."""
+        year = datetime.now().year
+        with self.engine.write() as c:
+            found = {}
+            for chunk in _chunks(dict.fromkeys(enrollment_ids)):
+                marks = ', '.join('?' * len(chunk))
+                for row in c.execute(f'SELECT * FROM training_enrollments WHERE id IN ({marks})', chunk):
+                    found[row['id']] = ENROLLMENTS.record(row)
+            if len(found) < len(set(enrollment_ids)):
+                raise ServiceError('Запись не найдена')
+            todo = [e for e in found.values() if e['status'] != 'completed']
+            row = c.execute('SELECT last FROM certificate_sequences WHERE year = ?', (year,)).fetchone()
+            first = (row[0] if row else 0) + 1
+            for n, e in enumerate(todo, first):
+                e.update(status='completed', completedAt=now(), certificateNumber=format_number(year, n))
+            c.executemany(ENROLLMENTS.update_sql, (ENROLLMENTS.row(e)[1:] + [e['id']] for e in todo))
+            numbers = {e['userId']: e['certificateNumber'] for e in todo}
+            users = []
+            for chunk in _chunks(numbers):
+                marks = ', '.join('?' * len(chunk))
+                users += [USERS.record(r) for r in c.execute(f'SELECT * FROM users WHERE id IN ({marks})', chunk)]
+            for user in users:
+                user.update(isCertified=True, certificateNumber=numbers[user['id']])
+            c.executemany(USERS.update_sql, (USERS.row(u)[1:] + [u['id']] for u in users))
+        return [found[i] for i in enrollment_ids]
+
+    def verify_certificate(self, cert_number):
+        with self.engine.read() as c:
+            row = c.execute("SELECT * FROM training_enrollments WHERE certificate_number = ? AND status = 'completed' "
+                            'ORDER BY rowid LIMIT 1', (cert_number,)).fetchone()
+        return ENROLLMENTS.record(row) if row else None
+
+
+class SqlDashboard(_Service):
+    def get(self, user_id):
+        with self.engine.read() as c:
+            user = self.db.auth._get(c, user_id)
+            if user is None:
+                return None
+            counts = dict(c.execute('SELECT name, n FROM dashboard_counters WHERE user_id = ?', (user_id,)).fetchall())
+        return dashboard.snapshot(user, counts, dashboard.messaging_unread(self.db, user_id))
+
+
+class SqlCollection:
+    """The read side of a ``store.Collection`` over a watched table."""
+
+    def __init__(self, db, key):
+        self.db = db
+        self.name = key
+        self.table = WATCHED[key]
+        self._watchers = []
+        self._listed = False  # watchers derive their state from all(); until then there is nothing to tell them
+
+    def _select(self, where, args):
+        if self.table == 'users':
+            with self.db.engine.read() as c:
+                return [USERS.record(r) for r in c.execute(f'SELECT * FROM users WHERE {where} ORDER BY rowid', args)]
+        return self.db.services[self.db.READERS[self.name]]._select(where, args)
+
+    def all(self):
+        self._listed = True
+        return self._select('1', ())
+
+    def get(self, id):
+        found = self._select('id = ?', (id,))
+        return found[0] if found else None
+
+    def many(self, ids):
+        """``{id: record}`` for those of ``ids`` that exist."""
+        out = {}
+        for chunk in _chunks(ids):
+            out.update((r['id'], r) for r in self._select(f'id IN ({", ".join("?" * len(chunk))})', chunk))
+        return out
+
+    def watch(self, fn):
+        """Call ``fn(event, record)`` after each committed write: ``'update'``, or ``'delete'`` with just the id."""
+        self._watchers.append(fn)
+
+    def _notify(self, ids):
+        if not self._watchers or not self._listed:
+            return
+        found = self.many(ids)
+        for id in ids:
+            record = found.get(id)
+            event, record = ('update', record) if record is not None else ('delete', {'id': id})
+            for fn in self._watchers:
+                fn(event, record)
+
+
+class _Serialized:
+    """``service`` with every public method run under ``lock``, which change delivery also holds.
+
+    An index built from a snapshot then never misses a change committed
+    while it was being built.
+    """
+
+    def __init__(self, service, lock):
+        self._service = service
+        self._lock = lock
+
+    def __getattr__(self, name):
+        attr = getattr(self._service, name)
+        if name.startswith('_') or not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        def locked(*args, **kwargs):
+            with self._lock:
+                return attr(*args, **kwargs)
+        return locked
+
+
+class SqliteDatabase:
+    """The storage.ts services backed by a SQLite file."""
+
+    SERVICES = {
+        'auth': SqlAuth,
+        'vacancies': SqlVacancies,
+        'gigs': SqlGigs,
+        'clientOrders': SqlClientOrders,
+        'messaging': SqlMessaging,
+        'communityChat': SqlCommunityChat,
+        'promos': SqlPromos,
+        'reviews': SqlReviews,
+        'collectivePurchases': SqlCollectivePurchases,
+        'training': SqlTraining,
+        'dashboard': SqlDashboard,
+        'search': SearchService,
+        'facets': FacetService,
+        'matching': MatchingService,
+    }
+    # Services built on ``Collection.watch``; they keep their own in-memory indexes.
+    WATCHING = ('search', 'facets', 'matching')
+    # The service whose ``_select`` reads each watched table other than users.
+    READERS = {'dp_vacancies': 'vacancies', 'dp_gigs': 'gigs', 'dp_client_orders': 'clientOrders'}
+    # Concurrency is handled by the pool and SQLite's own locking.
+    thread_safe = True
+
+    # Tables filled by triggers; copying them between databases would double count.
+    DERIVED = ('rating_aggregates', 'certificate_sequences', 'dashboard_counters', 'record_changes')
+
+    def __init__(self, path, pool_size=4):
+        self.engine = Engine(path, pool_size)
+        self.services = {name: cls(self) for name, cls in self.SERVICES.items() if name not in self.WATCHING}
+        self.auth = self.services['auth']
+        self._watch_lock = threading.RLock()
+        self._watch()
+        self.engine.on_commit = self._drain_changes
+        with self.engine.read() as c:
+            # Databases created before the aggregates and sequences existed get them backfilled once.
+            stale = c.execute('SELECT EXISTS (SELECT 1 FROM reviews) '
+                              'AND NOT EXISTS (SELECT 1 FROM rating_aggregates)').fetchone()[0]
+            uncounted = c.execute('SELECT EXISTS (SELECT 1 FROM users) '
+                                  'AND NOT EXISTS (SELECT 1 FROM dashboard_counters)').fetchone()[0]
+            numbered = c.execute("SELECT EXISTS (SELECT 1 FROM training_enrollments WHERE certificate_number "
+                                 "GLOB 'UC-*') AND NOT EXISTS (SELECT 1 FROM certificate_sequences)").fetchone()[0]
+        if stale:
+            self.rebuild_ratings()
+        if uncounted:
+            self.rebuild_dashboard()
+        if numbered:
+            with self.engine.write() as c:
+                c.execute("INSERT INTO certificate_sequences (year, last) "
+                          "SELECT CAST(substr(certificate_number, 4, 4) AS INTEGER) AS year, "
+                          "max(CAST(substr(certificate_number, 9) AS INTEGER)) FROM training_enrollments "
+                          "WHERE certificate_number GLOB 'UC-[0-9][0-9][0-9][0-9]-[0-9]*' GROUP BY year")
+
+    def _watch(self):
+        """(Re)create the ``WATCHING`` services over fresh collections, dropping their indexes."""
+        with self.engine.write() as c:
+            c.execute('DELETE FROM record_changes')
+        with self._watch_lock:
+            self.collections = {key: SqlCollection(self, key) for key in WATCHED}
+            for name in self.WATCHING:
+                self.services[name] = _Serialized(self.SERVICES[name](self), self._watch_lock)
+
+    def _drain_changes(self, c):
+        rows = c.execute('DELETE FROM record_changes RETURNING tbl, id').fetchall()
+        if not rows:
+            return None
+        by_table = {}
+        for tbl, id in rows:
+            by_table.setdefault(tbl, []).append(id)
+
+        def deliver():
+            with self._watch_lock:
+                for collection in self.collections.values():
+                    if collection.table in by_table:
+                        collection._notify(by_table[collection.table])
+        return deliver
+
+    def rating_mismatches(self):
+        """``(reviewed targets, [(user id, stored, expected)])`` recomputed from ``reviews``."""
+        with self.engine.read() as c:
+            targets, = c.execute('SELECT count(DISTINCT target_id) FROM reviews').fetchone()
+            rows = c.execute(f"SELECT u.id, json_extract(u.data, '$.rating') AS rating, "
+                             f"json_extract(u.data, '$.reviewCount') AS review_count, a.count, {_EXPECTED} "
+                             f'FROM ({_RECOMPUTE}) AS a JOIN users u ON u.id = a.target_id '
+                             'WHERE rating IS NOT expected OR review_count IS NOT a.count').fetchall()
+        return targets, [(r['id'], {'rating': r['rating'], 'reviewCount': r['review_count']},
+                          {'rating': r['expected'], 'reviewCount': r['count']}) for r in rows]
+
+    def rebuild_ratings(self):
+        """Recompute ``rating_aggregates`` and every reviewed user's rating in one pass."""
+        with self.engine.write() as c:
+            c.execute('DELETE FROM rating_aggregates')
+            c.execute(f'INSERT INTO rating_aggregates (target_id, total, count) '
+                      f'SELECT target_id, total, count FROM ({_RECOMPUTE})')
+            c.execute(f"UPDATE users SET data = json_set(data, '$.rating', a.expected, '$.reviewCount', a.count) "
+                      f'FROM (SELECT target_id, count, {_EXPECTED} FROM rating_aggregates) AS a '
+                      'WHERE users.id = a.target_id')
+
+    def rebuild_dashboard(self):
+        """Recompute ``dashboard_counters`` from the tables in one pass."""
+        with self.engine.write() as c:
+            c.execute('DELETE FROM dashboard_counters')
+            c.execute(dashboard.rebuild_sql())
+
+    def batch(self):
+        """Group every write made inside the block into one transaction."""
+        return self.engine.write()
+
+    def is_empty(self):
+        with self.engine.read() as c:
+            return c.execute('SELECT 1 FROM users LIMIT 1').fetchone() is None
+
+    def load(self, data):
+        """Bulk-insert ``{dp_key: [records]}`` with one ``executemany`` per table."""
+        simple = {'dp_users': USERS, 'dp_chat_messages': CHAT_MESSAGES, 'dp_reviews': REVIEWS,
+                  'dp_training_enrollments': ENROLLMENTS, 'dp_messages': MESSAGES}
+        nested = {'dp_vacancies': (VACANCIES, 'applications', APPLICATIONS),
+                  'dp_gigs': (GIGS, 'responses', GIG_RESPONSES),
+                  'dp_client_orders': (ORDERS, 'responses', ORDER_RESPONSES)}
+        with self.engine.write() as c:
+            for key, table in simple.items():
+                c.executemany(table.insert_sql, (table.row(r) for r in data.get(key, ())))
+            for key, (table, field, child) in nested.items():
+                records = data.get(key, ())
+                c.executemany(table.insert_sql, (table.row(r) for r in records))
+                c.executemany(child.insert_sql, (child.row(x) for r in records for x in r.get(field, ())))
+            purchases = data.get('dp_collective_purchases', ())
+            c.executemany(PURCHASES.insert_sql, (PURCHASES.row(p) for p in purchases))
+            c.executemany(PARTICIPANTS.insert_sql, (PARTICIPANTS.row(x, purchaseId=p['id'])
+                                                    for p in purchases for x in p.get('participants', ())))
+            promos = data.get('dp_promos', ())
+            c.executemany(PROMOS.insert_sql, (PROMOS.row(p) for p in promos))
+            c.executemany('INSERT OR IGNORE INTO promo_uses (promo_id, user_id) VALUES (?, ?)',
+                          ((p['id'], u) for p in promos for u in p.get('usedBy', ())))
+            for conv in data.get('dp_conversations', ()):
+                _insert_conversation(c, conv)
+            c.execute('DELETE FROM record_changes')  # a bulk load rebuilds the watchers' indexes instead
+        self._watch()
+
+    def dump(self):
+        """All collections as ``{dp_key: [records]}``, as localStorage would hold them."""
+        s = self.services
+        with self.engine.read() as c:
+            users = [USERS.record(r) for r in c.execute('SELECT * FROM users ORDER BY rowid')]
+            conv_rows = c.execute('SELECT * FROM conversations ORDER BY rowid').fetchall()
+            conversations = s['messaging']._conversations(c, conv_rows)
+            messages = [MESSAGES.record(r) for r in c.execute('SELECT * FROM messages ORDER BY rowid')]
+            chat = [CHAT_MESSAGES.record(r) for r in c.execute('SELECT * FROM chat_messages ORDER BY rowid')]
+            reviews = [REVIEWS.record(r) for r in c.execute('SELECT * FROM reviews ORDER BY rowid')]
+        return dump_services({
+            'dp_users': users,
+            'dp_vacancies': s['vacancies']._select('1', ()),
+            'dp_gigs': s['gigs']._select('1', ()),
+            'dp_client_orders': s['clientOrders'].get_all(),
+            'dp_conversations': conversations,
+            'dp_messages': messages,
+            'dp_chat_messages': chat,
+            'dp_promos': s['promos'].get_all(),
+            'dp_reviews': reviews,
+            'dp_collective_purchases': s['collectivePurchases'].get_all(),
+            'dp_training_enrollments': s['training']._select('1', ()),
+        }, s)
+
+    @classmethod
+    def seeded(cls, path, seed_path=SEED_PATH):
+        """Open ``path``, loading the ``initializeData()`` seed if it is empty."""
+        db = cls(path)
+        if db.is_empty():
+            with open(seed_path, encoding='utf-8') as f:
+                db.load(json.load(f))
+        return db
+
+    def close(self):
+        self.engine.pool.close()
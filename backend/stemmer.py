@@ -0,0 +1,123 @@
+"""Russian stemmer (the Snowball algorithm) and the tokenizer used by search.
+
+Snowball's Russian stemmer strips inflectional endings inside the RV region.
+RV is everything after the first vowel. The steps are:
+
+1. a perfective gerund, or else a reflexive ending followed by an
+   adjectival, verb or noun ending;
+2. a final ``и``;
+3. a derivational ``ост``/``ость`` in R2;
+4. ``нн`` → ``н``, a superlative ``ейш(е)``, or a final ``ь``.
+
+So ``полировка``, ``полировки`` and ``полировкой`` all become ``полировк``.
+Endings marked as group 1 in the algorithm must follow ``а`` or ``я``.
+Latin words (brand names such as ``Koch`` or ``PPF``) pass through lowercased.
+``terms`` drops ``STOPWORDS`` (prepositions, conjunctions, particles and
+pronouns), which would otherwise post to nearly every document.
+"""
+
+import re
+from functools import lru_cache
+
+VOWELS = frozenset('аеиоуыэюя')
+_TOKEN_RE = re.compile(r'[0-9a-zа-я]+')
+
+STOPWORDS = frozenset('''
+    а без более бы был была были было быть в вам вас весь во вот все всего всех вы где да даже для до
+    его ее ей если есть еще же за здесь и из или им их к как ко когда кто ли либо между меня мне мы на
+    над не него нее нет ни них но ну о об около он она они оно от по под при про с со так также там
+    то тоже только у уже чем что чтобы эта эти это этот я
+'''.split())
+
+
+def _endings(group1='', group2=''):
+    """``[(ending, needs а/я before it)]``, longest first."""
+    out = [(e, True) for e in group1.split()] + [(e, False) for e in group2.split()]
+    return sorted(out, key=lambda e: -len(e[0]))
+
+
+PERFECTIVE_GERUND = _endings('в вши вшись', 'ив ивши ившись ыв ывши ывшись')
+ADJECTIVE = _endings('', 'ее ие ые ое ими ыми ей ий ый ой ем им ым ом его ого ему ому их ых ую юю ая яя ою ею')
+PARTICIPLE = _endings('ем нн вш ющ щ', 'ивш ывш ующ')
+REFLEXIVE = _endings('', 'ся сь')
+VERB = _endings('ла на ете йте ли й л ем н ло но ет ют ны ть ешь нно',
+                'ила ыла ена ейте уйте ите или ыли ей уй ил ыл им ым ен ило ыло ено ят ует уют ит ыт ены '
+                'ить ыть ишь ую ю')
+NOUN = _endings('', 'а ев ов ие ье е иями ями ами еи ии и ией ей ой ий й иям ям ием ем ам ом о у ах иях ях ы ь '
+                    'ию ью ю ия ья я')
+SUPERLATIVE = _endings('', 'ейше ейш')
+DERIVATIONAL = _endings('', 'ость ост')
+
+
+def _regions(word):
+    """Start offsets of RV and R2."""
+    rv = next((i + 1 for i, ch in enumerate(word) if ch in VOWELS), len(word))
+
+    def after_vc(start):
+        for i in range(start + 1, len(word)):
+            if word[i] not in VOWELS and word[i - 1] in VOWELS:
+                return i + 1
+        return len(word)
+
+    return rv, after_vc(after_vc(0) - 1)
+
+
+def _strip(word, start, endings):
+    """``word`` without the longest ending of ``endings`` that lies at or after ``start``, else None."""
+    for ending, after_a in endings:
+        cut = len(word) - len(ending)
+        if cut >= start and word.endswith(ending):
+            if not after_a:
+                return word[:cut]
+            if cut - 1 >= start and word[cut - 1] in 'ая':
+                return word[:cut]
+    return None
+
+
+@lru_cache(maxsize=200_000)
+def stem(word):
+    word = word.lower().replace('ё', 'е')
+    if not word or not ('а' <= word[0] <= 'я'):
+        return word
+    rv, r2 = _regions(word)
+
+    # Step 1
+    out = _strip(word, rv, PERFECTIVE_GERUND)
+    if out is None:
+        word = _strip(word, rv, REFLEXIVE) or word
+        out = _strip(word, rv, ADJECTIVE)
+        if out is not None:
+            out = _strip(out, rv, PARTICIPLE) or out
+        else:
+            out = _strip(word, rv, VERB)
+            if out is None:
+                out = _strip(word, rv, NOUN)
+    word = out if out is not None else word
+
+    # Step 2
+    if word.endswith('и') and len(word) - 1 >= rv:
+        word = word[:-1]
+
+    # Step 3
+    word = _strip(word, max(r2, rv), DERIVATIONAL) or word
+
+    # Step 4
+    if word.endswith('нн') and len(word) - 2 >= rv:
+        return word[:-1]
+    out = _strip(word, rv, SUPERLATIVE)
+    if out is not None:
+        word = out
+        return word[:-1] if word.endswith('нн') else word
+    if word.endswith('ь') and len(word) - 1 >= rv:
+        return word[:-1]
+    return word
+
+
+def tokens(text):
+    """Lowercased word tokens of ``text`` (``ё`` folded to ``е``)."""
+    return _TOKEN_RE.findall(text.lower().replace('ё', 'е'))
+
+
+def terms(text):
+    """Stemmed tokens of ``text``, without stopwords."""
+    return [stem(t) for t in tokens(text) if t not in STOPWORDS]
@@ -0,0 +1,127 @@
+"""In-memory collections with hash indexes.
+
+``storage.ts`` keeps every collection as one JSON array and answers each
+lookup with a linear scan. A ``Collection`` keeps records by id and
+maintains secondary indexes (field value → ordered set of ids), so lookups
+by indexed fields cost O(1) for the bucket plus O(k) for its contents.
+Buckets preserve insertion order, so results come back in the same order as
+the array scans they replace. ``watch`` registers a listener that sees every
+insert, update and delete, which keeps derived indexes (e.g. search) current.
+Services that change nested data in place (appending an application,
+bumping an unread count) report it with ``touch``.
+"""
+
+from collections import defaultdict
+
+
+class Collection:
+    """Records keyed by ``id`` with secondary indexes.
+
+    ``indexes`` are scalar fields; ``multi`` are list fields indexed per
+    element (e.g. ``Conversation.participantIds``). Records returned by the
+    lookups are the stored dicts: treat them as read-only and change indexed
+    fields through ``update``.
+    """
+
+    def __init__(self, name, indexes=(), multi=()):
+        self.name = name
+        self._rows = {}
+        self._fields = tuple(indexes)
+        self._multi = tuple(multi)
+        self._index = {f: defaultdict(dict) for f in self._fields + self._multi}
+        self._watchers = []
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __contains__(self, id):
+        return id in self._rows
+
+    def watch(self, fn):
+        """Call ``fn(event, record)`` after each ``'insert'``, ``'update'``, ``'touch'`` and ``'delete'``.
+
+        ``'touch'`` follows an in-place change to unindexed, nested fields;
+        listeners that only read top-level fields can ignore it.
+        """
+        self._watchers.append(fn)
+
+    def _notify(self, event, record):
+        for fn in self._watchers:
+            fn(event, record)
+
+    def _keys(self, field, record):
+        value = record.get(field)
+        if field in self._multi:
+            return value or ()
+        return () if value is None else (value,)
+
+    def _add(self, record, fields=None):
+        for f in fields or self._index:
+            for v in self._keys(f, record):
+                self._index[f][v][record['id']] = None
+
+    def _remove(self, record, fields=None):
+        for f in fields or self._index:
+            for v in self._keys(f, record):
+                bucket = self._index[f].get(v)
+                if bucket is not None:
+                    bucket.pop(record['id'], None)
+                    if not bucket:
+                        del self._index[f][v]
+
+    def insert(self, record):
+        if record['id'] in self._rows:
+            raise KeyError(f'{self.name}: duplicate id {record["id"]!r}')
+        self._rows[record['id']] = record
+        self._add(record)
+        self._notify('insert', record)
+        return record
+
+    def load(self, records):
+        for r in records:
+            self.insert(r)
+
+    def get(self, id):
+        return self._rows.get(id)
+
+    def all(self):
+        return list(self._rows.values())
+
+    def find(self, field, value):
+        """Records whose ``field`` equals (or, for multi fields, contains) ``value``."""
+        bucket = self._index[field].get(value, ())
+        return [self._rows[i] for i in bucket]
+
+    def find_one(self, field, value):
+        for i in self._index[field].get(value, ()):
+            return self._rows[i]
+        return None
+
+    def count(self, field, value):
+        return len(self._index[field].get(value, ()))
+
+    def update(self, id, changes):
+        """Merge ``changes`` into the record and re-index it; returns the record."""
+        record = self._rows[id]
+        touched = [f for f in self._index if f in changes and changes[f] != record.get(f)]
+        if touched:
+            self._remove(record, touched)
+        record.update(changes)
+        if touched:
+            self._add(record, touched)
+        self._notify('update', record)
+        return record
+
+    def touch(self, id):
+        """Report an in-place change to the record's nested data; returns the record."""
+        record = self._rows.get(id)
+        if record is not None:
+            self._notify('touch', record)
+        return record
+
+    def delete(self, id):
+        record = self._rows.pop(id, None)
+        if record is not None:
+            self._remove(record)
+            self._notify('delete', record)
+        return record
@@ -0,0 +1,191 @@
+"""Concurrency stress tests for writes that storage.ts does as read-modify-write.
+
+    python -m backend.stress purchases|certificates [--backends json,memory,sqlite] [--threads 16]
+                                                    [--ops 20000] [--purchases 50] [--target 400]
+                                                    [--seed 1] [--output report.json]
+
+Each scenario starts ``--threads`` threads that together make ``--ops`` calls,
+runs them against the backends of ``backend.bench``, then checks the stored
+state. A backend passes when every anomaly count is zero. The JSON report
+adds calls/s.
+
+``purchases`` calls ``collectivePurchases.join``. Each call picks a random
+purchase, one of a few hundred users and a quantity of 1–5, so users join
+the same purchase several times and most purchases fill up before the run
+ends. The anomalies are:
+
+* ``lost``: units the calls reported as accepted (for the storage.ts
+  baseline, every unit it was asked for) that are missing from the
+  participants;
+* ``drift``: purchases whose ``currentVolume`` differs from the sum of their
+  participants;
+* ``overshoot``: purchases past ``targetVolume``;
+* ``status``: purchases whose status disagrees with their volume.
+
+``certificates`` calls ``training.complete`` on ``--ops`` distinct
+enrollments. The anomalies are:
+
+* ``duplicates``: certificate numbers issued more than once;
+* ``lost``: completions that are not stored;
+* ``profiles``: graduates whose profile lacks ``isCertified`` or carries
+  another number.
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from .bench import BACKENDS
+
+
+def _users(n):
+    return [{'id': f'u{i}', 'role': 'specialist', 'name': f'Мастер {i}', 'email': f'u{i}@stress.test',
+             'password': '123456', 'city': 'Москва', 'createdAt': '2026-01-01T00:00:00Z'} for i in range(n)]
+
+
+def _hammer(threads, calls, work):
+    """Run ``work(thread no, its share of calls)`` on ``threads`` threads; returns the seconds taken."""
+    shares = [calls // threads + (i < calls % threads) for i in range(threads)]
+    start = threading.Barrier(threads + 1)
+
+    def run(n, share):
+        start.wait()
+        work(n, share)
+
+    pool = [threading.Thread(target=run, args=(n, share)) for n, share in enumerate(shares)]
+    for t in pool:
+        t.start()
+    start.wait()
+    t0 = time.perf_counter()
+    for t in pool:
+        t.join()
+    return time.perf_counter() - t0
+
+
+def _open(backend, data):
+    workdir = tempfile.mkdtemp(prefix='stress-')
+    return BACKENDS[backend](data, workdir), workdir
+
+
+def _close(db, workdir):
+    close = getattr(db, 'close', None)
+    if close is not None:
+        close()
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+def stress_purchases(backend, args, users=300):
+    data = {'dp_users': _users(users),
+            'dp_collective_purchases': [{'id': f'cp{i}', 'supplierId': 'sup1', 'supplierName': 'Поставщик',
+                                         'product': f'Товар {i}', 'targetVolume': args.target,
+                                         'currentVolume': 0, 'unitPrice': '100 ₽', 'status': 'active',
+                                         'participants': []} for i in range(args.purchases)]}
+    db, workdir = _open(backend, data)
+    service = db.services['collectivePurchases']
+    accepted = [0] * args.purchases
+    merge = threading.Lock()
+
+    def work(n, calls):
+        r = random.Random(f'{args.seed}:{n}')
+        mine = [0] * args.purchases
+        for _ in range(calls):
+            i, u, q = r.randrange(args.purchases), r.randrange(users), r.randint(1, 5)
+            result = service.join(f'cp{i}', f'u{u}', f'Клиент {u}', q)
+            # The storage.ts port returns nothing and accepts everything.
+            mine[i] += q if result is None else result['accepted']
+        with merge:
+            for i, q in enumerate(mine):
+                accepted[i] += q
+
+    elapsed = _hammer(args.threads, args.ops, work)
+    stored = {p['id']: p for p in service.get_all()}
+    found = Counter()
+    for i in range(args.purchases):
+        p = stored[f'cp{i}']
+        held = sum(x['quantity'] for x in p['participants'])
+        found['lost'] += max(0, accepted[i] - held)
+        found['drift'] += p['currentVolume'] != held
+        found['overshoot'] += p['currentVolume'] > p['targetVolume']
+        found['status'] += (p['status'] == 'completed') != (p['currentVolume'] >= p['targetVolume'])
+    _close(db, workdir)
+    return elapsed, {k: found[k] for k in ('lost', 'drift', 'overshoot', 'status')}
+
+
+def stress_certificates(backend, args):
+    data = {'dp_users': _users(args.ops),
+            'dp_training_enrollments': [{'id': f'e{i}', 'userId': f'u{i}', 'userName': f'Мастер {i}',
+                                         'course': 'Полировка кузова', 'status': 'enrolled',
+                                         'enrolledAt': '2026-01-01T00:00:00Z'} for i in range(args.ops)]}
+    db, workdir = _open(backend, data)
+    service = db.services['training']
+    shares = [list(range(args.ops))[n::args.threads] for n in range(args.threads)]
+
+    def work(n, calls):
+        for i in shares[n]:
+            service.complete(f'e{i}')
+
+    elapsed = _hammer(args.threads, args.ops, work)
+    graduates = service.get_all_graduates()
+    numbers = Counter(e['certificateNumber'] for e in graduates)
+    profiles = sum(1 for e in graduates for u in (db.auth.get_user(e['userId']),)
+                   if not (u.get('isCertified') and u.get('certificateNumber') == e['certificateNumber']))
+    _close(db, workdir)
+    return elapsed, {'duplicates': sum(n - 1 for n in numbers.values()), 'lost': args.ops - len(graduates),
+                     'profiles': profiles}
+
+
+SCENARIOS = {'purchases': stress_purchases, 'certificates': stress_certificates}
+
+
+def _csv(value):
+    return [v for v in value.split(',') if v]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Stress concurrent writes against each backend.')
+    parser.add_argument('scenario', choices=sorted(SCENARIOS))
+    parser.add_argument('--backends', type=_csv, default=['json', 'memory', 'sqlite'])
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--ops', type=int, default=20_000, help='calls across all threads')
+    parser.add_argument('--purchases', type=int, default=50, help='purchases: how many purchases')
+    parser.add_argument('--target', type=int, default=400, help='purchases: targetVolume of each')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='write the JSON report here instead of stdout')
+    args = parser.parse_args(argv)
+
+    unknown = [b for b in args.backends if b not in BACKENDS]
+    if unknown:
+        parser.error(f'unknown backend: {", ".join(unknown)}')
+
+    results = []
+    for backend in args.backends:
+        elapsed, anomalies = SCENARIOS[args.scenario](backend, args)
+        r = {'scenario': args.scenario, 'backend': backend, 'threads': args.threads, 'ops': args.ops,
+             'seconds': round(elapsed, 3), 'ops_per_sec': round(args.ops / elapsed, 1), **anomalies,
+             'ok': not any(anomalies.values())}
+        results.append(r)
+        found = '  '.join(f'{k} {v:>6}' for k, v in anomalies.items())
+        print(f'{backend:<8} {r["ops_per_sec"]:>11,.1f} ops/s  {found}  {"ok" if r["ok"] else "FAIL"}',
+              file=sys.stderr)
+    report = {'meta': {'cpu_count': os.cpu_count(), 'seed': args.seed,
+                       'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())},
+              'results': results}
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+    # The storage.ts baseline is expected to fail; it is there for comparison.
+    sys.exit(0 if all(r['ok'] for r in results if r['backend'] != 'json') else 1)
+
+
+if __name__ == '__main__':
+    main()
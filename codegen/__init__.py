@@ -0,0 +1 @@
+"""Code generation helpers for the Next.js pages under src/app."""
@@ -0,0 +1,104 @@
+"""Batch splicing driven by a manifest of (target page, fragment, region) entries.
+
+A manifest is a JSON list of entries; paths are relative to the repo root:
+
+    [
+      {"target": "src/app/dashboard/page.tsx",
+       "fragment": "codegen/fragments/dashboard/employer/vacancies.frag",
+       "region": "employer: vacancies"}
+    ]
+
+Without ``region`` every top-level marked region of the fragment is spliced.
+Edits are grouped per target so each page is read and written at most once,
+and pages are processed in parallel. Fragments are resolved through the
+``FragmentStore`` hash index, so a fragment whose digest already matches its
+region is never read.
+"""
+
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+from .fragments import ROOT
+from .splice import SpliceError, fragment_regions, splice_file
+
+MANIFEST_PATH = os.path.join(ROOT, 'codegen', 'manifest.json')
+
+
+@dataclass
+class FileResult:
+    target: str
+    changed: list = field(default_factory=list)
+    unchanged: list = field(default_factory=list)
+    error: str = ''
+    seconds: float = 0.0
+
+
+def load_manifest(path):
+    with open(path, encoding='utf-8') as f:
+        entries = json.load(f)
+    if not isinstance(entries, list):
+        raise SpliceError(f'{path}: manifest must be a JSON list')
+    for i, e in enumerate(entries):
+        if not isinstance(e, dict) or 'target' not in e or 'fragment' not in e:
+            raise SpliceError(f'{path}: entry {i} needs "target" and "fragment"')
+    return entries
+
+
+def group_entries(entries, store, root=ROOT):
+    """Map each target path to its ``[(Fragment, region or None), ...]``."""
+    jobs = {}
+    for e in entries:
+        target = os.path.join(root, e['target'])
+        jobs.setdefault(target, []).append((store.get(e['fragment']), e.get('region')))
+    return jobs
+
+
+def build_replacements(sources):
+    """Resolve ``[(Fragment, region), ...]`` into ``{region: body}``."""
+    replacements = {}
+    for fragment, region in sources:
+        parts = {region: fragment} if region else fragment_regions(fragment.text)
+        for name, body in parts.items():
+            if name in replacements:
+                raise SpliceError(f'region {name!r} is spliced more than once')
+            replacements[name] = body
+    return replacements
+
+
+def process_file(target, sources, dry_run=False):
+    started = time.perf_counter()
+    result = FileResult(target)
+    try:
+        result.changed, result.unchanged = splice_file(target, build_replacements(sources), dry_run=dry_run)
+    except (OSError, SpliceError) as e:
+        result.error = str(e)
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+def run(jobs, dry_run=False, workers=None):
+    """Process ``{target: sources}`` and return a ``FileResult`` per target."""
+    if workers is None:
+        workers = min(len(jobs), os.cpu_count() or 1)
+    if workers <= 1 or len(jobs) <= 1:
+        return [process_file(t, s, dry_run) for t, s in jobs.items()]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(process_file, t, s, dry_run) for t, s in jobs.items()]
+        return [f.result() for f in futures]
+
+
+def report(results, root=ROOT, out=None):
+    """Print one line per page with its timing; return the number of failures."""
+    failures = 0
+    for r in results:
+        name = os.path.relpath(r.target, root)
+        if r.error:
+            failures += 1
+            print(f'  FAIL {name}: {r.error}', file=out)
+        else:
+            print(f'  {name}: {len(r.changed)} spliced, {len(r.unchanged)} unchanged '
+                  f'({r.seconds * 1000:.1f} ms)', file=out)
+    return failures
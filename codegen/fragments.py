@@ -0,0 +1,80 @@
+"""On-disk fragment store with a content-hash index.
+
+Fragments live as one ``.frag`` file per region under ``codegen/fragments``:
+``dashboard/<role>/<tab>.frag`` for the ``{/* === ROLE: TAB === */}``
+regions of ``src/app/dashboard/page.tsx`` and ``dashboard/<name>.frag`` for
+the shared ones. ``partials/`` holds blocks that specs include. The index
+maps each fragment path to its size, mtime and body digest, so a run can
+tell that a fragment matches the region already in the page from a
+``stat`` call alone, without reading it. Bodies are read only when a region
+actually has to be rewritten.
+"""
+
+import json
+import os
+from dataclasses import dataclass, field
+
+from .splice import body_digest, write_atomic
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FRAGMENTS_DIR = os.path.join(ROOT, 'codegen', 'fragments')
+INDEX_PATH = os.path.join(FRAGMENTS_DIR, '.index.json')
+
+
+@dataclass
+class Fragment:
+    """A fragment file known by digest; its text is read on first access."""
+
+    path: str
+    digest: str
+    _text: str = field(default=None, repr=False)
+
+    @property
+    def text(self):
+        if self._text is None:
+            with open(self.path, encoding='utf-8', newline='') as f:
+                self._text = f.read()
+        return self._text
+
+    def __getstate__(self):
+        # Ship only path and digest to worker processes.
+        return {'path': self.path, 'digest': self.digest, '_text': None}
+
+
+class FragmentStore:
+    def __init__(self, root=ROOT, index_path=INDEX_PATH):
+        self.root = root
+        self.index_path = index_path
+        self._index = None
+        self._dirty = False
+        self.hashed = 0
+
+    @property
+    def index(self):
+        if self._index is None:
+            try:
+                with open(self.index_path, encoding='utf-8') as f:
+                    self._index = json.load(f)
+            except (FileNotFoundError, ValueError):
+                self._index = {}
+        return self._index
+
+    def get(self, path):
+        """Return a ``Fragment`` for ``path``, re-hashing only if it changed on disk."""
+        full = os.path.join(self.root, path)
+        key = os.path.relpath(full, self.root)
+        st = os.stat(full)
+        entry = self.index.get(key)
+        if entry and entry['size'] == st.st_size and entry['mtime_ns'] == st.st_mtime_ns:
+            return Fragment(full, entry['digest'])
+        fragment = Fragment(full, '')
+        fragment.digest = body_digest(fragment.text)
+        self.index[key] = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'digest': fragment.digest}
+        self._dirty = True
+        self.hashed += 1
+        return fragment
+
+    def save(self):
+        if self._dirty:
+            write_atomic(self.index_path, json.dumps(self.index, indent=1, sort_keys=True) + '\n')
+            self._dirty = False
@@ -0,0 +1,25 @@
+        {tab === "favorites" && user.role === "client" && (
+          <Card title={`Избранное (${favUsers.length})`}>
+            {favUsers.length === 0 ? <EmptyState text="Нет избранных специалистов или компаний" /> : (
+              <div className="space-y-2">
+                {favUsers.map(u => (
+                  <div key={u.id} className="flex items-center justify-between p-4 rounded-xl bg-surface border border-border">
+                    <div className="flex items-center gap-3">
+                      <div className="w-10 h-10 rounded-full bg-primary/10 flex items-center justify-center text-primary font-bold text-sm">
+                        {(u.companyName || u.name || "?")[0].toUpperCase()}
+                      </div>
+                      <div>
+                        <Link href={u.role === "employer" ? `/companies/${u.id}` : `/specialists/${u.id}`} className="text-sm font-medium hover:text-primary">{u.companyName || u.name}</Link>
+                        <div className="text-xs text-muted">{u.role === "employer" ? "Компания" : "Специалист"} · {u.city}</div>
+                      </div>
+                    </div>
+                    <div className="flex items-center gap-2">
+                      <div className="flex items-center gap-1 text-xs text-yellow-400"><Star size={12} fill="currentColor" />{u.rating || 0}</div>
+                      <button onClick={() => removeFavorite(u.id)} className="p-1.5 hover:text-red-400 text-muted"><Heart size={14} fill="currentColor" className="text-pink-400" /></button>
+                    </div>
+                  </div>
+                ))}
+              </div>
+            )}
+          </Card>
+        )}
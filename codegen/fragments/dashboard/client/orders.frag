@@ -0,0 +1,7 @@
+        {tab === "orders" && user.role === "client" && (
+          <Card title={`Мои заказы (${myOrders.length})`} action={<Link href="/orders" className="px-4 py-2 bg-primary text-white text-sm rounded-full hover:bg-primary-hover flex items-center gap-1.5"><Plus size={14} /> Создать</Link>}>
+            {myOrders.length === 0 ? <EmptyState text="У вас пока нет заказов" /> : (
+              <div className="space-y-2">{myOrders.map(o => <OrderItem key={o.id} o={o} />)}</div>
+            )}
+          </Card>
+        )}
@@ -0,0 +1,7 @@
+        {tab === "gigs" && (user.role === "employer" || user.role === "specialist") && (
+          <Card title={`Мои подработки (${myGigs.length})`} action={<Link href="/gigs" className="px-4 py-2 bg-primary text-white text-sm rounded-full hover:bg-primary-hover flex items-center gap-1.5"><Plus size={14} /> Создать</Link>}>
+            {myGigs.length === 0 ? <EmptyState text="У вас пока нет подработок" /> : (
+              <div className="space-y-2">{myGigs.map(g => <GigItem key={g.id} g={g} />)}</div>
+            )}
+          </Card>
+        )}
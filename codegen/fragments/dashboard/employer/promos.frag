@@ -0,0 +1,21 @@
+        {tab === "promos" && user.role === "employer" && (
+          <Card title={`Мои промоакции (${myPromos.length})`} action={<Link href="/promos" className="px-4 py-2 bg-primary text-white text-sm rounded-full hover:bg-primary-hover flex items-center gap-1.5"><Plus size={14} /> Создать</Link>}>
+            {myPromos.length === 0 ? <EmptyState text="У вас пока нет промоакций" /> : (
+              <div className="space-y-2">{myPromos.map(p => (
+                <div key={p.id} className="flex items-center justify-between p-4 rounded-xl bg-surface border border-border">
+                  <div>
+                    <span className="text-sm font-medium">{p.title}</span>
+                    <div className="flex items-center gap-3 text-xs text-muted mt-1">
+                      <span className="flex items-center gap-1"><Tag size={12} />{p.discount}</span>
+                      <span>Код: {p.code}</span>
+                      <span>Использовано: {p.usedBy.length}/{p.maxUses || "∞"}</span>
+                    </div>
+                  </div>
+                  <div className="flex items-center gap-2">
+                    {p.isActive ? <span className="px-2.5 py-1 rounded-full text-xs bg-emerald-500/10 text-emerald-400">Активна</span> : <span className="px-2.5 py-1 rounded-full text-xs bg-muted/20 text-muted">Неактивна</span>}
+                  </div>
+                </div>
+              ))}</div>
+            )}
+          </Card>
+        )}
@@ -0,0 +1,45 @@
+        {tab === "subaccounts" && user.role === "employer" && (
+          <Card title="Суб-аккаунты" action={<button onClick={() => setShowSubForm(true)} className="px-4 py-2 bg-primary text-white text-sm rounded-full hover:bg-primary-hover flex items-center gap-1.5"><Plus size={14} /> Добавить</button>}>
+            {(user.subAccounts || []).length === 0 ? (
+              <EmptyState text="Нет суб-аккаунтов. Добавьте сотрудников для управления профилем." />
+            ) : (
+              <div className="space-y-2">
+                {(user.subAccounts || []).map(s => (
+                  <div key={s.id} className="flex items-center justify-between p-4 rounded-xl bg-surface border border-border">
+                    <div>
+                      <span className="text-sm font-medium">{s.name}</span>
+                      <div className="text-xs text-muted mt-1">{s.email}</div>
+                      <div className="flex gap-2 mt-1.5">
+                        {s.canEditVacancies && <span className="px-2 py-0.5 bg-blue-500/10 text-blue-400 text-[10px] rounded-full">Вакансии</span>}
+                        {s.canEditProfile && <span className="px-2 py-0.5 bg-emerald-500/10 text-emerald-400 text-[10px] rounded-full">Профиль</span>}
+                      </div>
+                    </div>
+                    <button onClick={() => removeSubAccount(s.id)} className="p-1.5 hover:text-red-400 text-muted"><Trash2 size={14} /></button>
+                  </div>
+                ))}
+              </div>
+            )}
+
+            {/* Sub-account form modal */}
+            {showSubForm && (
+              <div className="fixed inset-0 bg-black/60 z-50 flex items-center justify-center p-4" onClick={() => setShowSubForm(false)}>
+                <div className="bg-card border border-border rounded-2xl p-6 w-full max-w-md" onClick={e => e.stopPropagation()}>
+                  <h3 className="text-lg font-semibold mb-4">Добавить суб-аккаунт</h3>
+                  <div className="space-y-3">
+                    <input placeholder="Имя" value={subForm.name} onChange={e => setSubForm(p => ({ ...p, name: e.target.value }))} className="w-full px-4 py-2.5 bg-surface border border-border rounded-lg text-sm focus:border-primary focus:outline-none" />
+                    <input placeholder="Email" type="email" value={subForm.email} onChange={e => setSubForm(p => ({ ...p, email: e.target.value }))} className="w-full px-4 py-2.5 bg-surface border border-border rounded-lg text-sm focus:border-primary focus:outline-none" />
+                    <input placeholder="Пароль" type="password" value={subForm.password} onChange={e => setSubForm(p => ({ ...p, password: e.target.value }))} className="w-full px-4 py-2.5 bg-surface border border-border rounded-lg text-sm focus:border-primary focus:outline-none" />
+                    <div className="flex items-center gap-4">
+                      <label className="flex items-center gap-2 text-sm"><input type="checkbox" checked={subForm.canEditVacancies} onChange={e => setSubForm(p => ({ ...p, canEditVacancies: e.target.checked }))} className="accent-primary" /> Управление вакансиями</label>
+                      <label className="flex items-center gap-2 text-sm"><input type="checkbox" checked={subForm.canEditProfile} onChange={e => setSubForm(p => ({ ...p, canEditProfile: e.target.checked }))} className="accent-primary" /> Редактирование профиля</label>
+                    </div>
+                  </div>
+                  <div className="flex justify-end gap-2 mt-6">
+                    <button onClick={() => setShowSubForm(false)} className="px-4 py-2 text-sm border border-border rounded-full hover:border-primary/30">Отмена</button>
+                    <button onClick={addSubAccount} className="px-4 py-2 bg-primary text-white text-sm rounded-full hover:bg-primary-hover">Добавить</button>
+                  </div>
+                </div>
+              </div>
+            )}
+          </Card>
+        )}
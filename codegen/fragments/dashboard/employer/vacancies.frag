@@ -0,0 +1,7 @@
+        {tab === "vacancies" && user.role === "employer" && (
+          <Card title={`Мои вакансии (${myVacancies.length})`} action={<Link href="/vacancies" className="px-4 py-2 bg-primary text-white text-sm rounded-full hover:bg-primary-hover flex items-center gap-1.5"><Plus size={14} /> Создать</Link>}>
+            {myVacancies.length === 0 ? <EmptyState text="У вас пока нет вакансий" /> : (
+              <div className="space-y-2">{myVacancies.map(v => <VacancyItem key={v.id} v={v} />)}</div>
+            )}
+          </Card>
+        )}
@@ -0,0 +1,58 @@
+        {tab === "overview" && (
+          <div className="space-y-6">
+            <Card title="Быстрые действия">
+              <div className="grid grid-cols-1 sm:grid-cols-3 gap-3">
+                {user.role === "employer" && <>
+                  <QuickAction href="/vacancies" icon={Plus} title="Создать вакансию" sub="Опубликовать объявление" />
+                  <QuickAction href="/gigs" icon={Briefcase} title="Создать подработку" sub="Разовая работа" />
+                  <QuickAction href="/messages" icon={MessageSquare} title="Сообщения" sub={`${unread} непрочитанных`} />
+                </>}
+                {user.role === "specialist" && <>
+                  <QuickAction href="/vacancies" icon={Briefcase} title="Вакансии" sub="Найти работу" />
+                  <QuickAction href="/gigs" icon={Zap} title="Подработки" sub="Разовые заказы" />
+                  <QuickAction href="/training" icon={BookOpen} title="Обучение" sub="Курсы и сертификация" />
+                </>}
+                {user.role === "client" && <>
+                  <QuickAction href="/orders" icon={Plus} title="Создать заказ" sub="Заказать услугу" />
+                  <QuickAction href="/specialists" icon={Users} title="Специалисты" sub="Найти мастера" />
+                  <QuickAction href="/companies" icon={Building2} title="Компании" sub="Найти сервис" />
+                </>}
+                {user.role === "supplier" && <>
+                  <QuickAction href="/suppliers" icon={Plus} title="Совместная закупка" sub="Создать закупку" />
+                  <QuickAction href="/messages" icon={MessageSquare} title="Сообщения" sub={`${unread} непрочитанных`} />
+                  <QuickAction href="/chats" icon={Users} title="Общий чат" sub="Обсуждения отрасли" />
+                </>}
+              </div>
+            </Card>
+
+            {/* Recent items */}
+            {user.role === "employer" && myVacancies.length > 0 && (
+              <Card title="Последние вакансии" action={<Link href="/vacancies" className="text-xs text-primary hover:underline flex items-center gap-1">Все <ChevronRight size={12} /></Link>}>
+                <div className="space-y-2">{myVacancies.slice(0, 3).map(v => <VacancyItem key={v.id} v={v} />)}</div>
+              </Card>
+            )}
+            {user.role === "specialist" && appliedVacs.length > 0 && (
+              <Card title="Последние отклики" action={<button onClick={() => setTab("applications")} className="text-xs text-primary hover:underline flex items-center gap-1">Все <ChevronRight size={12} /></button>}>
+                <div className="space-y-2">{appliedVacs.slice(0, 3).map(v => <VacancyItem key={v.id} v={v} />)}</div>
+              </Card>
+            )}
+            {user.role === "client" && myOrders.length > 0 && (
+              <Card title="Последние заказы" action={<button onClick={() => setTab("orders")} className="text-xs text-primary hover:underline flex items-center gap-1">Все <ChevronRight size={12} /></button>}>
+                <div className="space-y-2">{myOrders.slice(0, 3).map(o => <OrderItem key={o.id} o={o} />)}</div>
+              </Card>
+            )}
+            {user.role === "supplier" && myPurchases.length > 0 && (
+              <Card title="Мои закупки">
+                <div className="space-y-2">{myPurchases.slice(0, 3).map(p => (
+                  <div key={p.id} className="flex items-center justify-between p-4 rounded-xl bg-surface border border-border">
+                    <div>
+                      <span className="text-sm font-medium">{p.product}</span>
+                      <div className="text-xs text-muted mt-1">{p.participants.length} участников · {p.currentVolume}/{p.targetVolume}</div>
+                    </div>
+                    {statusBadge(p.status)}
+                  </div>
+                ))}</div>
+              </Card>
+            )}
+          </div>
+        )}
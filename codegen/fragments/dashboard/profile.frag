@@ -0,0 +1,74 @@
+        {tab === "profile" && (
+          <Card title="Профиль" action={<ProfileActions />}>
+            <div className="grid grid-cols-1 sm:grid-cols-2 gap-4">
+              {user.role === "employer" && <>
+                <EditField label="Название компании" field="companyName" />
+                <EditField label="Тип компании" field="companyType" />
+                <EditField label="Город" field="city" />
+                <EditField label="Район" field="district" />
+                <EditField label="Адрес" field="address" />
+                <EditField label="Телефон" field="phone" />
+                <EditField label="Email" field="email" type="email" />
+                <EditField label="ИНН" field="inn" />
+                <EditField label="Часы работы" field="workingHours" />
+                <div />
+                <EditTextarea label="Описание" field="description" />
+                <EditSkills label="Услуги" field="services" />
+              </>}
+              {user.role === "specialist" && <>
+                <EditField label="Имя" field="name" />
+                <EditField label="Специализация" field="specialization" />
+                <EditField label="Город" field="city" />
+                <EditField label="Телефон" field="phone" />
+                <EditField label="Email" field="email" type="email" />
+                <EditField label="Опыт" field="experience" />
+                <EditSkills label="Навыки" field="skills" />
+                <div className="sm:col-span-2 flex items-center gap-6 mt-2">
+                  <div className="flex items-center gap-2">
+                    <span className="text-sm text-muted">Статус:</span>
+                    <button onClick={() => { updateProfile({ status: user.status === "searching" ? "employed" : "searching" }); }} className="flex items-center gap-2">
+                      {user.status === "searching" ? <ToggleRight size={24} className="text-emerald-400" /> : <ToggleLeft size={24} className="text-muted" />}
+                      <span className="text-sm">{user.status === "searching" ? "Ищу работу" : "Занят"}</span>
+                    </button>
+                  </div>
+                  <div className="flex items-center gap-2">
+                    <span className="text-sm text-muted">Подработки:</span>
+                    <button onClick={() => { updateProfile({ availableForGigs: !user.availableForGigs }); }} className="flex items-center gap-2">
+                      {user.availableForGigs ? <ToggleRight size={24} className="text-emerald-400" /> : <ToggleLeft size={24} className="text-muted" />}
+                      <span className="text-sm">{user.availableForGigs ? "Доступен" : "Недоступен"}</span>
+                    </button>
+                  </div>
+                </div>
+              </>}
+              {user.role === "client" && <>
+                <EditField label="Имя" field="name" />
+                <EditField label="Город" field="city" />
+                <EditField label="Телефон" field="phone" />
+                <EditField label="Email" field="email" type="email" />
+              </>}
+              {user.role === "supplier" && <>
+                <EditField label="Название компании" field="companyName" />
+                <EditField label="Категория" field="category" />
+                <EditField label="Город" field="city" />
+                <EditField label="Телефон" field="phone" />
+                <EditField label="Email" field="email" type="email" />
+                <EditField label="Мин. заказ" field="minOrder" />
+                <EditField label="Скидка (%)" field="discount" />
+                <div />
+                <EditSkills label="Продукция" field="products" />
+              </>}
+            </div>
+
+            {/* Subscription info for employer */}
+            {user.role === "employer" && (
+              <div className="mt-6 p-4 rounded-xl bg-surface border border-border">
+                <h4 className="text-sm font-medium mb-3 flex items-center gap-2"><Shield size={16} className="text-primary" /> Подписка</h4>
+                <div className="flex items-center gap-4">
+                  {planLabel(user.subscriptionPlan)}
+                  {user.subscriptionExpiry && <span className="text-xs text-muted">до {fmtDate(user.subscriptionExpiry)}</span>}
+                  <button className="ml-auto px-4 py-1.5 bg-primary/10 text-primary text-xs rounded-full hover:bg-primary/20 transition-colors">Улучшить</button>
+                </div>
+              </div>
+            )}
+          </Card>
+        )}
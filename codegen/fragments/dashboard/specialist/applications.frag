@@ -0,0 +1,27 @@
+        {tab === "applications" && user.role === "specialist" && (
+          <Card title={`Мои отклики (${appliedVacs.length})`}>
+            {appliedVacs.length === 0 ? <EmptyState text="Вы ещё не откликались на вакансии" /> : (
+              <div className="space-y-2">
+                {appliedVacs.map(v => {
+                  const myApp = v.applications.find(a => a.specialistId === user.id);
+                  return (
+                    <div key={v.id} className="p-4 rounded-xl bg-surface border border-border">
+                      <div className="flex items-center justify-between">
+                        <div>
+                          <Link href={`/vacancies/${v.id}`} className="text-sm font-medium hover:text-primary">{v.title}</Link>
+                          <div className="flex items-center gap-3 text-xs text-muted mt-1">
+                            <span>{v.companyName}</span>
+                            <span>{v.salary}</span>
+                            <span className="flex items-center gap-1"><MapPin size={12} />{v.city}</span>
+                          </div>
+                        </div>
+                        {myApp && statusBadge(myApp.status)}
+                      </div>
+                      {myApp?.message && <p className="text-xs text-muted mt-2 border-t border-border pt-2">{myApp.message}</p>}
+                    </div>
+                  );
+                })}
+              </div>
+            )}
+          </Card>
+        )}
@@ -0,0 +1,37 @@
+        {tab === "portfolio" && user.role === "specialist" && (
+          <Card title="Портфолио" action={<button onClick={() => setShowPortfolioForm(true)} className="px-4 py-2 bg-primary text-white text-sm rounded-full hover:bg-primary-hover flex items-center gap-1.5"><Plus size={14} /> Добавить</button>}>
+            {(!user.portfolio || user.portfolio.length === 0) ? <EmptyState text="Портфолио пусто. Добавьте свои работы!" /> : (
+              <div className="grid grid-cols-1 sm:grid-cols-2 lg:grid-cols-3 gap-4">
+                {user.portfolio.map(item => (
+                  <div key={item.id} className="rounded-xl bg-surface border border-border overflow-hidden group">
+                    <div className="aspect-[3/2] bg-card flex items-center justify-center relative">
+                      <ImageIcon size={32} className="text-muted" />
+                      <button onClick={() => removePortfolioItem(item.id)} className="absolute top-2 right-2 p-1.5 bg-black/60 rounded-lg opacity-0 group-hover:opacity-100 transition-opacity hover:text-red-400"><Trash2 size={14} /></button>
+                    </div>
+                    <div className="p-3">
+                      <h4 className="text-sm font-medium">{item.title}</h4>
+                      {item.description && <p className="text-xs text-muted mt-1 line-clamp-2">{item.description}</p>}
+                    </div>
+                  </div>
+                ))}
+              </div>
+            )}
+
+            {showPortfolioForm && (
+              <div className="fixed inset-0 bg-black/60 z-50 flex items-center justify-center p-4" onClick={() => setShowPortfolioForm(false)}>
+                <div className="bg-card border border-border rounded-2xl p-6 w-full max-w-md" onClick={e => e.stopPropagation()}>
+                  <h3 className="text-lg font-semibold mb-4">Добавить работу</h3>
+                  <div className="space-y-3">
+                    <input placeholder="Название" value={portfolioForm.title} onChange={e => setPortfolioForm(p => ({ ...p, title: e.target.value }))} className="w-full px-4 py-2.5 bg-surface border border-border rounded-lg text-sm focus:border-primary focus:outline-none" />
+                    <textarea placeholder="Описание" value={portfolioForm.description} onChange={e => setPortfolioForm(p => ({ ...p, description: e.target.value }))} rows={3} className="w-full px-4 py-2.5 bg-surface border border-border rounded-lg text-sm focus:border-primary focus:outline-none resize-none" />
+                    <input placeholder="URL изображения (необязательно)" value={portfolioForm.imageUrl} onChange={e => setPortfolioForm(p => ({ ...p, imageUrl: e.target.value }))} className="w-full px-4 py-2.5 bg-surface border border-border rounded-lg text-sm focus:border-primary focus:outline-none" />
+                  </div>
+                  <div className="flex justify-end gap-2 mt-6">
+                    <button onClick={() => setShowPortfolioForm(false)} className="px-4 py-2 text-sm border border-border rounded-full hover:border-primary/30">Отмена</button>
+                    <button onClick={addPortfolioItem} className="px-4 py-2 bg-primary text-white text-sm rounded-full hover:bg-primary-hover">Добавить</button>
+                  </div>
+                </div>
+              </div>
+            )}
+          </Card>
+        )}
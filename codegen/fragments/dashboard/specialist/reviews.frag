@@ -0,0 +1,20 @@
+        {tab === "reviews" && user.role === "specialist" && (
+          <Card title={`Отзывы (${myReviews.length})`}>
+            {myReviews.length === 0 ? <EmptyState text="Пока нет отзывов" /> : (
+              <div className="space-y-3">
+                {myReviews.map(r => (
+                  <div key={r.id} className="p-4 rounded-xl bg-surface border border-border">
+                    <div className="flex items-center justify-between mb-2">
+                      <span className="text-sm font-medium">{r.authorName}</span>
+                      <span className="text-xs text-muted">{fmtDate(r.createdAt)}</span>
+                    </div>
+                    <div className="flex gap-0.5 mb-2">
+                      {[1,2,3,4,5].map(n => <Star key={n} size={14} className={n <= r.rating ? "text-yellow-400 fill-yellow-400" : "text-muted"} />)}
+                    </div>
+                    <p className="text-sm text-foreground/80">{r.text}</p>
+                  </div>
+                ))}
+              </div>
+            )}
+          </Card>
+        )}
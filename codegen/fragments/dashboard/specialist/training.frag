@@ -0,0 +1,21 @@
+        {tab === "training" && user.role === "specialist" && (
+          <Card title={`Обучение (${enrollments.length})`} action={<Link href="/training" className="text-xs text-primary hover:underline flex items-center gap-1">Каталог курсов <ChevronRight size={12} /></Link>}>
+            {enrollments.length === 0 ? <EmptyState text="Вы не записаны на курсы" /> : (
+              <div className="space-y-2">
+                {enrollments.map(e => (
+                  <div key={e.id} className="flex items-center justify-between p-4 rounded-xl bg-surface border border-border">
+                    <div>
+                      <span className="text-sm font-medium">{e.course}</span>
+                      <div className="flex items-center gap-3 text-xs text-muted mt-1">
+                        <span className="flex items-center gap-1"><Calendar size={12} />{fmtDate(e.enrolledAt)}</span>
+                        {e.completedAt && <span>Завершён: {fmtDate(e.completedAt)}</span>}
+                        {e.certificateNumber && <span className="flex items-center gap-1 text-emerald-400"><CheckCircle2 size={12} />Сертификат: {e.certificateNumber}</span>}
+                      </div>
+                    </div>
+                    {statusBadge(e.status)}
+                  </div>
+                ))}
+              </div>
+            )}
+          </Card>
+        )}
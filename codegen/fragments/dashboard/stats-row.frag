@@ -0,0 +1,26 @@
+        <div className="grid grid-cols-2 lg:grid-cols-4 gap-4 mb-8">
+          {user.role === "employer" && <>
+            <StatCard label="Вакансий" value={myVacancies.length} icon={Briefcase} />
+            <StatCard label="Откликов" value={totalApps} icon={FileText} color="text-blue-400" />
+            <StatCard label="Сообщений" value={unread} icon={MessageSquare} color="text-amber-400" />
+            <StatCard label="Рейтинг" value={user.rating || 0} icon={Star} color="text-yellow-400" />
+          </>}
+          {user.role === "specialist" && <>
+            <StatCard label="Отклики" value={appliedVacs.length} icon={FileText} />
+            <StatCard label="Подработки" value={myGigs.length} icon={Briefcase} color="text-blue-400" />
+            <StatCard label="Отзывы" value={myReviews.length} icon={Star} color="text-yellow-400" />
+            <StatCard label="Рейтинг" value={user.rating || 0} icon={TrendingUp} color="text-emerald-400" />
+          </>}
+          {user.role === "client" && <>
+            <StatCard label="Заказов" value={myOrders.length} icon={FileText} />
+            <StatCard label="Активных" value={myOrders.filter(o => o.status === "active").length} icon={Zap} color="text-emerald-400" />
+            <StatCard label="Избранное" value={favUsers.length} icon={Heart} color="text-pink-400" />
+            <StatCard label="Сообщений" value={unread} icon={MessageSquare} color="text-amber-400" />
+          </>}
+          {user.role === "supplier" && <>
+            <StatCard label="Закупок" value={myPurchases.length} icon={Package} />
+            <StatCard label="Рейтинг" value={user.rating || 0} icon={Star} color="text-yellow-400" />
+            <StatCard label="Сообщений" value={unread} icon={MessageSquare} color="text-amber-400" />
+            <StatCard label="Верификация" value={user.isVerified ? "✓" : "—"} icon={Shield} color="text-emerald-400" />
+          </>}
+        </div>
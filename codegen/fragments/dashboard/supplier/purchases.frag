@@ -0,0 +1,25 @@
+        {tab === "purchases" && user.role === "supplier" && (
+          <Card title={`Совместные закупки (${myPurchases.length})`} action={<Link href="/suppliers" className="px-4 py-2 bg-primary text-white text-sm rounded-full hover:bg-primary-hover flex items-center gap-1.5"><Plus size={14} /> Создать</Link>}>
+            {myPurchases.length === 0 ? <EmptyState text="У вас нет совместных закупок" /> : (
+              <div className="space-y-3">
+                {myPurchases.map(p => (
+                  <div key={p.id} className="p-4 rounded-xl bg-surface border border-border">
+                    <div className="flex items-center justify-between mb-3">
+                      <span className="text-sm font-medium">{p.product}</span>
+                      {statusBadge(p.status)}
+                    </div>
+                    <div className="flex items-center gap-4 text-xs text-muted mb-2">
+                      <span>{p.participants.length} участников</span>
+                      <span>Цена: {p.unitPrice}</span>
+                      <span>До: {fmtDate(p.deadline)}</span>
+                    </div>
+                    <div className="w-full bg-surface rounded-full h-2 border border-border">
+                      <div className="bg-primary h-full rounded-full transition-all" style={{ width: `${Math.min(100, (p.currentVolume / p.targetVolume) * 100)}%` }} />
+                    </div>
+                    <div className="text-xs text-muted mt-1">{p.currentVolume} / {p.targetVolume} ({Math.round((p.currentVolume / p.targetVolume) * 100)}%)</div>
+                  </div>
+                ))}
+              </div>
+            )}
+          </Card>
+        )}
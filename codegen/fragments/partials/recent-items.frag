@@ -0,0 +1,29 @@
+{/* Recent items */}
+{user.role === "employer" && myVacancies.length > 0 && (
+  <Card title="Последние вакансии" action={<Link href="/vacancies" className="text-xs text-primary hover:underline flex items-center gap-1">Все <ChevronRight size={12} /></Link>}>
+    <div className="space-y-2">{myVacancies.slice(0, 3).map(v => <VacancyItem key={v.id} v={v} />)}</div>
+  </Card>
+)}
+{user.role === "specialist" && appliedVacs.length > 0 && (
+  <Card title="Последние отклики" action={<button onClick={() => setTab("applications")} className="text-xs text-primary hover:underline flex items-center gap-1">Все <ChevronRight size={12} /></button>}>
+    <div className="space-y-2">{appliedVacs.slice(0, 3).map(v => <VacancyItem key={v.id} v={v} />)}</div>
+  </Card>
+)}
+{user.role === "client" && myOrders.length > 0 && (
+  <Card title="Последние заказы" action={<button onClick={() => setTab("orders")} className="text-xs text-primary hover:underline flex items-center gap-1">Все <ChevronRight size={12} /></button>}>
+    <div className="space-y-2">{myOrders.slice(0, 3).map(o => <OrderItem key={o.id} o={o} />)}</div>
+  </Card>
+)}
+{user.role === "supplier" && myPurchases.length > 0 && (
+  <Card title="Мои закупки">
+    <div className="space-y-2">{myPurchases.slice(0, 3).map(p => (
+      <div key={p.id} className="flex items-center justify-between p-4 rounded-xl bg-surface border border-border">
+        <div>
+          <span className="text-sm font-medium">{p.product}</span>
+          <div className="text-xs text-muted mt-1">{p.participants.length} участников · {p.currentVolume}/{p.targetVolume}</div>
+        </div>
+        {statusBadge(p.status)}
+      </div>
+    ))}</div>
+  </Card>
+)}
@@ -0,0 +1,310 @@
+"""Marker-delimited regions in TSX pages and idempotent splicing.
+
+A region starts at a line holding nothing but a JSX comment marker, e.g.
+
+    {/* ── Profile Tab ── */}
+    {/* ===================== EMPLOYER: VACANCIES ===================== */}
+
+and runs until the next marker at the same or a shallower indentation, or
+until the enclosing block closes (a line indented less than the marker).
+Markers nested deeper inside a region form child regions, so a region key
+is the path of labels from the outermost marker, e.g. ``specialist/spec gigs``.
+
+A body whose lines would end its region early (a non-blank line indented
+less than the marker, or a marker at the marker's own level) is refused, so
+splicing the same body again finds the same region and is a no-op. Spliced
+lines take the page's line endings.
+
+Splicing compares content hashes first and only rewrites regions whose text
+actually changed; the result is checked for balanced braces and JSX tags
+(``codegen.tsx_check``) and written back through a temp file and
+``os.replace``.
+"""
+
+import hashlib
+import os
+import re
+import tempfile
+from dataclasses import dataclass, field
+
+MARKER_RE = re.compile(r'^[ \t]*\{/\*\s*(?P<label>.*?)\s*\*/\}\s*$')
+_DECORATION = '─━═=-—–*#~ '
+
+
+class SpliceError(Exception):
+    """Raised when a region cannot be located or edits overlap."""
+
+
+def digest(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def normalize_label(label):
+    """'── Profile Tab ──' and '=== PROFILE TAB ===' both become 'profile tab'."""
+    return ' '.join(label.strip(_DECORATION).split()).casefold()
+
+
+def _indent(line):
+    stripped = line.lstrip(' \t')
+    return len(line[:len(line) - len(stripped)].expandtabs(4))
+
+
+def _as_lines(text):
+    lines = text.splitlines(keepends=True)
+    if lines and not lines[-1].endswith(('\n', '\r')):
+        lines[-1] += '\n'
+    return lines
+
+
+def normalize_body(text):
+    """Body lines as they would be stored in a region: no trailing blank lines."""
+    lines = _as_lines(text.rstrip('\r\n') + '\n') if text.strip() else []
+    while lines and not lines[-1].strip():
+        lines.pop()
+    return lines
+
+
+def body_digest(text):
+    """Digest of ``text`` comparable with ``Region.digest``."""
+    return digest(''.join(normalize_body(text)))
+
+
+@dataclass
+class Region:
+    key: str
+    label: str
+    indent: int
+    start: int          # marker line
+    end: int = 0        # exclusive, trailing blank lines excluded
+    parent: 'Region | None' = None
+    children: list = field(default_factory=list)
+    digest: str = ''
+
+    @property
+    def body_start(self):
+        return self.start + 1
+
+
+class Document:
+    """A page (or fragment) split into lines with its marker regions indexed."""
+
+    def __init__(self, text):
+        self.lines = _as_lines(text)
+        self.regions = {}
+        self.roots = []
+        self._by_label = {}
+        self._parse()
+
+    @classmethod
+    def read(cls, path):
+        with open(path, encoding='utf-8', newline='') as f:
+            return cls(f.read())
+
+    @property
+    def text(self):
+        return ''.join(self.lines)
+
+    @property
+    def newline(self):
+        """The page's line ending, taken from its first line."""
+        return '\r\n' if self.lines and self.lines[0].endswith('\r\n') else '\n'
+
+    def body(self, region):
+        return ''.join(self.lines[region.body_start:region.end])
+
+    def shell(self, region):
+        """Region body with child bodies cut out, marker lines kept."""
+        parts, pos = [], region.body_start
+        for child in region.children:
+            parts.extend(self.lines[pos:child.body_start])
+            pos = child.end
+        parts.extend(self.lines[pos:region.end])
+        return ''.join(parts)
+
+    def resolve(self, name):
+        """Find a region by full key or, if unambiguous, by its own label."""
+        key = '/'.join(normalize_label(p) for p in name.split('/'))
+        if key in self.regions:
+            return self.regions[key]
+        found = self._by_label.get(key, [])
+        if len(found) == 1:
+            return found[0]
+        if not found:
+            known = ', '.join(repr(r.key) for r in self.regions.values()) or 'none'
+            raise SpliceError(f'region not found: {name!r} (regions: {known})')
+        raise SpliceError(f'region {name!r} is ambiguous: ' + ', '.join(r.key for r in found))
+
+    def _parse(self):
+        stack = []
+        for i, line in enumerate(self.lines):
+            if not line.strip():
+                continue
+            width = _indent(line)
+            m = MARKER_RE.match(line)
+            while stack and (width < stack[-1].indent or (m and width <= stack[-1].indent)):
+                self._close(stack.pop(), i)
+            if m:
+                label = normalize_label(m.group('label'))
+                parent = stack[-1] if stack else None
+                key = f'{parent.key}/{label}' if parent else label
+                n = 2
+                base = key
+                while key in self.regions:
+                    key = f'{base}#{n}'
+                    n += 1
+                region = Region(key=key, label=label, indent=width, start=i, parent=parent)
+                self.regions[key] = region
+                self._by_label.setdefault(label, []).append(region)
+                (parent.children if parent else self.roots).append(region)
+                stack.append(region)
+        while stack:
+            self._close(stack.pop(), len(self.lines))
+
+    def _close(self, region, end):
+        while end > region.body_start and not self.lines[end - 1].strip():
+            end -= 1
+        region.end = end
+        region.digest = digest(''.join(self.lines[region.body_start:end]))
+
+
+@dataclass
+class Edit:
+    key: str
+    start: int
+    end: int
+    lines: list
+
+
+def plan(doc, region, body):
+    """Edits that turn ``region`` into ``body``, recursing into unchanged shells.
+
+    When the new body keeps the same child markers and only a child changed,
+    only that child is rewritten; otherwise the whole region body is replaced.
+    """
+    new_lines = [line.rstrip('\r\n') + doc.newline for line in normalize_body(body)]
+    if digest(''.join(new_lines)) == region.digest:
+        return []
+    fragment = Document(''.join(new_lines))
+    if (region.children
+            and [c.label for c in fragment.roots] == [c.label for c in region.children]
+            and _shell(fragment, fragment.roots) == doc.shell(region)):
+        edits = []
+        for old, new in zip(region.children, fragment.roots):
+            edits.extend(plan(doc, old, fragment.body(new)))
+        return edits
+    _check_contained(region, new_lines)
+    return [Edit(region.key, region.body_start, region.end, new_lines)]
+
+
+def _check_contained(region, lines):
+    """Refuse a body that ``Document`` would not parse back as all of ``region``."""
+    for n, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        width = _indent(line)
+        if width < region.indent:
+            raise SpliceError(f'region {region.key!r}: body line {n} is indented less than its marker '
+                              f'({width} < {region.indent} columns) and would end the region')
+        if width == region.indent and MARKER_RE.match(line):
+            raise SpliceError(f'region {region.key!r}: body line {n} is a marker at the region\'s own level')
+
+
+def _shell(fragment, roots):
+    parts, pos = [], 0
+    for child in roots:
+        parts.extend(fragment.lines[pos:child.body_start])
+        pos = child.end
+    parts.extend(fragment.lines[pos:])
+    while parts and not parts[-1].strip():
+        parts.pop()
+    return ''.join(parts)
+
+
+def apply_edits(doc, edits):
+    """Return the document text with ``edits`` applied; edits must not overlap."""
+    edits = sorted(edits, key=lambda e: e.start)
+    for a, b in zip(edits, edits[1:]):
+        if b.start < a.end:
+            raise SpliceError(f'overlapping edits: {a.key!r} and {b.key!r}')
+    lines = list(doc.lines)
+    for e in reversed(edits):
+        lines[e.start:e.end] = e.lines
+    return ''.join(lines)
+
+
+def splice(text, replacements, doc=None):
+    """Splice ``{region name: new body}`` into ``text``.
+
+    A body is either a string or an object with ``digest`` and ``text``
+    attributes (see ``codegen.fragments.Fragment``); the latter is only read
+    when its digest differs from the region's. ``doc`` is ``text`` already
+    parsed, for callers that keep pages in memory.
+
+    Returns ``(new_text, changed_keys, unchanged_names)``.  ``new_text`` is
+    ``text`` itself when nothing changed.
+    """
+    if doc is None:
+        doc = Document(text)
+    edits, unchanged = [], []
+    for name, body in replacements.items():
+        region = doc.resolve(name)
+        if isinstance(body, str):
+            region_edits = plan(doc, region, body)
+        elif body.digest == region.digest:
+            region_edits = []
+        else:
+            region_edits = plan(doc, region, body.text)
+        if region_edits:
+            edits.extend(region_edits)
+        else:
+            unchanged.append(name)
+    if not edits:
+        return text, [], unchanged
+    return apply_edits(doc, edits), [e.key for e in edits], unchanged
+
+
+def fragment_regions(text):
+    """Top-level ``{label: body}`` pairs of a fragment, in file order."""
+    doc = Document(text)
+    return {r.key: doc.body(r) for r in doc.roots}
+
+
+def write_atomic(path, text):
+    """Write ``text`` to ``path`` via a temp file in the same directory."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.chmod(tmp, os.stat(path).st_mode & 0o7777)
+        except FileNotFoundError:
+            pass
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def splice_file(path, replacements, dry_run=False):
+    """Splice into ``path`` in place; the file is untouched when nothing changed.
+
+    The spliced page must pass ``codegen.tsx_check`` before it is written, so
+    an unbalanced fragment raises ``TsxError`` (a ``SpliceError``) instead
+    of breaking the page.
+    """
+    from .tsx_check import check
+
+    with open(path, encoding='utf-8', newline='') as f:
+        text = f.read()
+    new_text, changed, unchanged = splice(text, replacements)
+    if changed:
+        check(new_text, path, jsx=not path.endswith('.ts'))
+        if not dry_run:
+            write_atomic(path, new_text)
+    return changed, unchanged
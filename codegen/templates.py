@@ -0,0 +1,236 @@
+"""Declarative templates for the repeated dashboard JSX blocks.
+
+A spec (``codegen/specs/*.json``) describes fragments as trees of widgets:
+
+    {
+      "output": "dashboard",
+      "fragments": {
+        "stats-row": {"indent": 8, "root": {"widget": "grid", "className": "...", "children": [
+          {"widget": "role", "role": "client", "of": "stat", "children": [
+            {"label": "Заказов", "value": "myOrders.length", "icon": "FileText"}
+          ]}
+        ]}}
+      }
+    }
+
+Each fragment renders to ``codegen/fragments/<output>/<name>.frag``, which
+the manifest splices into its page region. Widgets render the page's own
+components (``StatCard``, ``QuickAction``, ``Card``) and the
+``{user.role === "..." && <>…</>}`` blocks that repeat them for each role.
+Children without a ``widget`` take the parent's ``of`` (or the block's
+default). Bespoke markup is pulled in with an ``include`` widget from
+``codegen/fragments/partials``.
+
+Widget templates are compiled once per process. Rendered fragments are
+cached on disk in ``codegen/.cache/render.json`` under a hash of the
+fragment spec (plus the digests of any included partials), so re-generating
+an unchanged spec only costs a ``stat`` per output fragment. A fragment is
+re-rendered only when that hash changes (or its file is gone), so a hand
+edit to a generated fragment stays until its spec changes.
+"""
+
+import functools
+import hashlib
+import json
+import os
+import re
+from string import Template
+
+from .fragments import FRAGMENTS_DIR, ROOT, FragmentStore
+from .splice import write_atomic
+
+ENGINE_VERSION = 2
+SPECS_DIR = os.path.join(ROOT, 'codegen', 'specs')
+CACHE_PATH = os.path.join(ROOT, 'codegen', '.cache', 'render.json')
+
+# name: (template, {block: default widget for plain-dict children})
+# A line holding only ``@block`` renders that block's children at its indent.
+WIDGETS = {
+    'tab': ('''\
+{$when && (
+  @children
+)}''', {}),
+    'stack': ('''\
+<div className="$className">
+  @children
+</div>''', {}),
+    'grid': ('''\
+<div className="$className">
+  @children
+</div>''', {}),
+    'card': ('''\
+<Card title="$title">
+  @children
+</Card>''', {}),
+    'role': ('''\
+{user.role === "$role" && <>
+  @children
+</>}''', {}),
+    'stat': ('<StatCard label="$label" value={$value} icon={$icon}$colorAttr />', {}),
+    'quick_action': ('<QuickAction href="$href" icon={$icon} title="$title" sub=$subAttr />', {}),
+}
+
+_BLOCK_RE = re.compile(r'^(?P<indent> *)@(?P<name>\w+)$')
+
+
+class TemplateError(Exception):
+    """Raised for unknown widgets or missing widget fields."""
+
+
+def _stat(node):
+    return {'colorAttr': f' color="{node["color"]}"' if node.get('color') else ''}
+
+
+def _quick_action(node):
+    """``sub`` is a string; ``subExpr`` a JSX expression such as a template literal."""
+    if 'subExpr' in node:
+        return {'subAttr': '{' + node['subExpr'] + '}'}
+    if 'sub' in node:
+        return {'subAttr': '"' + node['sub'] + '"'}
+    raise TemplateError("widget 'quick_action' needs field 'sub' or 'subExpr'")
+
+
+# Extra fields derived from a widget's own spec before substitution.
+_DERIVED = {'stat': _stat, 'quick_action': _quick_action}
+# Widgets whose children are separated by a blank line.
+_SPACED = {'stack'}
+
+
+@functools.lru_cache(maxsize=None)
+def compile_widget(name):
+    """Split a widget template into ``('line', Template)`` / ``('block', indent, name)``."""
+    if name not in WIDGETS:
+        raise TemplateError(f'unknown widget {name!r}')
+    template, _ = WIDGETS[name]
+    parts = []
+    for line in template.split('\n'):
+        m = _BLOCK_RE.match(line)
+        if m:
+            parts.append(('block', len(m.group('indent')), m.group('name')))
+        else:
+            parts.append(('line', Template(line)))
+    return tuple(parts)
+
+
+def _spec_key(node):
+    return json.dumps(node, ensure_ascii=False, sort_keys=True)
+
+
+class Renderer:
+    def __init__(self, store=None):
+        self.store = store or FragmentStore()
+        self._memo = {}
+
+    def render(self, node, indent=0, default=None):
+        """Render a widget node to a list of lines (without newlines)."""
+        key = (_spec_key(node), indent, default)
+        if key not in self._memo:
+            self._memo[key] = self._render(node, indent, default)
+        return self._memo[key]
+
+    def _render(self, node, indent, default):
+        name = node.get('widget', default)
+        if name == 'include':
+            return self._include(node, indent)
+        _, blocks = WIDGETS.get(name, (None, {}))
+        fields = {k: v for k, v in node.items() if not isinstance(v, (list, dict))}
+        if name in _DERIVED:
+            fields.update(_DERIVED[name](node))
+        pad = ' ' * indent
+        lines = []
+        for part in compile_widget(name):
+            if part[0] == 'line':
+                try:
+                    lines.append(pad + part[1].substitute(fields) if part[1].template else '')
+                except KeyError as e:
+                    raise TemplateError(f'widget {name!r} needs field {e.args[0]!r}') from None
+                continue
+            _, extra, block = part
+            children = node.get(block, [])
+            if isinstance(children, dict):
+                children = [children]
+            for i, child in enumerate(children):
+                if i and name in _SPACED:
+                    lines.append('')
+                lines.extend(self.render(child, indent + extra, node.get('of') or blocks.get(block)))
+        return lines
+
+    def _include(self, node, indent):
+        fragment = self.store.get(os.path.join(FRAGMENTS_DIR, node['fragment'] + '.frag'))
+        lines = fragment.text.rstrip('\n').split('\n')
+        strip = min((len(l) - len(l.lstrip(' ')) for l in lines if l.strip()), default=0)
+        return [' ' * indent + l[strip:] if l.strip() else '' for l in lines]
+
+    def render_fragment(self, spec):
+        return '\n'.join(self.render(spec['root'], spec.get('indent', 0))) + '\n'
+
+
+def _includes(node):
+    if isinstance(node, dict):
+        if node.get('widget') == 'include':
+            yield node['fragment']
+        for v in node.values():
+            yield from _includes(v)
+    elif isinstance(node, list):
+        for v in node:
+            yield from _includes(v)
+
+
+def fragment_key(renderer, spec):
+    """Cache key of a fragment: its spec, the engine version and included partials."""
+    h = hashlib.sha256(f'{ENGINE_VERSION}\0{_spec_key(spec)}'.encode('utf-8'))
+    for name in sorted(set(_includes(spec))):
+        h.update(renderer.store.get(os.path.join(FRAGMENTS_DIR, name + '.frag')).digest.encode())
+    return h.hexdigest()
+
+
+def _load_cache():
+    try:
+        with open(CACHE_PATH, encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def generate(spec_paths=None, store=None, dry_run=False):
+    """Render every fragment of the given specs into fragment files.
+
+    Returns the list of fragment paths (relative to the repo root) whose
+    content changed. A fragment whose key matches the cache is skipped
+    without rendering, even if it was edited by hand since.
+    """
+    if spec_paths is None:
+        spec_paths = sorted(os.path.join(SPECS_DIR, n) for n in os.listdir(SPECS_DIR) if n.endswith('.json'))
+    renderer = Renderer(store)
+    store = renderer.store
+    cache = _load_cache()
+    dirty = False
+    written = []
+    for spec_path in spec_paths:
+        with open(spec_path, encoding='utf-8') as f:
+            spec = json.load(f)
+        for name, fragment in spec['fragments'].items():
+            path = os.path.join(FRAGMENTS_DIR, spec['output'], name + '.frag')
+            rel = os.path.relpath(path, ROOT)
+            key = fragment_key(renderer, fragment)
+            current = store.get(rel) if os.path.exists(path) else None
+            cached = cache.get(rel)
+            if cached and current and cached['key'] == key:
+                if cached['digest'] != current.digest:  # edited by hand: keep it
+                    cache[rel] = {'key': key, 'digest': current.digest}
+                    dirty = True
+                continue
+            text = renderer.render_fragment(fragment)
+            if current is None or text != current.text:
+                written.append(rel)
+                if dry_run:
+                    continue
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                write_atomic(path, text)
+                current = store.get(rel)
+            cache[rel] = {'key': key, 'digest': current.digest}
+            dirty = True
+    if dirty and not dry_run:
+        os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+        write_atomic(CACHE_PATH, json.dumps(cache, indent=1, sort_keys=True) + '\n')
+    return written
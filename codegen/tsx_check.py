@@ -0,0 +1,448 @@
+"""Single-pass structural check of TSX source.
+
+``check(text)`` tokenizes a page once, left to right, and raises
+``TsxError`` with the line and column of the first structural problem:
+
+* ``{}``, ``()`` and ``[]`` that do not pair up, in code and in JSX
+  attribute and child expressions;
+* JSX elements whose closing tag is missing or names another element,
+  fragments (``<>…</>``) included;
+* ``}`` or ``>`` in JSX text, where they are usually what is left of a
+  missing ``)}`` or a broken tag;
+* strings, template literals (``${}`` nesting included), regular
+  expressions and block comments that are never terminated.
+
+It is not a parser: types, operators and statements are not checked, only
+what ``next build`` would otherwise be the first to notice, and it takes a
+few milliseconds per page. Whether ``<`` opens a JSX element and ``/`` a
+regular expression is decided the way the TypeScript scanner does, from the
+previous token. In type position (after ``type X =``, or a ``:`` or
+``extends`` followed by ``<…>(``) a ``<`` opens type parameters, and after
+an operand ``!`` is a non-null assertion, so ``x! < y`` is a comparison.
+``.ts`` files are checked with JSX off. ``--self-check`` runs the checker
+over ``SELF_CHECK``.
+
+``splice_file`` runs it on every spliced page before writing. To check the
+whole app:
+
+    python -m codegen.tsx_check [PATH ...]      # default: src/app
+    python -m codegen.tsx_check --self-check
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+
+from .fragments import ROOT
+from .splice import SpliceError
+
+APP_DIR = os.path.join(ROOT, 'src', 'app')
+EXTENSIONS = ('.tsx', '.ts', '.jsx', '.js')
+
+_CODE = re.compile(r'''\s*(?:
+    (?P<word>(?:[^\W\d]|\$)[\w$]*(?:\s*\??\.\s*(?:[^\W\d]|\$|\#)[\w$]*)*)
+  | (?P<num>\d[\w.]*)
+  | (?P<op>\+\+|--|[-+*%&|^!~=>?:;,.@]+)
+  | (?P<ch>\S)
+)''', re.X)
+_STRING = {"'": re.compile(r"'(?:[^'\\\n]|\\.)*'", re.S), '"': re.compile(r'"(?:[^"\\\n]|\\.)*"', re.S)}
+_TEMPLATE = re.compile(r'(?:[^`\\$]|\\.|\$(?!\{))*', re.S)
+_REGEX = re.compile(r'/(?:[^/\\\[\n]|\\.|\[(?:[^\]\\\n]|\\.)*\])+/[A-Za-z]*')
+_SPACE = re.compile(r'(?:\s+|//[^\n]*|/\*.*?\*/)*', re.S)
+_NAME = re.compile(r'(?:[^\W\d]|\$)[\w$.:-]*')
+_GENERIC = re.compile(r'<\s*(?:[^\W\d]|\$)[\w$]*\s*(?:,|extends\b)')
+_TYPE_TOKEN = re.compile(r'''=>|"(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*'|[<>]|[^<>"'=]+|[="']''')
+_ATTR = re.compile(r'(?:[^\W\d]|\$)[\w$:-]*\s*(=\s*)?')
+_ATTR_STRING = re.compile(r'"[^"]*"|\'[^\']*\'')
+_TEXT = re.compile(r'[^{}<>]*')
+_CLOSING = re.compile(r'</\s*((?:[^\W\d]|\$)[\w$.:-]*)?\s*>')
+
+# After these words an expression starts, so ``<`` and ``/`` open JSX and
+# regular expressions; after any other word they are operators.
+_KEYWORDS = frozenset('return typeof instanceof in of new delete void throw case do else yield await'.split())
+_CLOSERS = {')': '(', ']': '[', '}': '{'}
+
+CODE, TAG, CHILDREN, END = range(4)
+
+# (source, start of the expected error message or None if it is valid)
+SELF_CHECK = [
+    ('const a = <div className="x">{items.map(i => <Item key={i} />)}</div>;', None),
+    ('const a = <>{ok ? <A /> : <B />}</>;', None),
+    ('const o = { icon: <Icon size={1} />, n: a ? 1 : 2 };', None),
+    ('const a = <Foo<string> a="b" />;', None),
+    ('const a = <Foo<Map<string, () => void>>>x</Foo>;', None),
+    ('const c = <T,>(x: T) => x;', None),
+    ('type F = <T>(x: T) => T;', None),
+    ('type G<T> = <U>(x: T, y: U) => [T, U];', None),
+    ('const f: <T>(x: T) => T = (x) => x;', None),
+    ('function g(cb?: <T>(x: T) => void) { return cb; }', None),
+    ('interface H { run: <T extends object>(x: T) => T }', None),
+    ('const q = x! < y;', None),
+    ('const r = f()! > 1 ? <p>big</p> : null;', None),
+    ('const s = a ? <b>(1)</b> : <i>(2)</i>;', None),
+    ('const re = /<div>/g.test(s);', None),
+    ('if (node.type) el = <div />;', None),
+    ('const a = <div>;', '<div> is never closed'),
+    ('const a = <div></span>;', '</span> does not close'),
+    ('const a = <Foo<string a="b" />;', 'unexpected'),
+    ('const a = f(1;', "'(' is never closed"),
+    ('const a = <p>{x}}</p>;', "unexpected '}'"),
+]
+
+
+class TsxError(SpliceError):
+    """A structural error at ``line``:``col`` (both 1-based) of ``path``."""
+
+    def __init__(self, message, path='<string>', line=0, col=0):
+        super().__init__(message)
+        self.message, self.path, self.line, self.col = message, path, line, col
+
+    def __str__(self):
+        return f'{self.path}:{self.line}:{self.col}: {self.message}'
+
+
+def position(text, pos):
+    """``(line, column)`` of offset ``pos``, both 1-based."""
+    return text.count('\n', 0, pos) + 1, pos - text.rfind('\n', 0, pos)
+
+
+class _Scanner:
+    # Stack frames are ``(kind, offset, tag name)``; kind is one of
+    # '{' '(' '[' for code, '${' for template substitutions, 'jsx{' for
+    # expressions in JSX, 'tag' while reading attributes, 'elem' for children.
+
+    def __init__(self, text, path, jsx):
+        self.text, self.path, self.jsx = text, path, jsx
+        self.stack = []
+        self.expr = True
+        self.type_next = None  # 'alias' after ``type X =``; 'annotation' after a type ``:`` or ``extends``
+        self._alias = 0        # 1 after ``type``, 2 after ``type X`` until its ``=``
+        self._ternary = {}     # open ``?`` per stack depth, to tell ``a ? b : c`` from ``x: T``
+
+    def fail(self, pos, message):
+        raise TsxError(message, self.path, *position(self.text, pos))
+
+    def where(self, frame):
+        line, col = position(self.text, frame[1])
+        return f'{self.describe(frame)} at {line}:{col}'
+
+    @staticmethod
+    def describe(frame):
+        kind, _, name = frame
+        if kind in ('tag', 'elem'):
+            return f'<{name}>'
+        return f"'{kind[-1]}'" if kind != '${' else "'${'"
+
+    def run(self):
+        mode, pos = CODE, 0
+        while mode != END:
+            if mode == CODE:
+                mode, pos = self.code(pos)
+            elif mode == TAG:
+                mode, pos = self.tag(pos)
+            else:
+                mode, pos = self.children(pos)
+        if self.stack:
+            frame = self.stack[-1]
+            self.fail(frame[1], f'{self.describe(frame)} is never closed')
+
+    def resume(self):
+        """The mode to continue in after a frame was popped."""
+        kind = self.stack[-1][0] if self.stack else None
+        if kind == 'tag':
+            return TAG
+        if kind == 'elem':
+            return CHILDREN
+        return CODE
+
+    def code(self, pos):
+        text, stack, match = self.text, self.stack, _CODE.match
+        while True:
+            m = match(text, pos)
+            if m is None:
+                return END, len(text)
+            pos = m.end()
+            kind = m.lastgroup
+            type_next, self.type_next = self.type_next, None
+            if kind == 'word':
+                word = m.group('word')
+                self.expr = word in _KEYWORDS
+                if word == 'extends':
+                    self.type_next = 'annotation'
+                self._alias = 1 if word == 'type' else 2 if self._alias else 0
+                continue
+            if kind == 'num':
+                self.expr = False
+                continue
+            if kind == 'op':
+                self.operator(m.group('op'))
+                continue
+            c = m.group('ch')
+            start = pos - 1
+            if c != '<':
+                self._alias = 0
+            if c in '([{':
+                stack.append((c, start, None))
+                self.expr = True
+            elif c in ')]}':
+                top = stack[-1] if stack else None
+                if top is not None and top[0] == '${' and c == '}':
+                    stack.pop()
+                    pos = self.template(pos)
+                    continue
+                if top is not None and top[0] == 'jsx{' and c == '}':
+                    stack.pop()
+                    return self.resume(), pos
+                if top is None or top[0] != _CLOSERS[c]:
+                    self.fail(start, f"unexpected '{c}'" + (f'; {self.where(top)} is still open' if top else ''))
+                stack.pop()
+                self._ternary.pop(len(stack) + 1, None)
+                self.expr = False
+            elif c in '\'"':
+                m = _STRING[c].match(text, start)
+                if m is None:
+                    self.fail(start, 'unterminated string')
+                pos = m.end()
+                self.expr = False
+            elif c == '`':
+                pos = self.template(pos)
+            elif c == '/':
+                if text.startswith('/', pos):
+                    end = text.find('\n', pos)
+                    pos = len(text) if end < 0 else end
+                elif text.startswith('*', pos):
+                    end = text.find('*/', pos + 1)
+                    if end < 0:
+                        self.fail(start, 'unterminated comment')
+                    pos = end + 2
+                elif self.expr:
+                    m = _REGEX.match(text, start)
+                    if m is None:
+                        self.fail(start, 'unterminated regular expression')
+                    pos = m.end()
+                    self.expr = False
+                else:
+                    self.expr = True
+            elif c == '<':
+                if self.jsx and text.startswith('/', pos) and _CLOSING.match(text, start):
+                    # A closing tag in code: the element ended early, most
+                    # often because a ')' or '}' before it went missing.
+                    top = stack[-1] if stack else None
+                    self.fail(start, f'{_CLOSING.match(text, start).group()} outside of JSX'
+                                     + (f'; {self.where(top)} is still open' if top else ''))
+                if type_next is not None:
+                    end = self._type_arguments_end(start)
+                    if end is not None and (type_next == 'alias' or text.startswith('(', _SPACE.match(text, end).end())):
+                        pos = end
+                        self.expr = True
+                        continue
+                if self.jsx and self.expr and not _GENERIC.match(text, start):
+                    return self.open_tag(start)
+                self.expr = True
+            else:
+                self.expr = False
+
+    def operator(self, op):
+        if op == '!' and not self.expr:
+            return  # ``x!``: a non-null assertion; an operand still ends here
+        self.expr = op not in ('++', '--')
+        depth = len(self.stack)
+        if ';' in op:
+            self._ternary.pop(depth, None)
+            self._alias = 0
+            return
+        questions = op.count('?') - 2 * op.count('??') - op.count('?.') - op.count('?:')
+        if questions > 0:
+            self._ternary[depth] = self._ternary.get(depth, 0) + questions
+        if op.endswith(':'):
+            if not op.endswith('?:') and self._ternary.get(depth):
+                self._ternary[depth] -= 1
+            else:
+                self.type_next = 'annotation'
+        elif op.endswith('=') and self._alias == 2:
+            self.type_next = 'alias'
+        if op.endswith('=') or self._alias == 1:
+            self._alias = 0
+
+    def template(self, pos):
+        """Scan a template literal from just after its backtick or a ``${…}``."""
+        end = _TEMPLATE.match(self.text, pos).end()
+        if self.text.startswith('`', end):
+            self.expr = False
+            return end + 1
+        if self.text.startswith('${', end):
+            self.stack.append(('${', end, None))
+            self.expr = True
+            return end + 2
+        start = self.text.rfind('`', 0, pos)
+        self.fail(start if start >= 0 else pos, 'unterminated template literal')
+
+    def open_tag(self, start):
+        """``start`` is at a ``<`` that opens an element or a fragment."""
+        pos = _SPACE.match(self.text, start + 1).end()
+        if self.text.startswith('>', pos):
+            self.stack.append(('elem', start, ''))
+            return CHILDREN, pos + 1
+        m = _NAME.match(self.text, pos)
+        if m is None:
+            self.fail(pos, "expected a tag name after '<'")
+        pos = _SPACE.match(self.text, m.end()).end()
+        if self.text.startswith('<', pos):
+            pos = self.type_arguments(pos)
+        self.stack.append(('tag', start, m.group()))
+        return TAG, pos
+
+    def type_arguments(self, start):
+        """Skip the balanced ``<…>`` type arguments of a generic component, as in ``<Select<Option> …/>``."""
+        end = self._type_arguments_end(start)
+        if end is None:
+            self.fail(start, 'type arguments are never closed')
+        return end
+
+    def _type_arguments_end(self, start):
+        depth, pos = 0, start
+        while m := _TYPE_TOKEN.match(self.text, pos):
+            pos = m.end()
+            if m.group() == '<':
+                depth += 1
+            elif m.group() == '>':
+                depth -= 1
+                if not depth:
+                    return pos
+        return None
+
+    def tag(self, pos):
+        text = self.text
+        while True:
+            pos = _SPACE.match(text, pos).end()
+            c = text[pos:pos + 1]
+            if c == '>':
+                _, start, name = self.stack.pop()
+                self.stack.append(('elem', start, name))
+                return CHILDREN, pos + 1
+            if text.startswith('/>', pos):
+                return self.close_element(pos + 2)
+            if c == '{':
+                self.stack.append(('jsx{', pos, None))
+                self.expr = True
+                return CODE, pos + 1
+            m = _ATTR.match(text, pos)
+            if m is None:
+                top = self.stack[-1]
+                if not c:
+                    self.fail(top[1], f'{self.describe(top)} tag is never closed')
+                self.fail(pos, f'unexpected {c!r} in {self.describe(top)} tag')
+            pos = m.end()
+            if m.group(1) is None:
+                continue
+            if text.startswith('{', pos):
+                self.stack.append(('jsx{', pos, None))
+                self.expr = True
+                return CODE, pos + 1
+            value = _ATTR_STRING.match(text, pos)
+            if value is None:
+                self.fail(pos, 'expected a string or {expression} as attribute value')
+            pos = value.end()
+
+    def children(self, pos):
+        text = self.text
+        while True:
+            pos = _TEXT.match(text, pos).end()
+            c = text[pos:pos + 1]
+            if c == '{':
+                self.stack.append(('jsx{', pos, None))
+                self.expr = True
+                return CODE, pos + 1
+            if c == '<':
+                if not text.startswith('/', _SPACE.match(text, pos + 1).end()):
+                    return self.open_tag(pos)
+                m = _CLOSING.match(text, pos)
+                if m is None:
+                    self.fail(pos, 'malformed closing tag')
+                name = m.group(1) or ''
+                top = self.stack[-1]
+                if name != top[2]:
+                    self.fail(pos, f'</{name}> does not close {self.where(top)}')
+                self.stack.pop()
+                return self.close_element(m.end(), popped=True)
+            if not c:
+                return END, pos
+            top = self.stack[-1]
+            self.fail(pos, f"unexpected '{c}' in JSX text inside {self.where(top)}")
+
+    def close_element(self, pos, popped=False):
+        if not popped:
+            self.stack.pop()
+        self.expr = False
+        return self.resume(), pos
+
+
+def check(text, path='<string>', jsx=True):
+    """Raise ``TsxError`` at the first structural problem in ``text``."""
+    _Scanner(text, path, jsx).run()
+
+
+def self_check():
+    """Run ``SELF_CHECK``; returns a description of each case that went wrong."""
+    problems = []
+    for source, expected in SELF_CHECK:
+        try:
+            check(source)
+        except TsxError as e:
+            if expected is None or not e.args[0].startswith(expected):
+                problems.append(f'{source!r}: {e}')
+        else:
+            if expected is not None:
+                problems.append(f'{source!r}: accepted, expected {expected!r}')
+    return problems
+
+
+def check_file(path):
+    with open(path, encoding='utf-8', newline='') as f:
+        text = f.read()
+    check(text, path, jsx=not path.endswith('.ts'))
+
+
+def sources(paths):
+    """Every checkable file under ``paths`` (files are taken as given)."""
+    for path in paths:
+        if os.path.isfile(path):
+            yield path
+            continue
+        for directory, dirs, files in os.walk(path):
+            dirs[:] = sorted(d for d in dirs if not d.startswith('.') and d != 'node_modules')
+            for name in sorted(files):
+                if name.endswith(EXTENSIONS) and not name.endswith('.d.ts'):
+                    yield os.path.join(directory, name)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Check brace, paren and JSX tag balance in TSX sources.')
+    parser.add_argument('paths', nargs='*', default=[APP_DIR], help='files or directories (default: src/app)')
+    parser.add_argument('--self-check', action='store_true', help='run the built-in cases instead')
+    args = parser.parse_args(argv)
+    if args.self_check:
+        problems = self_check()
+        for problem in problems:
+            print(problem, file=sys.stderr)
+        print(f'{len(SELF_CHECK)} cases, {len(problems)} wrong')
+        return 1 if problems else 0
+
+    started = time.perf_counter()
+    checked = failed = 0
+    for path in sources(args.paths):
+        checked += 1
+        try:
+            check_file(path)
+        except TsxError as e:
+            failed += 1
+            e.path = os.path.relpath(path)
+            print(e, file=sys.stderr)
+    print(f'{checked} files checked, {failed} with errors ({(time.perf_counter() - started) * 1000:.0f} ms)')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,299 @@
+"""Watch fragments and specs and re-splice affected regions as they are saved.
+
+    python append_dashboard.py --watch [--manifest PATH] [--poll] [--debounce MS]
+
+One full pass runs first, as without ``--watch``. After that, the process
+waits for changes under ``codegen/fragments``, ``codegen/specs`` and the
+manifest. On Linux it uses inotify; elsewhere, or with ``--poll``, it
+rescans them every few milliseconds. A burst of events, such as an editor's
+write-rename-chmod on save, is debounced into one round. A round:
+
+* re-renders the specs when a spec, or a fragment that the manifest does
+  not splice itself (a partial), changed. Hand edits to generated fragments
+  are spliced as saved and kept until their spec changes;
+* splices only the manifest entries whose fragment changed, into only their
+  pages;
+* checks each page with ``codegen.tsx_check`` before writing it. A broken
+  fragment is reported and the page is left as it was.
+
+The fragment index, the parsed pages and their region digests stay in
+memory between rounds. A page is re-read only when its size or mtime show
+that something else wrote it. Each round prints the time from the first
+event to the page being replaced.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from dataclasses import dataclass
+
+from . import batch, templates
+from .fragments import FRAGMENTS_DIR, ROOT, FragmentStore
+from .splice import Document, SpliceError, splice, write_atomic
+from .tsx_check import check
+
+DEBOUNCE = 0.01
+POLL_INTERVAL = 0.02
+
+# <sys/inotify.h>
+IN_CLOSE_WRITE, IN_MOVED_FROM, IN_MOVED_TO, IN_CREATE, IN_DELETE = 0x8, 0x40, 0x80, 0x100, 0x200
+IN_DELETE_SELF, IN_Q_OVERFLOW, IN_ISDIR = 0x400, 0x4000, 0x40000000
+_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+_EVENT = struct.Struct('iIII')
+
+
+class InotifyWatcher:
+    """Changed paths under ``roots`` (watched recursively) and in ``flat`` directories, via inotify."""
+
+    def __init__(self, roots, flat=()):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError('inotify is not available')
+        self._libc = libc
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self._dirs = {}
+        self._flat = set(flat)
+        for directory in flat:
+            self._add(directory)
+        for root in roots:
+            self._add_tree(root)
+
+    def _add(self, directory):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), _MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f'inotify_add_watch failed for {directory}')
+        self._dirs[wd] = directory
+
+    def _add_tree(self, top):
+        for directory, dirs, _ in os.walk(top):
+            dirs[:] = [d for d in dirs if not d.startswith('.')]
+            self._add(directory)
+
+    def wait(self, timeout=None):
+        """Paths changed within ``timeout`` seconds (``None``: block until one is)."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        changed = set()
+        while True:
+            try:
+                data = os.read(self.fd, 1 << 16)
+            except BlockingIOError:
+                return changed
+            pos = 0
+            while pos < len(data):
+                wd, mask, _, size = _EVENT.unpack_from(data, pos)
+                name = data[pos + _EVENT.size:pos + _EVENT.size + size].rstrip(b'\0')
+                pos += _EVENT.size + size
+                if mask & IN_Q_OVERFLOW:
+                    changed.add(None)  # events were dropped: treat everything as changed
+                    continue
+                directory = self._dirs.get(wd)
+                if directory is None or not name:
+                    continue
+                path = os.path.join(directory, os.fsdecode(name))
+                if mask & IN_ISDIR:
+                    if (mask & (IN_CREATE | IN_MOVED_TO) and directory not in self._flat
+                            and not os.path.basename(path).startswith('.')):
+                        self._add_tree(path)
+                        changed.add(None)
+                    continue
+                if mask & IN_CREATE:
+                    continue  # the IN_CLOSE_WRITE that follows is what counts
+                changed.add(path)
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Like ``InotifyWatcher``, by rescanning every ``interval`` seconds."""
+
+    def __init__(self, roots, flat=(), interval=POLL_INTERVAL):
+        self.roots, self.flat, self.interval = roots, flat, interval
+        self._seen = self._scan()
+
+    def _scan(self):
+        seen = {}
+        stack = [(d, True) for d in self.roots] + [(d, False) for d in self.flat]
+        while stack:
+            directory, recursive = stack.pop()
+            try:
+                entries = list(os.scandir(directory))
+            except FileNotFoundError:
+                continue
+            for entry in entries:
+                if entry.name.startswith('.'):
+                    continue
+                if entry.is_dir():
+                    if recursive:
+                        stack.append((entry.path, True))
+                else:
+                    st = entry.stat()
+                    seen[entry.path] = (st.st_size, st.st_mtime_ns)
+        return seen
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            seen = self._scan()
+            changed = {p for p in seen.keys() | self._seen.keys() if seen.get(p) != self._seen.get(p)}
+            self._seen = seen
+            if changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            time.sleep(self.interval if deadline is None else
+                       max(0.0, min(self.interval, deadline - time.monotonic())))
+
+    def close(self):
+        pass
+
+
+def open_watcher(roots, flat=(), poll=False):
+    """An ``InotifyWatcher`` where inotify works, else a ``PollingWatcher``."""
+    if not poll and sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(roots, flat)
+        except OSError as e:
+            print(f'inotify unavailable ({e}); polling instead', file=sys.stderr)
+    return PollingWatcher(roots, flat)
+
+
+@dataclass
+class Page:
+    text: str
+    doc: Document
+    size: int
+    mtime_ns: int
+
+
+class Session:
+    """A manifest with its fragment index and parsed pages kept warm."""
+
+    def __init__(self, manifest_path, store=None, out=None):
+        self.manifest_path = os.path.abspath(manifest_path)
+        self.store = store or FragmentStore()
+        self.out = out
+        self.pages = {}
+        self.load_manifest()
+
+    def load_manifest(self):
+        self.entries = batch.load_manifest(self.manifest_path)
+        self.by_fragment = {}
+        for e in self.entries:
+            self.by_fragment.setdefault(os.path.join(ROOT, e['fragment']), []).append(e)
+
+    def page(self, target):
+        """The parsed page, re-read only if it changed on disk since last seen."""
+        st = os.stat(target)
+        page = self.pages.get(target)
+        if page is None or (page.size, page.mtime_ns) != (st.st_size, st.st_mtime_ns):
+            with open(target, encoding='utf-8', newline='') as f:
+                text = f.read()
+            page = self.pages[target] = Page(text, Document(text), st.st_size, st.st_mtime_ns)
+        elif page.doc is None:
+            page.doc = Document(page.text)
+        return page
+
+    def splice(self, target, sources):
+        """Splice ``[(Fragment, region)]`` into ``target``; returns a ``batch.FileResult``."""
+        started = time.perf_counter()
+        result = batch.FileResult(target)
+        try:
+            page = self.page(target)
+            new_text, changed, result.unchanged = splice(page.text, batch.build_replacements(sources), page.doc)
+            if changed:
+                check(new_text, target, jsx=not target.endswith('.ts'))
+                write_atomic(target, new_text)
+                st = os.stat(target)
+                self.pages[target] = Page(new_text, None, st.st_size, st.st_mtime_ns)
+                result.changed = changed
+        except (OSError, SpliceError) as e:
+            result.error = str(e)
+        result.seconds = time.perf_counter() - started
+        return result
+
+    def reparse(self):
+        # Parsing a just-written page is left until after the round is reported.
+        for page in self.pages.values():
+            if page.doc is None:
+                page.doc = Document(page.text)
+
+    def run(self, entries):
+        jobs = batch.group_entries(entries, self.store)
+        return [self.splice(target, sources) for target, sources in jobs.items()]
+
+    def full(self):
+        """Render every spec and splice every entry, like a run without ``--watch``."""
+        for rendered in templates.generate(store=self.store):
+            print('  rendered', rendered, file=self.out)
+        return self.run(self.entries)
+
+    def round(self, paths):
+        """Re-render and re-splice for a set of changed paths (``None``: unknown)."""
+        if None in paths or self.manifest_path in paths:
+            self.load_manifest()
+            return self.full()
+        fragments = {p for p in paths if p.endswith('.frag')}
+        specs = {p for p in paths if p.endswith('.json') and p.startswith(templates.SPECS_DIR + os.sep)}
+        if specs or any(p not in self.by_fragment for p in fragments):
+            for rendered in templates.generate(store=self.store):
+                print('  rendered', rendered, file=self.out)
+                fragments.add(os.path.join(ROOT, rendered))
+        entries = [e for p in sorted(fragments) if os.path.exists(p) for e in self.by_fragment.get(p, ())]
+        return self.run(entries) if entries else []
+
+
+def watch(manifest_path=batch.MANIFEST_PATH, poll=False, debounce=DEBOUNCE, out=None):
+    try:
+        session = Session(manifest_path, out=out)
+        results = session.full()
+    except (OSError, ValueError, KeyError, SpliceError, templates.TemplateError) as e:
+        print('Error:', e, file=sys.stderr)
+        return 1
+    batch.report(results, out=out)
+    session.store.save()
+    session.reparse()
+
+    roots = [r for r in (FRAGMENTS_DIR, templates.SPECS_DIR) if os.path.isdir(r)]
+    # The manifest's directory is watched without recursion; only the manifest matters there.
+    watcher = open_watcher(roots, [os.path.dirname(session.manifest_path)], poll)
+    interesting = (FRAGMENTS_DIR + os.sep, templates.SPECS_DIR + os.sep)
+    print(f'Watching {", ".join(os.path.relpath(r, ROOT) for r in roots)} and '
+          f'{os.path.relpath(session.manifest_path, ROOT)} '
+          f'({type(watcher).__name__}, {debounce * 1000:.0f} ms debounce); Ctrl-C to stop', file=out)
+    try:
+        while True:
+            paths = watcher.wait()
+            first = time.perf_counter()
+            while more := watcher.wait(debounce):
+                paths |= more
+            # Dotfiles are ours: the fragment index is rewritten after every round.
+            paths = {p for p in paths if p is None or p == session.manifest_path
+                     or (p.startswith(interesting) and p.endswith(('.frag', '.json'))
+                         and not os.path.basename(p).startswith('.'))}
+            if not paths:
+                continue
+            try:
+                results = session.round(paths)
+            except (OSError, ValueError, KeyError, SpliceError, templates.TemplateError) as e:
+                print('Error:', e, file=sys.stderr)
+                continue
+            if any(r.changed or r.error for r in results):
+                batch.report(results, out=out)
+                print(f'{sum(len(r.changed) for r in results)} regions spliced '
+                      f'{(time.perf_counter() - first) * 1000:.1f} ms after the first change', file=out)
+            session.store.save()
+            session.reparse()
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        watcher.close()
+        session.store.save()
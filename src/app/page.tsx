@@ -16,7 +16,101 @@ const STATS = [
 ];
 
 const TOTAL_FRAMES = 61;
-const FRAME_PATH = (i: number) => `/hero-frames/frame-${String(i).padStart(3, "0")}.jpg`;
+
+/* Hero frames: `python -m assets.frames` writes AVIF/WebP variants and a
+   manifest; the original JPEGs are the fallback when it is missing.
+   `python -m assets.pack` packs each variant into one file that is fetched
+   with Range requests: low-quality keyframes first, then the frames in
+   playback order, PACK_BATCH per request. */
+type FrameVariant = { format: string; type: string; width: number; height: number; path: string; bytes: number };
+type FrameManifest = { frames: number; pad: number; variants: FrameVariant[]; fallback: FrameVariant };
+type FramePack = FrameVariant & {
+  preview?: { width: number; height: number; bytes: number; frames: [number, number, number][] };
+  frames: [number, number][];
+};
+
+const FRAME_MANIFEST = "/hero-frames/manifest.json";
+const FRAME_PACKS = "/hero-frames/packs.json";
+const JPEG_FRAMES = "/hero-frames/frame-{frame}.jpg";
+const JPEG_VARIANT: FrameVariant = { format: "jpeg", type: "image/jpeg", width: 1920, height: 1068, path: JPEG_FRAMES, bytes: 0 };
+const PACK_BATCH = 8;
+const FRAME_PATH = (i: number, pattern = JPEG_FRAMES, pad = 3) =>
+  pattern.replace("{frame}", String(i).padStart(pad, "0"));
+
+/* Resolves to whether the browser can decode `src`. */
+function canDecode(src: string) {
+  return new Promise<boolean>((resolve) => {
+    const img = new Image();
+    img.onload = () => resolve(img.naturalWidth > 0);
+    img.onerror = () => resolve(false);
+    img.src = src;
+  });
+}
+
+async function fetchJson<T>(url: string): Promise<T> {
+  const res = await fetch(url);
+  if (!res.ok) throw new Error(`${url}: ${res.status}`);
+  return res.json();
+}
+
+/* The variant to load: the first decodable format, at the narrowest width
+   that still covers the viewport at its pixel ratio. */
+async function pickFrameVariant(): Promise<{ variant: FrameVariant; pad: number }> {
+  try {
+    const m = await fetchJson<FrameManifest>(FRAME_MANIFEST);
+    const need = window.innerWidth * Math.min(window.devicePixelRatio || 1, 2);
+    for (const format of [...new Set(m.variants.map((v) => v.format))]) {
+      const sizes = m.variants.filter((v) => v.format === format).sort((a, b) => a.width - b.width);
+      const v = sizes.find((s) => s.width >= need) ?? sizes[sizes.length - 1];
+      if (await canDecode(FRAME_PATH(1, v.path, m.pad))) return { variant: v, pad: m.pad };
+    }
+    return { variant: m.fallback, pad: m.pad };
+  } catch {
+    return { variant: JPEG_VARIANT, pad: 3 };
+  }
+}
+
+async function findPack(variant: FrameVariant): Promise<FramePack | undefined> {
+  const dir = variant.path.slice(0, variant.path.lastIndexOf("/") + 1);
+  try {
+    const { packs } = await fetchJson<{ packs: FramePack[] }>(FRAME_PACKS);
+    return packs.find((p) => p.path.startsWith(dir) && !p.path.slice(dir.length).includes("/"));
+  } catch {
+    return undefined;
+  }
+}
+
+function imageFrom(buf: ArrayBuffer, offset: number, length: number, type: string) {
+  const img = new Image();
+  const url = URL.createObjectURL(new Blob([buf.slice(offset, offset + length)], { type }));
+  img.onload = () => URL.revokeObjectURL(url);
+  img.src = url;
+  return img;
+}
+
+/* Calls `onFrame(index, image, isPreview)` for every image in the pack, in
+   pack order. A server that ignores Range sends the whole pack at once. */
+async function streamPack(pack: FramePack, onFrame: (index: number, img: HTMLImageElement, preview: boolean) => void, signal: AbortSignal) {
+  const read = async (start: number, end: number) => {
+    const res = await fetch(pack.path, { headers: { Range: `bytes=${start}-${end - 1}` }, signal });
+    if (!res.ok) throw new Error(`${pack.path}: ${res.status}`);
+    return { buf: await res.arrayBuffer(), base: res.status === 206 ? start : 0, whole: res.status === 200 };
+  };
+  const frames = (buf: ArrayBuffer, base: number, from: number, to: number) => {
+    for (let i = from; i < to; i++) onFrame(i, imageFrom(buf, pack.frames[i][0] - base, pack.frames[i][1], pack.type), false);
+  };
+  if (pack.preview) {
+    const { buf, base, whole } = await read(0, pack.preview.bytes);
+    for (const [n, offset, length] of pack.preview.frames) onFrame(n - 1, imageFrom(buf, offset - base, length, pack.type), true);
+    if (whole) return frames(buf, 0, 0, pack.frames.length);
+  }
+  for (let i = 0; i < pack.frames.length; i += PACK_BATCH) {
+    const last = Math.min(i + PACK_BATCH, pack.frames.length) - 1;
+    const { buf, base, whole } = await read(pack.frames[i][0], pack.frames[last][0] + pack.frames[last][1]);
+    if (whole) return frames(buf, 0, i, pack.frames.length);
+    frames(buf, base, i, last + 1);
+  }
+}
 
 /* ── Scroll reveal ── */
 function Reveal({ children, delay = 0, className = "" }: { children: ReactNode; delay?: number; className?: string }) {
@@ -68,6 +162,8 @@ export default function HomePage() {
   const canvasRef = useRef<HTMLCanvasElement>(null);
   const heroRef = useRef<HTMLElement>(null);
   const framesRef = useRef<HTMLImageElement[]>([]);
+  const previewsRef = useRef<HTMLImageElement[]>([]);
+  const sizeRef = useRef<[number, number] | null>(null);
   const currentFrameRef = useRef(0);
   const [mounted, setMounted] = useState(false);
   const [openFaq, setOpenFaq] = useState<number | null>(null);
@@ -76,30 +172,57 @@ export default function HomePage() {
 
   // Preload all frames
   useEffect(() => {
-    const imgs: HTMLImageElement[] = [];
-    let loaded = 0;
-    for (let i = 1; i <= TOTAL_FRAMES; i++) {
-      const img = new Image();
-      img.src = FRAME_PATH(i);
-      img.onload = () => {
-        loaded++;
-        if (loaded === 1) drawFrame(0); // draw first frame immediately
-      };
-      imgs.push(img);
-    }
-    framesRef.current = imgs;
+    const abort = new AbortController();
+    const onFrame = (index: number, img: HTMLImageElement, preview: boolean) => {
+      (preview ? previewsRef : framesRef).current[index] = img;
+      img.addEventListener("load", () => {
+        // Redraw if this is the frame in view, or a preview standing in for it.
+        if (index === currentFrameRef.current || (preview && !framesRef.current[currentFrameRef.current]?.complete)) {
+          drawFrame(currentFrameRef.current);
+        }
+      });
+    };
+    pickFrameVariant().then(async ({ variant, pad }) => {
+      if (abort.signal.aborted) return;
+      sizeRef.current = [variant.width, variant.height];
+      const pack = await findPack(variant);
+      if (pack) {
+        try {
+          return await streamPack(pack, onFrame, abort.signal);
+        } catch {
+          if (abort.signal.aborted) return;
+        }
+      }
+      for (let i = 1; i <= TOTAL_FRAMES; i++) {
+        if (framesRef.current[i - 1]) continue;
+        const img = new Image();
+        onFrame(i - 1, img, false);
+        img.src = FRAME_PATH(i, variant.path, pad);
+      }
+    });
+    return () => abort.abort();
   }, []);
 
   const drawFrame = useCallback((index: number) => {
     const canvas = canvasRef.current;
     const ctx = canvas?.getContext("2d");
-    const img = framesRef.current[index];
-    if (!canvas || !ctx || !img || !img.complete) return;
-    if (canvas.width !== img.naturalWidth || canvas.height !== img.naturalHeight) {
-      canvas.width = img.naturalWidth;
-      canvas.height = img.naturalHeight;
+    const ready = (img?: HTMLImageElement) => !!img && img.complete && img.naturalWidth > 0;
+    let img = framesRef.current[index];
+    if (!ready(img)) {
+      // Until the frame arrives, the nearest low-quality keyframe stands in.
+      let best = -1;
+      previewsRef.current.forEach((p, i) => {
+        if (ready(p) && (best < 0 || Math.abs(i - index) < Math.abs(best - index))) best = i;
+      });
+      img = previewsRef.current[best];
+    }
+    if (!canvas || !ctx || !ready(img)) return;
+    const [w, h] = sizeRef.current ?? [img.naturalWidth, img.naturalHeight];
+    if (canvas.width !== w || canvas.height !== h) {
+      canvas.width = w;
+      canvas.height = h;
     }
-    ctx.drawImage(img, 0, 0);
+    ctx.drawImage(img, 0, 0, w, h);
   }, []);
 
   // Scroll-driven frame sequence